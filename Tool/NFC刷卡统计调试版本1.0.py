@@ -1,12 +1,18 @@
 # -*- coding: utf-8 -*-
 import serial
-import time
 import random
 import datetime
 import logging
 import sys
 import win32api
 import win32con
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../libs"))
+from stress.clock import SYSTEM_CLOCK  # noqa: E402
+from stress.normalize import normalize  # noqa: E402
+from stress.decoder import StreamDecoder  # noqa: E402
+from stress.status import StatusLine, route_console  # noqa: E402
 
 # ================= 配置区域 =================
 RELAY_PORT = "COM14"  # 继电器控制端口
@@ -14,6 +20,7 @@ DEVICE_PORT = "COM10"  # 被测设备端口
 RELAY_BAUDRATE = 9600
 DEVICE_BAUDRATE = 115200
 LOG_FILE = "nfc_test.log"
+LIVE_STATUS = True  # 控制台只保留一行实时状态（4 次/秒刷新，WARNING 及以上显示在行尾），逐轮详细日志只写入文件
 
 # ================= 日志配置 =================
 # 配置日志同时输出到文件和控制台，替代原来的 bWritePrint
@@ -41,9 +48,10 @@ def show_message_box(details, title="Alert"):
 class RelayController:
     """继电器控制类，负责长连接管理"""
 
-    def __init__(self, port, baudrate):
+    def __init__(self, port, baudrate, clock=SYSTEM_CLOCK):
         self.port = port
         self.baudrate = baudrate
+        self.clock = clock
         self.ser = None
 
     def connect(self):
@@ -63,7 +71,7 @@ class RelayController:
             if not self.ser or not self.ser.is_open:
                 self.connect()
             self.ser.write(cmd_char.encode("utf-8"))
-            time.sleep(0.1)  # 给继电器一点反应时间
+            self.clock.sleep(0.1)  # 给继电器一点反应时间
         except Exception as e:
             logging.error(f"继电器指令发送失败: {e}")
 
@@ -76,7 +84,7 @@ class RelayController:
     def reset_motor(self):
         logging.warning("执行电机复位操作...")
         self.power_on()
-        time.sleep(2.5)
+        self.clock.sleep(2.5)
         self.power_off()
 
 
@@ -87,6 +95,8 @@ class DeviceMonitor:
         self.port = port
         self.baudrate = baudrate
         self.ser = None
+        # 会话内检测一次编码（utf-8/gb2312），跨读取保留未收完的半行
+        self.decoder = StreamDecoder(errors='ignore')
 
     def connect(self):
         try:
@@ -108,18 +118,10 @@ class DeviceMonitor:
         try:
             # 读取所有缓冲区数据
             raw_data = self.ser.readlines()
-            decoded_lines = []
-            for line in raw_data:
-                try:
-                    # 尝试用 utf-8 解码，忽略错误字符
-                    s = line.decode('utf-8', errors='ignore').strip()
-                    # 去除颜色代码和其他杂质 (根据你原代码的逻辑简化)
-                    s = s.replace('\x1b', '').replace('[33m', '')
-                    if s:
-                        decoded_lines.append(s)
-                except:
-                    continue
-            return "".join(decoded_lines).replace(" ", "").lower()  # 转小写方便查找
+            # 只处理完整的行（超时截断的半行留到下次），字节级去色、去空格、转小写，拼接后只解码一次
+            lines = self.decoder.feed(b"".join(raw_data))
+            cleaned = b"".join(normalize(line).strip() for line in lines)
+            return self.decoder.decode(cleaned)
         except Exception as e:
             logging.error(f"读取数据异常: {e}")
             return ""
@@ -127,10 +129,10 @@ class DeviceMonitor:
 
 # ================= 主逻辑 =================
 
-def run_nfc_test(loop_times=10000):
+def run_nfc_test(loop_times=10000, clock=SYSTEM_CLOCK):
     logging.info("###### NFC开关锁测试开始 ######")
 
-    relay = RelayController(RELAY_PORT, RELAY_BAUDRATE)
+    relay = RelayController(RELAY_PORT, RELAY_BAUDRATE, clock)
     device = DeviceMonitor(DEVICE_PORT, DEVICE_BAUDRATE)
 
     success_count = 0
@@ -143,6 +145,9 @@ def run_nfc_test(loop_times=10000):
         show_message_box(f"串口初始化失败: {e}", "Error")
         return
 
+    status = StatusLine(loop_times, clock=clock) if LIVE_STATUS else None
+    restore_console = route_console(logging.getLogger(), status) if status else None
+
     try:
         for i in range(loop_times):
             current_idx = i + 1
@@ -153,7 +158,7 @@ def run_nfc_test(loop_times=10000):
             # logging.info(f"随机断电延时: {random_sleep:.2f}s")
 
             relay.power_on()
-            time.sleep(random_sleep)
+            clock.sleep(random_sleep)
             relay.power_off()
 
             # 2. 读取设备反馈
@@ -197,15 +202,20 @@ def run_nfc_test(loop_times=10000):
                     f"当前统计: 成功率 {percentage:.2f}% (测试数:{current_idx}, 成功:{success_count}, 复位:{reset_count})")
             else:
                 logging.info(f"当前统计: 有效测试数为0")
+            if status:
+                status.update(current_idx, success_count, rated=valid_tests, counters={"复位": reset_count})
 
             # 5. 循环间隔
-            time.sleep(2)
+            clock.sleep(2)
 
     except KeyboardInterrupt:
         logging.info("用户强制停止测试")
     except Exception as e:
         logging.error(f"测试过程中发生未捕获异常: {e}", exc_info=True)
     finally:
+        if status:
+            status.close()
+            restore_console()
         # 确保程序退出时关闭串口
         relay.close()
         device.close()
@@ -1,13 +1,21 @@
 # -*- coding: utf-8 -*-
 import serial
 import serial.tools.list_ports
-import time
 import datetime
 import random
 import sys
-import re
 import logging
-import collections
+import threading
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../libs"))
+from stress.clock import SYSTEM_CLOCK  # noqa: E402
+from stress.matcher import KeywordMatcher  # noqa: E402
+from stress.normalize import normalize, display  # noqa: E402
+from stress.decoder import StreamDecoder  # noqa: E402
+from stress.verdict import CycleVerdict  # noqa: E402
+from stress.rules import RuleEngine, ACTION_STOP, ACTION_ALERT, ACTION_TAG, ACTION_POWER_CYCLE  # noqa: E402
+from stress.status import StatusLine, route_console  # noqa: E402
 
 # 尝试导入 win32api，如果没有安装也不影响脚本运行
 try:
@@ -37,16 +45,22 @@ class Config:
     LOG_FILE = "test_normal.log"  # 详细日志
     ERR_FILE = "test_error.log"  # 错误日志
 
-    # ---------------- 异常检测阈值 ----------------
-    # 严重错误：继电器开启状态下，1秒内出现5次 -> 立即停止
-    CRITICAL_KEYWORD = "[e/motor]reg_addr(00)isunviald"
-    CRITICAL_WINDOW = 1.0
-    CRITICAL_MAX_COUNT = 5
+    # 控制台只保留一行实时状态（4 次/秒刷新，WARNING 及以上显示在行尾），逐轮详细日志只写入文件
+    LIVE_STATUS = True
 
-    # 普通错误：3秒内出现3次 -> 停止
-    ERROR_KEYWORD = "paramisinvalid"
-    ERROR_WINDOW = 3.0
-    ERROR_MAX_COUNT = 3
+    # ---------------- 异常检测阈值 ----------------
+    # 频率规则：window 秒内出现 count 次 -> 执行 action，字段说明见 libs/stress/rules.py
+    #   action: stop 停止测试 / alert 弹窗提醒 / tag 标记本轮 / power_cycle 立即断电进入下一轮
+    RULES = [
+        # 严重错误：继电器开启状态下，1秒内出现5次 -> 立即停止（每轮重新计数）
+        {"name": "CRITICAL", "keywords": ["[e/motor]reg_addr(00)isunviald"], "window": 1.0, "count": 5,
+         "action": "stop", "powered_only": True, "per_cycle": True},
+        # 普通错误：3秒内出现3次 -> 停止
+        {"name": "ERROR", "keywords": ["paramisinvalid"], "window": 3.0, "count": 3, "action": "stop"},
+    ]
+    # 规则文件（JSON 列表，格式同 RULES）：存在时覆盖 RULES，每轮开始前检查修改并热加载
+    # 放在本脚本旁、按脚本名命名，不会被其他压力测试脚本的规则文件覆盖
+    RULES_FILE = os.path.splitext(os.path.abspath(__file__))[0] + ".rules.json"
 
     # 信息关键字（仅打印）
     INFO_KEYWORDS = ["voice_msgnum", "voice_msgcutoff", "ui_pm_acc"]
@@ -54,6 +68,12 @@ class Config:
     # 异常关键字（记录到统计）
     EXCEPTION_KEYWORDS = ["assertionfailedatfunction"]
 
+    # 单轮结果判定：开机或关机信号任一出现即成功
+    VERDICT_KEYWORDS = {
+        "POWER_ON": ["motorpoweron"],
+        "SHUTDOWN": ["pm_acc_tim", "power_off_system"],
+    }
+
 
 # ================= 日志系统初始化 =================
 def setup_logger():
@@ -98,36 +118,17 @@ def show_alert(message, title="测试提示"):
         print(f"\n{'!' * 20}\n[{title}] {message}\n{'!' * 20}\n")
 
 
-class ErrorCounter:
-    """滑动窗口计数器，用于检测 X 秒内 Y 次错误"""
-
-    def __init__(self, window_seconds, max_count):
-        self.window = window_seconds
-        self.max_count = max_count
-        self.timestamps = collections.deque()
-
-    def add(self):
-        now = time.time()
-        self.timestamps.append(now)
-        self.cleanup(now)
-        return len(self.timestamps)
-
-    def cleanup(self, now):
-        """移除超出时间窗口的记录"""
-        while self.timestamps and (now - self.timestamps[0] > self.window):
-            self.timestamps.popleft()
-
-    def clear(self):
-        self.timestamps.clear()
-
-
 # ================= 核心测试类 =================
 class RelayTester:
-    def __init__(self):
+    def __init__(self, clock=SYSTEM_CLOCK):
+        # 时钟：默认真实时间；仿真时传入 VirtualClock，配合模拟器加速运行
+        self.clock = clock
         self.relay_ser = None
         self.device_ser = None
         self.relay_port = None
         self.device_port = None
+        # 设备日志流：按块读取后切行（跨读取保留半行），会话内检测一次编码（gb2312/utf-8）
+        self.decoder = StreamDecoder()
 
         # 统计数据
         self.stats = {
@@ -137,12 +138,20 @@ class RelayTester:
             "disconnect": 0
         }
 
-        # 错误检测器
-        self.critical_checker = ErrorCounter(Config.CRITICAL_WINDOW, Config.CRITICAL_MAX_COUNT)
-        self.error_checker = ErrorCounter(Config.ERROR_WINDOW, Config.ERROR_MAX_COUNT)
+        # 频率规则引擎 + 本轮规则动作状态
+        self.rules = RuleEngine(Config.RULES, Config.RULES_FILE)
+        self.cycle_tags = []
+        self.power_cycle_requested = False
+
+        # 关键字自动机：所有类别（含规则关键字）一次编译，每行只扫描一遍（直接匹配归一化字节）
+        self.line_matcher = self.build_line_matcher()
+        # 单轮判定状态机：逐行更新命中标志，不再拼接整轮日志回扫
+        self.verdict = CycleVerdict(Config.VERDICT_KEYWORDS)
 
         # 状态标记
         self.is_relay_on = False
+        # 控制台实时状态行（run 中创建）
+        self.status = None
 
     def detect_ports(self):
         """自动侦测端口"""
@@ -159,7 +168,9 @@ class RelayTester:
         return d_port, r_port
 
     def open_ports(self):
-        """打开串口"""
+        """打开串口（已由外部注入串口对象时直接使用）"""
+        if self.relay_ser and self.device_ser:
+            return True
         self.device_port, self.relay_port = self.detect_ports()
 
         if not self.relay_port or not self.device_port:
@@ -195,6 +206,7 @@ class RelayTester:
         """设备串口重连逻辑"""
         self.stats["disconnect"] += 1
         log.warning("正在尝试重连设备串口...")
+        self.decoder.flush()  # 旧连接残留的半行作废
 
         if self.device_ser:
             try:
@@ -202,7 +214,7 @@ class RelayTester:
             except:
                 pass
 
-        time.sleep(Config.DEVICE_RETRY_DELAY)
+        self.clock.sleep(Config.DEVICE_RETRY_DELAY)
         # 重新侦测
         new_d_port, _ = self.detect_ports()
         if new_d_port:
@@ -223,7 +235,7 @@ class RelayTester:
         try:
             if self.relay_ser and self.relay_ser.is_open:
                 self.relay_ser.write(cmd)
-                time.sleep(0.1)  # 给一点硬件反应时间
+                self.clock.sleep(0.1)  # 给一点硬件反应时间
                 self.relay_ser.reset_input_buffer()  # 清空回显
                 self.is_relay_on = state
                 log.debug(f"继电器已{action}")
@@ -232,132 +244,149 @@ class RelayTester:
         except Exception as e:
             log.error(f"继电器控制失败: {e}")
 
-    def process_log_line(self, line):
+    def build_line_matcher(self):
+        """EXCEPTION/INFO 与全部规则关键字编译为一个匹配器（规则热加载后重建）"""
+        return KeywordMatcher({
+            **self.rules.categories,
+            "EXCEPTION": Config.EXCEPTION_KEYWORDS,
+            "INFO": Config.INFO_KEYWORDS,
+        }, binary=True)
+
+    def reload_rules(self):
+        """每轮开始前检查规则文件，修改过则热加载"""
+        try:
+            if self.rules.reload_if_changed():
+                self.line_matcher = self.build_line_matcher()
+                log.info(f"规则已重新加载: {Config.RULES_FILE}，共 {len(self.rules.rules)} 条")
+        except ValueError as e:
+            log.error(str(e))
+
+    def apply_rule(self, rule):
+        """执行已触发规则的动作，返回是否需要停止测试"""
+        reason = f"触发规则 [{rule.name}]：{rule.describe()}"
+        if rule.action == ACTION_STOP:
+            log.critical(f"【错误中止】{reason}")
+            return True
+        log.error(f"【规则】{reason} -> {rule.action}")
+        if rule.action == ACTION_ALERT:
+            threading.Thread(target=show_alert, args=(reason, "规则提醒"), daemon=True).start()
+        elif rule.action == ACTION_TAG:
+            self.cycle_tags.append(rule.name)
+        elif rule.action == ACTION_POWER_CYCLE:
+            self.power_cycle_requested = True
+        return False
+
+    def process_log_line(self, raw):
         """
         单行日志处理核心
-        返回: (is_critical_error, should_stop_test, cleaned_line)
+        返回: (is_critical_error, should_stop_test, normalized_line)
+        关键字在归一化字节上匹配，只有命中时才解码原始行用于打印
         """
-        raw_line = line.strip()
-        # 去除ANSI颜色码
-        clean_line = re.sub(r'\x1B\[[0-?]*[ -/]*[@-~]', '', raw_line)
-        if not clean_line:
+        line_check = normalize(raw).strip()
+        if not line_check:
             return False, False, None
 
-        lower_line = clean_line.lower().replace(" ", "")
+        hits = self.line_matcher.scan(line_check)
+        if not hits:
+            return False, False, line_check
+        clean_line = display(raw, self.decoder.encoding)
 
-        # 1. 严重错误检测 (1秒5次)
-        if Config.CRITICAL_KEYWORD in lower_line:
-            cnt = self.critical_checker.add()
-            log.warning(f"检测到严重关键字 ({cnt}/{Config.CRITICAL_MAX_COUNT})")
-
-            if self.is_relay_on and cnt >= Config.CRITICAL_MAX_COUNT:
-                log.critical(f"【致命错误】严重故障触发阈值！立即停机。")
-                return True, True, clean_line
-
-        # 2. 普通错误检测 (3秒3次)
-        if Config.ERROR_KEYWORD in lower_line:
-            cnt = self.error_checker.add()
-            log.warning(f"检测到普通错误 ({cnt}/{Config.ERROR_MAX_COUNT})")
-            if cnt >= Config.ERROR_MAX_COUNT:
-                log.critical("【错误中止】普通错误触发阈值。")
-                return True, True, clean_line
+        # 1/2. 频率规则 (X 秒内 Y 次)
+        for event in self.rules.feed(hits, self.clock.time(), powered=self.is_relay_on):
+            rule = event.rule
+            log.warning(f"检测到规则关键字 [{rule.name}] ({event.count}/{rule.count})")
+            if event.fired and self.apply_rule(rule):
+                return True, True, line_check
 
         # 3. 异常关键字记录
-        for kw in Config.EXCEPTION_KEYWORDS:
-            if kw in lower_line:
-                log.error(f"检测到异常日志: {clean_line}")
-                self.stats["exception"] += 1
+        for kw in hits.get("EXCEPTION", ()):
+            log.error(f"检测到异常日志: {clean_line}")
+            self.stats["exception"] += 1
 
         # 4. 信息关键字打印
-        for kw in Config.INFO_KEYWORDS:
-            if kw in lower_line:
-                log.info(f"捕获信息: {clean_line}")
+        for kw in hits.get("INFO", ()):
+            log.info(f"捕获信息: {clean_line}")
 
-        return False, False, clean_line
+        return False, False, line_check
 
     def monitor_loop(self, duration):
         """
         实时监控循环
         在 duration 时间内持续读取串口，同时进行实时错误检测
+        返回本轮当前是否已判定成功（self.verdict 随每行更新）
         """
-        end_time = time.time() + duration
-        collected_logs = []
-
-        # 清空计数器，开始新的一轮检测
-        self.critical_checker.clear()
+        end_time = self.clock.time() + duration
 
-        while time.time() < end_time:
+        while self.clock.time() < end_time:
+            if self.status:
+                self.status.refresh()
             try:
                 if not self.device_ser or not self.device_ser.is_open:
                     if not self.reconnect_device():
                         break  # 重连失败跳出循环
 
-                if self.device_ser.in_waiting:
-                    # 读取一行，设置errors='ignore'防止乱码炸掉脚本
-                    line_bytes = self.device_ser.readline()
-                    try:
-                        line_str = line_bytes.decode('gb2312', errors='ignore')
-                    except:
-                        line_str = line_bytes.decode('utf-8', errors='ignore')
-
-                    is_crit, stop_test, clean_line = self.process_log_line(line_str)
-
-                    if clean_line:
-                        collected_logs.append(clean_line)
-
-                    if stop_test:
-                        # 立即执行紧急动作
-                        self.control_relay(False)
-                        self.close_ports()
-                        show_alert("检测到达到阈值的错误，测试已紧急停止！", "致命错误")
-                        sys.exit(1)
+                waiting = self.device_ser.in_waiting
+                if waiting:
+                    # 整块读取原始字节并切出完整行（半行留到下次拼接），匹配前不再解码
+                    for line_bytes in self.decoder.feed(self.device_ser.read(waiting)):
+                        is_crit, stop_test, line_check = self.process_log_line(line_bytes)
+
+                        if line_check:
+                            self.verdict.feed(line_check)
+
+                        if stop_test:
+                            # 立即执行紧急动作
+                            self.control_relay(False)
+                            self.close_ports()
+                            show_alert("检测到达到阈值的错误，测试已紧急停止！", "致命错误")
+                            sys.exit(1)
+                        if self.power_cycle_requested:
+                            log.warning("【规则】请求立即断电，提前结束本段监控")
+                            return self.verdict.passed
                 else:
                     # 避免CPU空转，短暂休眠
-                    time.sleep(0.01)
+                    self.clock.sleep(0.01)
 
             except Exception as e:
                 log.error(f"读取循环异常: {e}")
                 self.reconnect_device()
 
-        return "\n".join(collected_logs)
+        return self.verdict.passed
 
-    def analyze_cycle_result(self, logs):
+    def analyze_cycle_result(self):
         """
         分析结果：
         不再判断 '同时出现' 的情况。
         只要有 motorpoweron 或者 关机信号，就算成功。
         """
-        logs_lower = logs.lower().replace(" ", "")
-
-        has_power_on = "motorpoweron" in logs_lower
-        has_shutdown = "pm_acc_tim" in logs_lower or "power_off_system" in logs_lower
-
-        if has_power_on or has_shutdown:
-            return True
-        else:
-            return False
+        return self.verdict.passed
 
     def run_single_test(self, cycle_idx):
         log.info(f"--- 循环 {cycle_idx} / {Config.TEST_CYCLES} ---")
 
         on_time = round(random.uniform(Config.POWER_ON_MIN, Config.POWER_ON_MAX), 2)
 
-        # 1. 开启继电器
+        # 1. 开启继电器（每轮开始前热加载规则、清零本轮计数）
+        self.reload_rules()
+        self.rules.start_cycle()
+        self.cycle_tags = []
+        self.power_cycle_requested = False
+        self.verdict.reset()
         self.control_relay(True)
 
         # 2. 实时监控（供电期间）
-        logs = self.monitor_loop(on_time)
+        self.monitor_loop(on_time)
 
         # 3. 关闭继电器
         self.control_relay(False)
+        self.power_cycle_requested = False
 
         # 4. 读取剩余日志（断电后缓冲）
-        time.sleep(Config.POWER_OFF_TIME)
-        extra_logs = self.monitor_loop(1.0)  # 额外读1秒
-        full_logs = logs + "\n" + extra_logs
+        self.clock.sleep(Config.POWER_OFF_TIME)
+        self.monitor_loop(1.0)  # 额外读1秒
 
         # 5. 结果判定
-        is_success = self.analyze_cycle_result(full_logs)
+        is_success = self.analyze_cycle_result()
 
         if is_success:
             self.stats["success"] += 1
@@ -365,19 +394,30 @@ class RelayTester:
         else:
             self.stats["fail"] += 1
             log.error("【判定】本轮失败 (未检测到有效启动/关机信号)")
+        if self.cycle_tags:
+            log.warning(f"【标记】本轮触发规则: {', '.join(self.cycle_tags)}")
 
         # 计算成功率时排除已掉线的次数，或者直接除以总循环数，这里采用除以当前循环数
         success_rate = (self.stats['success'] / cycle_idx) * 100
         log.info(f"当前成功率: {success_rate:.2f}%")
+        if self.status:
+            self.status.update(cycle_idx, self.stats['success'],
+                               counters={"异常行": self.stats['exception'], "掉线": self.stats['disconnect']})
 
     def run(self):
         print(f"{'=' * 30}\n开始自动化压力测试 (无复位版)\n{'=' * 30}")
         if not self.open_ports():
             return
+        log.info(self.rules.describe_source())
 
         # 初始状态复位
         self.control_relay(False)
-        time.sleep(1)
+        self.clock.sleep(1)
+
+        restore_console = None
+        if Config.LIVE_STATUS:
+            self.status = StatusLine(Config.TEST_CYCLES, clock=self.clock)
+            restore_console = route_console(log, self.status)
 
         try:
             for i in range(1, Config.TEST_CYCLES + 1):
@@ -387,6 +427,10 @@ class RelayTester:
         except Exception as e:
             log.exception(f"未捕获的全局异常: {e}")
         finally:
+            if self.status:
+                self.status.close()
+                self.status = None
+                restore_console()
             self.control_relay(False)
             self.close_ports()
             self.report_summary()
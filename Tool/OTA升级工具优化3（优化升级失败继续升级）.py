@@ -1,9 +1,11 @@
 import time
+import asyncio
 import subprocess
 import serial
 import serial.tools.list_ports
 import psutil
 import os
+import sys
 import threading
 import logging
 import tkinter as tk
@@ -12,6 +14,13 @@ from datetime import datetime
 import pyautogui
 import pygetwindow as gw
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../libs"))
+from stress.logsink import open_sink  # noqa: E402
+from ppx.aio import AsyncSerial  # noqa: E402
+
+# 提示符（msh > / password:）后没有换行：等不到整行时，超过该时间按已收到的部分处理（与原 readline 超时一致）
+PARTIAL_LINE_TIMEOUT = 1.0
+
 class OTAUpgradeGUI:
     def __init__(self, root):
         self.root = root
@@ -362,6 +371,7 @@ class OTAUpgradeAutomation:
         self.upgrade_timeout = 1800
         self.stop_requested = False
         self.log_directory = "ota_upgrade_logs"
+        self.serial_log_sink = None     # 当前串口日志文件（后台写入，按日期/目录切换）
         
         # 升级工具成功关键字
         self.central_success_keyword = "中控升级成功"
@@ -383,6 +393,8 @@ class OTAUpgradeAutomation:
         
         # 串口对象
         self.serial_conn = None
+        self.loop = None        # 升级线程的事件循环
+        self.aio = None         # 串口异步读取（有整行到达即唤醒，不再 sleep 轮询）
         
         # 配置pyautogui
         pyautogui.FAILSAFE = True
@@ -404,12 +416,25 @@ class OTAUpgradeAutomation:
             log_filename = f"serial_log_{datetime.now().strftime('%Y%m%d')}.txt"
             log_path = os.path.join(self.log_directory, log_filename)
             
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(log_entry)
+            # 串口线程只入队，文件由后台线程保持打开并批量写入
+            sink = open_sink(log_path)
+            if sink is not self.serial_log_sink:
+                if self.serial_log_sink:
+                    self.serial_log_sink.close()
+                self.serial_log_sink = sink
+            sink.write(log_entry)
                 
         except Exception as e:
             self.log(f"保存串口日志失败: {e}", "ERROR")
     
+    def sync_serial_log(self):
+        """等待串口日志落盘（一次升级结束时调用）"""
+        try:
+            if self.serial_log_sink:
+                self.serial_log_sink.sync()
+        except Exception as e:
+            self.log(f"保存串口日志失败: {e}", "ERROR")
+    
     def kill_process_by_name(self, process_name):
         """根据进程名结束进程"""
         try:
@@ -565,6 +590,8 @@ class OTAUpgradeAutomation:
                 self.log("串口连接成功")
                 # 清空输入缓冲区
                 self.serial_conn.reset_input_buffer()
+                self.loop = asyncio.new_event_loop()
+                self.aio = AsyncSerial(self.serial_conn, loop=self.loop)
                 return True
             else:
                 self.log("串口连接失败", "ERROR")
@@ -577,9 +604,16 @@ class OTAUpgradeAutomation:
     def close_serial(self):
         """关闭串口连接"""
         try:
+            if self.aio:
+                self.aio.close()
+                self.aio = None
+            if self.loop:
+                self.loop.close()
+                self.loop = None
             if self.serial_conn and self.serial_conn.is_open:
                 self.serial_conn.close()
                 self.log("串口连接已关闭")
+            self.sync_serial_log()
         except Exception as e:
             self.log(f"关闭串口时出错: {e}", "ERROR")
     
@@ -606,15 +640,23 @@ class OTAUpgradeAutomation:
     def read_serial_response_with_timeout(self, timeout=10, check_prompts=False, check_success=False):
         """读取串口响应，支持检测特定提示符和成功关键字"""
         try:
-            if not self.serial_conn or not self.serial_conn.is_open:
+            if not self.serial_conn or not self.serial_conn.is_open or not self.aio:
                 return None, None
             
-            start_time = time.time()
+            deadline = time.monotonic() + timeout
             response = ""
             
-            while time.time() - start_time < timeout and not self.stop_requested:
-                if self.serial_conn.in_waiting > 0:
-                    data = self.serial_conn.readline().decode('utf-8', errors='ignore').strip()
+            while not self.stop_requested:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                # 整行到达立即返回，不再固定 0.1 秒轮询 in_waiting
+                line = self.loop.run_until_complete(
+                    self.aio.readline(min(remaining, PARTIAL_LINE_TIMEOUT)))
+                if line is None:
+                    line = self.aio.read_available()
+                if line:
+                    data = line.decode('utf-8', errors='ignore').strip()
                     if data:
                         response += data + "\n"
                         self.save_serial_log(data, "RX")
@@ -645,8 +687,6 @@ class OTAUpgradeAutomation:
                             elif self.password_prompt in data.lower():
                                 self.log(f"检测到密码提示符: {self.password_prompt}")
                                 return response, "password"
-                
-                time.sleep(0.1)
             
             return response if response else None, None
             
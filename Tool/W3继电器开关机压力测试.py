@@ -1,11 +1,14 @@
 # -*- coding: utf-8 -*-
 import serial
 import serial.tools.list_ports
-import time
 import datetime
 import win32api
 import win32con
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../libs"))
+from stress.clock import SYSTEM_CLOCK  # noqa: E402
 
 # ==========================================================
 #                    串口与硬件配置 (调试请改这里)
@@ -45,7 +48,9 @@ CMD_ENABLE = bytes([0x51])  # 初始化使能指令
 # ==========================================================
 
 class RelayTester:
-    def __init__(self):
+    def __init__(self, clock=SYSTEM_CLOCK):
+        # 时钟：默认真实时间；仿真时传入 VirtualClock，配合模拟器加速运行
+        self.clock = clock
         self.relay_ser = None
         self.device_ser = None
         self.stop_flag = False
@@ -53,7 +58,7 @@ class RelayTester:
         # 日志缓存
         self.log_cache_normal = []
         self.log_cache_exception = []
-        self.last_flush_time = time.time()
+        self.last_flush_time = self.clock.time()
 
         self.device_port = None
         self.relay_port = None
@@ -70,7 +75,7 @@ class RelayTester:
 
     # ---------------- 通用函数 ----------------
     def get_time(self):
-        return datetime.datetime.now().strftime("[%Y-%m-%d %H:%M:%S]")
+        return self.clock.now().strftime("[%Y-%m-%d %H:%M:%S]")
 
     def log(self, message, show=True, is_exception=False):
         """
@@ -91,9 +96,9 @@ class RelayTester:
             self.log_cache_normal.append(timestamp_msg)
 
         # 3. 定时写入文件
-        if time.time() - self.last_flush_time >= LOG_FLUSH_INTERVAL:
+        if self.clock.time() - self.last_flush_time >= LOG_FLUSH_INTERVAL:
             self.save_logs_to_file()
-            self.last_flush_time = time.time()
+            self.last_flush_time = self.clock.time()
 
     def save_logs_to_file(self):
         """将内存中的日志写入硬盘"""
@@ -136,6 +141,9 @@ class RelayTester:
         return device_port, relay_port
 
     def open_serial_ports(self):
+        # 已由外部注入串口对象时直接使用
+        if self.relay_ser and self.device_ser:
+            return True
         self.device_port, self.relay_port = self.detect_ports()
         if not self.device_port or not self.relay_port:
             self.log("错误 未检测到完整的串口设备，请检查配置区的关键字", is_exception=True)
@@ -154,7 +162,7 @@ class RelayTester:
             # 安全退出：必须发送松开指令 (亮灯 0x4F)
             if self.relay_ser and self.relay_ser.is_open:
                 self.relay_ser.write(CMD_RELEASE)
-                time.sleep(0.1)
+                self.clock.sleep(0.1)
 
             if self.relay_ser and self.relay_ser.is_open:
                 self.relay_ser.close()
@@ -175,12 +183,12 @@ class RelayTester:
             # Step 1: 强制复位
             self.log("初始化 Step 1: 强制复位继电器 (发送 0x4F/松开)...")
             self.relay_ser.write(CMD_RELEASE)
-            time.sleep(1.0)
+            self.clock.sleep(1.0)
 
             # Step 2: 发送使能
             self.log("初始化 Step 2: 发送使能/查询指令 (0x51)...")
             self.relay_ser.write(CMD_ENABLE)
-            time.sleep(1.0)
+            self.clock.sleep(1.0)
 
             self.log("继电器初始化完成，状态: 松开 (安全)")
 
@@ -195,12 +203,12 @@ class RelayTester:
                 self.log(f"【{action_name}】按钮按下 (保持 {duration}s)")
 
                 # 2. 保持
-                start_t = time.time()
-                while time.time() - start_t < duration:
+                start_t = self.clock.time()
+                while self.clock.time() - start_t < duration:
                     if self.stop_flag:
                         self.log(f"警告 在{action_name}期间脚本终止，立即执行松开！", is_exception=True)
                         break
-                    time.sleep(0.05)
+                    self.clock.sleep(0.05)
 
                     # 3. 松开 (发送 0x4F / 亮灯 / NC断开)
                 self.relay_ser.write(CMD_RELEASE)
@@ -216,8 +224,8 @@ class RelayTester:
 
     # ---------------- 读取设备日志 ----------------
     def read_device_logs(self, duration):
-        end_time = time.time() + duration
-        while time.time() < end_time and not self.stop_flag:
+        end_time = self.clock.time() + duration
+        while self.clock.time() < end_time and not self.stop_flag:
             try:
                 if self.device_ser and self.device_ser.in_waiting:
                     # 使用 errors='replace' 忽略无法解码的乱码
@@ -239,7 +247,7 @@ class RelayTester:
                             self.stop_flag = True
                             break
                 else:
-                    time.sleep(0.01)
+                    self.clock.sleep(0.01)
             except Exception as e:
                 self.log(f"读取设备日志异常: {e}", is_exception=True)
                 self.stop_flag = True
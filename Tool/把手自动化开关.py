@@ -4,12 +4,16 @@
 import win32api
 import win32con
 import os
+import sys
 import time
 import serial
 import re
 import datetime
 import random
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../libs"))
+from stress.logsink import open_sink  # noqa: E402
+
 
 
 #ȡǰʱ  ʱ
@@ -28,8 +32,8 @@ def vShowForm(strDetails="OK",strTitle="Result"):
 #дļѡʽǷӡдϢ
 def bWritePrint(strWriteInfo="",strFileName="log.txt",strWriteWay='a',bIsPrint=True):
     try:
-        with open(strFileName,strWriteWay) as fl:
-            fl.write(strWriteInfo.replace("\r",""))
+        #̨߳д룬ļִ򿪣ԭ open() Ĭһ£˳ʱԶ
+        open_sink(strFileName,mode=strWriteWay,encoding=None).write(strWriteInfo.replace("\r",""))
         if bIsPrint:
             print (strWriteInfo.strip())
         return True
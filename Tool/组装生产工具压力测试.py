@@ -5,19 +5,35 @@ import logging
 from datetime import datetime
 import psutil
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../libs"))
+from stress.status import StatusLine  # noqa: E402
 
 # 设置点击次数
 click_count = 30000
 current_click = 0  # 当前点击次数计数
 valid_click_count = 0  # 有效点击次数计数
+LIVE_STATUS = True  # 控制台只保留一行实时状态（4 次/秒刷新，错误显示在行尾），每次点击的详细记录只写入日志文件
 
 # 使用时间戳创建日志文件名
 log_filename = f'click_log_{datetime.now().strftime("%Y%m%d_%H%M%S")}.txt'
 logging.basicConfig(filename=log_filename, level=logging.INFO, format='%(asctime)s - %(message)s')
 
+status = StatusLine(click_count) if LIVE_STATUS else None
+
+def console(message, is_error=False):
+    """控制台输出：状态行模式下只显示错误（状态行末尾），其余只在日志文件中"""
+    if status is None:
+        print(message)
+    elif is_error:
+        status.error(message)
+
 def end_logging(clicks):
     """结束日志并记录点击次数"""
     logging.info(f"脚本结束，总点击次数：{clicks}")
+    if status:
+        status.close()
     print(f"脚本结束，总点击次数：{clicks}")
 
 def check_window_exists(title):
@@ -51,12 +67,12 @@ def restart_software(program_path, window_title):
         if not check_window_exists(window_title):
             raise Exception("目标软件启动后未检测到窗口。")
         logging.info("目标软件启动成功。")
-        print("目标软件启动成功。")
+        console("目标软件启动成功。")
         return True
 
     except Exception as e:
         logging.error(f"重新启动软件失败: {e}")
-        print(f"重新启动软件失败: {e}")
+        console(f"重新启动软件失败: {e}", is_error=True)
         return False
 
 try:
@@ -69,7 +85,7 @@ try:
             # 检查目标窗口是否存在
             if not check_window_exists(window_title):
                 logging.warning("检测到目标窗口已关闭，可能是软件闪退。")
-                print("检测到目标窗口已关闭，尝试重新启动软件...")
+                console("检测到目标窗口已关闭，尝试重新启动软件...", is_error=True)
                 if not restart_software(program_path, window_title):
                     raise Exception("软件重新启动失败，脚本停止执行。")
 
@@ -98,7 +114,7 @@ try:
             for pos, wait_time, description in click_actions:
                 if not check_window_exists(window_title):
                     logging.error("检测到目标窗口已关闭，可能是软件闪退。")
-                    print("检测到目标窗口已关闭，脚本停止执行。")
+                    console("检测到目标窗口已关闭，脚本停止执行。", is_error=True)
                     raise Exception("目标窗口已关闭")
 
                 x = window_x + (pos[0] - window_x)
@@ -107,12 +123,12 @@ try:
                 pyautogui.click(x, y)
                 current_click += 1
                 logging.info(f"第 {current_click} 次点击，位置 ({x}, {y})，操作：{description}")
-                print(f"第 {current_click} 次点击，位置 ({x}, {y})，操作：{description}")
+                console(f"第 {current_click} 次点击，位置 ({x}, {y})，操作：{description}")
 
                 if pos in [(1695, 324), (1683, 370), (1687, 410), (1683, 491), (1684, 551), (1684, 581), (864, 621), (1686, 674)]:
                     valid_click_count += 1
                     logging.info(f"有效点击次数更新为：{valid_click_count}")
-                    print(f"有效点击次数更新为：{valid_click_count}")
+                    console(f"有效点击次数更新为：{valid_click_count}")
 
                 # 输入SN号
                 if pos == (1231, 363):
@@ -127,11 +143,16 @@ try:
                     text = 'W303010ZP004A00001'
                     pyautogui.typewrite(text, interval=0.1)
 
+                if status:
+                    status.update(i, counters={"点击": current_click, "有效点击": valid_click_count})
                 time.sleep(wait_time)
 
+            if status:
+                status.update(i + 1)
+
         except Exception as e:
             logging.error(f"发生错误: {e}")
-            print(f"发生错误: {e}")
+            console(f"发生错误: {e}", is_error=True)
             break
 
 except Exception as e:
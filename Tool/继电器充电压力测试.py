@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 import serial
 import serial.tools.list_ports
-import time
 import datetime
 import random
 import sys
@@ -9,6 +8,13 @@ import logging
 import threading
 import os
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../libs"))
+from stress.clock import SYSTEM_CLOCK  # noqa: E402
+from stress.matcher import KeywordMatcher  # noqa: E402
+from stress.normalize import normalize, display  # noqa: E402
+from stress.decoder import StreamDecoder  # noqa: E402
+from stress.status import StatusLine, route_console  # noqa: E402
+
 # 尝试导入 win32api 用于弹窗提醒
 try:
     import win32api
@@ -49,6 +55,19 @@ CONFIG = {
     'POWER_OFF_TIME': 5.0,
     'DELAY_AFTER_OFF': 20,  # 关机后等待日志的时间
 
+    # 循环模式
+    # 'fixed': 原固定延时，断电后等满 POWER_OFF_TIME + DELAY_AFTER_OFF 再一次性读取分析
+    # 'event': 边读边分析，结果确定且日志静默 OFF_QUIET_TIME 后进入下一轮，POWER_OFF_TIME + DELAY_AFTER_OFF 仅作为等待上限
+    #          （尚未在实机上验证）。OFF_QUIET_TIME 是 event 模式防止迟到日志记到下一轮的唯一手段：
+    #          进入下一轮后才到达的关机/休眠日志会算作下一轮的结果，确认实机关机日志的最长间隔后再按需调小
+    'CYCLE_MODE': 'fixed',
+    'MIN_OFF_TIME': 2.0,  # event 模式断电后至少等待的时间（捕获断电阶段的异常日志）
+    'OFF_QUIET_TIME': 20,  # event 模式断电后设备日志需静默的时间（关机/休眠阶段的断言可能在断电后 5~20 秒才打印）
+    'POLL_INTERVAL': 0.05,  # event 模式读取串口的间隔
+
+    # 控制台只保留一行实时状态（4 次/秒刷新，WARNING 及以上显示在行尾），逐轮详细日志只写入文件
+    'LIVE_STATUS': True,
+
     # 路径引用
     'LOG_FILENAME': LOG_FILE_PATH,
     'ERROR_LOG_FILENAME': ERR_FILE_PATH,
@@ -110,15 +129,23 @@ logger = LoggerSetup.setup()
 # ================= 测试核心类 =================
 
 class RelayTester:
-    def __init__(self):
+    def __init__(self, clock=SYSTEM_CLOCK):
+        # 时钟：默认真实时间；仿真时传入 VirtualClock，配合模拟器加速运行
+        self.clock = clock
+        # 关键字自动机：SUCCESS/EXCEPTION/INFO 一次编译，每行只扫描一遍
+        self.matcher = KeywordMatcher(KEYWORDS, binary=True)
         self.relay_ser = None
         self.device_ser = None
+        # 设备日志流：会话内检测一次编码，跨读取保留半行与被切开的多字节字符
+        self.decoder = StreamDecoder()
         self.stats = {
             'success': 0,  # 检测到 voice_msg
             'exceptions': 0,  # 检测到代码断言失败
             'failures': 0,  # 超时/未检测到关键字
             'cycles': 0
         }
+        # 控制台实时状态行（run 中创建）
+        self.status = None
 
     def show_alert(self, msg):
         """显示弹窗提示"""
@@ -145,7 +172,9 @@ class RelayTester:
         return device_port, relay_port
 
     def open_serials(self):
-        """打开串口连接"""
+        """打开串口连接（已由外部注入串口对象时直接使用）"""
+        if self.relay_ser and self.device_ser:
+            return True
         dev, relay = self.detect_ports()
         if not dev or not relay:
             logger.error(f"串口识别失败! Device: {dev}, Relay: {relay}")
@@ -190,7 +219,7 @@ class RelayTester:
             # 1. 发送 0x50 (复位信号)
             logger.info("STEP 1: 发送复位指令 (0x50)...")
             self.relay_ser.write(bytes([0x50]))
-            time.sleep(1)
+            self.clock.sleep(1)
             # 读取缓存防止干扰
             if self.relay_ser.in_waiting:
                 self.relay_ser.read(self.relay_ser.in_waiting)
@@ -198,7 +227,7 @@ class RelayTester:
             # 2. 发送 0x51 (使能/查询)
             logger.info("STEP 2: 发送使能/查询指令 (0x51)...")
             self.relay_ser.write(bytes([0x51]))
-            time.sleep(1)
+            self.clock.sleep(1)
 
             # 3. 读取响应并判断类型
             if self.relay_ser.in_waiting:
@@ -220,7 +249,7 @@ class RelayTester:
             # 4. 【关键步骤】初始化完成后，立即关闭继电器
             logger.info("STEP 3: 初始化完成，强制关闭继电器以保持初始状态 (0x50)...")
             self.relay_ser.write(bytes([0x50]))
-            time.sleep(2)  # 给硬件一点反应时间
+            self.clock.sleep(2)  # 给硬件一点反应时间
             logger.info(">>> 继电器已就绪 (当前状态: OFF)")
 
         except Exception as e:
@@ -236,8 +265,11 @@ class RelayTester:
         except Exception as e:
             logger.error(f"继电器控制失败: {e}")
 
-    def read_device_buffer(self):
-        """读取数据，同时写入 Raw 日志"""
+    def read_device_buffer(self, flush=True):
+        """
+        读取数据，同时写入 Raw 日志；返回原始字节行，分析时再做字节级归一化
+        flush=False 时末尾不完整的一行留到下次读取再拼接（event 模式频繁读取时避免关键字被截断）
+        """
         if not self.device_ser or not self.device_ser.is_open: return []
         logs = []
         try:
@@ -246,20 +278,18 @@ class RelayTester:
             else:
                 raw = self.device_ser.read_all()
 
+            # 1. 按行切分原始字节供脚本分析（不再逐行解码）
+            lines = self.decoder.feed(raw)
+            if flush:
+                lines += self.decoder.flush()
+
+            # 2. 增量解码后写入原始日志 (给开发看)，块边界上的半个汉字留到下一块
             if raw:
-                # 1. 尝试解码
-                try:
-                    text_decoded = raw.decode("utf-8", errors="ignore")
-                except:
-                    text_decoded = raw.decode("latin1", errors="ignore")
-
-                # 2.  写入原始日志 (给开发看)
-                LoggerSetup.log_raw_data(text_decoded)
-
-                # 3. 处理成列表供脚本分析
-                for line in text_decoded.split('\n'):
-                    if line.strip():
-                        logs.append(line.strip())
+                LoggerSetup.log_raw_data(self.decoder.text(raw))
+
+            for line in lines:
+                if line.strip():
+                    logs.append(line.strip())
         except Exception as e:
             logger.error(f"读取设备日志出错: {e}")
             self.device_ser = None
@@ -270,49 +300,112 @@ class RelayTester:
         found_success = False
         found_exception = False
 
-        for line in log_lines:
-            # 简单预处理用于匹配
-            processed_line = line.replace(" ", "").lower()
+        for raw in log_lines:
+            # 字节级预处理用于匹配，命中时才解码
+            hits = self.matcher.scan(normalize(raw))
+            if not hits:
+                continue
+            line = display(raw, self.decoder.encoding)
 
             # 检查异常 (Assertion Failed)
-            for kw in KEYWORDS['EXCEPTION']:
-                if kw in processed_line:
-                    found_exception = True
-                    msg = f"检测到异常报错: {line}"
-                    logger.error(msg)
-                    LoggerSetup.log_exception_to_file(msg)
+            for kw in hits.get('EXCEPTION', ()):
+                found_exception = True
+                msg = f"检测到异常报错: {line}"
+                logger.error(msg)
+                LoggerSetup.log_exception_to_file(msg)
 
             # 检查成功 (Voice Msg)
-            for kw in KEYWORDS['SUCCESS']:
-                if kw in processed_line:
-                    found_success = True
-                    logger.info(f"检测到成功关键字: {line}")
+            for kw in hits.get('SUCCESS', ()):
+                found_success = True
+                logger.info(f"检测到成功关键字: {line}")
 
         return found_success, found_exception
 
-    def run_cycle(self, cycle_num):
-        """执行单次测试循环"""
-        self.stats['cycles'] = cycle_num
-        logger.info(f"{'=' * 20} 第 {cycle_num} 轮开始 {'=' * 20}")
+    def watch_device(self, duration, verdict, min_wait=None, quiet=0.0):
+        """
+        event 模式：在 duration 秒内持续读取并逐行分析设备日志
+        verdict: 本轮 {'success': bool, 'exception': bool}，随日志到达即时更新
+        min_wait 不为 None 时，结果已确定（出现异常或成功）、已等待满 min_wait 秒
+        且设备日志已静默 quiet 秒即提前返回
+        返回实际等待的秒数
+        """
+        start = self.clock.monotonic()
+        deadline = start + duration
+        last_line = start
+        while True:
+            if self.status:
+                self.status.refresh()
+            lines = self.read_device_buffer(flush=False)
+            now = self.clock.monotonic()
+            if lines:
+                last_line = now
+                success, exception = self.analyze_logs(lines)
+                verdict['success'] = verdict['success'] or success
+                verdict['exception'] = verdict['exception'] or exception
+
+            if min_wait is not None and (verdict['exception'] or verdict['success']) \
+                    and now - start >= min_wait and now - last_line >= quiet:
+                break
+            if now >= deadline:
+                break
+            self.clock.sleep(min(CONFIG['POLL_INTERVAL'], deadline - now))
+        return now - start
+
+    def run_cycle_event(self):
+        """
+        event 模式单轮：上电时长不变，断电后结果确定且设备日志静默 OFF_QUIET_TIME 秒即结束本轮，
+        POWER_OFF_TIME + DELAY_AFTER_OFF 作为等待上限（未检测到关键字时与 fixed 模式等待相同）
+        返回 (is_success, is_exception)
+        """
+        verdict = {'success': False, 'exception': False}
 
+        # 1. 开启充电（上电时长是测试激励，不提前结束）
+        logger.info("动作: 开启继电器 (ON)")
+        self.relay_control(True)
+        self.watch_device(random.uniform(CONFIG['POWER_ON_MIN'], CONFIG['POWER_ON_MAX']), verdict)
+
+        # 2. 关闭充电，等待结果确定
+        logger.info("动作: 关闭继电器 (OFF)")
+        self.relay_control(False)
+        limit = CONFIG['POWER_OFF_TIME'] + CONFIG['DELAY_AFTER_OFF']
+        waited = self.watch_device(limit, verdict, min_wait=CONFIG['MIN_OFF_TIME'], quiet=CONFIG['OFF_QUIET_TIME'])
+
+        # 3. 分析残留的半行
+        success, exception = self.analyze_logs(self.read_device_buffer())
+        if waited < limit:
+            logger.info(f"断电后 {waited:.1f} 秒结果已确定，提前进入下一轮 (上限 {limit} 秒)")
+        return verdict['success'] or success, verdict['exception'] or exception
+
+    def run_cycle_fixed(self):
+        """fixed 模式单轮：固定延时后一次性读取分析，返回 (is_success, is_exception)"""
         # 1. 开启充电
         logger.info("动作: 开启继电器 (ON)")
         self.relay_control(True)
-        time.sleep(random.uniform(CONFIG['POWER_ON_MIN'], CONFIG['POWER_ON_MAX']))
+        self.clock.sleep(random.uniform(CONFIG['POWER_ON_MIN'], CONFIG['POWER_ON_MAX']))
         logs_stage_1 = self.read_device_buffer()
 
         # 2. 关闭充电
         logger.info("动作: 关闭继电器 (OFF)")
         self.relay_control(False)
-        time.sleep(CONFIG['POWER_OFF_TIME'])
+        self.clock.sleep(CONFIG['POWER_OFF_TIME'])
 
         # 3. 关机等待
         logger.info(f"等待 {CONFIG['DELAY_AFTER_OFF']} 秒 (捕获关机/休眠日志)...")
-        time.sleep(CONFIG['DELAY_AFTER_OFF'])
+        self.clock.sleep(CONFIG['DELAY_AFTER_OFF'])
         logs_stage_2 = self.read_device_buffer()
 
         # 4. 分析结果
-        is_success, is_exception = self.analyze_logs(logs_stage_1 + logs_stage_2)
+        return self.analyze_logs(logs_stage_1 + logs_stage_2)
+
+    def run_cycle(self, cycle_num):
+        """执行单次测试循环"""
+        self.stats['cycles'] = cycle_num
+        logger.info(f"{'=' * 20} 第 {cycle_num} 轮开始 {'=' * 20}")
+
+        if CONFIG['CYCLE_MODE'] == 'event':
+            is_success, is_exception = self.run_cycle_event()
+        else:
+            is_success, is_exception = self.run_cycle_fixed()
 
         # 5. 统计逻辑
         if is_exception:
@@ -327,6 +420,9 @@ class RelayTester:
 
         logger.info(
             f"当前统计 -> 成功: {self.stats['success']} | 失败: {self.stats['failures']} | 异常: {self.stats['exceptions']}")
+        if self.status:
+            self.status.update(cycle_num, self.stats['success'],
+                               counters={"失败": self.stats['failures'], "异常": self.stats['exceptions']})
 
     def run(self):
         """主运行函数"""
@@ -342,6 +438,11 @@ class RelayTester:
         self.init_relay_hardware()
         # ==========================================
 
+        restore_console = None
+        if CONFIG['LIVE_STATUS']:
+            self.status = StatusLine(CONFIG['TEST_CYCLES'], clock=self.clock)
+            restore_console = route_console(logger, self.status)
+
         try:
             for i in range(1, CONFIG['TEST_CYCLES'] + 1):
                 self.run_cycle(i)
@@ -350,6 +451,10 @@ class RelayTester:
         except Exception as e:
             logger.critical(f"发生错误: {e}", exc_info=True)
         finally:
+            if self.status:
+                self.status.close()
+                self.status = None
+                restore_console()
             self.close_serials()
             msg = (f"测试结束\n"
                    f"成功: {self.stats['success']}\n"
@@ -1,14 +1,21 @@
 # -*- coding: utf-8 -*-
 import serial
 import serial.tools.list_ports
-import time
-import datetime
 import random
 import sys
 import win32api
 import win32con
-import re
-from collections import deque
+import os
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../libs"))
+from stress.clock import SYSTEM_CLOCK  # noqa: E402
+from stress.matcher import KeywordMatcher  # noqa: E402
+from stress.normalize import normalize, display  # noqa: E402
+from stress.decoder import StreamDecoder  # noqa: E402
+from stress.verdict import CycleVerdict  # noqa: E402
+from stress.rules import RuleEngine, ACTION_STOP, ACTION_ALERT, ACTION_TAG, ACTION_POWER_CYCLE  # noqa: E402
+from stress.status import StatusLine  # noqa: E402
 
 # ================= 测试参数配置 =================
 RELAY_BAUDRATE = 9600  # 继电器串口波特率
@@ -27,6 +34,7 @@ DEVICE_RETRY_DELAY = 3.0  # 设备串口重连等待时间（秒）
 # ================= 开关配置 =================
 SAVE_LOG_TO_FILE = True  # 是否保存日志到文件
 LOG_FLUSH_INTERVAL = 60  # 内存缓存落盘间隔（秒）
+LIVE_STATUS = True  # 控制台只保留一行实时状态（4 次/秒刷新，异常显示在行尾），逐轮详细日志只写入文件
 
 # ================= 关键字逻辑配置 =================
 # 1. 普通异常关键字 (发现即记录异常)
@@ -41,18 +49,24 @@ INFO_KEYWORDS = [
     "ui_pm_acc"
 ]
 
-# 3. 累计错误关键字 (逻辑：3秒内 ≥ 3次 → 停止测试)
-ERROR_CONFIG = {
-    "keyword": "param is invalid".replace(" ", ""),
-    "window": 3.0,
-    "count": 3
-}
-
-# 4. 致命错误关键字 (逻辑：1秒内 ≥ 3次 → 立即停止测试)
-CRITICAL_CONFIG = {
-    "keyword": "[e/motor]reg_addr(00)isunviald",
-    "window": 1.0,
-    "count": 3
+# 3/4. 频率规则 (逻辑：window 秒内 ≥ count 次 → 执行 action)，字段说明见 libs/stress/rules.py
+#   action: stop 停止测试 / alert 弹窗提醒 / tag 标记本轮 / power_cycle 立即断电进入下一轮
+RULES = [
+    # 累计错误：3秒内 ≥ 3次 → 停止测试
+    {"name": "ERROR", "keywords": ["param is invalid"], "window": 3.0, "count": 3, "action": "stop"},
+    # 致命错误：1秒内 ≥ 3次 → 立即停止测试
+    {"name": "CRITICAL", "keywords": ["[e/motor]reg_addr(00)isunviald"], "window": 1.0, "count": 3,
+     "action": "stop"},
+]
+# 规则文件 (JSON 列表，格式同 RULES)：存在时覆盖 RULES，每轮开始前检查修改并热加载
+# 放在本脚本旁、按脚本名命名，不会被其他压力测试脚本的规则文件覆盖
+RULES_FILE = os.path.splitext(os.path.abspath(__file__))[0] + ".rules.json"
+
+# 5. 单轮结果判定关键字 (任一类别命中即视为成功)
+VERDICT_KEYWORDS = {
+    "MotorOn": ["motorpoweron..."],
+    "PM_ACC": ["pm_acc_tim,"],
+    "PowerOff": ["power_off_system"],
 }
 
 
@@ -64,7 +78,9 @@ class StopTestException(Exception):
 
 
 class RelayTester:
-    def __init__(self):
+    def __init__(self, clock=SYSTEM_CLOCK):
+        # 时钟：默认真实时间；仿真时传入 VirtualClock，配合模拟器加速运行
+        self.clock = clock
         self.relay_ser = None
         self.device_ser = None
         self.total_success = 0
@@ -73,32 +89,43 @@ class RelayTester:
         self.device_disconnect_count = 0
         self.relay_port = None
         self.device_port = None
-
-        # ANSI 颜色去除正则预编译
-        self.ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+        # 设备日志流：按块读取后切行（跨读取保留半行），会话内检测一次编码（gb2312/utf-8）
+        self.decoder = StreamDecoder()
 
         # 日志缓存
         self.log_cache_normal = []
         self.log_cache_exception = []
-        self.last_flush_time = time.time()
+        self.last_flush_time = self.clock.time()
+
+        # 频率规则引擎 + 本轮规则动作状态
+        self.rules = RuleEngine(RULES, RULES_FILE)
+        self.cycle_tags = []
+        self.power_cycle_requested = False
 
-        # 错误计数器 (使用 deque 存储时间戳)
-        self.error_timestamps = deque()
-        self.critical_timestamps = deque()
+        # 关键字自动机：所有类别（含规则关键字）一次编译，每行只扫描一遍（直接匹配归一化字节）
+        self.line_matcher = self.build_line_matcher()
+        # 单轮判定状态机：逐行更新命中标志，本轮最后一行到达时结果即确定
+        self.verdict = CycleVerdict(VERDICT_KEYWORDS)
+        # 控制台实时状态行（run_test 中创建）
+        self.status = None
 
     def get_time(self):
-        return datetime.datetime.now().strftime("[%Y-%m-%d %H:%M:%S]")
+        return self.clock.now().strftime("[%Y-%m-%d %H:%M:%S]")
 
     def log(self, message, show=True, is_exception=False):
         """日志记录：内存缓存 + 控制台输出 + 自动落盘"""
         log_entry = f"{self.get_time()} {message}"
-        if show:
+        if self.status:
+            # 状态行模式：控制台只显示最近一条异常
+            if show and is_exception:
+                self.status.error(message)
+        elif show:
             print(log_entry)
 
         target_cache = self.log_cache_exception if is_exception else self.log_cache_normal
         target_cache.append(log_entry)
 
-        if SAVE_LOG_TO_FILE and (time.time() - self.last_flush_time >= LOG_FLUSH_INTERVAL):
+        if SAVE_LOG_TO_FILE and (self.clock.time() - self.last_flush_time >= LOG_FLUSH_INTERVAL):
             self.save_logs_to_file()
 
     def save_logs_to_file(self):
@@ -116,7 +143,7 @@ class RelayTester:
                     f.write("\n".join(self.log_cache_exception) + "\n")
                 self.log_cache_exception.clear()
 
-            self.last_flush_time = time.time()
+            self.last_flush_time = self.clock.time()
         except Exception as e:
             print(f"日志写入失败: {e}")
 
@@ -144,7 +171,9 @@ class RelayTester:
         return device_port, relay_port
 
     def open_serial_ports(self):
-        """打开所有串口"""
+        """打开所有串口（已由外部注入串口对象时直接使用）"""
+        if self.relay_ser and self.device_ser:
+            return True
         self.device_port, self.relay_port = self.detect_ports()
         if not self.device_port or not self.relay_port:
             self.log("未检测到完整设备，无法启动", is_exception=True)
@@ -159,43 +188,63 @@ class RelayTester:
             self.log(f"串口打开失败: {e}", is_exception=True)
             return False
 
-    def check_frequency(self, timestamps_deque, window_seconds, threshold_count):
-        """通用频率检查函数"""
-        now = time.time()
-        timestamps_deque.append(now)
-
-        # 移除超出时间窗口的旧记录
-        while timestamps_deque and timestamps_deque[0] < now - window_seconds:
-            timestamps_deque.popleft()
+    def build_line_matcher(self):
+        """INFO/EXCEPTION 与全部规则关键字编译为一个匹配器（规则热加载后重建）"""
+        return KeywordMatcher({
+            "INFO": INFO_KEYWORDS,
+            "EXCEPTION": EXCEPTION_KEYWORDS,
+            **self.rules.categories,
+        }, binary=True)
 
-        return len(timestamps_deque) >= threshold_count
-
-    def process_log_line(self, line):
-        """处理单行日志，返回 (是否触发停止, 停止原因)"""
-        # 1. 预处理：去色、转小写、去空格
-        clean_line = self.ansi_escape.sub('', line)
-        line_check = clean_line.lower().replace(" ", "")
+    def reload_rules(self):
+        """每轮开始前检查规则文件，修改过则热加载"""
+        try:
+            if self.rules.reload_if_changed():
+                self.line_matcher = self.build_line_matcher()
+                self.log(f"【规则】已加载 {RULES_FILE}，共 {len(self.rules.rules)} 条")
+        except ValueError as e:
+            self.log(f"【规则】{e}", is_exception=True)
+
+    def apply_rule(self, rule):
+        """执行已触发规则的动作，stop 返回停止原因，其余返回 None"""
+        reason = f"触发规则 [{rule.name}]：{rule.describe()}"
+        if rule.action == ACTION_STOP:
+            return reason
+        self.log(f"【规则】{reason} -> {rule.action}", is_exception=True)
+        if rule.action == ACTION_ALERT:
+            threading.Thread(target=self.show_message, args=(reason, "规则提醒"), daemon=True).start()
+        elif rule.action == ACTION_TAG:
+            self.cycle_tags.append(rule.name)
+        elif rule.action == ACTION_POWER_CYCLE:
+            self.power_cycle_requested = True
+        return None
+
+    def process_log_line(self, raw, line_check):
+        """
+        处理单行日志，返回 (是否触发停止, 停止原因)
+        raw: 串口原始字节；line_check: normalize(raw)，已去色、转小写、去空格
+        """
+        # 1. 关键字匹配直接在归一化字节上进行，命中时才解码原始行用于记录
+        hits = self.line_matcher.scan(line_check)
+        if not hits:
+            return False, None
+        clean_line = display(raw, self.decoder.encoding)
 
         # 2. 信息关键字检测
-        for kw in INFO_KEYWORDS:
-            if kw in line_check:
-                self.log(f"【信息】{kw} -> {clean_line.strip()}", show=False)
+        for kw in hits.get("INFO", ()):
+            self.log(f"【信息】{kw} -> {clean_line.strip()}", show=False)
 
         # 3. 普通异常关键字检测
-        for kw in EXCEPTION_KEYWORDS:
-            if kw in line_check:
-                self.total_exceptions += 1
-                self.log(f"【异常检测】发现关键字: {kw}", is_exception=True)
+        for kw in hits.get("EXCEPTION", ()):
+            self.total_exceptions += 1
+            self.log(f"【异常检测】发现关键字: {kw}", is_exception=True)
 
-        # 4. 累计错误 (3秒 >=3次)
-        if ERROR_CONFIG["keyword"] in line_check:
-            if self.check_frequency(self.error_timestamps, ERROR_CONFIG["window"], ERROR_CONFIG["count"]):
-                return True, f"触发停止条件：{ERROR_CONFIG['window']}秒内出现{ERROR_CONFIG['count']}次 '{ERROR_CONFIG['keyword']}'"
-
-        # 5. 致命错误 (1秒 >=3次)
-        if CRITICAL_CONFIG["keyword"] in line_check:
-            if self.check_frequency(self.critical_timestamps, CRITICAL_CONFIG["window"], CRITICAL_CONFIG["count"]):
-                return True, f"触发致命停止：{CRITICAL_CONFIG['window']}秒内出现{CRITICAL_CONFIG['count']}次 '{CRITICAL_CONFIG['keyword']}'"
+        # 4. 频率规则 (window 秒内 >= count 次)
+        for event in self.rules.feed(hits, self.clock.time()):
+            if event.fired:
+                reason = self.apply_rule(event.rule)
+                if reason:
+                    return True, reason
 
         return False, None
 
@@ -206,7 +255,7 @@ class RelayTester:
         try:
             cmd = bytes([0x50]) if action == 'on' else bytes([0x4F])
             self.relay_ser.write(cmd)
-            time.sleep(0.1)
+            self.clock.sleep(0.1)
             self.relay_ser.read_all()  # 清空缓冲区
             self.log(f"继电器 -> {action.upper()}", show=False)
         except Exception as e:
@@ -216,30 +265,35 @@ class RelayTester:
         """
         实时监控串口流
         duration: 监控持续时长(秒)
-        返回: (full_log_str, stop_triggered, stop_reason)
+        返回: (stop_triggered, stop_reason)；本轮判定结果在 self.verdict 中随行更新
         """
-        end_time = time.time() + duration
-        collected_logs = []
+        end_time = self.clock.time() + duration
 
-        while time.time() < end_time:
+        while self.clock.time() < end_time:
+            if self.status:
+                self.status.refresh()
             try:
-                if self.device_ser and self.device_ser.in_waiting:
-                    # 使用 errors='replace' 防止乱码崩溃
-                    raw_line = self.device_ser.readline().decode('gb2312', errors='replace')
-                    if not raw_line: continue
-
-                    collected_logs.append(raw_line.strip())
-
-                    # 实时分析
-                    should_stop, reason = self.process_log_line(raw_line)
-                    if should_stop:
-                        return "\n".join(collected_logs), True, reason
+                waiting = self.device_ser.in_waiting if self.device_ser else 0
+                if waiting:
+                    # 整块读取已到达的数据，只处理完整的行（超时截断的半行留到下次拼接）
+                    for raw in self.decoder.feed(self.device_ser.read(waiting)):
+                        # 字节级归一化一次，关键字检测与本轮判定共用，不再逐行解码
+                        line_check = normalize(raw)
+                        self.verdict.feed(line_check)
+
+                        # 实时分析
+                        should_stop, reason = self.process_log_line(raw, line_check)
+                        if should_stop:
+                            return True, reason
+                        if self.power_cycle_requested:
+                            self.log("【规则】请求立即断电，提前结束本轮监控")
+                            return False, None
 
                     # 优化：如果有数据，不sleep，直接进行下一次读取，加快处理速度
                     continue
 
                     # 只有无数据时才休眠，减少CPU占用
-                time.sleep(0.005)
+                self.clock.sleep(0.005)
 
             except serial.SerialException:
                 self.log("【警告】串口断开，尝试重连...", is_exception=True)
@@ -248,18 +302,19 @@ class RelayTester:
             except Exception as e:
                 self.log(f"读取流异常: {e}", is_exception=True)
 
-        return "\n".join(collected_logs), False, None
+        return False, None
 
     def try_reconnect_device(self):
         """断线重连逻辑"""
         self.device_disconnect_count += 1
+        self.decoder.flush()  # 旧连接残留的半行作废
         if self.device_ser:
             try:
                 self.device_ser.close()
             except:
                 pass
 
-        time.sleep(DEVICE_RETRY_DELAY)
+        self.clock.sleep(DEVICE_RETRY_DELAY)
         new_dev, _ = self.detect_ports()
 
         if new_dev:
@@ -270,24 +325,16 @@ class RelayTester:
             except Exception as e:
                 self.log(f"重连失败: {e}", is_exception=True)
 
-    def analyze_cycle_result(self, full_logs):
+    def analyze_cycle_result(self):
         """
-        分析单次循环的最终结果
+        分析单次循环的最终结果（self.verdict 已在监控期间逐行更新，无需回扫本轮日志）
         优化后：移除了复位判断，只要有 MotorOn 或 PM/Off 任意一个即视为成功
         """
-        logs_lower = full_logs.lower().replace(" ", "")
 
-        has_motor_on = "motorpoweron..." in logs_lower
-        has_pm_acc = "pm_acc_tim," in logs_lower
-        has_power_off = "power_off_system" in logs_lower
-
-        # 简化后的判断逻辑
-        if has_motor_on or has_pm_acc or has_power_off:
-            details = []
-            if has_motor_on: details.append("MotorOn")
-            if has_pm_acc: details.append("PM_ACC")
-            if has_power_off: details.append("PowerOff")
-            return True, f"正常 ({', '.join(details)})"
+        # 简化后的判断逻辑：MotorOn / PM_ACC / PowerOff 任一命中
+        found = self.verdict.found
+        if found:
+            return True, f"正常 ({', '.join(found)})"
 
         return False, "无有效响应"
 
@@ -298,10 +345,15 @@ class RelayTester:
         on_time = round(random.uniform(POWER_ON_MIN, POWER_ON_MAX), 1)
 
         # 2. 继电器上电
+        self.reload_rules()
+        self.rules.start_cycle()
+        self.cycle_tags = []
+        self.power_cycle_requested = False
+        self.verdict.reset()
         self.control_relay('on')
 
         # 3. 实时监控 (上电时间 + 缓冲时间)
-        logs, stop_triggered, stop_reason = self.monitor_serial_stream(on_time + 1.0)
+        stop_triggered, stop_reason = self.monitor_serial_stream(on_time + 1.0)
 
         # 4. 继电器断电
         self.control_relay('off')
@@ -313,20 +365,25 @@ class RelayTester:
             raise StopTestException(stop_reason)
 
         # 6. 分析本次结果 (简化版)
-        success, reason = self.analyze_cycle_result(logs)
+        success, reason = self.analyze_cycle_result()
 
         if success:
             self.total_success += 1
             self.log(f"【结果】成功: {reason}")
         else:
             self.log(f"【结果】失败: {reason}", is_exception=True)
+        if self.cycle_tags:
+            self.log(f"【标记】第 {cycle_num} 次循环触发规则: {', '.join(self.cycle_tags)}", is_exception=True)
 
         # 断电等待
-        time.sleep(POWER_OFF_TIME)
+        self.clock.sleep(POWER_OFF_TIME)
 
         # 打印当前成功率
-        rate = (self.total_success / cycle_num) * 100
-        print(f"当前成功率: {rate:.2f}%")
+        if self.status:
+            self.status.update(cycle_num, self.total_success, counters={"异常关键字": self.total_exceptions})
+        else:
+            rate = (self.total_success / cycle_num) * 100
+            print(f"当前成功率: {rate:.2f}%")
 
     def run_test(self):
         if not self.open_serial_ports():
@@ -335,10 +392,13 @@ class RelayTester:
 
         self.log("正在初始化...预先断电")
         self.control_relay('off')
-        time.sleep(2.0)
+        self.clock.sleep(2.0)
 
+        self.log(f"【规则】{self.rules.describe_source()}")
         self.log(f"测试开始，目标循环: {TEST_CYCLES} 次")
-        start_time = time.time()
+        start_time = self.clock.time()
+        if LIVE_STATUS:
+            self.status = StatusLine(TEST_CYCLES, clock=self.clock)
 
         try:
             for i in range(1, TEST_CYCLES + 1):
@@ -350,13 +410,16 @@ class RelayTester:
         except Exception as e:
             self.log(f"发生未捕获异常: {e}", is_exception=True)
         finally:
+            if self.status:
+                self.status.close()
+                self.status = None
             self.save_logs_to_file()
             self.control_relay('off')  # 确保结束时断电
             if self.relay_ser: self.relay_ser.close()
             if self.device_ser: self.device_ser.close()
 
         # 统计信息
-        elapsed = time.time() - start_time
+        elapsed = self.clock.time() - start_time
         summary = (
             f"\n{'=' * 10} 测试报告 {'=' * 10}\n"
             f"总循环: {TEST_CYCLES if i == TEST_CYCLES else i}\n"  # 使用实际运行的次数
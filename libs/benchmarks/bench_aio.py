@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+多串口并发：逐线程轮询 vs 单线程顺序 vs asyncio 单事件循环（仅 Linux）
+============================================================
+N 个 BLE 灯板模拟器 + 1 个继电器 + 1 路 DUT 日志，全部在伪终端上（emulator.transport），
+主机端按三种方式驱动同一负载，固定时长内统计：
+
+- BLE 请求/应答：每个端口连续 READ LED 寄存器（停等），统计往返次数
+- 继电器：每 --relay-period 秒握手一次（0x51 等 1 字节应答）并切换吸合/断开（DUT 随之开关机出日志）
+- 日志采集：逐行读取 DUT 日志
+
+三种方式：
+- seq    : 一个线程轮流服务各端口（现有同步代码在单线程里的情况，等待不能重叠）
+- thread : 每个端口一个线程；BLE 用 Deframer.read_frame（10ms 短超时阻塞读），
+           日志按 OTA 工具原来的方式 in_waiting + readline + sleep(0.1)
+- async  : 一个事件循环，ppx.aio.AsyncSerial（add_reader，数据到达才唤醒）
+
+主机 CPU 只统计主机端线程（time.thread_time），不含同进程内模拟器线程。
+
+用法：
+    python bench_aio.py --ports 4 --latency 0.005 --seconds 3
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import threading
+
+import serial
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from emulator.ble import BleEmulator  # noqa: E402
+from emulator.dut_log import DutLogEmulator  # noqa: E402
+from emulator.relay import RelayEmulator, RELAY_CMD_ENABLE, RELAY_CMD_CLOSE, RELAY_CMD_OPEN  # noqa: E402
+from emulator.transport import PtyServer, PtyStreamServer, DEFAULT_BAUDRATE  # noqa: E402
+from ppx.aio import AsyncSerial  # noqa: E402
+from ppx.codec import PyBleCodec  # noqa: E402
+from ppx.deframer import Deframer  # noqa: E402
+from ppx.session import CodecSession  # noqa: E402
+from ppx.structs import PPX_ID_BLE, PPX_MSG_READ  # noqa: E402
+
+PPX_BLE_LED_MSG_REG = 0x08
+RESP_TIMEOUT = 0.5
+
+
+class Rig:
+    """一组模拟器与主机端串口"""
+
+    def __init__(self, ports, latency):
+        self.servers = []
+        self.ble = []
+        for i in range(ports):
+            server = PtyServer(BleEmulator(latency=latency, seed=i))
+            server.start()
+            self.servers.append(server)
+            self.ble.append(serial.Serial(server.port, DEFAULT_BAUDRATE, timeout=0.1))
+        self.dut = DutLogEmulator(seed=1)
+        relay = RelayEmulator()
+        relay.attach(self.dut)
+        server = PtyServer(relay)
+        server.start()
+        self.servers.append(server)
+        self.relay = serial.Serial(server.port, 9600, timeout=0.1)
+        log_server = PtyStreamServer(self.dut, poll=0.002)
+        log_server.start()
+        self.servers.append(log_server)
+        self.log = serial.Serial(log_server.port, 115200, timeout=0.1)
+        self.frame = bytes(CodecSession(PyBleCodec(), PPX_ID_BLE).format(PPX_MSG_READ, PPX_BLE_LED_MSG_REG, 1))
+
+    def close(self):
+        for ser in self.ble + [self.relay, self.log]:
+            ser.close()
+        for server in self.servers:
+            server.close()
+
+
+class Counters:
+    def __init__(self):
+        self.requests = 0
+        self.timeouts = 0
+        self.switches = 0
+        self.lines = 0
+        self.cpu = 0.0
+        self._lock = threading.Lock()
+
+    def add_cpu(self, seconds):
+        with self._lock:
+            self.cpu += seconds
+
+
+def relay_cmd(closed):
+    return bytes([RELAY_CMD_ENABLE]), bytes([RELAY_CMD_CLOSE if closed else RELAY_CMD_OPEN])
+
+
+# ---------------- seq：单线程顺序 ----------------
+def run_seq(rig, seconds, relay_period, c):
+    deframers = [Deframer(dev_id=PPX_ID_BLE) for _ in rig.ble]
+    t_end = time.monotonic() + seconds
+    next_relay = time.monotonic()
+    closed = False
+    partial = b""
+    while time.monotonic() < t_end:
+        for ser, deframer in zip(rig.ble, deframers):
+            ser.write(rig.frame)
+            if deframer.read_frame(ser, RESP_TIMEOUT) is None:
+                c.timeouts += 1
+            else:
+                c.requests += 1
+        if time.monotonic() >= next_relay:
+            closed = not closed
+            hello, switch = relay_cmd(closed)
+            rig.relay.write(hello)
+            rig.relay.read(1)
+            rig.relay.write(switch)
+            c.switches += 1
+            next_relay += relay_period
+        data = partial + rig.log.read(rig.log.in_waiting) if rig.log.in_waiting else partial
+        lines = data.split(b"\n")
+        partial = lines.pop()
+        c.lines += len(lines)
+    c.add_cpu(time.thread_time())
+
+
+# ---------------- thread：每端口一个线程 ----------------
+def run_threads(rig, seconds, relay_period, c):
+    t_end = time.monotonic() + seconds
+
+    def ble_worker(ser):
+        t0 = time.thread_time()
+        deframer = Deframer(dev_id=PPX_ID_BLE)
+        n = 0
+        while time.monotonic() < t_end:
+            ser.write(rig.frame)
+            if deframer.read_frame(ser, RESP_TIMEOUT) is None:
+                c.timeouts += 1
+            else:
+                n += 1
+        c.requests += n
+        c.add_cpu(time.thread_time() - t0)
+
+    def relay_worker():
+        t0 = time.thread_time()
+        closed = False
+        while time.monotonic() < t_end:
+            closed = not closed
+            hello, switch = relay_cmd(closed)
+            rig.relay.write(hello)
+            rig.relay.read(1)
+            rig.relay.write(switch)
+            c.switches += 1
+            time.sleep(relay_period)
+        c.add_cpu(time.thread_time() - t0)
+
+    def log_worker():
+        t0 = time.thread_time()
+        while time.monotonic() < t_end:
+            if rig.log.in_waiting > 0:
+                if rig.log.readline():
+                    c.lines += 1
+            else:
+                time.sleep(0.1)
+        c.add_cpu(time.thread_time() - t0)
+
+    threads = [threading.Thread(target=ble_worker, args=(ser,)) for ser in rig.ble]
+    threads += [threading.Thread(target=relay_worker), threading.Thread(target=log_worker)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+# ---------------- async：单事件循环 ----------------
+async def run_async(rig, seconds, relay_period, c):
+    t0 = time.thread_time()
+    loop = asyncio.get_running_loop()
+    t_end = loop.time() + seconds
+    ports = [AsyncSerial(ser, Deframer(dev_id=PPX_ID_BLE)) for ser in rig.ble]
+    relay = AsyncSerial(rig.relay)
+    log = AsyncSerial(rig.log)
+
+    async def ble_task(port):
+        while loop.time() < t_end:
+            if await port.request(rig.frame, RESP_TIMEOUT) is None:
+                c.timeouts += 1
+            else:
+                c.requests += 1
+
+    async def relay_task():
+        closed = False
+        while loop.time() < t_end:
+            closed = not closed
+            hello, switch = relay_cmd(closed)
+            relay.discard()
+            relay.write(hello)
+            await relay.read(1, RESP_TIMEOUT)
+            relay.write(switch)
+            c.switches += 1
+            await asyncio.sleep(relay_period)
+
+    async def log_task():
+        while loop.time() < t_end:
+            if await log.readline(t_end - loop.time()) is not None:
+                c.lines += 1
+
+    try:
+        await asyncio.gather(*(ble_task(p) for p in ports), relay_task(), log_task())
+    finally:
+        for port in ports + [relay, log]:
+            port.close()
+    c.add_cpu(time.thread_time() - t0)
+
+
+def main():
+    if os.name != "posix":
+        print("需要伪终端（Linux/macOS）")
+        return
+    parser = argparse.ArgumentParser(description="多串口并发：线程轮询 / 单线程顺序 / asyncio")
+    parser.add_argument("--ports", type=int, default=4, help="BLE 模拟器数量")
+    parser.add_argument("--latency", type=float, default=0.005, help="BLE 应答延时（秒）")
+    parser.add_argument("--seconds", type=float, default=3.0, help="每种方式运行时长（秒）")
+    parser.add_argument("--relay-period", type=float, default=0.5, help="继电器切换间隔（秒）")
+    args = parser.parse_args()
+
+    print(f"BLE 端口 {args.ports} 个，应答延时 {args.latency * 1000:.0f} ms，每种方式 {args.seconds:.0f} s\n")
+    print(f"{'方式':<8}{'往返/s':>10}{'超时':>6}{'继电器切换':>10}{'日志行':>8}{'主机CPU(s)':>12}{'CPU/往返(us)':>14}")
+    for name in ("seq", "thread", "async"):
+        rig = Rig(args.ports, args.latency)
+        c = Counters()
+        t0 = time.perf_counter()
+        if name == "seq":
+            run_seq(rig, args.seconds, args.relay_period, c)
+        elif name == "thread":
+            run_threads(rig, args.seconds, args.relay_period, c)
+        else:
+            asyncio.run(run_async(rig, args.seconds, args.relay_period, c))
+        wall = time.perf_counter() - t0
+        rig.close()
+        per = c.cpu / c.requests * 1e6 if c.requests else 0.0
+        print(f"{name:<8}{c.requests / wall:>10.0f}{c.timeouts:>6}{c.switches:>10}{c.lines:>8}"
+              f"{c.cpu:>12.2f}{per:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+心跳写合并：总线/锁占空比对比
+============================================================
+按 mcb_V1.4.5 / V1.4.6 的心跳写法模拟每个 150 ms 周期持锁发送的帧，
+对比逐帧 WRITE、WriteBatcher 合并 MULTWRITE、再加 ShadowCache 脏标记/保活后：
+- 每周期帧数、线上字节数
+- 每周期持锁时间（线上传输时间 + 脚本中的 sleep）与占空比
+
+帧内容由纯 Python 编解码真实组包得到，时间按 460800 baud 计算，不实际 sleep。
+
+用法：
+    python bench_batcher.py --ticks 1000
+"""
+
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ppx.batcher import WriteBatcher  # noqa: E402
+from ppx.codec import PyRegionCodec  # noqa: E402
+from ppx.regmap import write_reg  # noqa: E402
+from ppx.session import CodecSession  # noqa: E402
+from ppx.shadow import ShadowCache, DEFAULT_KEEPALIVE  # noqa: E402
+from ppx.structs import (  # noqa: E402
+    PPX_ID_MCB, PPX_MSG_WRITE,
+    PPX_RT_SETTING_REG, PPX_RUN_MODE_REG, PPX_GEARS_REG, PPX_TARGET_SPEED_REG, PPX_DAT_SETTING_REG,
+)
+
+BYTE_TIME = 10 / 460800
+HB_PERIOD = 0.15
+
+# 心跳场景：(名称, 每周期写入 [(reg, value)], 原写法两帧之间的 sleep)
+SCENARIOS = [
+    ("V1.4.5 灯光+速度", [(PPX_RT_SETTING_REG, 0x0C), (PPX_TARGET_SPEED_REG, 300)], 0.05),
+    ("V1.4.6 模式+灯光+速度+权限", [(PPX_RUN_MODE_REG, 7), (PPX_RT_SETTING_REG, 0x0C),
+                                (PPX_TARGET_SPEED_REG, 300), (PPX_DAT_SETTING_REG, 0x20)], 0.0),
+]
+
+
+class WireCounter:
+    def __init__(self):
+        self.session = CodecSession(PyRegionCodec(), PPX_ID_MCB)
+        self.frames = 0
+        self.bytes = 0
+
+    def send(self, cmd, reg, nums):
+        frame = self.session.format(cmd, reg, nums)
+        self.frames += 1
+        self.bytes += len(frame)
+        return len(frame) > 0
+
+
+def run_legacy(writes, gap, ticks):
+    wire = WireCounter()
+    held = 0.0
+    for _ in range(ticks):
+        before = wire.bytes
+        for i, (reg, value) in enumerate(writes):
+            write_reg(wire.session.codec.g_data, reg, value)
+            wire.send(PPX_MSG_WRITE, reg, 1)
+            if i < len(writes) - 1:
+                held += gap
+        held += (wire.bytes - before) * BYTE_TIME
+    return wire, held
+
+
+def run_batched(writes, ticks):
+    wire = WireCounter()
+    batcher = WriteBatcher(wire.send, wire.session.codec.g_data)
+    batcher.mark_known(PPX_RUN_MODE_REG, PPX_GEARS_REG)  # 初始化时已写过 RUN_MODE/GEAR
+    held = 0.0
+    for _ in range(ticks):
+        before = wire.bytes
+        for reg, value in writes:
+            batcher.set(reg, value)
+        batcher.flush()
+        held += (wire.bytes - before) * BYTE_TIME
+    return wire, held
+
+
+def run_shadow(writes, ticks):
+    """寄存器值不变，只在保活到期时重发；时间用虚拟时钟按心跳周期推进"""
+    wire = WireCounter()
+    batcher = WriteBatcher(wire.send, wire.session.codec.g_data)
+    batcher.mark_known(PPX_RUN_MODE_REG, PPX_GEARS_REG)
+    now = [0.0]
+    shadow = ShadowCache(batcher, keepalive=DEFAULT_KEEPALIVE, clock=lambda: now[0])
+    for reg, value in writes:
+        shadow.track(reg, value)
+    held = 0.0
+    for _ in range(ticks):
+        before = wire.bytes
+        shadow.tick()
+        held += (wire.bytes - before) * BYTE_TIME
+        now[0] += HB_PERIOD
+    return wire, held
+
+
+def main():
+    parser = argparse.ArgumentParser(description="心跳写合并占空比对比")
+    parser.add_argument("--ticks", type=int, default=1000, help="心跳周期数")
+    args = parser.parse_args()
+
+    print(f"{'场景':<28}{'方式':<10}{'帧/周期':>8}{'字节/周期':>10}{'持锁 ms/周期':>14}{'占空比':>9}")
+    print("-" * 82)
+    for name, writes, gap in SCENARIOS:
+        for mode, (wire, held) in (("逐帧", run_legacy(writes, gap, args.ticks)),
+                                   ("合并", run_batched(writes, args.ticks)),
+                                   ("脏标记", run_shadow(writes, args.ticks))):
+            per_tick = held / args.ticks
+            duty = per_tick / (per_tick + HB_PERIOD)
+            print(f"{name:<28}{mode:<10}{wire.frames / args.ticks:>8.1f}{wire.bytes / args.ticks:>10.1f}"
+                  f"{per_tick * 1000:>14.2f}{duty * 100:>8.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+BLE 自动化测试工具全量用例吞吐量（无实物灯板）
+============================================================
+在 Linux 伪终端上跑 BLE 灯板模拟器（emulator.ble），直接加载
+ble_自动化测试工具（测试版本）-V1.6.py 中的 BLEProtocol / AutoTester（python 编解码后端），
+执行 make_combo_cases 生成的全部组合用例（2187 条），统计：
+
+- 用例/秒、PASS/FAIL 数量
+- 不同故障场景下的表现：应答延时、丢应答、应答损坏（CRC 错）
+  丢应答/损坏应答都应表现为该用例 FAIL，且只多花一个 recv_timeout，不影响后续用例
+
+用法（仅 Linux）：
+    python bench_ble.py --limit 500 --recv-timeout 0.05
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import importlib.util
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+from emulator.ble import BleEmulator  # noqa: E402
+from emulator.transport import PtyServer  # noqa: E402
+
+BLE_TOOL = os.path.join(HERE, "..", "libs_lcb", "正式可用", "ble_自动化测试工具（测试版本）-V1.6.py")
+BAUDRATE = 460800
+
+SCENARIOS = [
+    ("无故障", {}),
+    ("延时 2ms", {"latency": 0.002}),
+    ("丢应答 1%", {"drop_rate": 0.01}),
+    ("损坏 1%", {"corrupt_rate": 0.01}),
+]
+
+
+def load_tool():
+    spec = importlib.util.spec_from_file_location("ble_tool_v16", BLE_TOOL)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.DEBUG_MODE = False
+    return module
+
+
+def run(tool, cases, faults, recv_timeout, seed):
+    emu = BleEmulator(seed=seed, **faults)
+    server = PtyServer(emu, pace=True, baudrate=BAUDRATE)
+    server.start()
+    out_dir = tempfile.mkdtemp(prefix="bench_ble_")
+    ble = tool.BLEProtocol("", server.port, BAUDRATE, recv_timeout=recv_timeout, backend="python")
+    ble.set_logger(lambda level, message: None)
+    tester = tool.AutoTester(ble, out_dir)
+    try:
+        t0 = time.perf_counter()
+        tester.run_cases(cases)
+        dt = time.perf_counter() - t0
+    finally:
+        ble.close()
+        server.close()
+        shutil.rmtree(out_dir, ignore_errors=True)
+    passed = sum(1 for r in tester.results if r["verdict"] == "PASS")
+    host = {"crc_errors": ble.deframer.crc_errors, "resyncs": ble.deframer.resyncs}
+    return dt, passed, len(tester.results) - passed, emu.stats(), host
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BLE 自动化测试工具全量用例吞吐量")
+    parser.add_argument("--limit", type=int, default=0, help="只跑前 N 条用例（0 = 全部）")
+    parser.add_argument("--recv-timeout", type=float, default=0.05, help="BLEProtocol 接收超时（秒）")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    tool = load_tool()
+    cases = tool.make_combo_cases()
+    if args.limit:
+        cases = cases[:args.limit]
+    print(f"用例 {len(cases)} 条，recv_timeout {args.recv_timeout * 1000:.0f} ms\n")
+    print(f"{'场景':<12}{'耗时(s)':>10}{'用例/s':>10}{'PASS':>8}{'FAIL':>8}{'丢弃':>8}{'损坏':>8}{'主机CRC错':>10}")
+    for name, faults in SCENARIOS:
+        dt, passed, failed, st, host = run(tool, cases, faults, args.recv_timeout, args.seed)
+        print(f"{name:<12}{dt:>10.2f}{len(cases) / dt:>10.0f}{passed:>8}{failed:>8}"
+              f"{st['dropped']:>8}{st['corrupted']:>8}{host['crc_errors']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+总线调度：全局锁 vs BusScheduler 时延对比
+============================================================
+按 mcb_V1.4.5 / V1.4.6 的负载模拟三类总线操作（串口 I/O 用 sleep 代替）：
+- 心跳：每 150 ms 一次，写一帧约 1 ms
+- 测试读：测试用例线程不断读转速，每次往返 80 ms（脚本中的固定等待）
+- 后台遥测：每 200 ms 一次状态轮询，每次往返 80 ms
+
+“全局锁”方式：三个线程各自 sleep 后抢 threading.Lock；
+“调度器”方式：同样的负载以任务形式交给 BusScheduler（控制 > 测试 > 遥测）。
+输出各类请求的 p50/p99/max 时延与心跳截止时间（一个周期）超时次数。
+
+用法：
+    python bench_bus.py --seconds 10
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ppx.bus import BusScheduler, PRIO_CONTROL, PRIO_TEST, PRIO_TELEMETRY, percentile  # noqa: E402
+
+HB_PERIOD = 0.15
+HB_IO = 0.001
+READ_IO = 0.08
+TELEMETRY_PERIOD = 0.2
+
+
+def report(name, samples, misses=None):
+    data = sorted(samples)
+    if not data:
+        return
+    extra = "" if misses is None else f"{misses:>8}"
+    print(f"{name:<16}{len(data):>6}{percentile(data, 50) * 1000:>10.1f}{percentile(data, 99) * 1000:>10.1f}"
+          f"{data[-1] * 1000:>10.1f}{extra}")
+
+
+def run_lock(seconds):
+    lock = threading.Lock()
+    stop = time.monotonic() + seconds
+    hb, test, tele = [], [], []
+
+    def heartbeat():
+        due = time.monotonic()
+        while time.monotonic() < stop:
+            with lock:
+                time.sleep(HB_IO)
+            done = time.monotonic()
+            hb.append(done - due)
+            due = max(due + HB_PERIOD, done)  # 落后时与调度器一样从当前时刻重新对齐
+            time.sleep(max(0.0, due - time.monotonic()))
+
+    def telemetry():
+        while time.monotonic() < stop:
+            t0 = time.monotonic()
+            with lock:
+                time.sleep(READ_IO)
+            tele.append(time.monotonic() - t0)
+            time.sleep(TELEMETRY_PERIOD)
+
+    threads = [threading.Thread(target=heartbeat), threading.Thread(target=telemetry)]
+    for t in threads:
+        t.start()
+    while time.monotonic() < stop:
+        t0 = time.monotonic()
+        with lock:
+            time.sleep(READ_IO)
+        test.append(time.monotonic() - t0)
+    for t in threads:
+        t.join()
+    misses = sum(1 for x in hb if x > HB_PERIOD)
+    return hb, misses, test, tele
+
+
+def run_scheduler(seconds):
+    bus = BusScheduler("bench-bus")
+    stop = time.monotonic() + seconds
+    test = []
+    bus.every(HB_PERIOD, lambda: time.sleep(HB_IO), prio=PRIO_CONTROL)
+    bus.every(TELEMETRY_PERIOD + READ_IO, lambda: time.sleep(READ_IO), prio=PRIO_TELEMETRY)
+    bus.start()
+    while time.monotonic() < stop:
+        t0 = time.monotonic()
+        bus.call(time.sleep, READ_IO, prio=PRIO_TEST)
+        test.append(time.monotonic() - t0)
+    bus.stop()
+    return bus.stats(), test
+
+
+def main():
+    parser = argparse.ArgumentParser(description="全局锁 vs 总线调度器时延对比")
+    parser.add_argument("--seconds", type=float, default=10.0, help="每种方式运行时长（秒）")
+    args = parser.parse_args()
+
+    header = f"{'类别':<16}{'次数':>6}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'超时':>8}"
+
+    print("== 全局锁 ==")
+    print(header)
+    hb, misses, test, tele = run_lock(args.seconds)
+    report("心跳(计划->完成)", hb, misses)
+    report("测试读", test)
+    report("遥测", tele)
+
+    print("\n== BusScheduler ==")
+    print(header)
+    st, test = run_scheduler(args.seconds)
+    c = st["control"]
+    print(f"{'心跳(计划->完成)':<16}{c['count']:>6}{c['p50_ms']:>10.1f}{c['p99_ms']:>10.1f}"
+          f"{c['max_ms']:>10.1f}{c['misses']:>8}")
+    report("测试读", test)
+    t = st["telemetry"]
+    print(f"{'遥测':<16}{t['count']:>6}{t['p50_ms']:>10.1f}{t['p99_ms']:>10.1f}{t['max_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+PPX 编解码后端性能对比
+============================================================
+对比纯 Python 编解码与 ppx_region.dll（ctypes 调用）的组包/解析吞吐。
+DLL 只能在 Windows 下加载，其他平台自动跳过 DLL 部分。
+
+用法：
+    python bench_codec.py
+    python bench_codec.py --dll ../libcs_mcb/libs/ppx_region.dll -n 50000
+"""
+
+import os
+import sys
+import time
+import argparse
+from ctypes import create_string_buffer, byref, c_uint8
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ppx.codec import open_region_codec, BACKEND_DLL, BACKEND_PYTHON  # noqa: E402
+from ppx.structs import ppx_region_msg_t, PPX_CMD_REQ, PPX_CMD_RSP, PPX_ID_MCB  # noqa: E402
+
+DEFAULT_DLL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../libcs_mcb/libs/ppx_region.dll")
+
+# 典型场景：单寄存器读请求 / 遥测区块响应 (reg 10~15)
+CASES = [
+    ("REQ READ  reg15", PPX_CMD_REQ, 0x01, 15, 1),
+    ("RSP MULT  reg10x6", PPX_CMD_RSP, 0x82, 10, 6),
+]
+
+
+def bench_backend(codec, n: int):
+    results = []
+    buf = create_string_buffer(256)
+    g = codec.g_ppx_region_data
+    g.bus_voltage, g.bus_current, g.hall_state = 480, 12, 3
+
+    for name, cmd_type, cmd, addr, nums in CASES:
+        msg = ppx_region_msg_t(id=PPX_ID_MCB, cmd=cmd, reg_addr=addr, reg_nums=nums)
+        t0 = time.perf_counter()
+        for _ in range(n):
+            length = codec.ppx_com_region_format(cmd_type, byref(msg), buf)
+        t_fmt = time.perf_counter() - t0
+
+        frame = buf.raw[:length]
+        arr = (c_uint8 * length)(*frame)
+        rsp = ppx_region_msg_t(id=PPX_ID_MCB)
+        t0 = time.perf_counter()
+        for _ in range(n):
+            codec.ppx_com_region_parse(arr, length, byref(rsp))
+        t_parse = time.perf_counter() - t0
+        results.append((name, n / t_fmt, n / t_parse))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PPX 编解码后端性能对比")
+    parser.add_argument("-n", type=int, default=20000, help="每项循环次数")
+    parser.add_argument("--dll", default=DEFAULT_DLL, help="ppx_region.dll 路径")
+    args = parser.parse_args()
+
+    print(f"{'后端':<8}{'场景':<22}{'组包 帧/s':>14}{'解析 帧/s':>14}")
+    print("-" * 58)
+    for backend in (BACKEND_PYTHON, BACKEND_DLL):
+        try:
+            codec = open_region_codec(backend, args.dll)
+        except OSError as e:
+            print(f"{backend:<8}跳过（DLL 无法加载: {e}）")
+            continue
+        for name, fmt_rate, parse_rate in bench_backend(codec, args.n):
+            print(f"{backend:<8}{name:<22}{fmt_rate:>14,.0f}{parse_rate:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+PPX 流式分帧器吞吐测试
+============================================================
+生成数 MB 的合成串口抓包（合法帧 + 随机噪声 + 少量损坏帧），
+按串口读取的块大小分块送入 Deframer，统计吞吐并与 460800 波特率的线速对比。
+同时给出 mcb_V1.3 中 extract_frames（index(0xA5)/index(0x55) 切分）的结果作参照。
+
+用法：
+    python bench_deframer.py
+    python bench_deframer.py --size-mb 16 --chunk 64
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ppx.codec import packet_format  # noqa: E402
+from ppx.deframer import Deframer  # noqa: E402
+from ppx.structs import PPX_CMD_RSP, PPX_ID_MCB  # noqa: E402
+
+# 460800 8N1 => 每字节 10 bit
+LINE_RATE = 460800 / 10
+
+
+def make_capture(size: int, seed: int = 0):
+    """返回 (抓包数据, 合法帧数)"""
+    rnd = random.Random(seed)
+    out = bytearray()
+    frames = 0
+    while len(out) < size:
+        payload = bytes(rnd.randrange(256) for _ in range(rnd.randint(2, 40)))
+        frame = bytearray(packet_format(PPX_CMD_RSP, PPX_ID_MCB, 0x02, payload))
+        r = rnd.random()
+        if r < 0.02:
+            frame[rnd.randrange(6, len(frame) - 2)] ^= 0x01     # 损坏帧
+        else:
+            frames += 1
+        if r > 0.9:
+            out += bytes(rnd.randrange(256) for _ in range(rnd.randint(1, 16)))  # 线路噪声
+        out += frame
+    return bytes(out), frames
+
+
+def extract_frames(buf: bytes):
+    """mcb_V1.3 原实现（参照用）"""
+    frames = []
+    start = 0
+    while True:
+        try:
+            start = buf.index(0xA5, start)
+            end = buf.index(0x55, start + 1)
+            frames.append(buf[start:end + 1])
+            start = end + 1
+        except ValueError:
+            break
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PPX 流式分帧器吞吐测试")
+    parser.add_argument("--size-mb", type=float, default=4.0, help="合成抓包大小（MB）")
+    parser.add_argument("--chunk", type=int, default=64, help="每次送入的字节数（模拟 ser.read 块大小）")
+    args = parser.parse_args()
+
+    print("生成合成抓包...")
+    capture, expected = make_capture(int(args.size_mb * 1024 * 1024))
+    size = len(capture)
+    print(f"抓包大小: {size / 1024 / 1024:.2f} MB, 合法帧: {expected}")
+
+    deframer = Deframer()
+    got = 0
+    t0 = time.perf_counter()
+    for i in range(0, size, args.chunk):
+        got += len(deframer.feed(capture[i:i + args.chunk]))
+    elapsed = time.perf_counter() - t0
+    rate = size / elapsed
+    print("-" * 50)
+    print(f"Deframer (chunk={args.chunk})")
+    print(f"  耗时: {elapsed:.2f} s, 吞吐: {rate / 1024 / 1024:.2f} MB/s, {got / elapsed:,.0f} 帧/s")
+    print(f"  线速倍数: {rate / LINE_RATE:.1f}x (460800 baud = {LINE_RATE / 1024:.1f} KB/s)")
+    print(f"  输出帧: {got}/{expected}, 统计: {deframer.stats()}")
+
+    t0 = time.perf_counter()
+    old = extract_frames(capture)
+    elapsed = time.perf_counter() - t0
+    print("-" * 50)
+    print("extract_frames (原实现，整段一次切分)")
+    print(f"  耗时: {elapsed:.2f} s, 切出片段: {len(old)}（含切错的片段，未做 CRC 校验）")
+
+
+if __name__ == "__main__":
+    main()
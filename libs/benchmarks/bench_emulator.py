@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+MCB 模拟器吞吐量
+============================================================
+模拟器要作为 TestEngine / RegionProtocol / 白盒用例基准测试的后端，
+处理能力必须不低于 460800 baud 串口的线上速率（约 46 KB/s 双向）。
+
+- 进程内（LoopPort）：连续发送 READ / MULTREAD / MULTWRITE 请求，统计设备端每秒处理的
+  帧数与收发字节数，换算成等效波特率
+- 伪终端（PtyServer，仅 Linux）：主机用 pyserial 逐帧请求/应答，统计往返次数与等效波特率
+
+用法：
+    python bench_emulator.py --seconds 2
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from emulator.mcb import McbEmulator  # noqa: E402
+from emulator.transport import LoopPort, PtyServer  # noqa: E402
+from ppx.codec import PyRegionCodec  # noqa: E402
+from ppx.deframer import Deframer  # noqa: E402
+from ppx.session import CodecSession  # noqa: E402
+from ppx.structs import (  # noqa: E402
+    PPX_ID_MCB, PPX_MSG_READ, PPX_MSG_MULTREAD, PPX_MSG_MULTWRITE,
+    PPX_HW_VERSION_REG, PPX_MCU_ERRCODE_REG, PPX_RT_SETTING_REG,
+)
+
+LINE_BAUDRATE = 460800
+
+REQUESTS = [
+    ("READ hw_version", PPX_MSG_READ, PPX_HW_VERSION_REG, 1),
+    ("MULTREAD 0x06~0x12", PPX_MSG_MULTREAD, PPX_MCU_ERRCODE_REG, 13),
+    ("MULTWRITE 0x1A~0x1D", PPX_MSG_MULTWRITE, PPX_RT_SETTING_REG, 4),
+]
+
+
+def baud(nbytes, seconds):
+    return nbytes * 10 / seconds
+
+
+def bench_loop(seconds):
+    print(f"{'进程内 LoopPort':<24}{'帧/s':>10}{'字节/s':>12}{'等效波特率':>14}{'倍数':>8}")
+    for name, cmd, addr, nums in REQUESTS:
+        emu = McbEmulator()
+        port = LoopPort(emu)
+        frame = bytes(CodecSession(PyRegionCodec(), PPX_ID_MCB).format(cmd, addr, nums))
+        n = 0
+        t0 = time.perf_counter()
+        while time.perf_counter() - t0 < seconds:
+            for _ in range(100):
+                port.write(frame)
+                port.reset_input_buffer()
+            n += 100
+        dt = time.perf_counter() - t0
+        st = emu.stats()
+        total = st["bytes_in"] + st["bytes_out"]
+        rate = baud(total, dt)
+        print(f"{name:<24}{n / dt:>10.0f}{total / dt:>12.0f}{rate:>14.0f}{rate / LINE_BAUDRATE:>8.1f}")
+
+
+def bench_pty(seconds):
+    import serial
+
+    print(f"\n{'伪终端 PtyServer':<24}{'往返/s':>10}{'字节/s':>12}{'等效波特率':>14}{'倍数':>8}")
+    for name, cmd, addr, nums in REQUESTS:
+        emu = McbEmulator()
+        server = PtyServer(emu)
+        server.start()
+        ser = serial.Serial(server.port, LINE_BAUDRATE, timeout=0.1)
+        session = CodecSession(PyRegionCodec(), PPX_ID_MCB)
+        deframer = Deframer(dev_id=PPX_ID_MCB)
+        frame = bytes(session.format(cmd, addr, nums))
+        n = 0
+        t0 = time.perf_counter()
+        while time.perf_counter() - t0 < seconds:
+            ser.write(frame)
+            if deframer.read_frame(ser, 0.5) is None:
+                print("  应答超时")
+                break
+            n += 1
+        dt = time.perf_counter() - t0
+        st = emu.stats()
+        total = st["bytes_in"] + st["bytes_out"]
+        rate = baud(total, dt)
+        print(f"{name:<24}{n / dt:>10.0f}{total / dt:>12.0f}{rate:>14.0f}{rate / LINE_BAUDRATE:>8.1f}")
+        ser.close()
+        server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MCB 模拟器吞吐量")
+    parser.add_argument("--seconds", type=float, default=2.0, help="每项测试时长（秒）")
+    args = parser.parse_args()
+    bench_loop(args.seconds)
+    if os.name == "posix":
+        bench_pty(args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+日志写入：每行 open/close vs 后台 LogSink
+============================================================
+按 AutoTester 的 FileLogger 格式（"[时间] [级别] 消息"）写 N 行调试日志，
+每 --per-case 行视为一条用例结束，对比：
+
+- 逐行打开 : 原 FileLogger / save_serial_log 写法，每行 with open(path, 'a') 追加
+- LogSink  : stress.logsink.LogSink，调用方只入队；每条用例结束调用 sync()（flush + fsync）
+
+"调用方耗时" 是测试线程在写日志上花的时间（LogSink 含 sync 等待），"总耗时" 含 close() 排空。
+两种方式写出的文件内容必须完全一致。
+
+用法：
+    python bench_logsink.py --lines 50000 --per-case 50
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import datetime as _dt
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from stress.logsink import LogSink  # noqa: E402
+
+
+def make_lines(n):
+    ts = _dt.datetime(2024, 1, 1).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+    return [f"[{ts}] [DEBUG] TX: 5A A5 {i % 256:02X} 10 01 02 03 04 05 06 07 08 | 解析: run_mode=1 gear=2\n"
+            for i in range(n)]
+
+
+def run_open(path, lines, per_case):
+    t0 = time.perf_counter()
+    for line in lines:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line)
+    t = time.perf_counter() - t0
+    return t, t
+
+
+def run_sink(path, lines, per_case):
+    t0 = time.perf_counter()
+    sink = LogSink(path)
+    for i, line in enumerate(lines, 1):
+        sink.write(line)
+        if i % per_case == 0:
+            sink.sync()
+    t1 = time.perf_counter()
+    sink.close()
+    t2 = time.perf_counter()
+    return t1 - t0, t2 - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="日志写入吞吐基准")
+    parser.add_argument("--lines", type=int, default=50000)
+    parser.add_argument("--per-case", type=int, default=50, help="每条用例的日志行数（LogSink 每条用例 sync 一次）")
+    parser.add_argument("--dir", default=None, help="日志目录（默认系统临时目录）")
+    args = parser.parse_args()
+
+    lines = make_lines(args.lines)
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        results = {}
+        for name, fn in (("逐行打开", run_open), ("LogSink", run_sink)):
+            path = os.path.join(tmp, f"{name}.log")
+            caller, total = fn(path, lines, args.per_case)
+            with open(path, 'rb') as f:
+                results[name] = f.read()
+            print(f"{name:<8} 调用方 {caller:7.3f}s  总计 {total:7.3f}s  "
+                  f"{args.lines / caller:>10.0f} 行/s")
+        assert results["逐行打开"] == results["LogSink"], "文件内容不一致"
+    print(f"\n{args.lines} 行，每 {args.per_case} 行 sync 一次，文件内容一致")
+
+
+if __name__ == "__main__":
+    main()
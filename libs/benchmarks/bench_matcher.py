@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+日志关键字匹配：逐关键字 `in` vs Aho–Corasick 自动机
+============================================================
+用 DUT 日志模拟器生成大量开关机日志（含各类故障行），按脚本原有方式预处理
+（去 ANSI、转小写、去空格）后，对比每行的关键字检测耗时：
+
+- 逐关键字 in : 继电器开关机压力测试.process_log_line 原写法，按类别循环 `kw in line`
+- 自动机      : stress.matcher.KeywordMatcher(automaton=True)，所有类别一次扫描
+- 自动选择    : KeywordMatcher 默认行为，关键字少时逐个 in，多时用自动机
+
+关键字表取脚本的 SUCCESS/EXCEPTION/INFO/ERROR/CRITICAL 五类，再追加 N 个合成关键字
+（模拟关键字表增长），观察两种方式随关键字数的变化。
+
+用法：
+    python bench_matcher.py --cycles 2000 --extra 0 50 200 1000
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from emulator.dut_log import DutLogEmulator  # noqa: E402
+from stress.matcher import KeywordMatcher  # noqa: E402
+
+ANSI_ESCAPE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+
+CATEGORIES = {
+    "SUCCESS": ["voice_msgnum:9", "voice_msgnum:10"],
+    "EXCEPTION": ["assertionfailedatfunction"],
+    "INFO": ["voice_msgnum", "voice_msgcutoff", "ui_pm_acc"],
+    "ERROR": ["paramisinvalid"],
+    "CRITICAL": ["[e/motor]reg_addr(00)isunviald"],
+}
+
+
+def make_lines(cycles, seed):
+    dut = DutLogEmulator(clock=lambda: 0.0, seed=seed, param_invalid=0.02, motor_reg=0.01,
+                         assertion=0.02, comm_loss=0.01, garbled=0.05)
+    t = 0.0
+    for _ in range(cycles):
+        dut.set_power(True, now=t)
+        dut.set_power(False, now=t + 5.0)
+        t += 30.0
+    raw = dut.read_due(now=t)
+    lines = raw.decode("utf-8", errors="replace").split("\n")
+    return [ANSI_ESCAPE.sub("", line).lower().replace(" ", "") for line in lines if line.strip()]
+
+
+def synthetic_keywords(n, seed):
+    rng = random.Random(seed)
+    words = ("pm", "ui", "voice", "motor", "nfc", "acc", "key", "evt", "tsk", "ble", "at", "net")
+    out = set()
+    while len(out) < n:
+        out.add("_".join(rng.sample(words, 3)) + f":{rng.randrange(100)}")
+    return sorted(out)
+
+
+def scan_loops(lines, categories):
+    hits = 0
+    items = list(categories.items())
+    for line in lines:
+        for _, kws in items:
+            for kw in kws:
+                if kw in line:
+                    hits += 1
+    return hits
+
+
+def scan_matcher(lines, matcher):
+    hits = 0
+    for line in lines:
+        for kws in matcher.scan(line).values():
+            hits += len(kws)
+    return hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="日志关键字匹配基准")
+    parser.add_argument("--cycles", type=int, default=2000, help="模拟开关机次数（决定日志行数）")
+    parser.add_argument("--extra", type=int, nargs="+", default=[0, 50, 200, 1000], help="追加的合成关键字数")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    lines = make_lines(args.cycles, args.seed)
+    print(f"日志 {len(lines)} 行，平均 {sum(map(len, lines)) / len(lines):.0f} 字符/行\n")
+    print(f"{'关键字数':>8}{'状态数':>8}{'逐关键字 in 行/s':>18}{'自动机 行/s':>14}{'自动选择 行/s':>16}{'倍数':>8}")
+    for extra in args.extra:
+        cats = dict(CATEGORIES)
+        cats["INFO"] = CATEGORIES["INFO"] + synthetic_keywords(extra, args.seed)
+        matcher = KeywordMatcher(cats, automaton=True)
+        auto = KeywordMatcher(cats)
+
+        t0 = time.perf_counter()
+        h1 = scan_loops(lines, cats)
+        t1 = time.perf_counter()
+        h2 = scan_matcher(lines, matcher)
+        t2 = time.perf_counter()
+        h3 = scan_matcher(lines, auto)
+        t3 = time.perf_counter()
+        assert h1 == h2 == h3, (h1, h2, h3)
+
+        r1 = len(lines) / (t1 - t0)
+        r2 = len(lines) / (t2 - t1)
+        r3 = len(lines) / (t3 - t2)
+        print(f"{len(matcher.keywords):>8}{matcher.states:>8}{r1:>18.0f}{r2:>14.0f}{r3:>16.0f}{r3 / r1:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+多 DUT 并行（--ports）吞吐量随端口数的扩展（仅 Linux）
+============================================================
+每个 DUT 是一个独立的 BLE 灯板模拟器进程（python -m emulator.ble，伪终端），
+BLE 自动化测试脚本的 run_port 通过 stress.multidut.run_ports 在 1/2/4/8 个端口上并行执行：
+
+- replicate : 每个端口跑同样的用例，统计总执行条数/s（理想情况随端口数线性增长）
+- shard     : 用例分给各端口，统计完成整张表的耗时
+
+用法：
+    python bench_multidut.py --limit 300 --ports 1,2,4,8 --latency 0.002
+    python bench_multidut.py --dispatch shard --workers thread
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import importlib.util
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+LIBS = os.path.join(HERE, "..")
+sys.path.insert(0, LIBS)
+
+from stress.multidut import run_ports, MODES, MODE_REPLICATE  # noqa: E402
+
+BLE_TOOL = os.path.join(LIBS, "libs_lcb", "正式可用", "ble_自动化测试工具（测试版本）-V1.6.py")
+
+
+def load_tool(path):
+    spec = importlib.util.spec_from_file_location("ble_tool_bench", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module     # 进程池按模块名找到 run_port
+    spec.loader.exec_module(module)
+    return module
+
+
+def start_emulators(n, latency):
+    procs, ports = [], []
+    for i in range(n):
+        proc = subprocess.Popen(
+            [sys.executable, "-u", "-m", "emulator.ble", "--latency", str(latency), "--seed", str(i)],
+            cwd=LIBS, stdout=subprocess.PIPE, text=True, encoding="utf-8")
+        line = proc.stdout.readline()
+        ports.append(line.split(":", 1)[1].split()[0])
+        procs.append(proc)
+    return procs, ports
+
+
+def main():
+    if os.name != "posix":
+        print("需要伪终端（Linux/macOS）")
+        return
+    parser = argparse.ArgumentParser(description="多 DUT 并行吞吐量")
+    parser.add_argument("--limit", type=int, default=300, help="用例条数（取排列组合用例前 N 条）")
+    parser.add_argument("--ports", default="1,2,4,8", help="端口数列表")
+    parser.add_argument("--latency", type=float, default=0.002, help="模拟器应答延时（秒）")
+    parser.add_argument("--dispatch", default=MODE_REPLICATE, choices=MODES)
+    parser.add_argument("--workers", default="process", choices=["process", "thread"])
+    parser.add_argument("--debug", action="store_true", help="保持脚本 DEBUG_MODE（逐帧日志写入各 DUT 的 raw.log）")
+    args = parser.parse_args()
+
+    tool = load_tool(BLE_TOOL)
+    tool.DEBUG_MODE = args.debug
+    tool.print = lambda *a, **k: None
+    cases = tool.make_combo_cases()[:args.limit]
+    counts = [int(x) for x in args.ports.split(",")]
+    procs, all_ports = start_emulators(max(counts), args.latency)
+    options = {"dll": "", "baud": tool.BAUDRATE, "backend": "python", "loop_count": 0, "loop_delay": 0}
+
+    print(f"用例 {len(cases)} 条，分发 {args.dispatch}，{args.workers}，应答延时 {args.latency * 1000:.0f} ms\n")
+    print(f"{'端口数':<8}{'耗时(s)':>10}{'执行条数':>10}{'条/s':>10}{'加速比':>8}{'PASS':>8}{'错误':>6}")
+    base = None
+    try:
+        for n in counts:
+            out_dir = tempfile.mkdtemp(prefix="bench_multidut_")
+            try:
+                t0 = time.perf_counter()
+                runs = run_ports(tool.run_port, all_ports[:n], cases, out_dir, mode=args.dispatch,
+                                 options=options, use_processes=args.workers == "process")
+                wall = time.perf_counter() - t0
+            finally:
+                shutil.rmtree(out_dir, ignore_errors=True)
+            executed = sum(len(r.results) for r in runs)
+            passed = sum(1 for r in runs for x in r.results if x["verdict"] == "PASS")
+            errors = sum(1 for r in runs if r.error)
+            rate = executed / wall
+            base = base or rate
+            print(f"{n:<8}{wall:>10.2f}{executed:>10}{rate:>10.0f}{rate / base:>8.2f}{passed:>8}{errors:>6}")
+    finally:
+        for proc in procs:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
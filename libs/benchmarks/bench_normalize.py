@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+日志行预处理：逐行解码 + 字符串清洗 vs 字节级归一化
+============================================================
+用 DUT 日志模拟器生成开关机日志（含 ANSI 颜色、GB2312 中文与乱码故障行），
+对比每行从串口字节到关键字判定的完整路径：
+
+- 原写法   : decode('gb2312') → ansi_escape.sub → lower() → replace(" ", "") → str 匹配，
+             整轮再 "\\n".join → lower() → replace() 后做一次判定
+- 字节级   : stress.normalize.normalize(raw) → KeywordMatcher(binary=True)，
+             命中时才 display() 解码；整轮判定直接在归一化字节上进行
+
+两种路径的命中数必须一致。另外单独统计只做预处理（不含关键字匹配）的速率。
+
+用法：
+    python bench_normalize.py --cycles 5000
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from emulator.dut_log import DutLogEmulator  # noqa: E402
+from stress.matcher import KeywordMatcher  # noqa: E402
+from stress.normalize import normalize, display  # noqa: E402
+
+ANSI_ESCAPE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+
+LINE_CATEGORIES = {
+    "INFO": ["voice_msgnum", "voice_msgcutoff", "ui_pm_acc"],
+    "EXCEPTION": ["assertionfailedatfunction"],
+    "ERROR": ["paramisinvalid"],
+    "CRITICAL": ["[e/motor]reg_addr(00)isunviald"],
+}
+VERDICT_CATEGORIES = {
+    "MotorOn": ["motorpoweron"],
+    "PM_ACC": ["pm_acc_tim,"],
+    "PowerOff": ["power_off_system"],
+}
+
+
+def make_cycles(cycles, seed):
+    """每轮一个字节行列表，与脚本 readline() 得到的数据一致"""
+    dut = DutLogEmulator(clock=lambda: 0.0, seed=seed, param_invalid=0.02, motor_reg=0.01,
+                         assertion=0.02, comm_loss=0.01, garbled=0.05)
+    out = []
+    t = 0.0
+    for _ in range(cycles):
+        dut.set_power(True, now=t)
+        dut.set_power(False, now=t + 5.0)
+        t += 30.0
+        raw = dut.read_due(now=t)
+        out.append([line + b"\n" for line in raw.split(b"\n") if line])
+    return out
+
+
+def run_str(cycles):
+    line_matcher = KeywordMatcher(LINE_CATEGORIES)
+    verdict_matcher = KeywordMatcher(VERDICT_CATEGORIES)
+    hits = verdicts = 0
+    for lines in cycles:
+        collected = []
+        for raw in lines:
+            text = raw.decode("gb2312", errors="replace")
+            clean = ANSI_ESCAPE.sub("", text)
+            check = clean.lower().replace(" ", "")
+            collected.append(text.strip())
+            found = line_matcher.scan(check)
+            if found:
+                hits += sum(map(len, found.values()))
+                clean.strip()
+        full = "\n".join(collected).lower().replace(" ", "")
+        verdicts += bool(verdict_matcher.find(full))
+    return hits, verdicts
+
+
+def run_bytes(cycles):
+    line_matcher = KeywordMatcher(LINE_CATEGORIES, binary=True)
+    verdict_matcher = KeywordMatcher(VERDICT_CATEGORIES, binary=True)
+    hits = verdicts = 0
+    for lines in cycles:
+        collected = []
+        for raw in lines:
+            check = normalize(raw)
+            collected.append(check)
+            found = line_matcher.scan(check)
+            if found:
+                hits += sum(map(len, found.values()))
+                display(raw)
+        verdicts += bool(verdict_matcher.find(b"\n".join(collected)))
+    return hits, verdicts
+
+
+def prep_str(cycles):
+    for lines in cycles:
+        for raw in lines:
+            ANSI_ESCAPE.sub("", raw.decode("gb2312", errors="replace")).lower().replace(" ", "")
+
+
+def prep_bytes(cycles):
+    for lines in cycles:
+        for raw in lines:
+            normalize(raw)
+
+
+def rate(func, cycles, n):
+    t0 = time.perf_counter()
+    result = func(cycles)
+    return n / (time.perf_counter() - t0), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="日志行预处理基准")
+    parser.add_argument("--cycles", type=int, default=5000, help="模拟开关机次数")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    cycles = make_cycles(args.cycles, args.seed)
+    n = sum(map(len, cycles))
+    size = sum(len(line) for lines in cycles for line in lines)
+    print(f"日志 {n} 行，平均 {size / n:.0f} 字节/行\n")
+
+    p1, _ = rate(prep_str, cycles, n)
+    p2, _ = rate(prep_bytes, cycles, n)
+    s1, r1 = rate(run_str, cycles, n)
+    s2, r2 = rate(run_bytes, cycles, n)
+    assert r1 == r2, (r1, r2)
+
+    print(f"{'路径':<10}{'仅预处理 行/s':>16}{'含匹配判定 行/s':>18}")
+    print(f"{'原写法':<10}{p1:>16.0f}{s1:>18.0f}")
+    print(f"{'字节级':<10}{p2:>16.0f}{s2:>18.0f}")
+    print(f"{'倍数':<10}{p2 / p1:>16.2f}{s2 / s1:>18.2f}")
+    print(f"\n命中 {r1[0]} 次，判定成功 {r1[1]} 轮")
+
+
+if __name__ == "__main__":
+    main()
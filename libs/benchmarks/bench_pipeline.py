@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+BLE 自动化测试用例吞吐量：逐条停等 vs 流水线（--pipeline N）
+============================================================
+BLEProtocol 接在进程内 BLE 灯板模拟器上（emulator.transport.LoopPort），模拟器每帧应答延时
+--latency 秒；LoopPort 中多帧应答可以同时在途（各自到期可读），相当于往返时延固定、
+带宽充足的链路（蓝牙透传、USB 转串口缓冲）。
+
+- 停等   : AutoTester.run_cases 逐条 写 -> 等应答 -> 读 -> 等应答，每条用例 2 个往返
+- 流水线 : 写 + 回读作为一个事务提交，最多 N 帧在途，应答按 (ID, 命令, 寄存器) 匹配
+
+--drop / --corrupt 注入丢应答与应答损坏，验证缺失检测与整条重发：
+"回读一致" 统计回读的 LED 状态与该用例写入参数相同的条数（流水线错配时会不一致）。
+--verify 打开工具的 --pipeline-verify（readback_check，依赖模拟器回显写应答），
+连续丢两帧不同键的应答造成的错位也会被发现并重发。
+
+用法：
+    python bench_pipeline.py --limit 500 --latency 0.005 --depths 0,2,4,8,16
+    python bench_pipeline.py --drop 0.02 --corrupt 0.01 --verify
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+from emulator.ble import BleEmulator  # noqa: E402
+from emulator.transport import LoopPort  # noqa: E402
+from ppx.deframer import READ_POLL  # noqa: E402
+from bench_trace import load_tool, BLE_TOOL  # noqa: E402
+
+LED_FIELDS = ["screen_on", "brightness", "digital", "logo", "rim_state",
+              "rdygo", "turn_left", "turn_right", "ring"]
+
+
+def run(tool, cases, depth, args):
+    out_dir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    ble = tool.BLEProtocol("", "bench-loop", 460800, recv_timeout=args.timeout, backend="python")
+    emu = BleEmulator(latency=args.latency, drop_rate=args.drop, corrupt_rate=args.corrupt, seed=args.seed)
+    ble.serial_port = LoopPort(emu, timeout=READ_POLL)   # 与 _init_serial 一致
+    ble.serial_connected = True
+    stats = {}
+    ble.set_logger(lambda level, message: None)
+    tester = tool.AutoTester(ble, out_dir)
+    if depth:
+        # 取流水线统计
+        open_pipeline = ble.open_pipeline
+
+        def traced(n):
+            pipe = open_pipeline(n)
+            stats["pipe"] = pipe
+            return pipe
+        ble.open_pipeline = traced
+    try:
+        t0 = time.perf_counter()
+        tester.run_cases(cases, pipeline=depth, verify=args.verify)
+        dt = time.perf_counter() - t0
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+    results = tester.results
+    passed = sum(1 for r in results if r["verdict"] == "PASS")
+    consistent = sum(1 for r in results if r["checks"] and all(r["checks"][k] == r[k] for k in LED_FIELDS))
+    pipe = stats.get("pipe")
+    return dt, len(results), passed, consistent, pipe.stats() if pipe else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BLE 用例吞吐量：停等 vs 流水线")
+    parser.add_argument("--limit", type=int, default=500, help="用例条数（取排列组合用例前 N 条）")
+    parser.add_argument("--latency", type=float, default=0.005, help="模拟器应答延时（秒）")
+    parser.add_argument("--drop", type=float, default=0.0, help="丢应答概率")
+    parser.add_argument("--corrupt", type=float, default=0.0, help="应答损坏概率")
+    parser.add_argument("--timeout", type=float, default=0.1, help="接收超时（秒）")
+    parser.add_argument("--depths", default="0,2,4,8,16", help="流水线深度列表，0 为停等")
+    parser.add_argument("--verify", action="store_true", help="流水线校验写应答回显与回读一致")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--tool", default=BLE_TOOL, help="BLE 自动化测试脚本路径")
+    args = parser.parse_args()
+
+    tool = load_tool(args.tool)
+    tool.DEBUG_MODE = False
+    tool.print = lambda *a, **k: None
+    tool.PIPELINE_RETRIES = 5
+    cases = tool.make_combo_cases()[:args.limit]
+
+    print(f"用例 {len(cases)} 条，应答延时 {args.latency * 1000:.1f} ms，丢应答 {args.drop:.1%}，"
+          f"损坏 {args.corrupt:.1%}，超时 {args.timeout * 1000:.0f} ms，回读校验 {'开' if args.verify else '关'}\n")
+    print(f"{'方式':<10}{'耗时(s)':>9}{'条/s':>9}{'加速比':>8}{'PASS':>7}{'回读一致':>9}"
+          f"{'重试':>6}{'缺失':>6}{'过期':>6}{'校验不符':>9}{'p99(ms)':>9}")
+    base = None
+    for depth in [int(x) for x in args.depths.split(",")]:
+        dt, total, passed, consistent, ps = run(tool, cases, depth, args)
+        rate = total / dt
+        base = base or rate
+        name = f"流水线{depth}" if depth else "停等"
+        extra = (f"{ps['retried']:>6}{ps['missing']:>6}{ps['stale']:>6}{ps['mismatch']:>9}{ps['p99_ms']:>9.1f}"
+                 if ps else f"{'-':>6}{'-':>6}{'-':>6}{'-':>9}{'-':>9}")
+        print(f"{name:<10}{dt:>9.2f}{rate:>9.0f}{rate / base:>8.2f}{passed:>7}{consistent:>9}" + extra)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+MULTREAD 读规划效果对比
+============================================================
+模拟一次完整状态轮询（mcb_V1.4.5 _monitor_loop / 白盒测试 Case 2/6 读的寄存器），
+对比“每个寄存器一次 READ”与 ReadPlanner 合并后的往返次数和总线耗时。
+
+设备端为 MCB 模拟器（emulator.mcb，进程内 LoopPort 回环）。
+耗时按 460800 baud 线上传输时间 + 每次往返固定等待（脚本中 50~80 ms 的 sleep）累计，
+不实际 sleep。
+
+用法：
+    python bench_planner.py
+    python bench_planner.py --wait 0.05 --polls 1000
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from emulator.mcb import McbEmulator  # noqa: E402
+from emulator.transport import LoopPort  # noqa: E402
+from ppx.codec import PyRegionCodec  # noqa: E402
+from ppx.deframer import Deframer  # noqa: E402
+from ppx.planner import ReadPlanner, plan_reads  # noqa: E402
+from ppx.session import CodecSession  # noqa: E402
+from ppx.structs import (  # noqa: E402
+    PPX_ID_MCB, PPX_MSG_READ,
+    PPX_MCU_ERRCODE_REG, PPX_MOTOR_SPEED_REG, PPX_BUS_VOLTAGE_REG, PPX_BUS_CURRENT_REG,
+    PPX_HALL_STATE_REG, PPX_BRAKE_STATE_REG, PPX_RT_SETTING_REG, PPX_RUN_MODE_REG,
+)
+
+BYTE_TIME = 10 / 460800
+
+STATUS_POLL = [
+    PPX_BUS_VOLTAGE_REG, PPX_BUS_CURRENT_REG, PPX_MCU_ERRCODE_REG, PPX_BRAKE_STATE_REG,
+    PPX_MOTOR_SPEED_REG, PPX_HALL_STATE_REG, PPX_RUN_MODE_REG, PPX_RT_SETTING_REG,
+]
+
+
+class SimLink:
+    """主机 CodecSession <-> MCB 模拟器，累计总线时间"""
+
+    def __init__(self, wait: float):
+        self.wait = wait
+        self.host = CodecSession(PyRegionCodec(), PPX_ID_MCB)
+        self.device = McbEmulator(clock=None)
+        self.device.inject_error(0x040000)
+        self.device.g_data.motor_speed = 300
+        self.port = LoopPort(self.device)
+        self.deframer = Deframer(dev_id=PPX_ID_MCB)
+        self.bus_time = 0.0
+        self.round_trips = 0
+
+    def transact(self, cmd: int, addr: int, nums: int) -> bool:
+        req = self.host.format(cmd, addr, nums)
+        self.port.write(req)
+        frame = self.deframer.read_frame(self.port, 0)
+        if frame is None:
+            return False
+        self.round_trips += 1
+        self.bus_time += (len(req) + len(frame.raw)) * BYTE_TIME + self.wait
+        return self.host.parse(frame.raw) == 1
+
+    @property
+    def g_data(self):
+        return self.host.codec.g_ppx_region_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MULTREAD 读规划效果对比")
+    parser.add_argument("--wait", type=float, default=0.05, help="每次往返的固定等待（秒）")
+    parser.add_argument("--polls", type=int, default=1000, help="轮询次数")
+    args = parser.parse_args()
+
+    print(f"轮询寄存器: {[hex(r) for r in STATUS_POLL]}")
+    print(f"规划结果: {[(hex(b.addr), b.nums) for b in plan_reads(STATUS_POLL)]}")
+    print(f"{'方式':<14}{'往返/次':>10}{'总线耗时 ms/次':>18}{'CPU us/次':>12}")
+    print("-" * 56)
+
+    # 逐个读
+    link = SimLink(args.wait)
+    t0 = time.perf_counter()
+    for _ in range(args.polls):
+        for reg in STATUS_POLL:
+            link.transact(PPX_MSG_READ, reg, 1)
+    cpu = (time.perf_counter() - t0) / args.polls * 1e6
+    print(f"{'逐个 READ':<14}{link.round_trips / args.polls:>10.1f}"
+          f"{link.bus_time / args.polls * 1000:>18.1f}{cpu:>12.1f}")
+
+    # 规划合并
+    link = SimLink(args.wait)
+    planner = ReadPlanner(link.transact, link.g_data)
+    t0 = time.perf_counter()
+    for _ in range(args.polls):
+        values = planner.read(STATUS_POLL)
+    cpu = (time.perf_counter() - t0) / args.polls * 1e6
+    print(f"{'ReadPlanner':<14}{link.round_trips / args.polls:>10.1f}"
+          f"{link.bus_time / args.polls * 1000:>18.1f}{cpu:>12.1f}")
+    print(f"读回值校验: 电压={values[PPX_BUS_VOLTAGE_REG]} 错误码=0x{values[PPX_MCU_ERRCODE_REG]:06X} "
+          f"转速={values[PPX_MOTOR_SPEED_REG]}")
+
+
+if __name__ == "__main__":
+    main()
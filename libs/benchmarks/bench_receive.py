@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+应答接收时延：固定 sleep / 轮询到超时 vs 按帧返回
+============================================================
+在 Linux 伪终端（pty）上跑 MCB 模拟器（emulator.mcb，按 460800 baud 节奏应答），
+主机端用 pyserial 打开从端。
+
+对比每次请求/应答往返的耗时：
+- sleep 0.08 : mcb_V1.4.6 read_reg 原写法（写后固定 sleep 80 ms 再读 in_waiting）
+- sleep 0.05 : mcb_V1.4.7 / V1.4.5 原写法
+- 轮询到超时 : BLE 工具 receive_data 原写法（5 ms 轮询直到 recv_timeout）
+- read_frame : Deframer.read_frame，阻塞读，收到完整帧立即返回
+
+用法（仅 Linux）：
+    python bench_receive.py --count 50 --recv-timeout 0.5
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import serial
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from emulator.mcb import McbEmulator  # noqa: E402
+from emulator.transport import PtyServer  # noqa: E402
+from ppx.codec import PyRegionCodec  # noqa: E402
+from ppx.deframer import Deframer, READ_POLL  # noqa: E402
+from ppx.session import CodecSession  # noqa: E402
+from ppx.structs import PPX_ID_MCB, PPX_MSG_READ, PPX_HW_VERSION_REG  # noqa: E402
+from ppx.bus import percentile  # noqa: E402
+
+BAUDRATE = 460800
+
+
+def rx_sleep(ser, wait):
+    time.sleep(wait)
+    return ser.read(ser.in_waiting) if ser.in_waiting else b""
+
+
+def rx_poll(ser, timeout):
+    start = time.time()
+    data = bytes()
+    while time.time() - start < timeout:
+        waiting = ser.in_waiting
+        if waiting > 0:
+            data += ser.read(waiting)
+        else:
+            time.sleep(0.005)
+    return data
+
+
+def measure(ser, session, receive, count):
+    samples, ok = [], 0
+    for _ in range(count):
+        ser.reset_input_buffer()
+        t0 = time.perf_counter()
+        ser.write(session.format(PPX_MSG_READ, PPX_HW_VERSION_REG))
+        data = receive()
+        samples.append(time.perf_counter() - t0)
+        if data and session.parse(data) == 1:
+            ok += 1
+    samples.sort()
+    return samples, ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="应答接收时延对比（pty 上的 MCB 模拟器）")
+    parser.add_argument("--count", type=int, default=50, help="每种方式的往返次数")
+    parser.add_argument("--recv-timeout", type=float, default=0.5, help="BLE 工具 recv_timeout（秒）")
+    args = parser.parse_args()
+
+    server = PtyServer(McbEmulator(), pace=True, baudrate=BAUDRATE)
+    server.start()
+    ser = serial.Serial(server.port, BAUDRATE, timeout=READ_POLL)
+    session = CodecSession(PyRegionCodec(), PPX_ID_MCB)
+    deframer = Deframer(dev_id=PPX_ID_MCB)
+
+    def rx_frame():
+        frame = deframer.read_frame(ser, args.recv_timeout)
+        return frame.raw if frame is not None else b""
+
+    modes = [
+        ("sleep 0.08", lambda: rx_sleep(ser, 0.08)),
+        ("sleep 0.05", lambda: rx_sleep(ser, 0.05)),
+        (f"轮询到超时 {args.recv_timeout}s", lambda: rx_poll(ser, args.recv_timeout)),
+        ("read_frame", rx_frame),
+    ]
+    print(f"{'方式':<22}{'成功':>6}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    print("-" * 58)
+    for name, receive in modes:
+        samples, ok = measure(ser, session, receive, args.count)
+        print(f"{name:<22}{ok:>6}{percentile(samples, 50) * 1000:>10.2f}"
+              f"{percentile(samples, 99) * 1000:>10.2f}{samples[-1] * 1000:>10.2f}")
+
+    ser.close()
+    server.close()
+
+
+if __name__ == "__main__":
+    main()
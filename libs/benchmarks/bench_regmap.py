@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+寄存器快照解码性能
+============================================================
+对比三种方式解码 N 个 ppx_region_data_t 快照（每个 125 字节）的速度：
+- ctypes：from_buffer_copy 后逐字段 getattr（脚本现有写法）
+- decode_snapshot：每个快照一次 struct.unpack_from
+- iter_snapshots：整段数据 struct.iter_unpack
+
+用法：
+    python bench_regmap.py -n 100000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ppx.regmap import REGION_REGS, REGION_SNAPSHOT_STRUCT, decode_snapshot, iter_snapshots  # noqa: E402
+from ppx.structs import ppx_region_data_t  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="寄存器快照解码性能")
+    parser.add_argument("-n", type=int, default=100000, help="快照数量")
+    args = parser.parse_args()
+
+    size = REGION_SNAPSHOT_STRUCT.size
+    rnd = random.Random(0)
+    data = bytes(rnd.randrange(256) for _ in range(size)) * args.n
+    names = [r.name for r in REGION_REGS]
+
+    def run_ctypes():
+        for i in range(0, len(data), size):
+            snap = ppx_region_data_t.from_buffer_copy(data, i)
+            for name in names:
+                getattr(snap, name)
+
+    def run_unpack_from():
+        for i in range(0, len(data), size):
+            decode_snapshot(data, i)
+
+    def run_iter_unpack():
+        for _ in iter_snapshots(data):
+            pass
+
+    print(f"快照数: {args.n}, 数据量: {len(data) / 1024 / 1024:.1f} MB")
+    print(f"{'方式':<20}{'耗时 s':>10}{'快照/s':>14}")
+    print("-" * 44)
+    for name, func in (("ctypes getattr", run_ctypes),
+                       ("decode_snapshot", run_unpack_from),
+                       ("iter_snapshots", run_iter_unpack)):
+        t0 = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - t0
+        print(f"{name:<20}{elapsed:>10.3f}{args.n / elapsed:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
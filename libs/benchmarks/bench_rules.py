@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+频率规则：每条规则一个 deque 逐个检查 vs RuleEngine + 共享匹配器
+============================================================
+用 DUT 日志模拟器生成开关机日志（含 param is invalid / motor reg 等故障行），
+在脚本原有的两条规则（ERROR 3 秒 3 次、CRITICAL 1 秒 3 次）之外追加 N 条合成规则，
+对比每行的规则判定耗时：
+
+- 逐条检查 : 原 check_frequency 写法，每条规则对每行做 `kw in line`，命中后 deque 追加/淘汰
+- 规则引擎 : stress.rules.RuleEngine，规则关键字并入行匹配器一次扫描，只处理命中的规则
+
+两种方式触发次数必须一致（触发后窗口清零，逐条检查同样处理）。
+规则引擎一列包含整行的共享匹配器扫描（INFO/EXCEPTION 也在其中，脚本里这一遍本来就要做），
+因此规则很少时反而慢于只查两条规则的逐条检查。
+
+用法：
+    python bench_rules.py --cycles 2000 --rules 0 100 300 1000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from collections import deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from emulator.dut_log import DutLogEmulator  # noqa: E402
+from stress.matcher import KeywordMatcher  # noqa: E402
+from stress.normalize import normalize  # noqa: E402
+from stress.rules import Rule, RuleEngine  # noqa: E402
+
+BASE_RULES = [
+    {"name": "ERROR", "keywords": ["param is invalid"], "window": 3.0, "count": 3},
+    {"name": "CRITICAL", "keywords": ["[e/motor]reg_addr(00)isunviald"], "window": 1.0, "count": 3},
+]
+LINE_CATEGORIES = {
+    "INFO": ["voice_msgnum", "voice_msgcutoff", "ui_pm_acc"],
+    "EXCEPTION": ["assertionfailedatfunction"],
+}
+LINE_PERIOD = 0.002     # 相邻日志行的时间间隔（约 500 行/秒）
+
+
+def make_lines(cycles, seed):
+    dut = DutLogEmulator(clock=lambda: 0.0, seed=seed, param_invalid=0.05, motor_reg=0.05,
+                         assertion=0.02, comm_loss=0.01, garbled=0.05)
+    t = 0.0
+    for _ in range(cycles):
+        dut.set_power(True, now=t)
+        dut.set_power(False, now=t + 5.0)
+        t += 30.0
+    raw = dut.read_due(now=t)
+    return [normalize(line) for line in raw.split(b"\n") if line.strip()]
+
+
+def synthetic_rules(n, seed):
+    """合成规则：一部分关键字取自真实日志片段，保证有命中"""
+    rng = random.Random(seed)
+    real = ["voice_msgnum:", "pm_acc_tim", "pm_event", "acc_cb", "motorpoweron", "paramisinvalid"]
+    words = ("pm", "ui", "voice", "motor", "nfc", "acc", "key", "evt", "tsk", "ble", "at", "net")
+    rules = []
+    for i in range(n):
+        if i % 10 == 0:
+            kws = [rng.choice(real)]
+        else:
+            kws = ["_".join(rng.sample(words, 3)) + f":{rng.randrange(100)}" for _ in range(rng.randint(1, 3))]
+        rules.append({"name": f"R{i}", "keywords": kws, "window": rng.choice((1.0, 3.0, 10.0)),
+                      "count": rng.randint(2, 6), "action": "tag"})
+    return rules
+
+
+def run_loops(lines, rules):
+    """原写法：每条规则逐个关键字 in，命中后 deque 追加并淘汰过期记录"""
+    parsed = []
+    for r in map(Rule.from_dict, rules):
+        parsed.append((r.keywords, r.window, r.count, deque()))
+    fired = 0
+    now = 0.0
+    for line in lines:
+        now += LINE_PERIOD
+        text = line.decode("utf-8", errors="replace")   # 原脚本在 str 上匹配
+        for kws, window, count, dq in parsed:
+            for kw in kws:
+                if kw in text:
+                    dq.append(now)
+                    while dq and dq[0] < now - window:
+                        dq.popleft()
+                    if len(dq) >= count:
+                        fired += 1
+                        dq.clear()
+                    break
+    return fired
+
+
+def run_engine(lines, rules):
+    engine = RuleEngine(rules)
+    matcher = KeywordMatcher({**LINE_CATEGORIES, **engine.categories}, binary=True)
+    fired = 0
+    now = 0.0
+    for line in lines:
+        now += LINE_PERIOD
+        hits = matcher.scan(line)
+        if hits:
+            for event in engine.feed(hits, now):
+                fired += event.fired
+    return fired
+
+
+def main():
+    parser = argparse.ArgumentParser(description="频率规则判定基准")
+    parser.add_argument("--cycles", type=int, default=2000, help="模拟开关机次数（决定日志行数）")
+    parser.add_argument("--rules", type=int, nargs="+", default=[0, 100, 300, 1000], help="追加的合成规则数")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    lines = make_lines(args.cycles, args.seed)
+    print(f"日志 {len(lines)} 行\n")
+    print(f"{'规则数':>8}{'触发次数':>10}{'逐条检查 行/s':>16}{'规则引擎 行/s':>16}{'倍数':>8}")
+    for extra in args.rules:
+        rules = BASE_RULES + synthetic_rules(extra, args.seed)
+        t0 = time.perf_counter()
+        f1 = run_loops(lines, rules)
+        t1 = time.perf_counter()
+        f2 = run_engine(lines, rules)
+        t2 = time.perf_counter()
+        assert f1 == f2, (f1, f2)
+        r1 = len(lines) / (t1 - t0)
+        r2 = len(lines) / (t2 - t1)
+        print(f"{len(rules):>8}{f1:>10}{r1:>16.0f}{r2:>16.0f}{r2 / r1:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+CodecSession 分配/延迟微基准
+============================================================
+对比脚本原写法（每次 create_string_buffer / (c_uint8 * n)(*data) / 新建 msg）
+与 CodecSession（缓冲区复用）的：
+- 单次调用平均延迟（us）
+- 单次调用的临时内存峰值（tracemalloc，字节）
+
+用法：
+    python bench_session.py
+    python bench_session.py --backend dll --dll ../libcs_mcb/libs/ppx_region.dll
+"""
+
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+from ctypes import create_string_buffer, byref, c_uint8
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ppx.codec import open_region_codec, BACKEND_AUTO  # noqa: E402
+from ppx.session import CodecSession  # noqa: E402
+from ppx.structs import ppx_region_msg_t, PPX_CMD_REQ, PPX_CMD_RSP, PPX_ID_MCB  # noqa: E402
+
+DEFAULT_DLL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../libcs_mcb/libs/ppx_region.dll")
+REG_TARGET_SPEED = 0x1D
+REG_BUS_VOLT = 10
+
+
+def legacy_format(codec):
+    msg = ppx_region_msg_t()
+    msg.id, msg.cmd, msg.reg_addr, msg.reg_nums = PPX_ID_MCB, 0x03, REG_TARGET_SPEED, 1
+    buf = create_string_buffer(256)
+    length = codec.ppx_com_region_format(0, byref(msg), buf)
+    return buf.raw[:length]
+
+
+def legacy_parse(codec, recv):
+    msg_res = ppx_region_msg_t()
+    msg_res.id = PPX_ID_MCB
+    return codec.ppx_com_region_parse((c_uint8 * len(recv))(*recv), len(recv), byref(msg_res))
+
+
+def measure(func, n: int):
+    """返回 (平均延迟 us, 单次临时内存峰值 字节)"""
+    for _ in range(100):
+        func()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        func()
+    latency = (time.perf_counter() - t0) / n * 1e6
+
+    samples = 200
+    total_peak = 0
+    tracemalloc.start()
+    for _ in range(samples):
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        total_peak += peak - base
+    tracemalloc.stop()
+    return latency, total_peak / samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CodecSession 分配/延迟微基准")
+    parser.add_argument("-n", type=int, default=50000, help="延迟测试循环次数")
+    parser.add_argument("--backend", default=BACKEND_AUTO, help="dll / python / auto")
+    parser.add_argument("--dll", default=DEFAULT_DLL, help="ppx_region.dll 路径")
+    args = parser.parse_args()
+
+    codec = open_region_codec(args.backend, args.dll)
+    session = CodecSession(codec, PPX_ID_MCB)
+
+    # 准备一帧响应数据
+    codec.g_ppx_region_data.bus_voltage = 480
+    rsp = bytes(session.format(0x01, REG_BUS_VOLT, 1, cmd_type=PPX_CMD_RSP))
+
+    cases = [
+        ("组包 原写法", lambda: legacy_format(codec)),
+        ("组包 CodecSession", lambda: session.format(0x03, REG_TARGET_SPEED, 1, PPX_CMD_REQ)),
+        ("解析 原写法", lambda: legacy_parse(codec, rsp)),
+        ("解析 CodecSession", lambda: session.parse(rsp)),
+    ]
+
+    print(f"后端: {codec.backend}")
+    print(f"{'场景':<20}{'延迟 us/次':>12}{'临时内存 B/次':>16}")
+    print("-" * 50)
+    for name, func in cases:
+        latency, peak = measure(func, args.n)
+        print(f"{name:<20}{latency:>12.2f}{peak:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
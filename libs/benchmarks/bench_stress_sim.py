@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+压力测试虚拟时间仿真
+============================================================
+VirtualClock + 继电器模拟器 + DUT 日志模拟器，离线跑 Tool/ 下压力测试脚本的循环逻辑：
+
+- charge : 继电器充电压力测试.RelayTester.run_cycle（NO 接法，0x4F 上电）
+           --mode fixed : 每轮固定等待 POWER_ON + POWER_OFF_TIME + DELAY_AFTER_OFF（约 29 秒虚拟时间）
+           --mode event : 边读边判定，断电后结果确定且日志静默 OFF_QUIET_TIME 即进入下一轮（固定延时为上限）
+- nfc    : NFC开关机异常关键字检测.RelayTester.run_single_test（NC 接法，0x50 上电）
+           逐行读取 + ErrorCounter 滑动窗口，10 ms 轮询
+
+脚本逻辑原样运行，只替换时钟与串口对象；控制台日志 handler 被移除（文件日志保留在临时目录），
+统计墙钟耗时、虚拟时间、每秒循环数，以及仿真相对实时的加速倍数。
+charge 引擎还按全量日志中的逐轮结果核对异常归属：注入 assertion / late_assertion 的轮次
+应恰好是判为异常的轮次（late_assertion 在断电后 5~20 秒才打印，event 模式过早进入下一轮时会记到下一轮）。
+
+--console 比较控制台输出方式（输出到伪终端，仅 Linux）：
+- none   : 不输出到控制台（默认）
+- lines  : 脚本原来的逐行控制台输出
+- status : stress.status.StatusLine 单行状态（4 Hz），详细日志只进文件
+
+用法：
+    python bench_stress_sim.py --engine charge --cycles 500000
+    python bench_stress_sim.py --engine charge --mode fixed --cycles 10000 --no-boot 0.05
+    python bench_stress_sim.py --engine charge --mode event --cycles 2000 --late-assertion 0.05 --off-quiet 3
+    python bench_stress_sim.py --engine nfc --cycles 2000 --assertion 0.01
+    python bench_stress_sim.py --engine charge --cycles 20000 --console lines
+"""
+
+import os
+import re
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import threading
+import importlib.util
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+from emulator.dut_log import DutLogEmulator, FAULT_NAMES  # noqa: E402
+from emulator.relay import RelayEmulator, WIRING_NO, WIRING_NC  # noqa: E402
+from emulator.transport import LoopPort, StreamPort  # noqa: E402
+from stress.clock import VirtualClock  # noqa: E402
+from stress.status import StatusLine, route_console  # noqa: E402
+
+TOOL_DIR = os.path.join(HERE, "..", "..", "Tool")
+
+# 注入后脚本应判为异常的故障
+EXCEPTION_FAULTS = ("assertion", "late_assertion")
+
+ENGINES = {
+    # 名称: (脚本文件, 接法, 单轮方法, 设备串口超时)
+    "charge": ("继电器充电压力测试.py", WIRING_NO, "run_cycle", 1.0),
+    "nfc": ("NFC开关机异常关键字检测.py", WIRING_NC, "run_single_test", 0.1),
+}
+
+
+def load_script(filename):
+    spec = importlib.util.spec_from_file_location("stress_script", os.path.join(TOOL_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def script_loggers(module):
+    return [lg for lg in (getattr(module, "logger", None), getattr(module, "log", None))
+            if isinstance(lg, logging.Logger)]
+
+
+def quiet_console(module):
+    """去掉脚本 logger 的控制台输出（每轮十几行 print 会淹没仿真本身的耗时）"""
+    for logger in script_loggers(module):
+        logger.handlers = [h for h in logger.handlers if isinstance(h, logging.FileHandler)]
+
+
+def exception_cycles(log_path):
+    """从 charge 脚本的全量日志取判为异常的轮次"""
+    cycles = set()
+    pattern = re.compile(r"第 (\d+) 轮结果: 🔴")
+    with open(log_path, encoding="utf-8") as f:
+        for line in f:
+            m = pattern.search(line)
+            if m:
+                cycles.add(int(m.group(1)))
+    return cycles
+
+
+def open_tty():
+    """伪终端：控制台输出写入从端，后台线程读空主端并统计字节数"""
+    master, slave = os.openpty()
+    received = [0]
+
+    def drain():
+        while True:
+            try:
+                data = os.read(master, 65536)
+            except OSError:
+                break
+            if not data:
+                break
+            received[0] += len(data)
+
+    threading.Thread(target=drain, daemon=True).start()
+    return open(slave, "w", encoding="utf-8"), received
+
+
+def main():
+    parser = argparse.ArgumentParser(description="压力测试虚拟时间仿真")
+    parser.add_argument("--engine", default="charge", choices=sorted(ENGINES))
+    parser.add_argument("--cycles", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--mode", choices=("event", "fixed"), help="charge 引擎的 CYCLE_MODE（默认取脚本配置）")
+    parser.add_argument("--off-quiet", type=float, help="charge 引擎 event 模式的 OFF_QUIET_TIME（默认取脚本配置）")
+    parser.add_argument("--console", choices=("none", "lines", "status"), default="none",
+                        help="控制台输出方式（lines/status 输出到伪终端）")
+    for name in FAULT_NAMES:
+        parser.add_argument(f"--{name.replace('_', '-')}", type=float, default=0.0, metavar="P")
+    args = parser.parse_args()
+
+    filename, wiring, step, dev_timeout = ENGINES[args.engine]
+    workdir = tempfile.mkdtemp(prefix="bench_stress_")
+    os.chdir(workdir)       # 脚本在当前目录下创建 logs/ 与日志文件
+    module = load_script(filename)
+    if args.console == "none":
+        quiet_console(module)
+    else:
+        tty, tty_bytes = open_tty()
+        for logger in script_loggers(module):
+            for h in logger.handlers:
+                if type(h) is logging.StreamHandler:
+                    h.setStream(tty)
+    if args.mode and hasattr(module, "CONFIG"):
+        module.CONFIG["CYCLE_MODE"] = args.mode
+    if args.off_quiet is not None and hasattr(module, "CONFIG"):
+        module.CONFIG["OFF_QUIET_TIME"] = args.off_quiet
+
+    clock = VirtualClock()
+    faults = {name: getattr(args, name) for name in FAULT_NAMES}
+    dut = DutLogEmulator(clock=clock.monotonic, seed=args.seed, **faults)
+    relay = RelayEmulator(4)
+    relay.attach(dut, wiring)
+
+    tester = module.RelayTester(clock=clock)
+    tester.relay_ser = LoopPort(relay)
+    tester.device_ser = StreamPort(dut, timeout=dev_timeout, sleep=clock.sleep)
+    run_one = getattr(tester, step)
+    if args.console == "status":
+        tester.status = StatusLine(args.cycles, clock=clock, stream=tty)
+        for logger in script_loggers(module):
+            route_console(logger, tester.status)
+
+    print(f"引擎 {args.engine}（{filename}），{args.cycles} 轮，日志目录 {workdir}")
+    done = 0
+    t0 = time.perf_counter()
+    try:
+        for i in range(1, args.cycles + 1):
+            run_one(i)
+            done = i
+    except SystemExit:
+        print(f"脚本在第 {done + 1} 轮触发停止条件")
+    if args.console == "status":
+        tester.status.close()
+    wall = time.perf_counter() - t0
+
+    st = dut.stats()
+    print(f"墙钟耗时   : {wall:.1f} s")
+    print(f"虚拟时间   : {clock.elapsed / 3600:.1f} h")
+    print(f"循环速率   : {done / wall:.0f} 轮/s（实时约 {done / clock.elapsed * 3600:.0f} 轮/h）")
+    print(f"加速倍数   : {clock.elapsed / wall:.0f}x")
+    print(f"sleep 调用 : {clock.sleeps}")
+    print(f"DUT 日志   : {st['lines']} 行  故障 {st['faults']}")
+    print(f"脚本统计   : {tester.stats}")
+    if args.engine == "charge":
+        expected = {cycle for cycle, name in dut.fault_events if name in EXCEPTION_FAULTS and cycle <= done}
+        reported = exception_cycles(module.CONFIG["LOG_FILENAME"])
+        print(f"异常归属   : 注入 {len(expected)} 轮，判为异常 {len(reported)} 轮，"
+              f"漏判 {len(expected - reported)} 轮，错判 {len(reported - expected)} 轮")
+    if args.console != "none":
+        tty.flush()
+        time.sleep(0.2)     # 等后台线程读完
+        redraws = f"，状态行重绘 {tester.status.redraws} 次" if args.console == "status" else ""
+        print(f"控制台输出 : {tty_bytes[0] / 1024:.0f} KiB{redraws}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+BLE 自动化测试用例吞吐量：调试日志开 / 关 / 抽样
+============================================================
+BLEProtocol 直接接在进程内 BLE 灯板模拟器上（emulator.transport.LoopPort，无串口、无线速限制），
+逐帧日志的开销因此不会被 I/O 等待掩盖。日志回调只计数不输出，衡量的是协议层生成日志文本的代价：
+
+- DEBUG 开 : 每帧输出 发送/接收十六进制、解析结果与 LED 状态
+- 抽样 1/N : tx / rx / frame / led 每 N 帧输出 1 帧（LOG_SAMPLE）
+- DEBUG 关 : 只保留 INFO 及以上
+
+另测单帧 send_data + parse_data 的耗时（LED 读应答帧，发送端写入空设备），用例吞吐量中
+模拟器与编解码占了大部分时间，这一列只反映日志部分。
+
+--tool 可指定其他版本的脚本做对比（旧版本没有 LOG_SAMPLE 时抽样一行按 DEBUG 开处理）。
+
+用法：
+    python bench_trace.py --limit 1000 --sample 10 --repeat 3
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import importlib.util
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+from emulator.ble import BleEmulator  # noqa: E402
+from emulator.transport import LoopPort  # noqa: E402
+from ppx.deframer import READ_POLL  # noqa: E402
+
+BLE_TOOL = os.path.join(HERE, "..", "libs_lcb", "正式可用", "ble_自动化测试工具（测试版本）-V1.6.py")
+
+
+def load_tool(path):
+    spec = importlib.util.spec_from_file_location("ble_tool_bench", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class NullPort:
+    def write(self, data):
+        return len(data)
+
+
+def setup(tool, debug, sample, logger):
+    tool.DEBUG_MODE = debug
+    if hasattr(tool, "LOG_SAMPLE"):
+        tool.LOG_SAMPLE = {cat: sample for cat in ("tx", "rx", "frame", "led")} if sample > 1 else {}
+    tool.print = lambda *a, **k: None   # 设置日志回调之前的输出（初始化时的全局变量打印）
+    ble = tool.BLEProtocol("", "bench-loop", 460800, recv_timeout=0.05, backend="python")
+    ble.serial_port = LoopPort(BleEmulator(seed=1), timeout=READ_POLL)
+    ble.serial_connected = True
+    ble.set_logger(logger)
+    return ble
+
+
+def run(tool, cases, debug, sample):
+    records = [0, 0]     # 条数, 字符数
+
+    def logger(level, message):
+        records[0] += 1
+        records[1] += len(message)
+
+    out_dir = tempfile.mkdtemp(prefix="bench_trace_")
+    ble = setup(tool, debug, sample, logger)
+    tester = tool.AutoTester(ble, out_dir)
+    try:
+        t0 = time.perf_counter()
+        tester.run_cases(cases)
+        dt = time.perf_counter() - t0
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+    passed = sum(1 for r in tester.results if r["verdict"] == "PASS")
+    return dt, passed, records
+
+
+def run_frame(tool, frame, debug, sample, n):
+    """单帧 send_data + parse_data 的平均耗时（微秒）"""
+    ble = setup(tool, debug, sample, lambda level, message: None)
+    ble.serial_port = NullPort()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        ble.send_data(frame)
+        ble.parse_data(frame)
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="调试日志开关对用例吞吐量的影响")
+    parser.add_argument("--limit", type=int, default=1000, help="只跑前 N 条用例（0 = 全部）")
+    parser.add_argument("--sample", type=int, default=10, help="抽样间隔 N")
+    parser.add_argument("--tool", default=BLE_TOOL, help="BLE 自动化测试脚本路径")
+    parser.add_argument("--repeat", type=int, default=3, help="每种配置重复次数，取最快一次")
+    args = parser.parse_args()
+
+    tool = load_tool(args.tool)
+    cases = tool.make_combo_cases()
+    if args.limit:
+        cases = cases[:args.limit]
+    print(f"用例 {len(cases)} 条\n")
+    ble = setup(tool, True, 1, lambda level, message: None)
+    _, frame, _, _ = ble.read_led_status()
+
+    print(f"{'日志':<12}{'耗时(s)':>10}{'用例/s':>10}{'PASS':>8}{'日志条数':>10}{'日志字符':>12}{'单帧 us':>10}")
+    for name, debug, sample in (("DEBUG 开", True, 1), (f"抽样 1/{args.sample}", True, args.sample),
+                                ("DEBUG 关", False, 1)):
+        dt, passed, (n, chars) = min(run(tool, cases, debug, sample) for _ in range(args.repeat))
+        us = min(run_frame(tool, frame, debug, sample, 20000) for _ in range(args.repeat))
+        print(f"{name:<12}{dt:>10.2f}{len(cases) / dt:>10.0f}{passed:>8}{n:>10}{chars:>12}{us:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+"""
+设备模拟器
+============================================================
+没有实物板卡时，用模拟器代替串口另一端的设备，脚本与基准测试可以照常运行。
+
+模块说明：
+- transport : 模拟器的串口端点（Linux 伪终端 PtyServer / 进程内回环 LoopPort）
+- device    : 寄存器型设备基类，按 PPX 协议应答 READ/MULTREAD/WRITE/MULTWRITE，非法地址回 EXCP
+              （含应答延时/丢应答/损坏应答的故障注入）
+- mcb       : MCB 模拟器（ppx_region_data_t 寄存器文件，RUN_MODE/霍尔/一阶转速响应）
+- ble       : BLE 灯板模拟器（ppx_ble_data_t 含 LED 位域，可配置应答延时/丢包/损坏率）
+- relay     : USB 继电器（0x51 握手回类型码，0x4F/0x50 吸合/断开，NO/NC 接法驱动 DUT 上电）
+- dut_log   : DUT 开关机日志（RT-Thread 风格 ANSI 彩色日志，按概率注入 param is invalid/断言等故障）
+
+命令行（Linux，打印伪终端路径，把脚本中的 SERIAL_PORT 改成该路径即可）：
+    cd libs && python -m emulator.mcb
+    cd libs && python -m emulator.relay --wiring NO --param-invalid 0.01
+"""
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+BLE 灯板模拟器（设备 ID 0x60）
+============================================================
+寄存器文件为完整的 ppx_ble_data_t（含 ppx_led_msg_t 位域），按 PPX 协议应答
+READ/MULTREAD/WRITE/MULTWRITE，主要服务 BLEProtocol.set_led_display / read_led_status：
+
+- 写 LED_MSG_REG(0x08)：整个 12 字节位域写入镜像，记录写入次数与最近一次显示状态
+- 读 LED_MSG_REG(0x08)：回读当前位域
+
+通过 latency / drop_rate / corrupt_rate 可以批量验证 AutoTester 的超时与失败处理。
+
+命令行（Linux）：
+    python -m emulator.ble [--latency 0.005] [--drop 0.01] [--corrupt 0.01]
+"""
+
+import time
+import argparse
+from typing import Callable, Optional
+
+from ppx.codec import PyBleCodec
+from ppx.structs import PPX_ID_BLE, PPX_BLE_LED_MSG_REG
+
+from .device import RegisterDevice, set_bytes
+
+DEFAULT_HW_VERSION = 0x10
+DEFAULT_SW_VERSION = b"LCB_EMU_V1.0"
+DEFAULT_MODEL = b"LCB-EMU"
+DEFAULT_SERIAL = b"EMU000000000000000000060"
+
+LED_FIELDS = ("screen_on", "brightness", "digital", "logo", "rim_state",
+              "rdygo", "turn_left", "turn_right", "ring")
+
+
+class BleEmulator(RegisterDevice):
+    def __init__(self, dev_id: int = PPX_ID_BLE,
+                 clock: Optional[Callable[[], float]] = None, **faults):
+        """faults: latency / drop_rate / corrupt_rate / seed，见 device.RegisterDevice"""
+        super().__init__(PyBleCodec(), dev_id, clock, **faults)
+        self.led_writes = 0
+        self.power_on()
+
+    def power_on(self):
+        d = self.g_data
+        self.raw[:] = bytes(len(self.raw))
+        d.id_num = self.dev_id
+        set_bytes(d.model, DEFAULT_MODEL)
+        set_bytes(d.serial_num, DEFAULT_SERIAL)
+        d.hw_version = DEFAULT_HW_VERSION
+        set_bytes(d.sw_version, DEFAULT_SW_VERSION)
+
+    def on_write(self, addr: int, nums: int):
+        if addr <= PPX_BLE_LED_MSG_REG < addr + nums:
+            self.led_writes += 1
+
+    def led_state(self) -> dict:
+        """当前灯板显示状态（字段名与用例表一致）"""
+        led = self.g_data.led_msg
+        return {name: getattr(led, name) for name in LED_FIELDS}
+
+
+def main():
+    from .transport import PtyServer, DEFAULT_BAUDRATE
+
+    parser = argparse.ArgumentParser(description="BLE 灯板模拟器（伪终端）")
+    parser.add_argument("--pace", action="store_true", help="按波特率延时应答")
+    parser.add_argument("--baudrate", type=int, default=DEFAULT_BAUDRATE)
+    parser.add_argument("--latency", type=float, default=0.0, help="应答延时（秒）")
+    parser.add_argument("--drop", type=float, default=0.0, help="丢应答概率")
+    parser.add_argument("--corrupt", type=float, default=0.0, help="应答损坏概率")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    emu = BleEmulator(latency=args.latency, drop_rate=args.drop, corrupt_rate=args.corrupt, seed=args.seed)
+    server = PtyServer(emu, pace=args.pace, baudrate=args.baudrate)
+    server.start()
+    print(f"BLE 灯板模拟器已启动: {server.port}  (Ctrl+C 退出)")
+    try:
+        while True:
+            time.sleep(5)
+            st = emu.stats()
+            print(f"  请求 {st['requests']}  LED 写入 {emu.led_writes}  丢弃 {st['dropped']}  "
+                  f"损坏 {st['corrupted']}  显示 {emu.led_state()}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
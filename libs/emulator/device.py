@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+寄存器型设备基类
+============================================================
+设备端持有一份完整的寄存器镜像（与纯 Python 编解码器共用 ctypes 结构体），
+收到请求帧后：
+
+- READ(0x01)      : data = [addr]             -> RSP [addr] + 寄存器字节
+- MULTREAD(0x02)  : data = [addr, nums]       -> RSP [addr] + 寄存器字节
+- WRITE(0x03)     : data = [addr] + 寄存器字节  -> 写入镜像，RSP 回读写入后的值
+- MULTWRITE(0x04) : data = [addr, nums] + 字节 -> 同上
+
+地址/数量越界、写入长度与寄存器宽度不符时回 EXCP：[addr, parse_status, cmd_status, data_status]，
+不支持的命令 cmd_status = 0，地址/长度错误 data_status = 0（模拟器约定，便于脚本区分）。
+RSP/EXCP 帧的 cmd 字节为 命令类别 | 命令内容，与 DLL 组包一致。
+
+故障注入（默认关闭）：
+- latency      : 应答延时（秒），由传输端点（PtyServer / LoopPort）按此延后可读时间
+- drop_rate    : 请求被“丢弃”、不回应答的概率
+- corrupt_rate : 应答帧中随机翻转一个字节的概率（帧头/CRC/数据都可能被破坏）
+"""
+
+import random
+from typing import Callable, Optional
+
+from ppx.codec import packet_format
+from ppx.deframer import Deframer, PpxFrame
+from ppx.structs import (
+    PPX_CMD_RSP, PPX_CMD_EXCP, PPX_MSG_MASK,
+    PPX_MSG_READ, PPX_MSG_MULTREAD, PPX_MSG_WRITE, PPX_MSG_MULTWRITE,
+    PPX_DATA_REGION_SIZE,
+)
+
+_HEAD_SIZE = {PPX_MSG_READ: 1, PPX_MSG_MULTREAD: 2, PPX_MSG_WRITE: 1, PPX_MSG_MULTWRITE: 2}
+
+
+def set_bytes(field, value: bytes):
+    """给 ctypes 字节数组字段赋值（型号/序列号/版本字符串），不足补 0"""
+    n = len(field)
+    field[:] = list(value[:n].ljust(n, b"\x00"))
+
+
+class RegisterDevice:
+    """
+    codec : PyRegionCodec / PyBleCodec 实例，只使用其寄存器镜像（g_data / _raw）与偏移表
+    clock : 设备时间源，模型按两次请求之间的时间差推进（advance）
+    """
+
+    def __init__(self, codec, dev_id: int, clock: Optional[Callable[[], float]] = None,
+                 latency: float = 0.0, drop_rate: float = 0.0, corrupt_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        self.codec = codec
+        self.dev_id = dev_id
+        self.g_data = codec.g_data
+        self.raw = codec._raw
+        self.offsets = codec.offsets
+        self.max_reg = codec.max_reg
+        self.clock = clock
+        self.deframer = Deframer(dev_id=dev_id)
+        self._last = clock() if clock else None
+        self.latency = latency
+        self.drop_rate = drop_rate
+        self.corrupt_rate = corrupt_rate
+        self.rng = random.Random(seed)
+        # 统计
+        self.requests = 0
+        self.responses = 0
+        self.exceptions = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.dropped = 0
+        self.corrupted = 0
+
+    # ---------------- 子类扩展点 ----------------
+    def on_write(self, addr: int, nums: int):
+        """寄存器 [addr, addr + nums) 被主机写入之后调用"""
+
+    def step(self, dt: float):
+        """推进设备模型 dt 秒"""
+
+    # ---------------- 时间推进 ----------------
+    def advance(self, now: Optional[float] = None):
+        if now is None:
+            if self.clock is None:
+                return
+            now = self.clock()
+        if self._last is not None and now > self._last:
+            self.step(now - self._last)
+        self._last = now
+
+    # ---------------- 字节流入口 ----------------
+    def feed(self, chunk) -> bytes:
+        """送入主机发来的字节，返回需要回给主机的字节（可能包含多帧应答）"""
+        self.bytes_in += len(chunk)
+        frames = self.deframer.feed(chunk)
+        if not frames:
+            return b""
+        self.advance()
+        out = b"".join(self._inject(self.handle(frame)) for frame in frames)
+        self.bytes_out += len(out)
+        return out
+
+    def _inject(self, resp: bytes) -> bytes:
+        if not resp:
+            return resp
+        if self.drop_rate and self.rng.random() < self.drop_rate:
+            self.dropped += 1
+            return b""
+        if self.corrupt_rate and self.rng.random() < self.corrupt_rate:
+            self.corrupted += 1
+            buf = bytearray(resp)
+            buf[self.rng.randrange(len(buf))] ^= 1 << self.rng.randrange(8)
+            return bytes(buf)
+        return resp
+
+    # ---------------- 请求处理 ----------------
+    def _excp(self, cmd: int, addr: int, cmd_ok: bool, data_ok: bool) -> bytes:
+        self.exceptions += 1
+        payload = bytes((addr & 0xFF, 1, int(cmd_ok), int(data_ok)))
+        return packet_format(PPX_CMD_EXCP, self.dev_id, cmd, payload)
+
+    def _span(self, addr: int, nums: int):
+        return self.offsets[addr], self.offsets[addr + nums]
+
+    def handle(self, frame: PpxFrame) -> bytes:
+        """处理一帧请求，返回应答帧（非请求帧返回 b""）"""
+        cmd = frame.cmd
+        if cmd & PPX_CMD_RSP or not cmd & PPX_MSG_MASK:
+            return b""
+        self.requests += 1
+        data = frame.data
+        addr = data[0]
+        head = _HEAD_SIZE.get(cmd)
+        if head is None:
+            return self._excp(cmd, addr, False, True)
+        if len(data) < head:
+            return self._excp(cmd, addr, True, False)
+        nums = data[1] if head == 2 else 1
+        if nums < 1 or addr >= self.max_reg or addr + nums > self.max_reg:
+            return self._excp(cmd, addr, True, False)
+
+        start, stop = self._span(addr, nums)
+        if cmd in (PPX_MSG_WRITE, PPX_MSG_MULTWRITE):
+            values = data[head:]
+            if len(values) != stop - start:
+                return self._excp(cmd, addr, True, False)
+            self.raw[start:stop] = values
+            self.on_write(addr, nums)
+        if 1 + stop - start > PPX_DATA_REGION_SIZE:
+            return self._excp(cmd, addr, True, False)
+
+        self.responses += 1
+        return packet_format(PPX_CMD_RSP, self.dev_id, cmd, bytes((addr,)) + bytes(self.raw[start:stop]))
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "responses": self.responses,
+            "exceptions": self.exceptions,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "resyncs": self.deframer.resyncs,
+            "crc_errors": self.deframer.crc_errors,
+            "dropped": self.dropped,
+            "corrupted": self.corrupted,
+        }
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+DUT 开关机日志模拟器（RT-Thread ulog 风格）
+============================================================
+按上电/断电事件生成带 ANSI 颜色的设备日志（格式取自 Tool/logs 中的实测原始日志）：
+
+    \\x1b[32m[I/voice] voice_msg num: 9\\x1b[0m\\r\\n
+
+- 上电：RT-Thread 启动横幅、motor power on、ui_pm_acc、ui_switch_key suspend、voice_msg num: 0/9
+- 断电：acc_cb、pm_acc_tim enter/release、pm_event、voice_msg cutoff、power_off_system
+
+每次上电按概率注入故障（默认全部关闭）：
+
+- no_boot       : 上电后无任何日志（断电时也没有关机日志）
+- param_invalid : 1 秒内连续 3 次 “param is invalid”（触发 ERROR_CONFIG 3 秒 3 次）
+- motor_reg     : 连续 3 次 “[E/motor] reg_addr(00) is unviald”（触发 CRITICAL_CONFIG）
+- assertion     : rt_assert 打印的 “assertion failed at function:...”
+- comm_loss     : “force_main_polling, communication loss”（W3 脚本的停止条件）
+- voice_6       : 语音 6（W3 脚本的 STOP_KEYWORD “voice_msg num: 6”）
+- garbled       : 插入一行非 UTF-8 / 非完整 GB2312 的乱码字节
+
+每次断电（已启动时）按概率注入：
+
+- late_assertion: 断电后 5~20 秒（关机/休眠阶段）才打印的 assertion failed，之后即使再次上电也照常输出
+
+日志行带到期时刻排队，read_due(now) 取出已到期的字节；
+传输端点见 transport.PtyStreamServer（伪终端）/ StreamPort（进程内）。
+"""
+
+import heapq
+import random
+import time
+from typing import Callable, List, Optional, Tuple
+
+ANSI_COLORS = {"I": 32, "W": 33, "E": 31}
+
+FAULT_NAMES = ("no_boot", "param_invalid", "motor_reg", "assertion", "comm_loss", "voice_6", "garbled",
+               "late_assertion")
+
+RT_BANNER = (
+    " \\ | /",
+    "- RT -     Thread Operating System",
+    " / | \\     4.0.3 build Dec 12 2025",
+    " 2006 - 2020 Copyright by rt-thread team",
+)
+
+# (相对事件的秒数, 级别, 标签, 内容)；级别为 None 表示 rt_kprintf 直接输出（无颜色、无标签）
+BOOT_LINES = (
+    (0.05, None, None, RT_BANNER[0]),
+    (0.05, None, None, RT_BANNER[1]),
+    (0.05, None, None, RT_BANNER[2]),
+    (0.05, None, None, RT_BANNER[3]),
+    (0.40, "I", "motor", "motor power on..."),
+    (0.60, "I", "ui", "ui_pm_acc 0 nfc 1 on 0"),
+    (1.20, "I", "ui", "ui_switch_key suspend..."),
+    (1.25, "I", "voice", "voice_msg num: 0"),
+    (1.80, "I", "voice", "voice_msg num: 9"),
+)
+
+SHUTDOWN_LINES = (
+    (0.05, "I", "gkey", "acc_cb, key_evt: 0"),
+    (0.10, "I", "pms", "pm_acc_tim, enter..."),
+    (0.15, "I", "pms", "pm_event, event: 0x4"),
+    (0.20, "I", "pms", "pm_thread, recved: 0x4"),
+    (0.30, "I", "voice", "voice_msg cutoff"),
+    (0.50, "I", "pms", "pm_task_unlock..."),
+    (1.00, "I", "pms", "pm_acc_tim, release..."),
+    (1.20, "I", "pms", "power_off_system..."),
+)
+
+FAULT_LINES = {
+    "param_invalid": (
+        (2.00, "E", "ui", "param is invalid"),
+        (2.30, "E", "ui", "param is invalid"),
+        (2.60, "E", "ui", "param is invalid"),
+    ),
+    "motor_reg": (
+        (0.50, "E", "motor", "reg_addr(00) is unviald"),
+        (0.60, "E", "motor", "reg_addr(00) is unviald"),
+        (0.70, "E", "motor", "reg_addr(00) is unviald"),
+    ),
+    "assertion": (
+        (1.50, None, None, "(dev != RT_NULL) assertion failed at function:rt_device_write, line number:1145"),
+    ),
+    "comm_loss": (
+        (2.50, "E", "force", "force_main_polling, communication loss"),
+    ),
+    "voice_6": (
+        (1.90, "I", "voice", "voice_msg num: 6"),
+    ),
+}
+
+# late_assertion：断电后打印的时间范围（秒）
+LATE_ASSERTION_DELAY = (5.0, 20.0)
+LATE_ASSERTION_LINE = "(pm_lock != RT_NULL) assertion failed at function:pm_sleep_enter, line number:212"
+
+
+def format_line(level: Optional[str], tag: Optional[str], msg: str) -> bytes:
+    if level is None:
+        return f"{msg}\r\n".encode("ascii")
+    return f"\x1b[{ANSI_COLORS[level]}m[{level}/{tag}] {msg}\x1b[0m\r\n".encode("ascii")
+
+
+class DutLogEmulator:
+    def __init__(self, clock: Callable[[], float] = time.monotonic, seed: Optional[int] = None, **faults):
+        """faults: FAULT_NAMES 中各故障的注入概率（0~1）"""
+        unknown = set(faults) - set(FAULT_NAMES)
+        if unknown:
+            raise ValueError(f"未知故障类型: {sorted(unknown)}")
+        self.clock = clock
+        self.faults = {name: float(faults.get(name, 0.0)) for name in FAULT_NAMES}
+        self.rng = random.Random(seed)
+        self.powered = False
+        self.booted = False
+        self._queue: List[Tuple[float, int, bytes]] = []
+        self._seq = 0
+        # 统计
+        self.boots = 0
+        self.shutdowns = 0
+        self.lines = 0
+        self.bytes_out = 0
+        self.fault_counts = {name: 0 for name in FAULT_NAMES}
+        # (上电序号, 故障名)：仿真中核对脚本把异常记在了哪一轮
+        self.fault_events: List[Tuple[int, str]] = []
+
+    # ---------------- 排队 ----------------
+    def _push(self, due: float, data: bytes):
+        heapq.heappush(self._queue, (due, self._seq, data))
+        self._seq += 1
+
+    def _schedule(self, t0: float, lines):
+        for offset, level, tag, msg in lines:
+            self._push(t0 + offset, format_line(level, tag, msg))
+
+    def _hit(self, name: str) -> bool:
+        p = self.faults[name]
+        if p and self.rng.random() < p:
+            self.fault_counts[name] += 1
+            self.fault_events.append((self.boots, name))
+            return True
+        return False
+
+    # ---------------- 电源事件 ----------------
+    def set_power(self, on: bool, now: Optional[float] = None):
+        if on == self.powered:
+            return
+        self.powered = on
+        t0 = self.clock() if now is None else now
+        if on:
+            self.boots += 1
+            self.booted = not self._hit("no_boot")
+            if not self.booted:
+                return
+            self._schedule(t0, BOOT_LINES)
+            for name, lines in FAULT_LINES.items():
+                if self._hit(name):
+                    self._schedule(t0, lines)
+            if self._hit("garbled"):
+                junk = bytes(self.rng.randrange(0x80, 0xFF) for _ in range(self.rng.randrange(3, 24)))
+                self._push(t0 + 1.0, junk + b"\r\n")
+        elif self.booted:
+            self.shutdowns += 1
+            self._schedule(t0, SHUTDOWN_LINES)
+            if self._hit("late_assertion"):
+                self._push(t0 + self.rng.uniform(*LATE_ASSERTION_DELAY), format_line(None, None, LATE_ASSERTION_LINE))
+
+    # ---------------- 输出 ----------------
+    def next_due(self) -> Optional[float]:
+        return self._queue[0][0] if self._queue else None
+
+    def read_due(self, now: Optional[float] = None) -> bytes:
+        """取出到期的日志字节（按到期时刻顺序）"""
+        if now is None:
+            now = self.clock()
+        out = bytearray()
+        q = self._queue
+        while q and q[0][0] <= now:
+            data = heapq.heappop(q)[2]
+            out += data
+            self.lines += 1
+        self.bytes_out += len(out)
+        return bytes(out)
+
+    def stats(self) -> dict:
+        return {
+            "boots": self.boots,
+            "shutdowns": self.shutdowns,
+            "lines": self.lines,
+            "bytes_out": self.bytes_out,
+            "pending": len(self._queue),
+            "faults": {k: v for k, v in self.fault_counts.items() if v},
+        }
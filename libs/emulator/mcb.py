@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+MCB 模拟器（region 协议设备端）
+============================================================
+寄存器文件为完整的 ppx_region_data_t，除通用的读写应答外模拟：
+
+- RUN_MODE  : 只有 RUN/TST 模式且未刹车时电机才跟随 TARGET_SPEED，其余模式目标为 0
+- 转速      : 一阶响应 motor_speed += (target - speed) * (1 - e^(-dt/tau))，speed_ref = 目标
+- 霍尔状态  : 按转速推进电角度，霍尔码按 1-3-2-6-4-5 顺序跳变（反转时逆序）
+- 母线      : bus_voltage 固定，bus_current 与 |转速| 成正比
+- RT_SETTING: 写入 PPX_CLR_ERRCODE(0x8000) 清除 mcu_errcode，清错位自动回 0
+- reboot()  : 模拟设备重启，控制寄存器回到上电默认值
+
+时间默认取 time.monotonic，可传入虚拟时钟做确定性测试。
+
+命令行（Linux）：
+    python -m emulator.mcb [--pace] [--tau 0.3]
+"""
+
+import math
+import time
+import argparse
+from typing import Callable, Optional
+
+from ppx.codec import PyRegionCodec
+from ppx.structs import (
+    PPX_ID_MCB, PPX_MODE_IDLE, PPX_MODE_RUN, PPX_MODE_TST,
+    PPX_RT_SETTING_REG, PPX_RUN_MODE_REG, PPX_TARGET_SPEED_REG,
+)
+
+from .device import RegisterDevice, set_bytes
+
+PPX_CLR_ERRCODE = 1 << 15
+HALL_SEQUENCE = (1, 3, 2, 6, 4, 5)
+
+DEFAULT_HW_VERSION = 0x0102
+DEFAULT_SW_VERSION = b"MCB_EMU_V1.0"
+DEFAULT_MODEL = b"MCB-EMU"
+DEFAULT_SERIAL = b"EMU000000000000000000001"
+DEFAULT_BUS_VOLTAGE = 480       # 0.1 V
+DEFAULT_TAU = 0.3               # 转速响应时间常数（秒）
+POLE_PAIRS = 15                 # 轮毂电机极对数
+CURRENT_PER_RPM = 0.02          # 0.1 A / rpm
+
+
+class McbEmulator(RegisterDevice):
+    def __init__(self, dev_id: int = PPX_ID_MCB, tau: float = DEFAULT_TAU,
+                 clock: Optional[Callable[[], float]] = time.monotonic, **faults):
+        """faults: latency / drop_rate / corrupt_rate / seed，见 device.RegisterDevice"""
+        super().__init__(PyRegionCodec(), dev_id, clock, **faults)
+        self.tau = tau
+        self._angle = 0.0       # 电角度（霍尔扇区，浮点）
+        self.reboots = 0
+        self.power_on()
+
+    # ---------------- 上电 / 重启 ----------------
+    def power_on(self):
+        d = self.g_data
+        self.raw[:] = bytes(len(self.raw))
+        d.id_num = self.dev_id
+        set_bytes(d.model, DEFAULT_MODEL)
+        set_bytes(d.serial_num, DEFAULT_SERIAL)
+        d.hw_version = DEFAULT_HW_VERSION
+        set_bytes(d.sw_version, DEFAULT_SW_VERSION)
+        d.bus_voltage = DEFAULT_BUS_VOLTAGE
+        d.rated_voltage = DEFAULT_BUS_VOLTAGE
+        d.max_voltage = 546
+        d.min_voltage = 390
+        d.run_mode = PPX_MODE_IDLE
+        d.hall_state = HALL_SEQUENCE[0]
+        self._angle = 0.0
+
+    def reboot(self):
+        """模拟设备重启：寄存器回到上电默认值"""
+        self.reboots += 1
+        self.power_on()
+
+    # ---------------- 写入钩子 ----------------
+    def on_write(self, addr: int, nums: int):
+        d = self.g_data
+        if addr <= PPX_RT_SETTING_REG < addr + nums and d.rt_setting & PPX_CLR_ERRCODE:
+            d.mcu_errcode = 0
+            d.rt_setting &= ~PPX_CLR_ERRCODE & 0xFFFF
+        if addr <= PPX_TARGET_SPEED_REG < addr + nums or addr <= PPX_RUN_MODE_REG < addr + nums:
+            d.speed_ref = self._target()
+
+    # ---------------- 电机模型 ----------------
+    def _target(self) -> int:
+        d = self.g_data
+        if d.run_mode not in (PPX_MODE_RUN, PPX_MODE_TST) or d.brake_state:
+            return 0
+        return d.target_speed
+
+    def step(self, dt: float):
+        d = self.g_data
+        target = self._target()
+        speed = d.motor_speed + (target - d.motor_speed) * (1.0 - math.exp(-dt / self.tau))
+        if abs(target - speed) < 0.5:
+            speed = target
+        d.motor_speed = int(round(speed))
+        d.speed_ref = target
+        d.bus_current = int(abs(d.motor_speed) * CURRENT_PER_RPM)
+
+        # 每电周期 6 个霍尔扇区
+        self._angle += speed / 60.0 * POLE_PAIRS * 6 * dt
+        d.hall_state = HALL_SEQUENCE[int(math.floor(self._angle)) % 6]
+
+    # ---------------- 故障注入 ----------------
+    def inject_error(self, code: int):
+        self.g_data.mcu_errcode = code
+
+    def set_brake(self, on: bool):
+        self.g_data.brake_state = 1 if on else 0
+
+
+def main():
+    from .transport import PtyServer, DEFAULT_BAUDRATE
+
+    parser = argparse.ArgumentParser(description="MCB 模拟器（伪终端）")
+    parser.add_argument("--pace", action="store_true", help="按波特率延时应答")
+    parser.add_argument("--baudrate", type=int, default=DEFAULT_BAUDRATE)
+    parser.add_argument("--tau", type=float, default=DEFAULT_TAU, help="转速响应时间常数（秒）")
+    args = parser.parse_args()
+
+    emu = McbEmulator(tau=args.tau)
+    server = PtyServer(emu, pace=args.pace, baudrate=args.baudrate)
+    server.start()
+    print(f"MCB 模拟器已启动: {server.port}  (Ctrl+C 退出)")
+    try:
+        while True:
+            time.sleep(5)
+            st = emu.stats()
+            print(f"  请求 {st['requests']}  应答 {st['responses']}  异常 {st['exceptions']}  "
+                  f"转速 {emu.g_data.motor_speed} rpm  模式 {emu.g_data.run_mode}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+USB 继电器模拟器
+============================================================
+与压力测试脚本（继电器开关机/充电/W3/NFC）使用的 USB 继电器板指令一致：
+
+- 0x51      : 使能/握手，回 1 字节类型码（0xAC 8 路 / 0xAB 4 路 / 0xAD 2 路）
+- 0x4F 'O'  : 吸合（指示灯亮，NO 触点导通）；NFC 脚本发送小写 'o'，同样处理
+- 0x50 'P'  : 断开（指示灯灭，NC 触点导通）；小写 'p' 同样处理
+
+各脚本接线不同：充电/使能版本按 NO 接法（0x4F 上电），开关机原版与 W3 按 NC 接法
+（0x50 上电/按下）。attach(dut, wiring) 按接法把触点状态转换为 DUT 的上电/断电。
+
+silent=True 模拟不回握手数据的继电器（日志中“继电器未返回握手数据”的情况）。
+"""
+
+from typing import Callable, Optional
+
+RELAY_CMD_ENABLE = 0x51
+RELAY_CMD_CLOSE = 0x4F
+RELAY_CMD_OPEN = 0x50
+
+RELAY_TYPES = {8: 0xAC, 4: 0xAB, 2: 0xAD}
+
+_CLOSE_BYTES = (RELAY_CMD_CLOSE, ord("o"))
+_OPEN_BYTES = (RELAY_CMD_OPEN, ord("p"))
+
+WIRING_NO = "NO"    # 常开：吸合 = DUT 上电
+WIRING_NC = "NC"    # 常闭：断开 = DUT 上电
+
+
+class RelayEmulator:
+    def __init__(self, channels: int = 4, silent: bool = False,
+                 on_change: Optional[Callable[[bool], None]] = None):
+        if channels not in RELAY_TYPES:
+            raise ValueError(f"不支持的继电器路数: {channels}")
+        self.channels = channels
+        self.type_code = RELAY_TYPES[channels]
+        self.silent = silent
+        self.on_change = on_change
+        self.latency = 0.0
+        self.closed = False
+        # 统计
+        self.handshakes = 0
+        self.switches = 0
+        self.commands = 0
+        self.unknown = 0
+
+    def attach(self, dut, wiring: str = WIRING_NO):
+        """触点状态变化时按接法驱动 dut.set_power(on)"""
+        if wiring not in (WIRING_NO, WIRING_NC):
+            raise ValueError(f"未知接法: {wiring}")
+        invert = wiring == WIRING_NC
+        self.on_change = lambda closed: dut.set_power(closed != invert)
+        self.on_change(self.closed)
+
+    def _set(self, closed: bool):
+        if closed == self.closed:
+            return
+        self.closed = closed
+        self.switches += 1
+        if self.on_change:
+            self.on_change(closed)
+
+    def feed(self, chunk) -> bytes:
+        """送入主机发来的指令字节，返回应答字节（只有握手有应答）"""
+        out = bytearray()
+        for b in bytes(chunk):
+            self.commands += 1
+            if b == RELAY_CMD_ENABLE:
+                self.handshakes += 1
+                if not self.silent:
+                    out.append(self.type_code)
+            elif b in _CLOSE_BYTES:
+                self._set(True)
+            elif b in _OPEN_BYTES:
+                self._set(False)
+            else:
+                self.unknown += 1
+        return bytes(out)
+
+    def stats(self) -> dict:
+        return {
+            "commands": self.commands,
+            "handshakes": self.handshakes,
+            "switches": self.switches,
+            "unknown": self.unknown,
+            "closed": self.closed,
+        }
+
+
+def main():
+    import time
+    import argparse
+    from .dut_log import DutLogEmulator, FAULT_NAMES
+    from .transport import PtyServer, PtyStreamServer
+
+    parser = argparse.ArgumentParser(description="USB 继电器 + DUT 日志模拟器（伪终端）")
+    parser.add_argument("--channels", type=int, default=4, choices=sorted(RELAY_TYPES))
+    parser.add_argument("--wiring", default=WIRING_NO, choices=(WIRING_NO, WIRING_NC),
+                        help="NO: 0x4F 上电（充电/使能版本）；NC: 0x50 上电（开关机原版/W3）")
+    parser.add_argument("--silent", action="store_true", help="不回握手数据")
+    parser.add_argument("--seed", type=int, default=None)
+    for name in FAULT_NAMES:
+        parser.add_argument(f"--{name.replace('_', '-')}", type=float, default=0.0, metavar="P",
+                            help=f"故障概率: {name}")
+    args = parser.parse_args()
+
+    faults = {name: getattr(args, name) for name in FAULT_NAMES}
+    dut = DutLogEmulator(seed=args.seed, **faults)
+    relay = RelayEmulator(args.channels, silent=args.silent)
+    relay.attach(dut, args.wiring)
+    relay_server = PtyServer(relay)
+    dut_server = PtyStreamServer(dut)
+    relay_server.start()
+    dut_server.start()
+    print(f"继电器: {relay_server.port}  DUT 日志: {dut_server.port}  接法: {args.wiring}  (Ctrl+C 退出)")
+    try:
+        while True:
+            time.sleep(5)
+            st = dut.stats()
+            print(f"  继电器切换 {relay.switches}  上电 {st['boots']}  行数 {st['lines']}  故障 {st['faults']}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        relay_server.close()
+        dut_server.close()
+
+
+if __name__ == "__main__":
+    main()
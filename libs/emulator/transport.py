@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""
+模拟器串口端点
+============================================================
+- PtyServer : Linux 伪终端。设备线程占用主端，脚本用 serial.Serial(server.port) 打开从端，
+              与真实串口完全一样（pyserial 打开时会把从端设为 raw 模式）
+- LoopPort  : 进程内回环，接口与 pyserial Serial 常用部分一致
+              （write/read/readinto/read_all/in_waiting/timeout/reset_input_buffer/close），
+              写入时同步交给设备处理，应答立即可读；不依赖操作系统，适合基准测试
+
+设备对象只需实现 feed(bytes) -> bytes（见 device.RegisterDevice / relay.RelayEmulator）。
+
+pace=True 时按波特率延时发送应答，模拟线上传输时间；设备的 latency 属性（秒）
+在两种端点上都表现为应答延后可读。
+
+主动输出日志的设备（dut_log.DutLogEmulator）用另一对端点：
+- PtyStreamServer : 伪终端，按设备时钟把到期日志写入主端
+- StreamPort      : 进程内，pyserial 风格的 read/readline/readlines/read_all
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+DEFAULT_BAUDRATE = 460800
+
+
+class PtyServer(threading.Thread):
+    """伪终端上的设备服务线程（仅 Linux/macOS）"""
+
+    def __init__(self, device, pace: bool = False, baudrate: int = DEFAULT_BAUDRATE):
+        super().__init__(daemon=True)
+        import pty
+        import tty
+        self.device = device
+        self.pace = pace
+        self.byte_time = 10.0 / baudrate
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+        self.running = True
+
+    def run(self):
+        while self.running:
+            try:
+                chunk = os.read(self.master, 4096)
+            except OSError:
+                return
+            out = self.device.feed(chunk)
+            if not out:
+                continue
+            delay = getattr(self.device, "latency", 0.0)
+            if self.pace:
+                delay += len(out) * self.byte_time
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                os.write(self.master, out)
+            except OSError:
+                return
+
+    def close(self):
+        self.running = False
+        for fd in (self.slave, self.master):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+class LoopPort:
+    """
+    进程内回环串口，主机端对象。
+    设备 latency 为 0 时应答在 write 返回后立即可读；否则应答到期前 read 按 timeout 阻塞等待。
+    """
+
+    def __init__(self, device, timeout: Optional[float] = 0.1):
+        self.device = device
+        self.timeout = timeout
+        self.is_open = True
+        self._rx = bytearray()
+        self._pending = deque()     # (可读时刻, 应答字节)
+        self._lock = threading.Lock()
+
+    def _pump(self) -> Optional[float]:
+        """把到期的应答移入接收缓冲区，返回下一个应答的到期时刻"""
+        now = time.monotonic()
+        while self._pending and self._pending[0][0] <= now:
+            self._rx += self._pending.popleft()[1]
+        return self._pending[0][0] if self._pending else None
+
+    def _wait(self, size: int):
+        """接收缓冲区不足 size 字节时，在 timeout 内等待延时应答到期"""
+        with self._lock:
+            due = self._pump()
+        if len(self._rx) >= size or due is None or not self.timeout:
+            return
+        deadline = time.monotonic() + self.timeout
+        while len(self._rx) < size and due is not None and due <= deadline:
+            time.sleep(max(0.0, due - time.monotonic()))
+            with self._lock:
+                due = self._pump()
+
+    # ---------------- pyserial 兼容接口 ----------------
+    @property
+    def in_waiting(self) -> int:
+        with self._lock:
+            self._pump()
+            return len(self._rx)
+
+    def write(self, data) -> int:
+        out = self.device.feed(bytes(data))
+        if out:
+            latency = getattr(self.device, "latency", 0.0)
+            with self._lock:
+                if latency > 0:
+                    self._pending.append((time.monotonic() + latency, out))
+                else:
+                    self._rx += out
+        return len(data)
+
+    def read(self, size: int = 1) -> bytes:
+        self._wait(size)
+        with self._lock:
+            data = bytes(self._rx[:size])
+            del self._rx[:size]
+        return data
+
+    def readinto(self, b) -> int:
+        view = memoryview(b).cast("B")
+        self._wait(len(view))
+        with self._lock:
+            n = min(len(view), len(self._rx))
+            view[:n] = self._rx[:n]
+            del self._rx[:n]
+        return n
+
+    def read_all(self) -> bytes:
+        with self._lock:
+            self._pump()
+            data = bytes(self._rx)
+            self._rx.clear()
+        return data
+
+    def reset_input_buffer(self):
+        with self._lock:
+            self._rx.clear()
+
+    def reset_output_buffer(self):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.is_open = False
+
+
+# ==============================================
+# 主动输出型设备（DUT 日志）的端点
+# ==============================================
+class PtyStreamServer(threading.Thread):
+    """
+    伪终端上的日志输出线程（仅 Linux/macOS）。
+    source 需实现 read_due() -> bytes（按自身时钟取出到期数据）；主机写入的字节被丢弃。
+    """
+
+    def __init__(self, source, poll: float = 0.005):
+        super().__init__(daemon=True)
+        import pty
+        import tty
+        self.source = source
+        self.poll = poll
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+        self.running = True
+
+    def run(self):
+        while self.running:
+            out = self.source.read_due()
+            if out:
+                try:
+                    os.write(self.master, out)
+                except OSError:
+                    return
+            time.sleep(self.poll)
+
+    def close(self):
+        self.running = False
+        for fd in (self.slave, self.master):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+class StreamPort:
+    """
+    进程内日志端口，主机端对象，接口与 pyserial Serial 读取部分一致
+    （read/readline/readlines/read_all/in_waiting/timeout/reset_input_buffer/close）。
+    时间取 source.clock，等待用 sleep（默认 time.sleep，可替换为虚拟时钟的 sleep）。
+    """
+
+    def __init__(self, source, timeout: Optional[float] = 0.1, sleep=time.sleep):
+        self.source = source
+        self.timeout = timeout
+        self.sleep = sleep
+        self.is_open = True
+        self._rx = bytearray()
+
+    def _pump(self):
+        self._rx += self.source.read_due()
+
+    def _wait(self, done) -> None:
+        """在 timeout 内等待后续日志到期，直到 done() 为真"""
+        self._pump()
+        if done() or not self.timeout:
+            return
+        clock = self.source.clock
+        deadline = clock() + self.timeout
+        while not done():
+            due = self.source.next_due()
+            now = clock()
+            if due is None or due > deadline:
+                if deadline > now:
+                    self.sleep(deadline - now)
+                self._pump()
+                return
+            if due > now:
+                self.sleep(due - now)
+            self._pump()
+
+    # ---------------- pyserial 兼容接口 ----------------
+    @property
+    def in_waiting(self) -> int:
+        self._pump()
+        return len(self._rx)
+
+    def read(self, size: int = 1) -> bytes:
+        self._wait(lambda: len(self._rx) >= size)
+        data = bytes(self._rx[:size])
+        del self._rx[:size]
+        return data
+
+    def readline(self) -> bytes:
+        self._wait(lambda: b"\n" in self._rx)
+        end = self._rx.find(b"\n")
+        end = len(self._rx) if end < 0 else end + 1
+        data = bytes(self._rx[:end])
+        del self._rx[:end]
+        return data
+
+    def readlines(self) -> list:
+        lines = []
+        while True:
+            line = self.readline()
+            if not line:
+                return lines
+            lines.append(line)
+
+    def read_all(self) -> bytes:
+        self._pump()
+        data = bytes(self._rx)
+        self._rx.clear()
+        return data
+
+    def write(self, data) -> int:
+        return len(data)
+
+    def reset_input_buffer(self):
+        self._pump()
+        self._rx.clear()
+
+    def close(self):
+        self.is_open = False
@@ -25,13 +25,21 @@ import os
 import threading
 import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../.."))
+from ppx.codec import open_region_codec
+from ppx.structs import ppx_region_msg_t
+from ppx.regmap import reg_value
+from ppx.deframer import Deframer, READ_POLL
+
 # ==============================================
 # 基础配置
 # ==============================================
 DLL_PATH = os.path.join(os.path.dirname(__file__), "ppx_region.dll")
+CODEC_BACKEND = "auto"  # dll / python / auto（非 Windows 或 DLL 缺失时自动使用纯 Python 实现）
 SERIAL_PORT = "COM9"
 BAUDRATE = 460800
 MCB_DEV_ID = 0x20
+RESP_TIMEOUT = 0.05  # 读应答超时（秒），收到完整帧即返回
 
 # 寄存器
 REG_HW_VERSION = 3
@@ -39,69 +47,38 @@ REG_HALL_STATE = 15  # [15] 霍尔状态 (0-7)
 REG_BUS_VOLT = 10
 
 
-# 结构体定义
-class ppx_region_excp_t(Structure):
-    _fields_ = [("parse_status", c_uint8), ("cmd_status", c_uint8), ("data_status", c_uint8)]
-
-
-class ppx_region_msg_t(Structure):
-    _fields_ = [("id", c_uint8), ("cmd", c_uint8), ("msg_type", c_uint8), ("reg_addr", c_uint8), ("reg_nums", c_uint8),
-                ("reg_excp", ppx_region_excp_t)]
-
-
-class ppx_region_data_t(Structure):
-    _pack_ = 1
-    _fields_ = [("id_num", c_uint8), ("model", c_uint8 * 8), ("serial_num", c_uint8 * 26),
-                ("hw_version", c_uint16), ("sw_version", c_uint8 * 20),
-                ("rim_state", c_uint8), ("mcu_errcode", c_uint32),
-                ("ctrl_model", c_uint8), ("speed_ref", c_int16),
-                ("motor_speed", c_int16),
-                ("bus_voltage", c_uint16), ("bus_current", c_uint16),
-                ("phase_current_a", c_int16), ("phase_current_b", c_int16), ("phase_current_c", c_int16),
-                ("hall_state", c_uint8),  # Reg 15
-                ("pi_vq", c_int16), ("pi_iq", c_int16), ("brake_state", c_uint8), ("imu_pitch", c_int16),
-                ("imu_roll", c_int16), ("imu_acc", c_uint8), ("brake_mileage", c_uint8), ("motor_angle", c_int32),
-                ("single_mileage", c_uint32), ("angular_speed", c_int16), ("rt_setting", c_uint16),
-                ("run_mode", c_uint8), ("gear", c_uint8), ("target_speed", c_int16), ("rated_voltage", c_uint16),
-                ("rated_current", c_uint16), ("max_voltage", c_uint16), ("min_voltage", c_uint16),
-                ("acceration", c_uint32), ("dat_setting", c_uint32), ("rsvd_data", c_uint32)]
-
-
 class TestEngine:
     def __init__(self):
         self.ser = None
         self.lib = None
         self.g_data = None
+        self.deframer = Deframer(dev_id=MCB_DEV_ID)
 
     def setup(self):
-        if not os.path.exists(DLL_PATH): print("DLL缺失"); return False
+        if CODEC_BACKEND == "dll" and not os.path.exists(DLL_PATH): print("DLL缺失"); return False
         try:
-            self.lib = cdll.LoadLibrary(DLL_PATH)
-            self.lib.ppx_com_region_format.argtypes = [c_int, POINTER(ppx_region_msg_t), c_void_p]
-            self.lib.ppx_com_region_format.restype = c_uint16
-            self.lib.ppx_com_region_parse.argtypes = [POINTER(c_uint8), c_uint8, POINTER(ppx_region_msg_t)]
-            self.lib.ppx_com_region_parse.restype = c_int
-            self.g_data = ppx_region_data_t.in_dll(self.lib, "g_ppx_region_data")
-            self.ser = serial.Serial(SERIAL_PORT, BAUDRATE, timeout=0.1)
+            self.lib = open_region_codec(CODEC_BACKEND, DLL_PATH)
+            self.g_data = self.lib.g_ppx_region_data
+            self.ser = serial.Serial(SERIAL_PORT, BAUDRATE, timeout=READ_POLL)
             return True
         except Exception as e:
             print(f"连接失败: {e}"); return False
 
     def read_reg(self, reg):
         self.ser.reset_input_buffer()
+        self.deframer.reset()
         msg = ppx_region_msg_t()
         msg.id, msg.cmd, msg.reg_addr, msg.reg_nums = MCB_DEV_ID, 0x01, reg, 1
         buf = create_string_buffer(256)
         length = self.lib.ppx_com_region_format(0, byref(msg), buf)
         self.ser.write(buf.raw[:length])
-        time.sleep(0.05)
-        if self.ser.in_waiting:
-            recv = self.ser.read(self.ser.in_waiting)
+        frame = self.deframer.read_frame(self.ser, RESP_TIMEOUT)
+        if frame is not None:
+            recv = frame.raw
             msg_res = ppx_region_msg_t()
             msg_res.id = MCB_DEV_ID
             if self.lib.ppx_com_region_parse((c_uint8 * len(recv))(*recv), len(recv), byref(msg_res)) == 1:
-                if reg == REG_HALL_STATE: return self.g_data.hall_state
-                if reg == REG_BUS_VOLT: return self.g_data.bus_voltage
+                return reg_value(self.g_data, reg)
         return None
 
 
@@ -13,6 +13,19 @@ from typing import List, Dict, Any, Optional, Tuple
 import itertools
 import csv
 
+# 公共协议库（libs/ppx）：结构体定义与纯 Python 编解码
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../.."))
+from ppx.codec import open_region_codec, resolve_backend, BACKEND_AUTO, BACKEND_DLL
+from ppx.session import CodecSession
+from ppx.deframer import Deframer, READ_POLL
+from ppx.aio import AsyncSerial
+from ppx.pipeline import Pipeline
+from ppx.trace import Trace, hexstr, DEBUG, INFO, ERROR
+from ppx.structs import ppx_region_msg_t, ppx_region_data_t  # 与 ppx_region.h 完全一致
+from stress.logsink import LogSink
+from stress.multidut import (run_ports, parse_ports, merge_results, summarize, save_merged_csv,
+                             save_merged_html, MODES, MODE_REPLICATE)
+
 
 # 尝试导入 pandas（用于 Excel/CSV 读写），失败则退化到 CSV 解析
 try:
@@ -25,10 +38,13 @@ except Exception:
 # 配置区域 - 根据实际情况修改这些参数
 # ==============================================
 REGION_PROTOCOL_DLL = r"C:\Test_ziliao\libs\libcs_mcb\libs\ppx_region"  # 控制器协议DLL路径
+CODEC_BACKEND = BACKEND_AUTO                        # 编解码后端：dll / python / auto
 SERIAL_PORT = "COM4"                              # 串口端口
 BAUDRATE = 115200                                   # 串口波特率
 DEBUG_MODE = True                                   # 调试模式，打印更多信息
+LOG_SAMPLE = {}                                     # 逐帧日志抽样：{"tx": 10, "rx": 10, "frame": 10} 每 10 帧打印 1 帧
 DEFAULT_RECV_TIMEOUT = 1.0                          # 串口接收默认超时（秒）
+PIPELINE_RETRIES = 2                                # 流水线中应答缺失/超时/校验不符时整个事务的重发次数
 
 # ==============================================
 # 协议常量定义（源自 ppx_region.h）
@@ -135,85 +151,23 @@ class PpxRimState:
     PPX_RIM_BUMP = 0x40    # 颠簸
     PPX_RIM_TURN = 0x80    # 转弯
 
-# ==============================================
-# 结构体定义 (与 ppx_region.h 完全一致)
-# ==============================================
-class ppx_region_excp_t(Structure):
-    """异常响应结构体（源自 ppx_region_excp_t）"""
-    _fields_ = [
-        ("parse_status", c_uint8),  # 解析状态
-        ("cmd_status", c_uint8),    # 命令状态
-        ("data_status", c_uint8)    # 数据状态
-    ]
-
-class ppx_region_msg_t(Structure):
-    """控制器消息结构体（源自 ppx_region_msg_t）"""
-    _fields_ = [
-        ("id", c_uint8),                # 设备ID
-        ("cmd", c_uint8),               # 写/读命令
-        ("msg_type", c_uint8),          # 主设备使用的消息类型
-        ("reg_addr", c_uint8),          # 寄存器地址
-        ("reg_nums", c_uint8),          # 寄存器数量
-        ("reg_excp", ppx_region_excp_t) # 异常响应
-    ]
-
-class ppx_region_data_t(Structure):
-    """控制器数据结构体（源自 ppx_region_data_t，注意内存对齐）"""
-    _pack_ = 1  # 强制1字节对齐，与C语言#pragma pack(1)保持一致
-    _fields_ = [
-        # 读数据区域
-        ("id_num", c_uint8),                     # 设备ID号
-        ("model", c_uint8 * 8),                  # 型号（PPX_MODEL_SIZE默认8）
-        ("serial_num", c_uint8 * 26),            # 序列号（PPX_SN_SIZE默认26）
-        ("hw_version", c_uint16),                # 硬件版本
-        ("sw_version", c_uint8 * 20),            # 软件版本（PPX_SW_VER_SIZE默认20）
-        ("rim_state", c_uint8),                  # 护盾状态（PpxRimState）
-        ("mcu_errcode", c_uint32),               # MCU错误码
-        ("ctrl_model", c_uint8),                 # 控制模式
-        ("speed_ref", c_int16),                  # 速度参考值
-        ("motor_speed", c_int16),                # 电机速度（rpm）
-        ("bus_voltage", c_uint16),               # 总线电压（0.1V）
-        ("bus_current", c_uint16),               # 总线电流（0.1A）
-        ("phase_current_a", c_int16),            # A相电流（0.1A）
-        ("phase_current_b", c_int16),            # B相电流（0.1A）
-        ("phase_current_c", c_int16),            # C相电流（0.1A）
-        ("hall_state", c_uint8),                 # 霍尔状态
-        ("pi_vq", c_int16),                      # PI_VQ参数
-        ("pi_iq", c_int16),                      # PI_IQ参数
-        ("brake_state", c_uint8),                # 刹车状态
-        ("imu_pitch", c_int16),                  # IMU俯仰角（0.1deg）
-        ("imu_roll", c_int16),                   # IMU横滚角（0.1deg）
-        ("imu_acc", c_uint8),                    # IMU加速度（0.01g）
-        ("board_temp", c_uint8),                 # 板温（℃）
-        ("brake_mileage", c_uint8),              # 刹车里程（dm）
-        ("motor_angle", c_int32),                # 电机角度
-        ("single_mileage", c_uint32),            # 单次里程（m）
-        ("angular_speed", c_int16),              # 角速度（0.1deg）
-        # 写数据区域
-        ("rt_setting", c_uint16),                # 实时设置（PpxRtSetting）
-        ("run_mode", c_uint8),                   # 运行模式（PpxRunMode）
-        ("gear", c_uint8),                       # 档位
-        ("target_speed", c_int16),               # 目标速度（rpm）
-        ("rated_voltage", c_uint16),             # 额定电压（0.1V）
-        ("rated_current", c_uint16),             # 额定电流（0.1A）
-        ("max_voltage", c_uint16),               # 最大电压（0.1V）
-        ("min_voltage", c_uint16),               # 最小电压（0.1V）
-        ("acceration", c_uint32),                # 加速度
-        ("dat_setting", c_uint32),               # 数据设置（PpxDatSetting）
-        ("rsvd_data", c_uint32)                  # 保留数据
-    ]
-
 # ==============================================
 # 控制器协议通信类（复用灯板框架，适配Region协议）
 # ==============================================
 class RegionProtocol:
-    def __init__(self, dll_path: str, serial_port: str, baudrate: int, recv_timeout: float = DEFAULT_RECV_TIMEOUT):
+    def __init__(self, dll_path: str, serial_port: str, baudrate: int, recv_timeout: float = DEFAULT_RECV_TIMEOUT,
+                 backend: str = CODEC_BACKEND):
         self.dll_loaded = False
+        self.backend = backend
         self.serial_connected = False
         self.recv_timeout = recv_timeout
+        self.aio = None  # type: Optional[AsyncSerial]  # 异步传输（request_async 时创建）
+        self.deframer = Deframer(dev_id=PPX_ID_REGION)  # 应答分帧
 
         # 日志回调（由外部 AutoTester 注入）
         self._logger = None  # type: Optional[callable]
+        # 逐帧日志：级别不够时不做格式化
+        self.trace = Trace(self._log, level=DEBUG if DEBUG_MODE else INFO, sample=LOG_SAMPLE)
 
         # 加载DLL
         self._load_dll(dll_path)
@@ -228,6 +182,12 @@ class RegionProtocol:
         """设置日志回调：logger_func(level:str, message:str)"""
         self._logger = logger_func
 
+    def sync_log(self):
+        """日志回调支持 sync() 时等待日志落盘"""
+        sync = getattr(self._logger, "sync", None)
+        if sync:
+            sync()
+
     # ---------------- 内部工具 ----------------
     def _log(self, level: str, message: str):
         if self._logger:
@@ -236,31 +196,19 @@ class RegionProtocol:
             print(f"[{level}] {message}")
 
     def _debug_print(self, message: str, is_error: bool = False):
-        prefix = "ERROR" if is_error else "DEBUG"
-        if is_error or DEBUG_MODE:
-            self._log(prefix, message)
+        self.trace.log(ERROR if is_error else DEBUG, message)
 
     # ---------------- DLL/串口初始化 ----------------
     def _load_dll(self, dll_path: str):
         try:
-            self.region_lib = cdll.LoadLibrary(dll_path)
+            # DLL 后端的函数原型在 ppx.codec.DllRegionCodec 中配置；python 后端不依赖 DLL
+            self.region_lib = open_region_codec(self.backend, dll_path)
+            self.session = CodecSession(self.region_lib, PPX_ID_REGION)  # 复用组包/解析缓冲区
             self.dll_loaded = True
-            self._debug_print(f"成功加载控制器DLL: {dll_path}")
-
-            # 配置DLL函数原型（与ppx_region.h中的函数定义一致）
-            self.region_lib.ppx_com_region_parse.argtypes = [
-                POINTER(c_uint8),          # pdata: 输入数据
-                c_uint8,                   # data_len: 数据长度
-                POINTER(ppx_region_msg_t)  # region_msg: 输出消息结构体
-            ]
-            self.region_lib.ppx_com_region_parse.restype = c_int  # 返回解析状态（成功/失败）
-
-            self.region_lib.ppx_com_region_format.argtypes = [
-                c_int,                     # cmd_type: 命令类型（REQ/RSP）
-                POINTER(ppx_region_msg_t), # region_msg: 输入消息结构体
-                c_void_p                   # buffer: 输出组包缓存
-            ]
-            self.region_lib.ppx_com_region_format.restype = c_uint16  # 返回组包长度
+            if self.region_lib.backend == "python":
+                self._debug_print("使用纯 Python 编解码后端")
+            else:
+                self._debug_print(f"成功加载控制器DLL: {dll_path}")
 
         except Exception as e:
             self._debug_print(f"加载控制器DLL失败: {e}", is_error=True)
@@ -271,7 +219,7 @@ class RegionProtocol:
             self.serial_port = serial.Serial(
                 port=port,
                 baudrate=baudrate,
-                timeout=self.recv_timeout,
+                timeout=READ_POLL,            # 读超时只设一次，接收截止时间由 recv_timeout 控制
                 parity=serial.PARITY_NONE,    # 默认无校验（需与硬件一致）
                 stopbits=serial.STOPBITS_ONE  # 默认1位停止位（需与硬件一致）
             )
@@ -284,17 +232,19 @@ class RegionProtocol:
     def _check_global_vars(self):
         """检查DLL中的全局变量g_ppx_region_data"""
         try:
-            self.g_ppx_region_data = ppx_region_data_t.in_dll(self.region_lib, "g_ppx_region_data")
+            self.g_ppx_region_data = self.region_lib.g_ppx_region_data
             self._debug_print("成功获取全局变量 g_ppx_region_data")
 
-            if DEBUG_MODE:
-                self._print_region_data(self.g_ppx_region_data)
+            self.trace.debug(self._format_region_data, self.g_ppx_region_data)
         except Exception as e:
             self._debug_print(f"获取全局变量失败: {e}", is_error=True)
 
     # ---------------- 基本通信 ----------------
     def close(self):
         """关闭串口连接"""
+        if self.aio is not None:
+            self.aio.close()
+            self.aio = None
         if hasattr(self, 'serial_port') and self.serial_port and self.serial_port.is_open:
             self.serial_port.close()
             self.serial_connected = False
@@ -306,7 +256,7 @@ class RegionProtocol:
             self._debug_print("串口未连接，无法发送数据", is_error=True)
             return False
         try:
-            self._debug_print(f"发送数据: {self._bytes_to_hex(data)}")
+            self.trace.debug("发送数据: %s", hexstr(data), category="tx")
             self.serial_port.write(data)
             return True
         except Exception as e:
@@ -314,24 +264,17 @@ class RegionProtocol:
             return False
 
     def receive_data(self, timeout: Optional[float] = None, max_length: int = 512) -> Optional[bytes]:
-        """从串口接收数据"""
+        """从串口接收一帧应答（max_length 仅为兼容保留，按帧接收后不再使用）"""
         if not self.serial_connected:
             self._debug_print("串口未连接，无法接收数据", is_error=True)
             return None
         try:
-            start_time = time.time()
-            data = bytes()
             _timeout = self.recv_timeout if timeout is None else timeout
-            while time.time() - start_time < _timeout:
-                waiting = self.serial_port.in_waiting
-                if waiting > 0:
-                    data += self.serial_port.read(waiting)
-                    if len(data) >= max_length:
-                        break
-                else:
-                    time.sleep(0.005)  # 微等，减少CPU占用
-            if data:
-                self._debug_print(f"接收数据: {self._bytes_to_hex(data)}")
+            # 阻塞读 + 增量分帧：收到一帧完整合法帧立即返回，不再 5ms 轮询到超时
+            frame = self.deframer.read_frame(self.serial_port, _timeout)
+            if frame is not None:
+                data = frame.raw
+                self.trace.debug("接收数据: %s", hexstr(data), category="rx")
                 return data
             else:
                 self._debug_print("接收数据超时")
@@ -340,6 +283,37 @@ class RegionProtocol:
             self._debug_print(f"接收数据失败: {e}", is_error=True)
             return None
 
+    async def request_async(self, data: bytes, timeout: Optional[float] = None) -> Optional[bytes]:
+        """
+        send_data + receive_data 的异步版本：await 应答帧，多个串口可在一个事件循环里并发。
+        第一次调用时把串口接到当前事件循环（ppx.aio），之后不要再混用同步 receive_data。
+        """
+        if not self.serial_connected:
+            self._debug_print("串口未连接，无法发送数据", is_error=True)
+            return None
+        try:
+            if self.aio is None:
+                self.aio = AsyncSerial(self.serial_port, self.deframer)
+            self.trace.debug("发送数据: %s", hexstr(data), category="tx")
+            _timeout = self.recv_timeout if timeout is None else timeout
+            frame = await self.aio.request(data, _timeout)
+            if frame is not None:
+                self.trace.debug("接收数据: %s", hexstr(frame.raw), category="rx")
+                return frame.raw
+            self._debug_print("接收数据超时")
+            return None
+        except Exception as e:
+            self._debug_print(f"异步请求失败: {e}", is_error=True)
+            return None
+
+    def open_pipeline(self, depth: int) -> Pipeline:
+        """
+        流水线会话：最多 depth 帧请求在途，应答按 (ID, 命令, 寄存器) 匹配，缺失/超时的事务整条重发。
+        请求帧用 format_data 组包后 submit，期间不要再调用 receive_data。
+        """
+        return Pipeline(self.serial_port, self.deframer, depth=depth, timeout=self.recv_timeout,
+                        retries=PIPELINE_RETRIES, trace=self.trace)
+
     def parse_data(self, data: bytes) -> Tuple[bool, Optional[ppx_region_msg_t], Optional[int], Optional[int]]:
         """用DLL解析数据包"""
         if not data:
@@ -349,24 +323,14 @@ class RegionProtocol:
             self._debug_print("DLL未加载，无法解析数据", is_error=True)
             return False, None, None, None
         try:
-            region_msg = ppx_region_msg_t()
-            region_msg.id = PPX_ID_REGION  # 预填充设备ID
-
-            data_len = len(data)
-            data_array = (c_uint8 * data_len)(*data)
-
-            # 调用DLL解析函数
-            parse_result = self.region_lib.ppx_com_region_parse(
-                cast(data_array, POINTER(c_uint8)),
-                c_uint8(data_len),
-                byref(region_msg)
-            )
+            # 数据拷入会话的固定输入缓冲区后解析，设备ID由会话预填充
+            # 注意：返回的 region_msg 为会话复用的结构体，下一次解析时会被覆盖
+            parse_result = self.session.parse(data)
+            region_msg = self.session.rx_msg
 
             if parse_result == PPX_PARSE_SUCCESS:
-                self._debug_print("数据解析成功:")
-                self._print_region_msg(region_msg)
-                # 更新全局变量信息
-                self._print_region_data_changes(region_msg)
+                # 解析结果与全局变量变化
+                self.trace.debug(self._format_parsed, region_msg, category="frame")
                 # 提取命令类型（首字节低4位）
                 cmd_type = data[0] & 0x0F if len(data) > 0 else None
                 return True, region_msg, cmd_type, int(parse_result)
@@ -383,18 +347,12 @@ class RegionProtocol:
             self._debug_print("DLL未加载，无法组包数据", is_error=True)
             return False, None
         try:
-            buffer_size = 256  # 足够大的缓存
-            buffer = create_string_buffer(buffer_size)
-
-            length = self.region_lib.ppx_com_region_format(
-                cmd_type,
-                byref(region_msg),
-                buffer
-            )
+            frame = self.session.format_msg(cmd_type, region_msg)
+            length = len(frame)
 
             if length > 0:
-                data = buffer.raw[:length]
-                self._debug_print(f"组包成功，数据长度: {length} 字节")
+                data = bytes(frame)
+                self.trace.debug("组包成功，数据长度: %d 字节", length)
                 return True, data
             else:
                 self._debug_print("组包失败，返回长度为0", is_error=True)
@@ -423,11 +381,11 @@ class RegionProtocol:
             self.g_ppx_region_data.gear = int(gear)
             self.g_ppx_region_data.target_speed = int(target_speed)
 
-            self._debug_print("修改后的运行参数:")
-            self._log("INFO", 
-                     f"  运行模式: {run_mode} ({self._get_run_mode_str(run_mode)})\n"
-                     f"  档位: {gear}\n"
-                     f"  目标速度: {target_speed} rpm")
+            self.trace.debug("修改后的运行参数:\n"
+                             "  运行模式: %s (%s)\n"
+                             "  档位: %s\n"
+                             "  目标速度: %s rpm",
+                             run_mode, self._get_run_mode_str(run_mode), gear, target_speed)
 
             # 准备消息结构体
             region_msg = ppx_region_msg_t()
@@ -478,13 +436,7 @@ class RegionProtocol:
             # 修改全局变量
             self.g_ppx_region_data.rt_setting = rt_setting
 
-            self._debug_print("修改后的实时设置:")
-            self._log("INFO", 
-                     f"  刹车灯: {'开' if brake_led else '关'}\n"
-                     f"  尾灯: {'开' if tail_led else '关'}\n"
-                     f"  右转向灯: {'开' if right_led else '关'}\n"
-                     f"  左转向灯: {'开' if left_led else '关'}\n"
-                     f"  清除错误码: {'是' if clear_err else '否'}")
+            self.trace.debug(self._format_rt_request, brake_led, tail_led, right_led, left_led, clear_err)
 
             # 准备消息结构体
             region_msg = ppx_region_msg_t()
@@ -586,81 +538,90 @@ class RegionProtocol:
         }
         return modes.get(mode, f"未知模式({mode})")
 
-    def _print_region_msg(self, region_msg: ppx_region_msg_t):
-        """打印控制器消息结构体"""
-        self._log("INFO", 
-                 f"  ID: 0x{region_msg.id:02X}\n"
-                 f"  命令: 0x{region_msg.cmd:02X} ({'写' if region_msg.cmd == PPX_MSG_WRITE else '读'})\n"
-                 f"  消息类型: 0x{region_msg.msg_type:02X}\n"
-                 f"  寄存器地址: 0x{region_msg.reg_addr:02X}\n"
-                 f"  寄存器数量: {region_msg.reg_nums}\n"
-                 f"  异常状态: 解析={region_msg.reg_excp.parse_status}, 命令={region_msg.reg_excp.cmd_status}, 数据={region_msg.reg_excp.data_status}")
-
-    def _print_region_data(self, region_data: ppx_region_data_t):
-        """打印控制器数据结构体"""
+    # 以下 _format_* 只在对应日志需要输出时由 trace 调用
+    def _format_region_msg(self, region_msg: ppx_region_msg_t) -> str:
+        """控制器消息结构体文本"""
+        return (f"  ID: 0x{region_msg.id:02X}\n"
+                f"  命令: 0x{region_msg.cmd:02X} ({'写' if region_msg.cmd == PPX_MSG_WRITE else '读'})\n"
+                f"  消息类型: 0x{region_msg.msg_type:02X}\n"
+                f"  寄存器地址: 0x{region_msg.reg_addr:02X}\n"
+                f"  寄存器数量: {region_msg.reg_nums}\n"
+                f"  异常状态: 解析={region_msg.reg_excp.parse_status}, 命令={region_msg.reg_excp.cmd_status}, 数据={region_msg.reg_excp.data_status}")
+
+    def _format_region_data(self, region_data: ppx_region_data_t) -> str:
+        """控制器数据结构体文本"""
         # 字符串类型字段需要解码
         model_str = bytes(region_data.model).decode('utf-8', errors='replace').strip('\x00')
         sn_str = bytes(region_data.serial_num).decode('utf-8', errors='replace').strip('\x00')
         sw_ver_str = bytes(region_data.sw_version).decode('utf-8', errors='replace').strip('\x00')
 
-        self._log("INFO",
-                 (f"\n全局控制器数据结构体内容:\n"
-                  f"设备ID号: {region_data.id_num}\n"
-                  f"型号: {model_str}\n"
-                  f"序列号: {sn_str}\n"
-                  f"硬件版本: 0x{region_data.hw_version:04X}\n"
-                  f"软件版本: {sw_ver_str}\n"
-                  f"护盾状态: 0x{region_data.rim_state:02X} {self._get_rim_state_str(region_data.rim_state)}\n"
-                  f"MCU错误码: 0x{region_data.mcu_errcode:08X}\n"
-                  f"控制模式: {region_data.ctrl_model}\n"
-                  f"速度参考值: {region_data.speed_ref}\n"
-                  f"电机速度: {region_data.motor_speed} rpm\n"
-                  f"总线电压: {region_data.bus_voltage * 0.1} V\n"
-                  f"总线电流: {region_data.bus_current * 0.1} A\n"
-                  f"A相电流: {region_data.phase_current_a * 0.1} A\n"
-                  f"B相电流: {region_data.phase_current_b * 0.1} A\n"
-                  f"C相电流: {region_data.phase_current_c * 0.1} A\n"
-                  f"霍尔状态: 0x{region_data.hall_state:02X}\n"
-                  f"PI_VQ参数: {region_data.pi_vq}\n"
-                  f"PI_IQ参数: {region_data.pi_iq}\n"
-                  f"刹车状态: {region_data.brake_state}\n"
-                  f"IMU俯仰角: {region_data.imu_pitch * 0.1} °\n"
-                  f"IMU横滚角: {region_data.imu_roll * 0.1} °\n"
-                  f"IMU加速度: {region_data.imu_acc * 0.01} g\n"
-                  f"板温: {region_data.board_temp} °C\n"
-                  f"刹车里程: {region_data.brake_mileage} dm\n"
-                  f"电机角度: {region_data.motor_angle}\n"
-                  f"单次里程: {region_data.single_mileage} m\n"
-                  f"角速度: {region_data.angular_speed * 0.1} °/s\n"
-                  f"实时设置: 0x{region_data.rt_setting:04X} {self._get_rt_setting_str(region_data.rt_setting)}\n"
-                  f"运行模式: {region_data.run_mode} {self._get_run_mode_str(region_data.run_mode)}\n"
-                  f"档位: {region_data.gear}\n"
-                  f"目标速度: {region_data.target_speed} rpm\n"
-                  f"额定电压: {region_data.rated_voltage * 0.1} V\n"
-                  f"额定电流: {region_data.rated_current * 0.1} A\n"
-                  f"最大电压: {region_data.max_voltage * 0.1} V\n"
-                  f"最小电压: {region_data.min_voltage * 0.1} V\n"
-                  f"加速度: {region_data.acceration}\n"
-                  f"数据设置: 0x{region_data.dat_setting:08X} {self._get_dat_setting_str(region_data.dat_setting)}\n"
-                  f"保留数据: 0x{region_data.rsvd_data:08X}"))
-
-    def _print_region_data_changes(self, region_msg: ppx_region_msg_t):
-        """打印数据变化（根据寄存器地址过滤）"""
+        return (f"\n全局控制器数据结构体内容:\n"
+                f"设备ID号: {region_data.id_num}\n"
+                f"型号: {model_str}\n"
+                f"序列号: {sn_str}\n"
+                f"硬件版本: 0x{region_data.hw_version:04X}\n"
+                f"软件版本: {sw_ver_str}\n"
+                f"护盾状态: 0x{region_data.rim_state:02X} {self._get_rim_state_str(region_data.rim_state)}\n"
+                f"MCU错误码: 0x{region_data.mcu_errcode:08X}\n"
+                f"控制模式: {region_data.ctrl_model}\n"
+                f"速度参考值: {region_data.speed_ref}\n"
+                f"电机速度: {region_data.motor_speed} rpm\n"
+                f"总线电压: {region_data.bus_voltage * 0.1} V\n"
+                f"总线电流: {region_data.bus_current * 0.1} A\n"
+                f"A相电流: {region_data.phase_current_a * 0.1} A\n"
+                f"B相电流: {region_data.phase_current_b * 0.1} A\n"
+                f"C相电流: {region_data.phase_current_c * 0.1} A\n"
+                f"霍尔状态: 0x{region_data.hall_state:02X}\n"
+                f"PI_VQ参数: {region_data.pi_vq}\n"
+                f"PI_IQ参数: {region_data.pi_iq}\n"
+                f"刹车状态: {region_data.brake_state}\n"
+                f"IMU俯仰角: {region_data.imu_pitch * 0.1} °\n"
+                f"IMU横滚角: {region_data.imu_roll * 0.1} °\n"
+                f"IMU加速度: {region_data.imu_acc * 0.01} g\n"
+                f"刹车里程: {region_data.brake_mileage} dm\n"
+                f"电机角度: {region_data.motor_angle}\n"
+                f"单次里程: {region_data.single_mileage} m\n"
+                f"角速度: {region_data.angular_speed * 0.1} °/s\n"
+                f"实时设置: 0x{region_data.rt_setting:04X} {self._get_rt_setting_str(region_data.rt_setting)}\n"
+                f"运行模式: {region_data.run_mode} {self._get_run_mode_str(region_data.run_mode)}\n"
+                f"档位: {region_data.gear}\n"
+                f"目标速度: {region_data.target_speed} rpm\n"
+                f"额定电压: {region_data.rated_voltage * 0.1} V\n"
+                f"额定电流: {region_data.rated_current * 0.1} A\n"
+                f"最大电压: {region_data.max_voltage * 0.1} V\n"
+                f"最小电压: {region_data.min_voltage * 0.1} V\n"
+                f"加速度: {region_data.acceration}\n"
+                f"数据设置: 0x{region_data.dat_setting:08X} {self._get_dat_setting_str(region_data.dat_setting)}\n"
+                f"保留数据: 0x{region_data.rsvd_data:08X}")
+
+    def _format_region_data_changes(self, region_msg: ppx_region_msg_t) -> str:
+        """数据变化文本（根据寄存器地址过滤），无相关变化时返回空串"""
         if region_msg.reg_addr == PpxRegionReg.PPX_RUN_MODE_REG:
-            self._log("INFO", "\n全局变量中的运行参数已更新:")
-            self._log("INFO", 
-                     f"  运行模式: {self.g_ppx_region_data.run_mode} {self._get_run_mode_str(self.g_ppx_region_data.run_mode)}\n"
-                     f"  档位: {self.g_ppx_region_data.gear}\n"
-                     f"  目标速度: {self.g_ppx_region_data.target_speed} rpm")
+            return ("\n全局变量中的运行参数已更新:\n"
+                    f"  运行模式: {self.g_ppx_region_data.run_mode} {self._get_run_mode_str(self.g_ppx_region_data.run_mode)}\n"
+                    f"  档位: {self.g_ppx_region_data.gear}\n"
+                    f"  目标速度: {self.g_ppx_region_data.target_speed} rpm")
         elif region_msg.reg_addr == PpxRegionReg.PPX_RT_SETTING_REG:
-            self._log("INFO", "\n全局变量中的实时设置已更新:")
-            self._log("INFO", f"  {self._get_rt_setting_str(self.g_ppx_region_data.rt_setting)}")
+            return ("\n全局变量中的实时设置已更新:\n"
+                    f"  {self._get_rt_setting_str(self.g_ppx_region_data.rt_setting)}")
         elif region_msg.reg_addr == PpxRegionReg.PPX_BUS_VOLTAGE_REG:
-            self._log("INFO", "\n全局变量中的车辆状态已更新:")
-            self._log("INFO", 
-                     f"  总线电压: {self.g_ppx_region_data.bus_voltage * 0.1} V\n"
-                     f"  总线电流: {self.g_ppx_region_data.bus_current * 0.1} A\n"
-                     f"  电机速度: {self.g_ppx_region_data.motor_speed} rpm")
+            return ("\n全局变量中的车辆状态已更新:\n"
+                    f"  总线电压: {self.g_ppx_region_data.bus_voltage * 0.1} V\n"
+                    f"  总线电流: {self.g_ppx_region_data.bus_current * 0.1} A\n"
+                    f"  电机速度: {self.g_ppx_region_data.motor_speed} rpm")
+        return ""
+
+    def _format_parsed(self, region_msg: ppx_region_msg_t) -> str:
+        changes = self._format_region_data_changes(region_msg)
+        return "数据解析成功:\n" + self._format_region_msg(region_msg) + ("\n" + changes if changes else "")
+
+    def _format_rt_request(self, brake_led, tail_led, right_led, left_led, clear_err) -> str:
+        return ("修改后的实时设置:\n"
+                f"  刹车灯: {'开' if brake_led else '关'}\n"
+                f"  尾灯: {'开' if tail_led else '关'}\n"
+                f"  右转向灯: {'开' if right_led else '关'}\n"
+                f"  左转向灯: {'开' if left_led else '关'}\n"
+                f"  清除错误码: {'是' if clear_err else '否'}")
 
     def _get_rim_state_str(self, rim_state: int) -> str:
         """护盾状态位转描述字符串"""
@@ -731,19 +692,28 @@ class RegionProtocol:
 # 自动化测试框架
 # ==============================================
 class FileLogger:
-    """简单文件日志器：写入 raw.log，同时回显到控制台"""
-    def __init__(self, log_path: str):
+    """简单文件日志器：写入 raw.log，同时回显到控制台（echo=False 时只写文件）"""
+    def __init__(self, log_path: str, echo: bool = True):
         self.log_path = log_path
-        os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+        self.echo = echo
+        # 后台线程写文件（文件保持打开、批量落盘），不再每行 open/close
+        self.sink = LogSink(self.log_path)
 
     def __call__(self, level: str, message: str):
         ts = _dt.datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
         line = f"[{ts}] [{level}] {message}"
         # 控制台输出
-        print(line)
+        if self.echo:
+            print(line)
         # 文件输出
-        with open(self.log_path, 'a', encoding='utf-8') as f:
-            f.write(line + "\n")
+        self.sink.write(line + "\n")
+
+    def sync(self):
+        """等待已写入的日志落盘（每条用例判定后调用）"""
+        self.sink.sync()
+
+    def close(self):
+        self.sink.close()
 
 
 def _coerce_int(val: Any) -> Optional[int]:
@@ -820,7 +790,9 @@ class AutoTester:
 
     # ---------------- 执行用例 ----------------
     def run_cases(self, cases):
-        for idx, row in enumerate(cases.to_dict(orient="records"), start=1):
+        # DataFrame（读表）或 list[dict]（make_combo_cases / 多 DUT 分片）
+        rows = cases.to_dict(orient="records") if hasattr(cases, "to_dict") else cases
+        for idx, row in enumerate(rows, start=1):
             start_ts = time.time()
             case_id = row.get('id', idx)
             comment = str(row.get('comment', '') or '')
@@ -929,6 +901,7 @@ class AutoTester:
                 'elapsed_s': round(elapsed, 3),
                 'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
             })
+            self.region.sync_log()   # 判定边界：本条用例日志落盘
 
             if delay_after > 0:
                 time.sleep(delay_after)
@@ -963,6 +936,7 @@ class AutoTester:
             except Exception as e:
                 self.region._debug_print(f"循环 {i} 异常: {e}", is_error=True)
             time.sleep(delay)
+        self.region.sync_log()
 
     # ---------------- 报告输出 ----------------
     def save_results_csv(self, path: str):
@@ -1260,6 +1234,75 @@ def make_combo_cases():
 
     return all_cases
 
+# ==============================================
+# 多 DUT 并行（--ports）
+# ==============================================
+# 汇总报告中的用例参数列
+CASE_FIELDS = ["test_type", "run_mode", "gear", "target_speed",
+               "brake_led", "tail_led", "right_led", "left_led", "clear_err"]
+
+
+def run_port(port: str, cases: List[Dict[str, Any]], out_dir: str, options: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """单个控制器的完整流程（在子进程中执行）：独立的协议会话、raw.log 与报告"""
+    os.makedirs(out_dir, exist_ok=True)
+    logger = FileLogger(os.path.join(out_dir, 'raw.log'), echo=False)
+    region = RegionProtocol(options['dll'], port, options['baud'], backend=options['backend'])
+    region.set_logger(logger)
+    try:
+        if not region.dll_loaded or not region.serial_connected:
+            raise RuntimeError("初始化失败，请检查 DLL 路径/串口参数")
+        logger("INFO", f"[{port}] 执行用例 {len(cases)} 条")
+        tester = AutoTester(region, out_dir)
+        tester.run_cases(cases)
+        if options.get('loop_count', 0) > 0 and cases:
+            tester.loop_case(cases[0], loop_count=options['loop_count'], delay=options['loop_delay'])
+        tester.save_results_csv(os.path.join(out_dir, 'results.csv'))
+        tester.save_report_html(os.path.join(out_dir, 'report.html'), title=f"控制器自动化测试报告 - {port}")
+        return tester.results
+    finally:
+        region.close()
+        logger.close()
+
+
+def run_multi_dut(args, cases, out_dir: str, logger) -> int:
+    """--ports：各串口并行执行，合并为一份报告；返回退出码"""
+    ports = parse_ports(args.ports)
+    use_processes = args.workers == 'process'
+    if not use_processes and resolve_backend(args.backend, args.dll) == BACKEND_DLL:
+        # DLL 的 g_ppx_region_data 是进程级全局变量，线程之间会互相覆盖
+        logger("WARNING", "DLL 后端不能多线程共用，改为多进程执行")
+        use_processes = True
+    logger("INFO", f"多 DUT 并行: {len(ports)} 个串口 {ports}，分发方式 {args.dispatch}，"
+                   f"{'多进程' if use_processes else '多线程'}")
+
+    def on_done(run):
+        s = summarize(run)
+        if run.error:
+            logger("ERROR", f"[{run.port}] 失败: {run.error}")
+        else:
+            logger("INFO", f"[{run.port}] 完成 {s['total']} 条，PASS {s['passed']}，FAIL {s['failed']}，"
+                           f"用时 {s['elapsed_s']:.1f}s（{s['cases_per_s']:.1f} 条/s）")
+
+    options = {'dll': args.dll, 'baud': args.baud, 'backend': args.backend,
+               'loop_count': args.loop_count, 'loop_delay': args.loop_delay}
+    t0 = time.perf_counter()
+    runs = run_ports(run_port, ports, cases, out_dir, mode=args.dispatch, options=options,
+                     use_processes=use_processes, on_done=on_done)
+    wall = time.perf_counter() - t0
+
+    rows = merge_results(runs, CASE_FIELDS)
+    csv_path = os.path.join(out_dir, 'results.csv')
+    html_path = os.path.join(out_dir, 'report.html')
+    save_merged_csv(csv_path, rows, ports, CASE_FIELDS)
+    save_merged_html(html_path, rows, runs, CASE_FIELDS, title="控制器自动化测试汇总报告",
+                     mode=args.dispatch, wall_s=wall)
+    executed = sum(len(run.results) for run in runs)
+    logger("INFO", f"全部完成: 执行 {executed} 条，用时 {wall:.1f}s（{executed / wall if wall else 0:.1f} 条/s）")
+    logger("INFO", f"已保存汇总结果: {csv_path}")
+    logger("INFO", f"已生成汇总报告: {html_path}")
+    return 1 if any(run.error for run in runs) else 0
+
+
 # ==============================================
 # 主程序
 # ==============================================
@@ -1274,6 +1317,8 @@ def main():
     # 解析参数
     parser = argparse.ArgumentParser(description="控制器自动化测试工具（Excel/CSV 用例 + HTML 报告）")
     parser.add_argument('--dll', default=REGION_PROTOCOL_DLL, help='ppx_region.dll 路径')
+    parser.add_argument('--backend', default=CODEC_BACKEND, choices=['dll', 'python', 'auto'],
+                        help='编解码后端（auto：Windows 且 DLL 存在时用 DLL，否则用纯 Python）')
     parser.add_argument('--port', default=SERIAL_PORT, help='串口号，如 COM44')
     parser.add_argument('--baud', type=int, default=BAUDRATE, help='波特率，如 460800')
     parser.add_argument('--cases', default='testcases.xlsx', help='用例文件（xlsx/xls/csv），默认 testcases.xlsx')
@@ -1282,6 +1327,11 @@ def main():
     parser.add_argument('--loop-delay', type=float, default=0.5, help='压力循环间隔秒')
     parser.add_argument('--make-sample', action='store_true', help='生成示例用例（不执行测试）')
     parser.add_argument('--combo', action='store_true', help='自动生成排列组合用例')
+    parser.add_argument('--ports', default=None, help='多块板并行，串口列表，如 COM1,COM2,COM3（覆盖 --port）')
+    parser.add_argument('--dispatch', default=MODE_REPLICATE, choices=MODES,
+                        help='多板用例分发：replicate 每块板跑全部用例 / shard 用例轮流分给各板')
+    parser.add_argument('--workers', default='process', choices=['process', 'thread'],
+                        help='多板执行方式（thread 仅限 python 后端）')
     args = parser.parse_args()
 
     # 如果无参数，默认开启组合用例模式
@@ -1304,9 +1354,27 @@ def main():
         print("已生成。")
         return
 
+    # 多 DUT 并行
+    if args.ports:
+        try:
+            if args.combo:
+                cases = make_combo_cases()
+                logger("INFO", f"生成排列组合用例 {len(cases)} 条")
+            else:
+                cases = AutoTester(None, out_dir).load_cases(args.cases)
+                logger("INFO", f"加载用例 {len(cases)} 条 来自: {args.cases}")
+            code = run_multi_dut(args, cases, out_dir, logger)
+        except Exception as e:
+            logger("ERROR", f"多 DUT 执行失败: {e}")
+            code = 3
+        finally:
+            logger("INFO", "程序结束")
+            logger.close()
+        sys.exit(code)
+
     # 初始化控制器协议
     logger("INFO", "初始化控制器协议通信...")
-    region = RegionProtocol(args.dll, args.port, args.baud)
+    region = RegionProtocol(args.dll, args.port, args.baud, backend=args.backend)
     region.set_logger(logger)
 
     if not region.dll_loaded or not region.serial_connected:
@@ -1357,6 +1425,7 @@ def main():
     finally:
         region.close()
         logger("INFO", "程序结束")
+        logger.close()
 
 
 if __name__ == "__main__":
@@ -4,6 +4,11 @@ from ctypes import *
 import serial
 import platform
 import time
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../.."))
+from ppx.deframer import Deframer
 
 # ---------------- 配置 ----------------
 REGION_PROTOCOL_DLL = r"C:\Test_ziliao\libs\libcs_mcb\libs\ppx_region"
@@ -84,6 +89,7 @@ class RegionProtocol:
     def __init__(self, dll_path, serial_port, baudrate):
         self.dll_loaded = False
         self.serial_connected = False
+        self.deframer = Deframer(dev_id=0x20)  # 串口流增量分帧
 
         try:
             self.region_lib = cdll.LoadLibrary(dll_path)
@@ -148,49 +154,37 @@ class RegionProtocol:
             f"cmd={msg.reg_excp.cmd_status}, data={msg.reg_excp.data_status}"
         )
 
-    @staticmethod
-    def extract_frames(buf: bytes):
-        """从原始缓冲区提取所有合法帧"""
-        frames = []
-        start = 0
-        while True:
-            try:
-                start = buf.index(0xA5, start)
-                end = buf.index(0x55, start + 1)
-                frame = buf[start:end + 1]
-                frames.append(frame)
-                start = end + 1
-            except ValueError:
-                break
-        return frames
-
     def _receive_and_parse(self, timeout=3):
         if not self.serial_connected:
             self._debug_print("串口未连接", is_error=True)
             return
 
         start = time.time()
-        buf = bytearray()
+        received = 0
+        frames = []
 
+        # 分块送入分帧器，每块只处理新到的数据
         while time.time() - start < timeout:
             data = self.serial_port.read(64)
             if data:
-                buf.extend(data)
+                received += len(data)
+                frames.extend(self.deframer.feed(data))
                 start = time.time()
             else:
                 break
 
-        if not buf:
+        if not received:
             self._debug_print("超时未接收到 MCU 响应", is_error=True)
             return
 
-        self._debug_print(f"接收到 {len(buf)} 字节: {buf.hex(' ')}")
+        self._debug_print(f"接收到 {received} 字节, 完整帧 {len(frames)} 个, 分帧统计: {self.deframer.stats()}")
 
         parsed = False
-        for frame in self.extract_frames(buf):
+        for frame in frames:
+            self._debug_print(f"帧: {frame.raw.hex(' ')}")
             msg_out = ppx_region_msg_t()
             msg_out.id = 0x20  # 自动设置请求 ID 进行解析
-            ret = self.region_lib.ppx_com_region_parse((c_uint8 * len(frame))(*frame), len(frame), byref(msg_out))
+            ret = self.region_lib.ppx_com_region_parse((c_uint8 * len(frame.raw))(*frame.raw), len(frame.raw), byref(msg_out))
             self._debug_print(f"ppx_com_region_parse 返回: {ret}")
             if ret == PPX_PARSE_SUCCESS:
                 print("[INFO] MCU 响应解析成功")
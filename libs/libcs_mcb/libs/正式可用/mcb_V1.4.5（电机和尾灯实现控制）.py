@@ -22,7 +22,13 @@ from ctypes import *
 import serial
 import time
 import os
-import threading
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../.."))
+from ppx.planner import ReadPlanner
+from ppx.batcher import WriteBatcher
+from ppx.deframer import Deframer, READ_POLL
+from ppx.bus import BusScheduler, PRIO_CONTROL, PRIO_TEST, PRIO_TELEMETRY
 
 # ==============================================
 # 核心配置
@@ -31,6 +37,9 @@ DLL_PATH = os.path.join(os.path.dirname(__file__), "../ppx_region.dll")
 SERIAL_PORT = "COM9"
 BAUDRATE = 460800
 MCB_DEV_ID = 0x20
+HB_PERIOD = 0.15  # 心跳周期（秒）
+MONITOR_PERIOD = 1.0  # 状态轮询周期（秒）
+RESP_TIMEOUT = 0.05  # 读应答超时（秒），收到完整帧即返回
 
 # 寄存器地址
 REG_HW_VERSION = 3
@@ -92,7 +101,9 @@ class MotorController(object):
     def __init__(self, dll_path, port, baudrate):
         self.ready = False
         self.ser = None
-        self.lock = threading.Lock()
+        self.bus = BusScheduler("mcb-bus", on_error=self._on_bus_error)  # 唯一访问串口的线程
+        self.bus_error = ""  # 最近一次周期任务异常（诊断台刷新会清屏，显示在面板上）
+        self.deframer = Deframer(dev_id=MCB_DEV_ID)
 
         self.target_left = 0
         self.target_right = 0
@@ -116,71 +127,86 @@ class MotorController(object):
 
         # 连接串口
         try:
-            self.ser = serial.Serial(port, baudrate, timeout=0.1)
+            self.ser = serial.Serial(port, baudrate, timeout=READ_POLL)
             print(f"✅ 串口已连接: {port}");
             self.ready = True
         except:
             return
 
-        # 启动线程
-        threading.Thread(target=self._heartbeat_loop, daemon=True).start()
-        threading.Thread(target=self._monitor_loop, daemon=True).start()
+        # 启动总线调度
+        # 状态轮询：电压/电流/错误码/刹车合并为一次 MULTREAD
+        self.planner = ReadPlanner(
+            lambda cmd, reg, nums: self._send_cmd(cmd, reg, 0, nums=nums, wait_resp=True), self.g_data)
+        # 心跳写入：RT_SETTING ~ TARGET_SPEED (0x1A~0x1D) 连续，合并为一帧 MULTWRITE
+        self.batcher = WriteBatcher(self._send_frame, self.g_data)
+        self.hb_ticks = 0
+        self.hb_busy = 0.0
+        self.hb_start = time.time()
+
+        # 心跳为控制类（截止时间 = 下一个周期），状态轮询为后台遥测，互不抢锁
+        self.bus.every(HB_PERIOD, self._heartbeat_tick, prio=PRIO_CONTROL)
+        self.bus.every(MONITOR_PERIOD, self._monitor_tick, prio=PRIO_TELEMETRY)
+        self.bus.start()
 
     def close(self):
         self.running = False
         self.target_speed = 0
         time.sleep(0.5)
+        self.bus.stop()
         if self.ser and self.ser.is_open: self.ser.close()
 
-    # --- 线程1: 心跳与控制 ---
-    def _heartbeat_loop(self):
-        while self.running:
-            if self.ready:
-                with self.lock:
-                    # 1. 组装 RT_SETTING (灯光 + 清错)
-                    rt_val = 0
-                    if self.target_left: rt_val |= 0x08
-                    if self.target_right: rt_val |= 0x04
-
-                    # 如果用户按了 'c'，发送清除错误位
-                    if self.do_clear_err:
-                        rt_val |= PPX_CLR_ERRCODE  # 0x8000
-                        # 仅发送一次高电平脉冲，下次循环自动清零
-                        self.do_clear_err = False
-
-                    self._send_cmd(0x03, REG_RT_SETTING, rt_val, nums=1)
-
-                    time.sleep(0.05)
-
-                    # 2. 发送速度
-                    self._send_cmd(0x03, REG_TARGET_SPEED, self.target_speed, nums=1)
-
-            time.sleep(0.15)
-
-            # --- 线程2: 状态监控 ---
-
-    def _monitor_loop(self):
-        while self.running:
-            if self.ready:
-                with self.lock:
-                    # 电压电流
-                    if self._send_cmd(0x01, REG_BUS_VOLT, 0, nums=2, wait_resp=True):
-                        self.monitor_data["volt"] = self.g_data.bus_voltage * 0.1
-                        self.monitor_data["curr"] = self.g_data.bus_current * 0.1
-
-                    time.sleep(0.05)
-                    # 错误码 + 刹车状态
-                    if self._send_cmd(0x01, REG_ERR_CODE, 0, nums=1, wait_resp=True):
-                        self.monitor_data["err"] = self.g_data.mcu_errcode
-
-                    time.sleep(0.05)
-                    if self._send_cmd(0x01, REG_BRAKE_STATE, 0, nums=1, wait_resp=True):
-                        self.monitor_data["brake"] = self.g_data.brake_state
-
-            time.sleep(1.0)
+    def _on_bus_error(self, name, e):
+        self.bus_error = f"{time.strftime('%H:%M:%S')} {name}: {e}"
+
+    # --- 周期任务1: 心跳与控制 ---
+    def _heartbeat_tick(self):
+        if not self.ready: return
+        t0 = time.perf_counter()
+        # 1. 组装 RT_SETTING (灯光 + 清错)
+        rt_val = 0
+        if self.target_left: rt_val |= 0x08
+        if self.target_right: rt_val |= 0x04
+
+        # 如果用户按了 'c'，发送清除错误位
+        if self.do_clear_err:
+            rt_val |= PPX_CLR_ERRCODE  # 0x8000
+            # 仅发送一次高电平脉冲，下次循环自动清零
+            self.do_clear_err = False
+
+        self.batcher.set(REG_RT_SETTING, rt_val)
+
+        # 2. 速度（与 RT_SETTING 同帧发送，不再间隔 50ms）
+        self.batcher.set(REG_TARGET_SPEED, self.target_speed)
+        self.batcher.flush()
+        self.hb_ticks += 1
+        self.hb_busy += time.perf_counter() - t0
+
+    # --- 周期任务2: 状态监控 ---
+    def _monitor_tick(self):
+        if not self.ready: return
+        # 电压电流 + 错误码 + 刹车状态（一次往返）
+        values = self.planner.read([REG_BUS_VOLT, REG_BUS_CURR, REG_ERR_CODE, REG_BRAKE_STATE])
+        if values[REG_BUS_VOLT] is not None:
+            self.monitor_data["volt"] = values[REG_BUS_VOLT] * 0.1
+            self.monitor_data["curr"] = values[REG_BUS_CURR] * 0.1
+            self.monitor_data["err"] = values[REG_ERR_CODE]
+            self.monitor_data["brake"] = values[REG_BRAKE_STATE]
+
+    def _send_frame(self, cmd, reg, nums):
+        """按当前镜像组包发送（WriteBatcher 回调，镜像已由 batcher 更新）"""
+        msg = ppx_region_msg_t()
+        msg.id, msg.cmd, msg.reg_addr, msg.reg_nums = MCB_DEV_ID, cmd, reg, nums
+        try:
+            buf = create_string_buffer(256)
+            length = self.lib.ppx_com_region_format(0, byref(msg), buf)
+            self.ser.write(buf.raw[:length])
+            return length > 0
+        except:
+            return False
 
     def _send_cmd(self, cmd, reg, val, nums=1, wait_resp=False):
         if cmd == 0x03:
+            self.batcher.mark_known(reg)
             if reg == REG_RT_SETTING: self.g_data.rt_setting = val
             if reg == REG_RUN_MODE: self.g_data.run_mode = val
             if reg == REG_DAT_SETTING: self.g_data.dat_setting = val
@@ -194,11 +220,14 @@ class MotorController(object):
         try:
             buf = create_string_buffer(256)
             length = self.lib.ppx_com_region_format(0, byref(msg), buf)
+            if wait_resp:
+                self.ser.reset_input_buffer()
+                self.deframer.reset()
             self.ser.write(buf.raw[:length])
             if wait_resp:
-                time.sleep(0.05)
-                if self.ser.in_waiting:
-                    recv = self.ser.read(self.ser.in_waiting)
+                frame = self.deframer.read_frame(self.ser, RESP_TIMEOUT)
+                if frame is not None:
+                    recv = frame.raw
                     msg_res = ppx_region_msg_t()
                     msg_res.id = MCB_DEV_ID
                     return self.lib.ppx_com_region_parse((c_uint8 * len(recv))(*recv), len(recv), byref(msg_res)) == 1
@@ -208,22 +237,26 @@ class MotorController(object):
 
     def initialize(self):
         print("🔄 初始化诊断...")
-        with self.lock:
-            if not self._send_cmd(0x01, REG_HW_VERSION, 0, wait_resp=True):
-                print("❌ 连接失败");
-                return False
-            print(f"   HW Ver: {self.g_data.hw_version}")
-
-            # 模式设置
-            self._send_cmd(0x03, REG_RUN_MODE, MODE_TST, wait_resp=False)
-            self._send_cmd(0x03, REG_DAT_SETTING, 0x20, wait_resp=False)
-            # 参数设置
-            self._send_cmd(0x03, REG_GEAR, 1, nums=1)
-            self._send_cmd(0x03, REG_ACCELERATION, 1000, nums=2)  # 增加加速度到1000
-
+        if not self.bus.call(self._initialize, prio=PRIO_TEST):
+            print("❌ 连接失败");
+            return False
+        print(f"   HW Ver: {self.g_data.hw_version}")
         print("✅ 诊断就绪！")
         return True
 
+    def _initialize(self):
+        """在总线线程中执行，期间心跳/轮询排队等待"""
+        if not self._send_cmd(0x01, REG_HW_VERSION, 0, wait_resp=True):
+            return False
+
+        # 模式设置
+        self._send_cmd(0x03, REG_RUN_MODE, MODE_TST, wait_resp=False)
+        self._send_cmd(0x03, REG_DAT_SETTING, 0x20, wait_resp=False)
+        # 参数设置
+        self._send_cmd(0x03, REG_GEAR, 1, nums=1)
+        self._send_cmd(0x03, REG_ACCELERATION, 1000, nums=2)  # 增加加速度到1000
+        return True
+
     def clear_error(self):
         print("   -> 发送清除错误指令...")
         self.do_clear_err = True  # 通知线程发送
@@ -238,6 +271,11 @@ class MotorController(object):
     def get_status(self):
         return self.monitor_data
 
+    def heartbeat_duty(self):
+        """心跳占用总线的时间比例"""
+        elapsed = time.time() - self.hb_start
+        return self.hb_busy / elapsed if elapsed > 0 else 0.0
+
 
 # ==============================================
 # 主交互
@@ -269,6 +307,11 @@ def main():
         print(f"🔧 错误: {st['err']} ({err_hex}) -> {err_msg}")
         print("-" * 60)
         print(f"⚙️  目标转速: {mcb.target_speed} RPM")
+        hb = mcb.batcher.stats()
+        print(f"💓 心跳: {hb['frames']} 帧/{hb['writes']} 次写入, 总线占用 {mcb.heartbeat_duty() * 100:.1f}%")
+        print(mcb.bus.format_stats())
+        if mcb.bus_error:
+            print(f"⚠️ 周期任务异常: {mcb.bus_error}")
         print("=" * 60)
         print(" [c] 清除错误 (Clear Error)  <-- 如果有错误码，请先按这个")
         print(" [w/s] 加/减速 (+100/-100)")
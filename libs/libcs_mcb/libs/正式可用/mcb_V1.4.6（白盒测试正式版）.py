@@ -16,21 +16,33 @@ MCB 自动化白盒测试脚本 (V1.6 )
 [Case 6] 动力回路响应 (PID闭环测试，软启动模式)
 """
 
-import ctypes
-from ctypes import *
 import serial
 import time
 import os
-import threading
 import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../.."))
+from ppx.codec import open_region_codec
+from ppx.session import CodecSession
+from ppx.deframer import Deframer, READ_POLL
+from ppx.regmap import reg_value, write_reg
+from ppx.planner import ReadPlanner
+from ppx.batcher import WriteBatcher
+from ppx.shadow import ShadowCache
+from ppx.bus import BusScheduler, PRIO_CONTROL, PRIO_TEST
+
 # ==============================================
 # 1. 基础配置
 # ==============================================
 DLL_PATH = os.path.join(os.path.dirname(__file__), "../ppx_region.dll")
+CODEC_BACKEND = "auto"  # dll / python / auto（非 Windows 或 DLL 缺失时自动使用纯 Python 实现）
 SERIAL_PORT = "COM9"
 BAUDRATE = 460800
 MCB_DEV_ID = 0x20
+HB_PERIOD = 0.15     # 心跳周期（秒）
+RESP_TIMEOUT = 0.08  # 读应答超时（秒），收到完整帧即返回
+HB_KEEPALIVE = 0.45  # 控制寄存器未变化时的保活重发间隔（秒），须小于 MCB 通信超时
+STATIC_TTL = 300.0   # 静态寄存器（ID/型号/序列号/版本）缓存有效期（秒）
 
 # 寄存器地址
 REG_HW_VERSION = 3
@@ -51,39 +63,6 @@ TEST_RPM_TARGET = 300
 RPM_TOLERANCE = 50
 
 
-# 结构体定义
-class ppx_region_excp_t(Structure):
-    _fields_ = [("parse_status", c_uint8), ("cmd_status", c_uint8), ("data_status", c_uint8)]
-
-
-class ppx_region_msg_t(Structure):
-    _fields_ = [
-        ("id", c_uint8), ("cmd", c_uint8), ("msg_type", c_uint8),
-        ("reg_addr", c_uint8), ("reg_nums", c_uint8), ("reg_excp", ppx_region_excp_t),
-    ]
-
-
-class ppx_region_data_t(Structure):
-    _pack_ = 1
-    _fields_ = [
-        ("id_num", c_uint8), ("model", c_uint8 * 8), ("serial_num", c_uint8 * 26),
-        ("hw_version", c_uint16), ("sw_version", c_uint8 * 20),
-        ("rim_state", c_uint8), ("mcu_errcode", c_uint32),
-        ("ctrl_model", c_uint8), ("speed_ref", c_int16),
-        ("motor_speed", c_int16),  # Reg 9
-        ("bus_voltage", c_uint16), ("bus_current", c_uint16),
-        ("phase_current_a", c_int16), ("phase_current_b", c_int16), ("phase_current_c", c_int16),
-        ("hall_state", c_uint8), ("pi_vq", c_int16), ("pi_iq", c_int16),
-        ("brake_state", c_uint8), ("imu_pitch", c_int16), ("imu_roll", c_int16),
-        ("imu_acc", c_uint8), ("brake_mileage", c_uint8), ("motor_angle", c_int32),
-        ("single_mileage", c_uint32), ("angular_speed", c_int16),
-        ("rt_setting", c_uint16), ("run_mode", c_uint8), ("gear", c_uint8),
-        ("target_speed", c_int16), ("rated_voltage", c_uint16), ("rated_current", c_uint16),
-        ("max_voltage", c_uint16), ("min_voltage", c_uint16), ("acceration", c_uint32),
-        ("dat_setting", c_uint32), ("rsvd_data", c_uint32),
-    ]
-
-
 # ==============================================
 # 2. 测试引擎
 # ==============================================
@@ -91,40 +70,43 @@ class TestEngine:
     def __init__(self):
         self.ser = None
         self.lib = None
-        self.lock = threading.Lock()
-        self.running = True
+        # 唯一访问串口的线程：控制写 > 测试读 > 后台遥测；心跳异常不能静默，否则控制器会超时停机
+        self.bus = BusScheduler("mcb-bus", on_error=lambda name, e: print(f"[ERROR] 周期任务 {name} 异常: {e}"))
         self.ready = False
         self.hb_paused = False
-
-        self.shadow_regs = {
-            REG_RT_SETTING: 0,
-            REG_TARGET_SPEED: 0,
-            REG_RUN_MODE: 0,
-            REG_DAT_SETTING: 0
-        }
+        self.hb_ticks = 0
+        self.hb_busy = 0.0  # 心跳占用总线累计时间（秒）
 
     def setup(self):
         print("[Setup] 初始化环境...")
-        if not os.path.exists(DLL_PATH): raise FileNotFoundError("DLL缺失")
+        if CODEC_BACKEND == "dll" and not os.path.exists(DLL_PATH): raise FileNotFoundError("DLL缺失")
         try:
-            self.lib = cdll.LoadLibrary(DLL_PATH)
-            self.lib.ppx_com_region_format.argtypes = [c_int, POINTER(ppx_region_msg_t), c_void_p]
-            self.lib.ppx_com_region_format.restype = c_uint16
-            self.lib.ppx_com_region_parse.argtypes = [POINTER(c_uint8), c_uint8, POINTER(ppx_region_msg_t)]
-            self.lib.ppx_com_region_parse.restype = c_int
-            self.g_data = ppx_region_data_t.in_dll(self.lib, "g_ppx_region_data")
+            self.lib = open_region_codec(CODEC_BACKEND, DLL_PATH)
+            self.g_data = self.lib.g_ppx_region_data
+            self.session = CodecSession(self.lib, MCB_DEV_ID)  # 复用组包/解析缓冲区
+            self.deframer = Deframer(dev_id=MCB_DEV_ID)  # 应答分帧，收齐一帧立即返回
+            self.planner = ReadPlanner(self._read_block, self.g_data)  # 多寄存器合并读
+            self.batcher = WriteBatcher(self._send_block, self.g_data)  # 心跳写合并
+            # 影子寄存器：变化或保活到期才发送；RUN_MODE/DAT_SETTING 为 0 时不发
+            self.shadow = ShadowCache(self.batcher, lambda r: self.read_reg(r, retry=5),
+                                      keepalive=HB_KEEPALIVE, static_ttl=STATIC_TTL)
+            self.shadow.track(REG_RUN_MODE, 0, skip_zero=True)
+            self.shadow.track(REG_RT_SETTING, 0)
+            self.shadow.track(REG_TARGET_SPEED, 0)
+            self.shadow.track(REG_DAT_SETTING, 0, skip_zero=True)
         except Exception as e:
             raise RuntimeError(f"DLL加载失败: {e}")
 
         try:
-            self.ser = serial.Serial(SERIAL_PORT, BAUDRATE, timeout=0.1)
+            self.ser = serial.Serial(SERIAL_PORT, BAUDRATE, timeout=READ_POLL)
             self.ser.reset_input_buffer()
             self.ready = True
         except Exception as e:
             raise RuntimeError(f"串口失败: {e}")
 
-        self.hb_thread = threading.Thread(target=self._heartbeat_task, daemon=True)
-        self.hb_thread.start()
+        self.hb_start = time.time()
+        self.bus.every(HB_PERIOD, self._heartbeat_tick, prio=PRIO_CONTROL)
+        self.bus.start()
         time.sleep(0.5)
 
     def teardown(self):
@@ -132,11 +114,27 @@ class TestEngine:
         self.set_shadow(REG_TARGET_SPEED, 0)
         self.set_shadow(REG_RT_SETTING, 0)
         time.sleep(0.5)
-        self.running = False
+        self.bus.stop()
+        if self.hb_ticks:
+            hb = self.batcher.stats()
+            elapsed = time.time() - self.hb_start
+            sh = self.shadow.stats()
+            print(f"[Heartbeat] 周期 {self.hb_ticks} 次, 寄存器写 {hb['writes']} 次 -> 发送 {hb['frames']} 帧, "
+                  f"总线占用 {self.hb_busy / elapsed * 100:.1f}%")
+            print(f"[Shadow] 全量重写需 {sh['legacy_frames']} 帧, 实际 {sh['sent_frames']} 帧, "
+                  f"节省 {sh['saved_per_min']:.0f} 帧/分钟; 静态寄存器缓存命中 {sh['static_hits']} 次, "
+                  f"重启检测 {sh['reboots']} 次")
+            print("[Bus] 各类请求时延（提交 -> 完成）:")
+            print(self.bus.format_stats())
         if self.ser: self.ser.close()
 
     def set_shadow(self, reg, val):
-        with self.lock: self.shadow_regs[reg] = val
+        # 在总线线程中修改影子值，避免与心跳周期交错；控制类优先于随后提交的测试读
+        self.bus.submit(self.shadow.set, reg, val, prio=PRIO_CONTROL)
+
+    def read_static(self, reg):
+        """静态寄存器（0x00~0x04）读取，TTL 内走缓存"""
+        return self.shadow.get_static(reg)
 
     def pause_heartbeat(self):
         self.hb_paused = True
@@ -145,68 +143,72 @@ class TestEngine:
     def resume_heartbeat(self):
         self.hb_paused = False
 
-    def _heartbeat_task(self):
-        while self.running:
-            if self.ready and not self.hb_paused:
-                with self.lock:
-                    if self.shadow_regs[REG_RUN_MODE] != 0:
-                        self._raw_write(REG_RUN_MODE, self.shadow_regs[REG_RUN_MODE])
+    def _heartbeat_tick(self):
+        """总线线程周期任务（控制类，截止时间为下一个心跳周期）"""
+        if not self.ready or self.hb_paused: return
+        t0 = time.perf_counter()
+        # 只发送变化/保活到期的寄存器，0x1A~0x1D 连续时合并为一帧 MULTWRITE
+        self.shadow.tick()
+        self.hb_ticks += 1
+        self.hb_busy += time.perf_counter() - t0
+
+    def _send_block(self, cmd, reg, nums):
+        """WriteBatcher 回调：按镜像发送一个寄存器区块"""
+        try:
+            self.ser.write(self.session.format(cmd, reg, nums))
+            return True
+        except:
+            return False
 
-                    self._raw_write(REG_RT_SETTING, self.shadow_regs[REG_RT_SETTING])
-                    self._raw_write(REG_TARGET_SPEED, self.shadow_regs[REG_TARGET_SPEED])
+    def _raw_write(self, reg, val, nums=1):
+        self.bus.call(self._write_once, reg, val, nums, prio=PRIO_CONTROL)
 
-                    if self.shadow_regs[REG_DAT_SETTING] != 0:
-                        self._raw_write(REG_DAT_SETTING, self.shadow_regs[REG_DAT_SETTING])
-            time.sleep(0.15)
+    def _write_once(self, reg, val, nums):
+        write_reg(self.g_data, reg, val)
+        self.batcher.mark_known(reg)
 
-    def _raw_write(self, reg, val, nums=1):
-        if reg == REG_TARGET_SPEED: self.g_data.target_speed = val
-        if reg == REG_RT_SETTING: self.g_data.rt_setting = val
-        if reg == REG_RUN_MODE: self.g_data.run_mode = val
-        if reg == REG_GEAR: self.g_data.gear = val
-        if reg == REG_ACCELERATION: self.g_data.acceration = val
-        if reg == REG_DAT_SETTING: self.g_data.dat_setting = val
-
-        msg = ppx_region_msg_t()
-        msg.id, msg.cmd, msg.reg_addr, msg.reg_nums = MCB_DEV_ID, 0x03, reg, nums
         try:
-            buf = create_string_buffer(256)
-            length = self.lib.ppx_com_region_format(0, byref(msg), buf)
-            self.ser.write(buf.raw[:length])
+            self.ser.write(self.session.format(0x03, reg, nums))
         except:
             pass
 
+    def _transact(self, cmd, reg, nums):
+        """总线线程中执行：发送读请求并解析应答，成功后镜像已更新"""
+        self.ser.reset_input_buffer()
+        self.deframer.reset()
+        self.ser.write(self.session.format(cmd, reg, nums))
+        frame = self.deframer.read_frame(self.ser, RESP_TIMEOUT)
+        if frame is not None and self.session.parse(frame.raw) == 1:
+            self.batcher.mark_known(*range(reg, reg + nums))
+            for r in range(reg, reg + nums):
+                self.shadow.note_read(r, reg_value(self.g_data, r))
+            return True
+        return False
+
     def read_reg(self, reg, nums=1, retry=3):
         for i in range(retry):
-            with self.lock:
-                self.ser.reset_input_buffer()
-                msg = ppx_region_msg_t()
-                msg.id, msg.cmd, msg.reg_addr, msg.reg_nums = MCB_DEV_ID, 0x01, reg, nums
-                buf = create_string_buffer(256)
-                length = self.lib.ppx_com_region_format(0, byref(msg), buf)
-                self.ser.write(buf.raw[:length])
-
-                time.sleep(0.08)
-
-                if self.ser.in_waiting:
-                    recv = self.ser.read(self.ser.in_waiting)
-                    msg_res = ppx_region_msg_t()
-                    msg_res.id = MCB_DEV_ID
-                    if self.lib.ppx_com_region_parse((c_uint8 * len(recv))(*recv), len(recv), byref(msg_res)) == 1:
-                        if reg == REG_HW_VERSION: return self.g_data.hw_version
-                        if reg == REG_BUS_VOLT: return self.g_data.bus_voltage
-                        if reg == REG_ERR_CODE: return self.g_data.mcu_errcode
-                        if reg == REG_BRAKE_STATE: return self.g_data.brake_state
-                        if reg == REG_RUN_MODE: return self.g_data.run_mode
-                        if reg == REG_GEAR: return self.g_data.gear
-                        if reg == REG_ACCELERATION: return self.g_data.acceration
-                        if reg == REG_RT_SETTING: return self.g_data.rt_setting
-                        # 重点：读实际转速
-                        if reg == REG_REAL_SPEED: return self.g_data.motor_speed
-                        return 0
+            if self.bus.call(self._transact, 0x01, reg, nums, prio=PRIO_TEST):
+                # 按寄存器表取值（REG_REAL_SPEED 即 motor_speed）
+                return reg_value(self.g_data, reg)
             time.sleep(0.1)
         return None
 
+    def _read_block(self, cmd, reg, nums):
+        """ReadPlanner 回调：读一个寄存器区块，成功后镜像已更新"""
+        return self.bus.call(self._transact, cmd, reg, nums, prio=PRIO_TEST)
+
+    def read_regs(self, regs, retry=3):
+        """一次读取多个寄存器，返回 {reg: value}；失败的寄存器重试，最终仍失败为 None"""
+        values = {}
+        todo = list(regs)
+        for i in range(retry):
+            values.update(self.planner.read(todo))
+            todo = [r for r in todo if values[r] is None]
+            if not todo:
+                break
+            time.sleep(0.1)
+        return values
+
     def get_feedback_speed(self):
         # 强制更新转速数据
         self.read_reg(REG_REAL_SPEED)
@@ -229,7 +231,7 @@ def run_tests():
 
     # --- Case 1 ---
     print("\n[Case 1] 通信链路测试")
-    ver = engine.read_reg(REG_HW_VERSION, retry=5)
+    ver = engine.read_static(REG_HW_VERSION)
     if ver is not None and ver > 0:
         print(f"  [PASS] 通过: HW Ver {ver}")
     else:
@@ -237,8 +239,9 @@ def run_tests():
 
     # --- Case 2 ---
     print("\n[Case 2] 环境安全扫描")
-    volt = engine.read_reg(REG_BUS_VOLT) * 0.1
-    err = engine.read_reg(REG_ERR_CODE)
+    env = engine.read_regs([REG_BUS_VOLT, REG_ERR_CODE])
+    volt = env[REG_BUS_VOLT] * 0.1
+    err = env[REG_ERR_CODE]
 
     print(f"  -> 电压: {volt:.1f}V")
     if err != 0:
@@ -307,12 +310,14 @@ def run_tests():
 
     # 3秒超时检测
     for i in range(15):
-        actual_rpm = engine.get_feedback_speed()
+        # 转速与错误码一次读回
+        fb = engine.read_regs([REG_REAL_SPEED, REG_ERR_CODE])
+        actual_rpm = engine.g_data.motor_speed
         max_rpm = max(max_rpm, abs(actual_rpm))  # 记录最大绝对值
         final_rpm = actual_rpm
 
         # 实时救错
-        if engine.read_reg(REG_ERR_CODE) != 0:
+        if fb[REG_ERR_CODE] != 0:
             engine.set_shadow(REG_RT_SETTING, 0x8000)
             time.sleep(0.2)
             engine.set_shadow(REG_RT_SETTING, 0)
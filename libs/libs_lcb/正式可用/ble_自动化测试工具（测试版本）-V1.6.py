@@ -25,6 +25,16 @@ BLE 协议自动化测试工具（完整版本）
 4. 生成一份示例Excel：
    py -3.11 自动化BLE测试.py --make-sample
 
+5. 多块板并行（每个串口一个子进程，结果汇总到一份报告，每个 DUT 一列）：
+   py -3.11 自动化BLE测试.py --combo --ports COM1,COM2,COM3,COM4 --dispatch replicate
+   --dispatch shard 时用例轮流分给各板，每条只跑一次
+
+6. 流水线执行（不等上一条应答就发下一条，最多 8 帧在途；链路往返时延大时吞吐量成倍提升）：
+   py -3.11 自动化BLE测试.py --combo --pipeline 8
+   应答缺失/超时的用例整条重发（PIPELINE_RETRIES 次），结果仍按用例顺序输出
+   加 --pipeline-verify 时另外校验写应答回显写入值、回读与写入一致，不一致也整条重发
+   （写应答回显目前只在模拟器上成立，实测设备确认前不要开启，否则每条用例都会被重发）
+
 Excel/CSV 用例字段说明：
 ------------------------------------------------------------
 必需（用于设置 LED）：
@@ -45,6 +55,8 @@ Excel/CSV 用例字段说明：
   - raw.log                 原始详细日志（时间戳+级别）
   - results.csv             每条用例的结果明细
   - report.html             富文本测试报告（统计+表格）
+  --ports 时 raw.log 只记录汇总过程，results.csv / report.html 为汇总结果（每个 DUT 一列），
+  各 DUT 的明细在 <端口名>/ 子目录下（raw.log / results.csv / report.html）
 
 注意事项：
 ------------------------------------------------------------
@@ -67,6 +79,18 @@ import itertools
 import chardet
 import csv
 
+# 公共协议库（libs/ppx）：结构体定义与纯 Python 编解码
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../.."))
+from ppx.codec import open_ble_codec, resolve_backend, BACKEND_AUTO, BACKEND_DLL
+from ppx.structs import ppx_ble_msg_t, ppx_led_msg_t, ppx_ble_data_t  # 与 ppx_ble.h 完全一致
+from ppx.deframer import Deframer, READ_POLL
+from ppx.aio import AsyncSerial
+from ppx.pipeline import Pipeline, readback_check
+from ppx.trace import Trace, hexstr, DEBUG, INFO, ERROR
+from stress.logsink import LogSink
+from stress.multidut import (run_ports, parse_ports, merge_results, summarize, save_merged_csv,
+                             save_merged_html, MODES, MODE_REPLICATE)
+
 
 
 # 尝试导入 pandas（用于 Excel/CSV 读写），失败则退化到 CSV 解析
@@ -80,10 +104,15 @@ except Exception:
 # 配置区域 - 根据实际情况修改这些参数
 # ==============================================
 BLE_PROTOCOL_DLL = r"C:\Test_ziliao\libs\libs\ppx_ble.dll"  # BLE协议DLL文件名
+CODEC_BACKEND = BACKEND_AUTO                        # 编解码后端：dll / python / auto
 SERIAL_PORT = "COM54"                              # 串口端口
 BAUDRATE = 460800                                   # 串口波特率
 DEBUG_MODE = True                                   # 调试模式，打印更多信息
+LOG_SAMPLE = {}                                     # 逐帧日志抽样：{"tx": 10, "rx": 10, "frame": 10} 每 10 帧打印 1 帧
 DEFAULT_RECV_TIMEOUT = 1.0                          # 串口接收默认超时（秒）
+PIPELINE_DEPTH = 0                                  # 用例流水线深度（最多在途帧数），0 为逐条停等
+PIPELINE_RETRIES = 2                                # 流水线中应答缺失/超时/校验不符时整条用例的重发次数
+PIPELINE_VERIFY = False                             # 流水线校验写应答回显与回读一致（仅模拟器验证过，设备确认前保持关闭）
 
 # ==============================================
 # 协议常量定义
@@ -107,62 +136,23 @@ PPX_BLE_LED_MSG_REG = 0x08
 PPX_PARSE_SUCCESS = 1
 PPX_PARSE_FAILURE = 0
 
-# ==============================================
-# 结构体定义 (必须与DLL中的定义完全一致)
-# ==============================================
-class ppx_ble_msg_t(Structure):
-    _fields_ = [
-        ("id", c_uint8),       # 设备ID
-        ("cmd", c_uint8),      # 写/读命令
-        ("reg_addr", c_uint8), # BLE数据地址
-        ("reg_nums", c_uint8)  # BLE寄存器数量
-    ]
-
-class ppx_led_msg_t(Structure):
-    _fields_ = [
-        ("screen_on", c_uint32, 1),      # 显示开关: 1开, 0关
-        ("brightness", c_uint32, 3),     # 亮度级别 0-7
-        ("blink_period", c_uint32, 4),   # 闪烁周期: N * 200ms
-        ("blink_duty", c_uint32, 4),     # 闪烁占空比
-        ("blink_en", c_uint32, 8),       # 闪烁使能
-        ("err_flag", c_uint32, 2),       # 错误码标志
-        ("err_code", c_uint32, 4),       # 错误码: 0-F
-        ("digital", c_uint32, 7),        # 电池SOC: 0-100
-        ("logo", c_uint32, 2),           # LOGO: 0关, 1白, 2红
-        ("rim_state", c_uint32, 2),      # 护盾: 0关, 1白, 2绿
-        ("rdygo", c_uint32, 2),          # Ready Go: 0关, 1白, 2红
-        ("turn_left", c_uint32, 2),      # 左转向灯: 0关, 1白, 2橙
-        ("turn_right", c_uint32, 2),     # 右转向灯: 0关, 1白, 2橙
-        ("ring", c_uint32, 2),           # 灯环: 0关, 1蓝, 2红
-        ("rsvd_data", c_uint32, 19)      # 保留
-    ]
-
-class ppx_ble_data_t(Structure):
-    _fields_ = [
-        ("id_num", c_uint8),                     # 设备ID号
-        ("model", c_uint8 * 8),                  # 型号 (8字节)
-        ("serial_num", c_uint8 * 26),            # 序列号 (26字节)
-        ("hw_version", c_uint8),                 # 硬件版本
-        ("sw_version", c_uint8 * 20),            # 软件版本 (20字节)
-        ("status", c_uint32),                    # 状态
-        ("ldr_value", c_uint16),                 # 光敏电阻亮度
-        ("io_status", c_uint16),                 # IO引脚状态
-        ("led_msg", ppx_led_msg_t),              # LED显示信息
-        ("card_id", c_uint32),                   # NFC卡ID
-        ("dat_setting", c_uint32)                # 数据设置
-    ]
-
 # ==============================================
 # BLE协议通信类（复用并增强日志）
 # ==============================================
 class BLEProtocol:
-    def __init__(self, dll_path: str, serial_port: str, baudrate: int, recv_timeout: float = DEFAULT_RECV_TIMEOUT):
+    def __init__(self, dll_path: str, serial_port: str, baudrate: int, recv_timeout: float = DEFAULT_RECV_TIMEOUT,
+                 backend: str = CODEC_BACKEND):
         self.dll_loaded = False
+        self.backend = backend
         self.serial_connected = False
         self.recv_timeout = recv_timeout
+        self.aio = None  # type: Optional[AsyncSerial]  # 异步传输（request_async 时创建）
+        self.deframer = Deframer(dev_id=PPX_ID_BLE)  # 应答分帧
 
         # 日志回调（由外部 AutoTester 注入），默认为打印
         self._logger = None  # type: Optional[callable]
+        # 逐帧日志：级别不够时不做格式化
+        self.trace = Trace(self._log, level=DEBUG if DEBUG_MODE else INFO, sample=LOG_SAMPLE)
 
         # 加载DLL
         self._load_dll(dll_path)
@@ -177,6 +167,12 @@ class BLEProtocol:
         """设置日志回调：logger_func(level:str, message:str)"""
         self._logger = logger_func
 
+    def sync_log(self):
+        """日志回调支持 sync() 时等待日志落盘"""
+        sync = getattr(self._logger, "sync", None)
+        if sync:
+            sync()
+
     # ---------------- 内部工具 ----------------
     def _log(self, level: str, message: str):
         if self._logger:
@@ -185,31 +181,18 @@ class BLEProtocol:
             print(f"[{level}] {message}")
 
     def _debug_print(self, message: str, is_error: bool = False):
-        prefix = "ERROR" if is_error else "DEBUG"
-        if is_error or DEBUG_MODE:
-            self._log(prefix, message)
+        self.trace.log(ERROR if is_error else DEBUG, message)
 
     # ---------------- DLL/串口初始化 ----------------
     def _load_dll(self, dll_path: str):
         try:
-            self.ble_lib = cdll.LoadLibrary(dll_path)
+            # DLL 后端的函数原型在 ppx.codec.DllBleCodec 中配置；python 后端不依赖 DLL
+            self.ble_lib = open_ble_codec(self.backend, dll_path)
             self.dll_loaded = True
-            self._debug_print(f"成功加载DLL: {dll_path}")
-
-            # 严格按照给定的函数原型设置
-            self.ble_lib.ppx_com_ble_parse.argtypes = [
-                POINTER(c_uint8),    # pdata
-                c_uint8,             # data_len
-                POINTER(ppx_ble_msg_t)  # ble_msg
-            ]
-            self.ble_lib.ppx_com_ble_parse.restype = c_int
-
-            self.ble_lib.ppx_com_ble_format.argtypes = [
-                c_int,                # cmd_type
-                POINTER(ppx_ble_msg_t), # ble_msg
-                c_void_p              # buffer
-            ]
-            self.ble_lib.ppx_com_ble_format.restype = c_uint16
+            if self.ble_lib.backend == "python":
+                self._debug_print("使用纯 Python 编解码后端")
+            else:
+                self._debug_print(f"成功加载DLL: {dll_path}")
 
         except Exception as e:
             self._debug_print(f"加载DLL失败: {e}", is_error=True)
@@ -220,7 +203,7 @@ class BLEProtocol:
             self.serial_port = serial.Serial(
                 port=port,
                 baudrate=baudrate,
-                timeout=self.recv_timeout
+                timeout=READ_POLL   # 读超时只设一次，接收截止时间由 recv_timeout 控制
             )
             self.serial_connected = True
             self._debug_print(f"串口已连接: {port}, 波特率: {baudrate}")
@@ -230,17 +213,19 @@ class BLEProtocol:
 
     def _check_global_vars(self):
         try:
-            self.g_ppx_ble_data = ppx_ble_data_t.in_dll(self.ble_lib, "g_ppx_ble_data")
+            self.g_ppx_ble_data = self.ble_lib.g_ppx_ble_data
             self._debug_print("成功获取全局变量 g_ppx_ble_data")
 
-            if DEBUG_MODE:
-                self._print_ble_data(self.g_ppx_ble_data)
+            self.trace.debug(self._format_ble_data, self.g_ppx_ble_data)
 
         except Exception as e:
             self._debug_print(f"获取全局变量失败: {e}", is_error=True)
 
     # ---------------- 基本通信 ----------------
     def close(self):
+        if self.aio is not None:
+            self.aio.close()
+            self.aio = None
         if hasattr(self, 'serial_port') and self.serial_port and self.serial_port.is_open:
             self.serial_port.close()
             self.serial_connected = False
@@ -251,7 +236,7 @@ class BLEProtocol:
             self._debug_print("串口未连接，无法发送数据", is_error=True)
             return False
         try:
-            self._debug_print(f"发送数据: {self._bytes_to_hex(data)}")
+            self.trace.debug("发送数据: %s", hexstr(data), category="tx")
             self.serial_port.write(data)
             return True
         except Exception as e:
@@ -263,19 +248,12 @@ class BLEProtocol:
             self._debug_print("串口未连接，无法接收数据", is_error=True)
             return None
         try:
-            start_time = time.time()
-            data = bytes()
             _timeout = self.recv_timeout if timeout is None else timeout
-            while time.time() - start_time < _timeout:
-                waiting = self.serial_port.in_waiting
-                if waiting > 0:
-                    data += self.serial_port.read(waiting)
-                    if len(data) >= max_length:
-                        break
-                else:
-                    time.sleep(0.005)  # 微等，减少CPU占用
-            if data:
-                self._debug_print(f"接收数据: {self._bytes_to_hex(data)}")
+            # 阻塞读 + 增量分帧：收到一帧完整合法帧立即返回，不再 5ms 轮询到超时
+            frame = self.deframer.read_frame(self.serial_port, _timeout)
+            if frame is not None:
+                data = frame.raw
+                self.trace.debug("接收数据: %s", hexstr(data), category="rx")
                 return data
             else:
                 self._debug_print("接收数据超时")
@@ -284,6 +262,29 @@ class BLEProtocol:
             self._debug_print(f"接收数据失败: {e}", is_error=True)
             return None
 
+    async def request_async(self, data: bytes, timeout: Optional[float] = None) -> Optional[bytes]:
+        """
+        send_data + receive_data 的异步版本：await 应答帧，多个串口可在一个事件循环里并发。
+        第一次调用时把串口接到当前事件循环（ppx.aio），之后不要再混用同步 receive_data。
+        """
+        if not self.serial_connected:
+            self._debug_print("串口未连接，无法发送数据", is_error=True)
+            return None
+        try:
+            if self.aio is None:
+                self.aio = AsyncSerial(self.serial_port, self.deframer)
+            self.trace.debug("发送数据: %s", hexstr(data), category="tx")
+            _timeout = self.recv_timeout if timeout is None else timeout
+            frame = await self.aio.request(data, _timeout)
+            if frame is not None:
+                self.trace.debug("接收数据: %s", hexstr(frame.raw), category="rx")
+                return frame.raw
+            self._debug_print("接收数据超时")
+            return None
+        except Exception as e:
+            self._debug_print(f"异步请求失败: {e}", is_error=True)
+            return None
+
     def parse_data(self, data: bytes) -> Tuple[bool, Optional[ppx_ble_msg_t], Optional[int], Optional[int]]:
         """ 用 DLL 的解析函数解析数据包，并返回 DLL 的原始返回码（result） """
         if not data:
@@ -307,10 +308,8 @@ class BLEProtocol:
             )
 
             if parse_result == PPX_PARSE_SUCCESS:
-                self._debug_print("数据解析成功:")
-                self._print_ble_msg(ble_msg)
-                # 更新全局变量信息（DLL 内部应已更新 g_ppx_ble_data）
-                self._print_ble_data_changes(ble_msg)
+                # 解析结果与全局变量变化（DLL 内部应已更新 g_ppx_ble_data）
+                self.trace.debug(self._format_parsed, ble_msg, category="frame")
                 # 粗略提取命令类型（若协议规定首字节低4位为类型，可根据实际更改）
                 cmd_type = data[0] & 0x0F if len(data) > 0 else None
                 return True, ble_msg, cmd_type, int(parse_result)
@@ -337,7 +336,7 @@ class BLEProtocol:
 
             if length > 0:
                 data = buffer.raw[:length]
-                self._debug_print(f"组包成功，数据长度: {length} 字节")
+                self.trace.debug("组包成功，数据长度: %d 字节", length)
                 return True, data
             else:
                 self._debug_print("组包失败，返回长度为0", is_error=True)
@@ -346,15 +345,20 @@ class BLEProtocol:
             self._debug_print(f"组包数据时发生异常: {e}", is_error=True)
             return False, None
 
+    def open_pipeline(self, depth: int) -> Pipeline:
+        """流水线会话：最多 depth 帧请求在途，应答按 (ID, 命令, 寄存器) 匹配，期间不要再调用 receive_data"""
+        return Pipeline(self.serial_port, self.deframer, depth=depth, timeout=self.recv_timeout,
+                        retries=PIPELINE_RETRIES, trace=self.trace)
+
     # ---------------- 业务操作：LED 设置/读取 ----------------
-    def set_led_display(self,
-                        screen_on=1, brightness=0, digital=0,
-                        logo=0, rim_state=0, rdygo=0,
-                        turn_left=0, turn_right=0, ring=0,
-                        recv_timeout: Optional[float] = None) -> Tuple[bool, Optional[bytes], Optional[int]]:
+    def format_led_write(self,
+                         screen_on=1, brightness=0, digital=0,
+                         logo=0, rim_state=0, rdygo=0,
+                         turn_left=0, turn_right=0, ring=0) -> Optional[bytes]:
+        """写 LED 寄存器的请求帧（同时更新全局变量中的 LED 显示信息），失败返回 None"""
         if not self.dll_loaded:
             self._debug_print("DLL未加载，无法设置LED", is_error=True)
-            return False, None, None
+            return None
         try:
             # 修改全局变量中的LED显示信息
             self.g_ppx_ble_data.led_msg.screen_on = int(screen_on)
@@ -367,8 +371,8 @@ class BLEProtocol:
             self.g_ppx_ble_data.led_msg.turn_right = int(turn_right)
             self.g_ppx_ble_data.led_msg.ring = int(ring)
 
-            self._debug_print("修改后的LED显示信息:")
-            self._print_led_msg(self.g_ppx_ble_data.led_msg)
+            self.trace.debug(self._format_led_msg, self.g_ppx_ble_data.led_msg, "修改后的LED显示信息:",
+                             category="led")
 
             # 准备消息结构体
             ble_msg = ppx_ble_msg_t()
@@ -377,9 +381,41 @@ class BLEProtocol:
             ble_msg.reg_addr = PPX_BLE_LED_MSG_REG
             ble_msg.reg_nums = 1
 
-            # 组包并发送
             success, data = self.format_data(PpxCmdType.REQ, ble_msg)
-            if success and data is not None:
+            return data if success else None
+        except Exception as e:
+            self._debug_print(f"设置LED显示时发生异常: {e}", is_error=True)
+            return None
+
+    def format_led_read(self) -> Optional[bytes]:
+        """读 LED 寄存器的请求帧，失败返回 None"""
+        if not self.dll_loaded:
+            self._debug_print("DLL未加载，无法读取LED状态", is_error=True)
+            return None
+        try:
+            # 准备消息结构体
+            ble_msg = ppx_ble_msg_t()
+            ble_msg.id = PPX_ID_BLE
+            ble_msg.cmd = PPX_MSG_READ
+            ble_msg.reg_addr = PPX_BLE_LED_MSG_REG
+            ble_msg.reg_nums = 1
+
+            success, data = self.format_data(PpxCmdType.REQ, ble_msg)
+            return data if success else None
+        except Exception as e:
+            self._debug_print(f"读取LED状态时发生异常: {e}", is_error=True)
+            return None
+
+    def set_led_display(self,
+                        screen_on=1, brightness=0, digital=0,
+                        logo=0, rim_state=0, rdygo=0,
+                        turn_left=0, turn_right=0, ring=0,
+                        recv_timeout: Optional[float] = None) -> Tuple[bool, Optional[bytes], Optional[int]]:
+        try:
+            # 组包并发送
+            data = self.format_led_write(screen_on, brightness, digital, logo, rim_state,
+                                         rdygo, turn_left, turn_right, ring)
+            if data is not None:
                 if self.send_data(data):
                     # 等待并接收响应
                     response = self.receive_data(timeout=recv_timeout or self.recv_timeout)
@@ -394,19 +430,9 @@ class BLEProtocol:
 
 
     def read_led_status(self, recv_timeout: Optional[float] = None) -> Tuple[bool, Optional[bytes], Optional[ppx_led_msg_t], Optional[int]]:
-        if not self.dll_loaded:
-            self._debug_print("DLL未加载，无法读取LED状态", is_error=True)
-            return False, None, None, None
         try:
-            # 准备消息结构体
-            ble_msg = ppx_ble_msg_t()
-            ble_msg.id = PPX_ID_BLE
-            ble_msg.cmd = PPX_MSG_READ
-            ble_msg.reg_addr = PPX_BLE_LED_MSG_REG
-            ble_msg.reg_nums = 1
-
-            success, data = self.format_data(PpxCmdType.REQ, ble_msg)
-            if success and data is not None:
+            data = self.format_led_read()
+            if data is not None:
                 if self.send_data(data):
                     response = self.receive_data(timeout=recv_timeout or self.recv_timeout)
                     if response:
@@ -422,64 +448,69 @@ class BLEProtocol:
     def _bytes_to_hex(self, data: bytes) -> str:
         return ' '.join(f'{b:02X}' for b in data)
 
-    def _print_ble_msg(self, ble_msg: ppx_ble_msg_t):
-        self._log("INFO", f"  ID: 0x{ble_msg.id:02X}\n  命令: 0x{ble_msg.cmd:02X} ({'写' if ble_msg.cmd == PPX_MSG_WRITE else '读'})\n  寄存器地址: 0x{ble_msg.reg_addr:02X}\n  寄存器数量: {ble_msg.reg_nums}")
-
-    def _print_led_msg(self, led_msg: ppx_led_msg_t):
-        self._log(
-            "INFO",
-            (
-                f"  屏幕状态: {'开' if led_msg.screen_on else '关'}\n"
-                f"  亮度级别: {led_msg.brightness}\n"
-                f"  数字显示: {led_msg.digital}\n"
-                f"  LOGO状态: {led_msg.logo} (0关, 1白, 2红)\n"
-                f"  护盾状态: {led_msg.rim_state} (0关, 1白, 2绿)\n"
-                f"  ReadyGo状态: {led_msg.rdygo} (0关, 1白, 2红)\n"
-                f"  左转向灯: {led_msg.turn_left} (0关, 1白, 2橙)\n"
-                f"  右转向灯: {led_msg.turn_right} (0关, 1白, 2橙)\n"
-                f"  灯环状态: {led_msg.ring} (0关, 1蓝, 2红)"
-            )
-        )
-
-    def _print_ble_data(self, ble_data: ppx_ble_data_t):
-        self._log(
-            "INFO",
-            (
-                "\n全局BLE数据结构体内容:\n"
-                f"设备ID号: {ble_data.id_num}\n"
-                f"硬件版本: {ble_data.hw_version}\n"
-                f"状态: 0x{ble_data.status:08X}\n"
-                f"光敏电阻亮度: {ble_data.ldr_value}\n"
-                f"IO状态: 0x{ble_data.io_status:04X}\n"
-                f"NFC卡ID: 0x{ble_data.card_id:08X}\n"
-                f"数据设置: 0x{ble_data.dat_setting:08X}\n"
-                "\nLED显示信息:"
-            )
+    # 以下 _format_* 只在对应日志需要输出时由 trace 调用
+    def _format_ble_msg(self, ble_msg: ppx_ble_msg_t) -> str:
+        return f"  ID: 0x{ble_msg.id:02X}\n  命令: 0x{ble_msg.cmd:02X} ({'写' if ble_msg.cmd == PPX_MSG_WRITE else '读'})\n  寄存器地址: 0x{ble_msg.reg_addr:02X}\n  寄存器数量: {ble_msg.reg_nums}"
+
+    def _format_led_msg(self, led_msg: ppx_led_msg_t, title: str = "") -> str:
+        return (
+            (f"{title}\n" if title else "") +
+            f"  屏幕状态: {'开' if led_msg.screen_on else '关'}\n"
+            f"  亮度级别: {led_msg.brightness}\n"
+            f"  数字显示: {led_msg.digital}\n"
+            f"  LOGO状态: {led_msg.logo} (0关, 1白, 2红)\n"
+            f"  护盾状态: {led_msg.rim_state} (0关, 1白, 2绿)\n"
+            f"  ReadyGo状态: {led_msg.rdygo} (0关, 1白, 2红)\n"
+            f"  左转向灯: {led_msg.turn_left} (0关, 1白, 2橙)\n"
+            f"  右转向灯: {led_msg.turn_right} (0关, 1白, 2橙)\n"
+            f"  灯环状态: {led_msg.ring} (0关, 1蓝, 2红)"
         )
-        self._print_led_msg(ble_data.led_msg)
 
-    def _print_ble_data_changes(self, ble_msg: ppx_ble_msg_t):
+    def _format_ble_data(self, ble_data: ppx_ble_data_t) -> str:
+        return (
+            "\n全局BLE数据结构体内容:\n"
+            f"设备ID号: {ble_data.id_num}\n"
+            f"硬件版本: {ble_data.hw_version}\n"
+            f"状态: 0x{ble_data.status:08X}\n"
+            f"光敏电阻亮度: {ble_data.ldr_value}\n"
+            f"IO状态: 0x{ble_data.io_status:04X}\n"
+            f"NFC卡ID: 0x{ble_data.card_id:08X}\n"
+            f"数据设置: 0x{ble_data.dat_setting:08X}\n"
+            "\nLED显示信息:\n"
+        ) + self._format_led_msg(ble_data.led_msg)
+
+    def _format_parsed(self, ble_msg: ppx_ble_msg_t) -> str:
+        text = "数据解析成功:\n" + self._format_ble_msg(ble_msg)
         if ble_msg.reg_addr == PPX_BLE_LED_MSG_REG:
-            self._log("INFO", "\n全局变量中的LED显示信息已更新:")
-            self._print_led_msg(self.g_ppx_ble_data.led_msg)
+            text += "\n" + self._format_led_msg(self.g_ppx_ble_data.led_msg, "全局变量中的LED显示信息已更新:")
+        return text
 
 # ==============================================
 # 自动化测试框架
 # ==============================================
 class FileLogger:
-    """ 简单文件日志器：写入 raw.log，同时回显到控制台 """
-    def __init__(self, log_path: str):
+    """ 简单文件日志器：写入 raw.log，同时回显到控制台（echo=False 时只写文件） """
+    def __init__(self, log_path: str, echo: bool = True):
         self.log_path = log_path
-        os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+        self.echo = echo
+        # 后台线程写文件（文件保持打开、批量落盘），不再每行 open/close
+        self.sink = LogSink(self.log_path)
 
     def __call__(self, level: str, message: str):
         ts = _dt.datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
         line = f"[{ts}] [{level}] {message}"
         # 控制台输出
-        print(line)
+        if self.echo:
+            print(line)
         # 文件输出
-        with open(self.log_path, 'a', encoding='utf-8') as f:
-            f.write(line + "\n")
+        self.sink.write(line + "\n")
+
+    def sync(self):
+        """等待已写入的日志落盘（每条用例判定后调用）"""
+        self.sink.sync()
+
+    def close(self):
+        self.sink.close()
 
 
 def _coerce_int(val: Any) -> Optional[int]:
@@ -553,24 +584,36 @@ class AutoTester:
         return cases
 
     # ---------------- 执行用例 ----------------
-    def run_cases(self, cases: List[Dict[str, Any]]):
-        for idx, row in enumerate(cases.to_dict(orient="records"), start=1):
+    @staticmethod
+    def _case_params(row: Dict[str, Any]) -> Dict[str, int]:
+        """用例行 -> set_led_display 参数"""
+        return {
+            'screen_on': _boolish_int(row.get('screen_on')) if _boolish_int(row.get('screen_on')) is not None else 1,
+            'brightness': _coerce_int(row.get('brightness')) or 0,
+            'digital': _coerce_int(row.get('digital')) or 0,
+            'logo': _coerce_int(row.get('logo')) or 0,
+            'rim_state': _coerce_int(row.get('rim_state')) or 0,
+            'rdygo': _coerce_int(row.get('rdygo')) or 0,
+            'turn_left': _coerce_int(row.get('turn_left')) or 0,
+            'turn_right': _coerce_int(row.get('turn_right')) or 0,
+            'ring': _coerce_int(row.get('ring')) or 0,
+        }
+
+    def run_cases(self, cases: List[Dict[str, Any]], pipeline: int = PIPELINE_DEPTH,
+                  verify: bool = PIPELINE_VERIFY):
+        """pipeline > 0 时各用例的写/回读请求流水线发送，最多 pipeline 帧在途；verify 见 PIPELINE_VERIFY"""
+        # DataFrame（读表）或 list[dict]（make_combo_cases 直接生成）
+        rows = cases.to_dict(orient="records") if hasattr(cases, "to_dict") else cases
+        if pipeline > 0:
+            self._run_cases_pipelined(rows, pipeline, verify)
+            return
+        for idx, row in enumerate(rows, start=1):
             start_ts = time.time()
             case_id = row.get('id', idx)
             comment = str(row.get('comment', '') or '')
 
             # 读取设置参数
-            params = {
-                'screen_on': _boolish_int(row.get('screen_on')) if _boolish_int(row.get('screen_on')) is not None else 1,
-                'brightness': _coerce_int(row.get('brightness')) or 0,
-                'digital': _coerce_int(row.get('digital')) or 0,
-                'logo': _coerce_int(row.get('logo')) or 0,
-                'rim_state': _coerce_int(row.get('rim_state')) or 0,
-                'rdygo': _coerce_int(row.get('rdygo')) or 0,
-                'turn_left': _coerce_int(row.get('turn_left')) or 0,
-                'turn_right': _coerce_int(row.get('turn_right')) or 0,
-                'ring': _coerce_int(row.get('ring')) or 0,
-            }
+            params = self._case_params(row)
 
             recv_timeout = _coerce_float(row.get('recv_timeout'))
             delay_after = _coerce_float(row.get('delay_after')) or 0.0
@@ -580,64 +623,131 @@ class AutoTester:
 
             # 写入命令
             ok, resp, parse_send = self.ble.set_led_display(**params, recv_timeout=recv_timeout)
-            recv_hex = self.ble._bytes_to_hex(resp) if ok and resp else ''
 
             # 读取响应
             read_ok, read_resp, led_msg, parse_read = self.ble.read_led_status(recv_timeout=recv_timeout)
-            read_hex = self.ble._bytes_to_hex(read_resp) if read_ok and read_resp else ''
-
-            # 判定结果
-            verdict = "PASS" if ok and read_ok else "FAIL"
-            elapsed = time.time() - start_ts
-            self.ble._log("INFO", f"结果: {verdict} | 用时: {elapsed:.3f}s")
-
-            # 展开 led_msg 为字典
-            checks = {}
-            if led_msg:
-                try:
-                    checks = {
-                        "screen_on": led_msg.screen_on,
-                        "brightness": led_msg.brightness,
-                        "digital": led_msg.digital,
-                        "logo": led_msg.logo,
-                        "rim_state": led_msg.rim_state,
-                        "rdygo": led_msg.rdygo,
-                        "turn_left": led_msg.turn_left,
-                        "turn_right": led_msg.turn_right,
-                        "ring": led_msg.ring,
-                    }
-                except Exception as e:
-                    checks = {"error": f"无法解析 led_msg: {e}"}
-
-            # 回填结果
-            self.results.append({
-                'case_id': case_id,
-                'comment': comment,
-                'screen_on': params['screen_on'],
-                'brightness': params['brightness'],
-                'digital': params['digital'],
-                'logo': params['logo'],
-                'rim_state': params['rim_state'],
-                'rdygo': params['rdygo'],
-                'turn_left': params['turn_left'],
-                'turn_right': params['turn_right'],
-                'ring': params['ring'],
-                'recv_timeout': recv_timeout,
-                'delay_after': delay_after,
-                'send_ok': "PASS" if ok else "FAIL",
-                'read_ok': "PASS" if read_ok else "FAIL",
-                'recv_hex': recv_hex,   # 写入响应
-                'read_hex': read_hex,   # 读取响应
-                'parse_send': parse_send,
-                'parse_read': parse_read,
-                'verdict': verdict,
-                'checks': checks,       # 现在是 dict，而不是 <object ...>
-                'elapsed_s': round(elapsed, 3),
-                'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
-            })
 
+            self.results.append(self._record(case_id, comment, params, recv_timeout, delay_after,
+                                             time.time() - start_ts, ok, resp, parse_send,
+                                             read_ok, read_resp, led_msg, parse_read))
+            self.ble.sync_log()   # 判定边界：本条用例日志落盘
+
+            if delay_after > 0:
+                time.sleep(delay_after)
+
+    def _run_cases_pipelined(self, rows: List[Dict[str, Any]], depth: int, verify: bool = False):
+        """
+        写 + 回读作为一个事务提交到流水线，不等应答就继续提交下一条用例。
+        应答缺失/超时时整条用例重发（PIPELINE_RETRIES 次）；verify 时回读与写入不一致也重发。
+        elapsed_s 为该用例从提交到收齐应答的时间；有 delay_after 的用例先等在途用例全部完成再延时。
+        """
+        pipe = self.ble.open_pipeline(depth)
+        done: Dict[int, Dict[str, Any]] = {}
+
+        def on_done(req):
+            idx, case_id, comment, params, recv_timeout, delay_after, start_ts = req.tag
+            resp, read_resp = req.responses
+            ok, parse_send = resp is not None, None
+            read_ok, led_msg, parse_read = False, None, None
+            if ok:
+                _, _, _, parse_send = self.ble.parse_data(resp.raw)
+            if read_resp is not None:
+                read_ok, _, _, parse_read = self.ble.parse_data(read_resp.raw)
+                led_msg = self.ble.g_ppx_ble_data.led_msg if read_ok else None
+            if req.error:
+                self.ble._log("WARNING", f"用例 #{case_id} {req.error}，重试 {req.attempts - 1} 次后放弃")
+            elif not req.verified:
+                self.ble._log("WARNING", f"用例 #{case_id} 回读与写入不一致（重试 {req.attempts - 1} 次）")
+            done[idx] = self._record(case_id, comment, params, recv_timeout, delay_after, time.time() - start_ts,
+                                     ok, resp.raw if ok else None, parse_send,
+                                     read_ok, read_resp.raw if read_resp is not None else None, led_msg, parse_read)
+
+        check = readback_check if verify else None
+        self.ble._log("INFO", f"流水线执行: 深度 {depth}，用例 {len(rows)} 条，{'校验回读' if verify else '只按键匹配'}")
+        for idx, row in enumerate(rows, start=1):
+            case_id = row.get('id', idx)
+            comment = str(row.get('comment', '') or '')
+            params = self._case_params(row)
+            recv_timeout = _coerce_float(row.get('recv_timeout'))
+            delay_after = _coerce_float(row.get('delay_after')) or 0.0
+
+            self.ble._log("INFO", f"==== 提交用例 #{case_id} ====")
+            self.ble._log("INFO", f"参数: {params} | 备注: {comment}")
+            start_ts = time.time()
+            write, read = self.ble.format_led_write(**params), self.ble.format_led_read()
+            tag = (idx, case_id, comment, params, recv_timeout, delay_after, start_ts)
+            if write is None or read is None:
+                done[idx] = self._record(case_id, comment, params, recv_timeout, delay_after, 0.0,
+                                         False, None, None, False, None, None, None)
+                continue
+            pipe.submit([write, read], tag=tag, timeout=recv_timeout, on_done=on_done, check=check)
             if delay_after > 0:
+                pipe.drain()
                 time.sleep(delay_after)
+        pipe.drain()
+
+        # 重发的用例完成得晚，结果按用例顺序回填
+        self.results.extend(done[idx] for idx in sorted(done))
+        self.ble._log("INFO", pipe.format_stats())
+        self.ble.sync_log()
+
+    def _record(self, case_id, comment: str, params: Dict[str, int], recv_timeout: Optional[float],
+                delay_after: float, elapsed: float, ok: bool, resp: Optional[bytes], parse_send: Optional[int],
+                read_ok: bool, read_resp: Optional[bytes], led_msg: Optional[ppx_led_msg_t],
+                parse_read: Optional[int]) -> Dict[str, Any]:
+        """判定并生成一条结果"""
+        recv_hex = self.ble._bytes_to_hex(resp) if ok and resp else ''
+        read_hex = self.ble._bytes_to_hex(read_resp) if read_ok and read_resp else ''
+
+        # 判定结果
+        verdict = "PASS" if ok and read_ok else "FAIL"
+        self.ble._log("INFO", f"用例 #{case_id} 结果: {verdict} | 用时: {elapsed:.3f}s")
+
+        # 展开 led_msg 为字典
+        checks = {}
+        if led_msg:
+            try:
+                checks = {
+                    "screen_on": led_msg.screen_on,
+                    "brightness": led_msg.brightness,
+                    "digital": led_msg.digital,
+                    "logo": led_msg.logo,
+                    "rim_state": led_msg.rim_state,
+                    "rdygo": led_msg.rdygo,
+                    "turn_left": led_msg.turn_left,
+                    "turn_right": led_msg.turn_right,
+                    "ring": led_msg.ring,
+                }
+            except Exception as e:
+                checks = {"error": f"无法解析 led_msg: {e}"}
+
+        # 回填结果
+        result = {
+            'case_id': case_id,
+            'comment': comment,
+            'screen_on': params['screen_on'],
+            'brightness': params['brightness'],
+            'digital': params['digital'],
+            'logo': params['logo'],
+            'rim_state': params['rim_state'],
+            'rdygo': params['rdygo'],
+            'turn_left': params['turn_left'],
+            'turn_right': params['turn_right'],
+            'ring': params['ring'],
+            'recv_timeout': recv_timeout,
+            'delay_after': delay_after,
+            'send_ok': "PASS" if ok else "FAIL",
+            'read_ok': "PASS" if read_ok else "FAIL",
+            'recv_hex': recv_hex,   # 写入响应
+            'read_hex': read_hex,   # 读取响应
+            'parse_send': parse_send,
+            'parse_read': parse_read,
+            'verdict': verdict,
+            'checks': checks,       # 现在是 dict，而不是 <object ...>
+            'elapsed_s': round(elapsed, 3),
+            'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        return result
 
 
 
@@ -692,6 +802,7 @@ class AutoTester:
             ok = bool(result)  # 如果 result 能转成布尔，作为成功失败判断
             self.ble._log("INFO", f"[循环 {i}/{loop_count}] 发送 {'OK' if ok else 'FAIL'}")
             time.sleep(delay)
+        self.ble.sync_log()
 
     # ---------------- 报告输出 ----------------
     def save_results_csv(self, path: str):
@@ -1007,6 +1118,76 @@ def make_combo_cases():
     return cases
              
 
+# ==============================================
+# 多 DUT 并行（--ports）
+# ==============================================
+# 汇总报告中的用例参数列
+CASE_FIELDS = ["screen_on", "brightness", "digital", "logo", "rim_state",
+               "rdygo", "turn_left", "turn_right", "ring"]
+
+
+def run_port(port: str, cases: List[Dict[str, Any]], out_dir: str, options: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """单个 DUT 的完整流程（在子进程中执行）：独立的协议会话、raw.log 与报告"""
+    os.makedirs(out_dir, exist_ok=True)
+    logger = FileLogger(os.path.join(out_dir, 'raw.log'), echo=False)
+    ble = BLEProtocol(options['dll'], port, options['baud'], backend=options['backend'])
+    ble.set_logger(logger)
+    try:
+        if not ble.dll_loaded or not ble.serial_connected:
+            raise RuntimeError("初始化失败，请检查 DLL 路径/串口参数")
+        logger("INFO", f"[{port}] 执行用例 {len(cases)} 条")
+        tester = AutoTester(ble, out_dir)
+        tester.run_cases(cases, pipeline=options.get('pipeline', 0),
+                         verify=options.get('pipeline_verify', PIPELINE_VERIFY))
+        if options.get('loop_count', 0) > 0 and cases:
+            tester.loop_case(cases[0], loop_count=options['loop_count'], delay=options['loop_delay'])
+        tester.save_results_csv(os.path.join(out_dir, 'results.csv'))
+        tester.save_report_html(os.path.join(out_dir, 'report.html'), title=f"BLE 自动化测试报告 - {port}")
+        return tester.results
+    finally:
+        ble.close()
+        logger.close()
+
+
+def run_multi_dut(args, cases, out_dir: str, logger) -> int:
+    """--ports：各串口并行执行，合并为一份报告；返回退出码"""
+    ports = parse_ports(args.ports)
+    use_processes = args.workers == 'process'
+    if not use_processes and resolve_backend(args.backend, args.dll) == BACKEND_DLL:
+        # DLL 的 g_ppx_ble_data 是进程级全局变量，线程之间会互相覆盖
+        logger("WARNING", "DLL 后端不能多线程共用，改为多进程执行")
+        use_processes = True
+    logger("INFO", f"多 DUT 并行: {len(ports)} 个串口 {ports}，分发方式 {args.dispatch}，"
+                   f"{'多进程' if use_processes else '多线程'}")
+
+    def on_done(run):
+        s = summarize(run)
+        if run.error:
+            logger("ERROR", f"[{run.port}] 失败: {run.error}")
+        else:
+            logger("INFO", f"[{run.port}] 完成 {s['total']} 条，PASS {s['passed']}，FAIL {s['failed']}，"
+                           f"用时 {s['elapsed_s']:.1f}s（{s['cases_per_s']:.1f} 条/s）")
+
+    options = {'dll': args.dll, 'baud': args.baud, 'backend': args.backend, 'pipeline': args.pipeline,
+               'pipeline_verify': args.pipeline_verify, 'loop_count': args.loop_count, 'loop_delay': args.loop_delay}
+    t0 = time.perf_counter()
+    runs = run_ports(run_port, ports, cases, out_dir, mode=args.dispatch, options=options,
+                     use_processes=use_processes, on_done=on_done)
+    wall = time.perf_counter() - t0
+
+    rows = merge_results(runs, CASE_FIELDS)
+    csv_path = os.path.join(out_dir, 'results.csv')
+    html_path = os.path.join(out_dir, 'report.html')
+    save_merged_csv(csv_path, rows, ports, CASE_FIELDS)
+    save_merged_html(html_path, rows, runs, CASE_FIELDS, title="BLE 自动化测试汇总报告",
+                     mode=args.dispatch, wall_s=wall)
+    executed = sum(len(run.results) for run in runs)
+    logger("INFO", f"全部完成: 执行 {executed} 条，用时 {wall:.1f}s（{executed / wall if wall else 0:.1f} 条/s）")
+    logger("INFO", f"已保存汇总结果: {csv_path}")
+    logger("INFO", f"已生成汇总报告: {html_path}")
+    return 1 if any(run.error for run in runs) else 0
+
+
 # ==============================================
 # 主程序
 # ==============================================
@@ -1022,6 +1203,8 @@ def main():
     # -------------------- 解析参数 --------------------
     parser = argparse.ArgumentParser(description="BLE 自动化测试工具（Excel/CSV 用例 + HTML 报告）")
     parser.add_argument('--dll', default=BLE_PROTOCOL_DLL, help='ppx_ble.dll 路径')
+    parser.add_argument('--backend', default=CODEC_BACKEND, choices=['dll', 'python', 'auto'],
+                        help='编解码后端（auto：Windows 且 DLL 存在时用 DLL，否则用纯 Python）')
     parser.add_argument('--port', default=SERIAL_PORT, help='串口号，如 COM44')
     parser.add_argument('--baud', type=int, default=BAUDRATE, help='波特率，如 460800')
     parser.add_argument('--cases', default='testcases.xlsx', help='用例文件（xlsx/xls/csv），默认 testcases.xlsx')
@@ -1030,6 +1213,15 @@ def main():
     parser.add_argument('--loop-delay', type=float, default=0.5, help='压力循环间隔秒')
     parser.add_argument('--make-sample', action='store_true', help='生成示例用例（不执行测试）')
     parser.add_argument('--combo', action='store_true', help='自动生成排列组合用例')
+    parser.add_argument('--ports', default=None, help='多块板并行，串口列表，如 COM1,COM2,COM3（覆盖 --port）')
+    parser.add_argument('--dispatch', default=MODE_REPLICATE, choices=MODES,
+                        help='多板用例分发：replicate 每块板跑全部用例 / shard 用例轮流分给各板')
+    parser.add_argument('--workers', default='process', choices=['process', 'thread'],
+                        help='多板执行方式（thread 仅限 python 后端）')
+    parser.add_argument('--pipeline', type=int, default=PIPELINE_DEPTH,
+                        help='流水线深度（最多在途帧数），0 为逐条停等')
+    parser.add_argument('--pipeline-verify', action='store_true', default=PIPELINE_VERIFY,
+                        help='流水线校验写应答回显与回读一致，不一致整条重发（需设备回显写入值）')
     args = parser.parse_args()
 
     # 如果用户直接点 Run（没有传参数），默认开启 combo 模式
@@ -1052,9 +1244,27 @@ def main():
         print("已生成。")
         return
 
+    # -------------------- 多 DUT 并行 --------------------
+    if args.ports:
+        try:
+            if args.combo:
+                cases = make_combo_cases()
+                logger("INFO", f"生成排列组合用例 {len(cases)} 条")
+            else:
+                cases = AutoTester(None, out_dir).load_cases(args.cases)
+                logger("INFO", f"加载用例 {len(cases)} 条 来自: {args.cases}")
+            code = run_multi_dut(args, cases, out_dir, logger)
+        except Exception as e:
+            logger("ERROR", f"多 DUT 执行失败: {e}")
+            code = 3
+        finally:
+            logger("INFO", "程序结束")
+            logger.close()
+        sys.exit(code)
+
     # -------------------- 初始化 BLE 协议 --------------------
     logger("INFO", "初始化 BLE 协议通信...")
-    ble = BLEProtocol(args.dll, args.port, args.baud)
+    ble = BLEProtocol(args.dll, args.port, args.baud, backend=args.backend)
     ble.set_logger(logger)
 
     if not ble.dll_loaded or not ble.serial_connected:
@@ -1086,7 +1296,7 @@ def main():
 
     # -------------------- 执行用例 --------------------
     try:
-        tester.run_cases(cases)
+        tester.run_cases(cases, pipeline=args.pipeline, verify=args.pipeline_verify)
 
         # 压力循环（可选）
         if args.loop_count > 0 and len(cases) > 0:
@@ -1103,6 +1313,7 @@ def main():
     finally:
         ble.close()
         logger("INFO", "程序结束")
+        logger.close()
 
 
 if __name__ == "__main__":
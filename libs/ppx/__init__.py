@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""
+PPX 协议公共库
+============================================================
+各测试脚本（MCB 白盒测试、BLE 自动化测试等）共用的协议层代码，
+统一放在这里，避免每个脚本各自重复声明结构体与组包/解析逻辑。
+
+模块说明：
+- structs : 与 ppx_packet.h / ppx_region.h / ppx_ble.h 一致的常量与 ctypes 结构体
+- codec   : 纯 Python 帧编解码（可替代 ppx_region.dll / ppx_ble.dll），以及 DLL 后端封装
+- regmap  : MCB 寄存器表（偏移/宽度/符号/换算系数），struct 一次解码整个镜像或寄存器区间
+- planner : 多寄存器读规划，把相邻寄存器合并为最少的 MULTREAD 请求
+- batcher : 心跳写合并，连续寄存器合并为一帧 MULTWRITE
+- shadow  : 影子寄存器缓存，控制寄存器脏标记 + 保活重发，静态寄存器 TTL 缓存与重启失效
+- bus     : 串口总线调度器，单线程独占串口，控制写 > 测试读 > 后台遥测优先级队列，Future 返回结果，p50/p99 时延统计
+- session : 编解码会话，复用输入/输出缓冲区与消息结构体（心跳等高频路径）
+- deframer: 串口字节流增量分帧（按 len 定位帧尾，校验 CRC，统计重同步/CRC 错误）
+- trace   : 协议热路径日志，先判级别再格式化，十六进制延迟渲染，按类别抽样（如每 N 帧心跳打印 1 帧）
+- aio     : 串口异步传输（asyncio），await request / read_frame / read_until / lines，一个事件循环驱动多个串口
+- pipeline: 请求流水线，最多 N 帧在途，应答按 (ID, 命令, 寄存器) 匹配，乱序/缺失检测与整条事务重发
+
+脚本中使用方式（以 libs/libcs_mcb/libs/正式可用 下的脚本为例）：
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../.."))
+    from ppx.codec import open_region_codec
+"""
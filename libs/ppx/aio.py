@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+串口异步传输（asyncio）
+============================================================
+BLEProtocol / RegionProtocol 的 receive_data、OTA 工具的 read_serial_response_with_timeout
+都在调用线程里阻塞等待（短超时轮询或 sleep 轮询），一个线程同一时刻只能等一个串口。
+
+AsyncSerial 把一个已打开的串口接到事件循环上，等待都是 await，一个事件循环即可同时驱动
+DUT 串口、继电器串口和日志采集：
+
+    aser = AsyncSerial(ser, deframer=Deframer(dev_id=PPX_ID_BLE))
+    frame = await aser.request(data, timeout=1.0)          # 发送并等待下一帧合法应答，超时返回 None
+    text = await aser.read_until(b"msh >", timeout=5)     # 读到指定字节串（或已编译的 bytes 正则）为止
+    async for line in log_port.lines(): ...               # 日志采集
+    code = await relay_port.read(1, timeout=0.5)           # 继电器握手应答
+
+    await asyncio.gather(dut_case(), relay_cycle(), capture_log())
+
+- 数据到达：串口有文件描述符时（Linux/macOS 上的 pyserial、伪终端）用 loop.add_reader，
+  可读时才被唤醒，没有轮询；否则（Windows COM 口、进程内 LoopPort）由后台线程阻塞读，
+  数据经 call_soon_threadsafe 交给事件循环
+- 超时统一用 asyncio.wait_for，超时返回 None，已收到的数据留在缓冲区
+- request 持有端口锁：同一端口上的请求/应答不交错，不同端口的请求并发
+- 同一端口同一时刻只应有一个协程在读（request / read_frame / read_until / lines 之一）
+- close() 只断开事件循环，串口本身由创建者关闭
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, Optional
+
+from .deframer import Deframer, PpxFrame
+
+# 线程方式下单次阻塞读的超时（秒）：只影响 close() 的响应速度，数据到达即返回
+READER_TIMEOUT = 0.05
+# 端口读不阻塞（如进程内回环无待收数据时立即返回）时的空闲间隔
+IDLE_POLL = 0.002
+READ_CHUNK = 4096
+
+
+def _fileno(ser) -> Optional[int]:
+    try:
+        fd = ser.fileno()
+    except (AttributeError, OSError, ValueError):
+        return None
+    return fd if isinstance(fd, int) and fd >= 0 else None
+
+
+class AsyncSerial:
+    def __init__(self, ser, deframer: Optional[Deframer] = None,
+                 loop: Optional[asyncio.AbstractEventLoop] = None, use_fd: bool = True):
+        """
+        ser      : 已打开的 pyserial Serial（或接口相同的对象，如 emulator.transport.LoopPort）
+        deframer : request / read_frame 使用的分帧器（只读文本时可不传）
+        loop     : 不传时取当前运行中的事件循环
+        use_fd   : False 时即使有文件描述符也用后台线程读（对比测试用）
+        """
+        self.ser = ser
+        self.deframer = deframer
+        self.loop = loop or asyncio.get_running_loop()
+        self._rx = bytearray()
+        self._frames: Deque[PpxFrame] = deque()
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._closed = False
+        self._eof = False
+        self._thread: Optional[threading.Thread] = None
+        # 统计
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.wakeups = 0
+
+        self._fd = _fileno(ser) if use_fd else None
+        self.mode = "fd" if self._fd is not None else "thread"
+        if self._fd is not None:
+            self.loop.add_reader(self._fd, self._on_readable)
+        else:
+            self._thread = threading.Thread(target=self._reader, name="AsyncSerial", daemon=True)
+            self._thread.start()
+
+    # ---------------- 数据到达（事件循环线程） ----------------
+    def _on_readable(self):
+        try:
+            data = os.read(self._fd, READ_CHUNK)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if data:
+            self._on_data(data)
+        else:
+            self._on_eof()
+
+    def _on_data(self, data: bytes):
+        self._rx += data
+        self.bytes_in += len(data)
+        self._wakeup.set()
+
+    def _on_eof(self):
+        if self._fd is not None and not self._closed:
+            self.loop.remove_reader(self._fd)
+            self._fd = None
+        self._eof = True
+        self._wakeup.set()
+
+    # ---------------- 数据到达（后台线程） ----------------
+    def _reader(self):
+        ser = self.ser
+        saved = ser.timeout
+        ser.timeout = READER_TIMEOUT
+        try:
+            while not self._closed:
+                t0 = time.monotonic()
+                data = ser.read(max(ser.in_waiting, 1))
+                if data:
+                    self.loop.call_soon_threadsafe(self._on_data, data)
+                elif time.monotonic() - t0 < READER_TIMEOUT / 2:
+                    time.sleep(IDLE_POLL)
+        except Exception:
+            if not self._closed:
+                try:
+                    self.loop.call_soon_threadsafe(self._on_eof)
+                except RuntimeError:
+                    pass
+        finally:
+            try:
+                ser.timeout = saved
+            except Exception:
+                pass
+
+    async def _wait_data(self):
+        if self._eof or self._closed:
+            raise ConnectionError("串口已关闭")
+        self._wakeup.clear()
+        await self._wakeup.wait()
+        self.wakeups += 1
+
+    # ---------------- 发送 ----------------
+    def write(self, data) -> int:
+        n = self.ser.write(data)
+        self.bytes_out += len(data)
+        return n
+
+    def discard(self):
+        """丢弃缓冲区中尚未读取的数据与帧（发送新请求前清掉迟到的旧应答）"""
+        self._rx.clear()
+        self._frames.clear()
+        if self.deframer is not None:
+            self.deframer.reset()
+
+    # ---------------- 帧 ----------------
+    async def _next_frame(self) -> PpxFrame:
+        while not self._frames:
+            if self._rx:
+                data, self._rx = self._rx, bytearray()
+                self._frames.extend(self.deframer.feed(data))
+            else:
+                await self._wait_data()
+        return self._frames.popleft()
+
+    async def read_frame(self, timeout: Optional[float] = None) -> Optional[PpxFrame]:
+        """等待下一帧完整合法帧，超时返回 None"""
+        if self.deframer is None:
+            raise ValueError("未指定分帧器")
+        try:
+            return await asyncio.wait_for(self._next_frame(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def request(self, data, timeout: Optional[float] = None) -> Optional[PpxFrame]:
+        """发送一帧请求并等待应答帧（端口锁内完成，超时返回 None）"""
+        async with self._lock:
+            self.discard()
+            self.write(data)
+            return await self.read_frame(timeout)
+
+    # ---------------- 字节 / 文本 ----------------
+    async def _exactly(self, size: int) -> bytes:
+        while len(self._rx) < size:
+            await self._wait_data()
+        data = bytes(self._rx[:size])
+        del self._rx[:size]
+        return data
+
+    async def read(self, size: int = 1, timeout: Optional[float] = None) -> Optional[bytes]:
+        """读 size 字节（如继电器握手应答），超时返回 None"""
+        try:
+            return await asyncio.wait_for(self._exactly(size), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def _until(self, pattern) -> bytes:
+        start = 0
+        while True:
+            if isinstance(pattern, (bytes, bytearray)):
+                pos = self._rx.find(pattern, start)
+                if pos >= 0:
+                    end = pos + len(pattern)
+                    break
+                start = max(0, len(self._rx) - len(pattern) + 1)
+            else:
+                m = pattern.search(self._rx)
+                if m:
+                    end = m.end()
+                    break
+            await self._wait_data()
+        data = bytes(self._rx[:end])
+        del self._rx[:end]
+        return data
+
+    async def read_until(self, pattern, timeout: Optional[float] = None) -> Optional[bytes]:
+        """读到 pattern（bytes 或已编译的 bytes 正则）为止，返回含 pattern 的数据；超时返回 None"""
+        try:
+            return await asyncio.wait_for(self._until(pattern), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def readline(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        return await self.read_until(b"\n", timeout)
+
+    async def lines(self) -> AsyncIterator[bytes]:
+        """逐行产出（含换行符），串口关闭后结束"""
+        while True:
+            try:
+                line = await self._until(b"\n")
+            except ConnectionError:
+                if self._rx:
+                    rest, self._rx = bytes(self._rx), bytearray()
+                    yield rest
+                return
+            yield line
+
+    def read_available(self) -> bytes:
+        """取出缓冲区中已收到的全部数据（不等待）"""
+        data, self._rx = bytes(self._rx), bytearray()
+        return data
+
+    # ---------------- 生命周期 ----------------
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if self._fd is not None:
+            self.loop.remove_reader(self._fd)
+            self._fd = None
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(1.0)
+        self._wakeup.set()
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "wakeups": self.wakeups,
+            "pending": len(self._rx),
+        }
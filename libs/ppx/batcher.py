@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+MCB 写合并（PPX_MSG_MULTWRITE）
+============================================================
+心跳每个周期要写 RT_SETTING(0x1A)、RUN_MODE(0x1B)、TARGET_SPEED(0x1D)，
+有时还有 DAT_SETTING(0x23)。WriteBatcher 在一个周期内收集寄存器更新，
+flush 时先写入寄存器镜像，再把地址连续的寄存器合并成一帧 MULTWRITE(0x04)。
+
+区块中间夹着未更新的寄存器（如 0x1C GEAR）时，只有当该寄存器的镜像值“已知”
+（主机写过或从设备读回过，见 mark_known）才会把它一起带上，否则拆成多帧，
+避免把未知的镜像值（默认 0）写进设备。
+"""
+
+import time
+from typing import Callable, Dict, List, NamedTuple, Set, Tuple
+
+from .planner import MULTREAD_MAX_BYTES, DEFAULT_MAX_GAP
+from .regmap import REGION_REGS, write_reg
+from .structs import PPX_MAX_REGION_REG, PPX_MSG_WRITE, PPX_MSG_MULTWRITE
+
+# MULTWRITE 与 MULTREAD 数据头相同 (addr, nums)，单帧容量一致
+MULTWRITE_MAX_BYTES = MULTREAD_MAX_BYTES
+
+
+class WriteBlock(NamedTuple):
+    addr: int
+    nums: int
+    regs: Tuple[int, ...]       # 区块内本周期更新的寄存器
+
+    @property
+    def cmd(self) -> int:
+        return PPX_MSG_MULTWRITE if self.nums > 1 else PPX_MSG_WRITE
+
+
+def plan_writes(staged, known=(), max_bytes: int = MULTWRITE_MAX_BYTES,
+                max_gap: int = DEFAULT_MAX_GAP) -> List[WriteBlock]:
+    """把待写寄存器合并为最少的写请求区块，只允许用 known 中的寄存器填补空隙"""
+    regs = sorted(set(staged))
+    fillable = set(regs) | set(known)
+    blocks: List[WriteBlock] = []
+    cur: List[int] = []
+    for reg in regs:
+        if not 0 <= reg < PPX_MAX_REGION_REG:
+            raise ValueError(f"寄存器地址越界: 0x{reg:02X}")
+        if cur:
+            first, last = REGION_REGS[cur[0]], REGION_REGS[cur[-1]]
+            info = REGION_REGS[reg]
+            gap_regs = range(cur[-1] + 1, reg)
+            gap = info.offset - (last.offset + last.size)
+            span = info.offset + info.size - first.offset
+            if gap <= max_gap and span <= max_bytes and all(r in fillable for r in gap_regs):
+                cur.append(reg)
+                continue
+            blocks.append(WriteBlock(cur[0], cur[-1] - cur[0] + 1, tuple(cur)))
+        cur = [reg]
+    if cur:
+        blocks.append(WriteBlock(cur[0], cur[-1] - cur[0] + 1, tuple(cur)))
+    return blocks
+
+
+class WriteBatcher:
+    """
+    send(cmd, addr, nums) 按寄存器镜像组包并发送一帧（不改镜像），成功返回 True。
+    用法（心跳周期内）：
+        batcher.set(REG_RT_SETTING, rt_val)
+        batcher.set(REG_TARGET_SPEED, speed)
+        batcher.flush()
+    """
+
+    def __init__(self, send: Callable[[int, int, int], bool], g_data,
+                 max_bytes: int = MULTWRITE_MAX_BYTES, max_gap: int = DEFAULT_MAX_GAP):
+        self.send = send
+        self.g_data = g_data
+        self.max_bytes = max_bytes
+        self.max_gap = max_gap
+        self._staged: Dict[int, int] = {}
+        self._known: Set[int] = set()
+        # 统计
+        self.flushes = 0
+        self.writes = 0         # 寄存器写次数（逐个发送需要的帧数）
+        self.frames = 0         # 实际发送帧数
+        self.busy = 0.0         # flush 中发送耗时（秒）
+
+    def set(self, reg: int, value: int):
+        """登记一次寄存器写，同一周期内重复写以最后一次为准"""
+        self._staged[reg] = value
+
+    def mark_known(self, *regs: int):
+        """声明这些寄存器的镜像值与设备一致（写过或读回过），可用于填补合并空隙"""
+        self._known.update(regs)
+
+    def forget(self, *regs: int):
+        """设备重启等情况下镜像失效"""
+        if regs:
+            self._known.difference_update(regs)
+        else:
+            self._known.clear()
+
+    def flush(self) -> int:
+        """发送本周期登记的写入，返回发送的帧数"""
+        if not self._staged:
+            return 0
+        staged, self._staged = self._staged, {}
+        for reg, value in staged.items():
+            write_reg(self.g_data, reg, value)
+
+        t0 = time.perf_counter()
+        sent = 0
+        for block in plan_writes(staged, self._known, self.max_bytes, self.max_gap):
+            if self.send(block.cmd, block.addr, block.nums):
+                self._known.update(block.regs)
+            sent += 1
+        self.busy += time.perf_counter() - t0
+
+        self.flushes += 1
+        self.writes += len(staged)
+        self.frames += sent
+        return sent
+
+    def stats(self) -> dict:
+        return {"flushes": self.flushes, "writes": self.writes, "frames": self.frames,
+                "busy_s": round(self.busy, 3)}
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+串口总线调度器（单线程独占总线 + 优先级队列）
+============================================================
+原脚本里心跳线程、状态监控线程、测试用例线程各自拿 self.lock 做阻塞串口 I/O，
+谁先抢到锁谁先用，测试读可能排在一次监控轮询后面，时延不可预测。
+
+BusScheduler 只有一个线程访问串口，所有总线操作都以任务形式提交：
+- PRIO_CONTROL   : 控制写（心跳等周期任务，带截止时间）
+- PRIO_TEST      : 测试用例读写
+- PRIO_TELEMETRY : 后台遥测轮询
+同优先级按截止时间、再按提交顺序执行；任务不可抢占（正在执行的任务做完才切换）。
+
+submit() 返回 concurrent.futures.Future；every() 注册周期任务，到期即按其优先级排队。
+stats() 给出各优先级的时延 p50/p99/max、截止时间超时次数与周期任务异常次数：
+一次性任务时延 = 提交 -> 完成，周期任务时延 = 计划时刻 -> 完成。
+一次性任务的异常由 Future 交给调用方；周期任务（如心跳）的异常交给 on_error(task_name, exc)，
+不传时打印到控制台，调度不中断。
+
+用法：
+    bus = BusScheduler(on_error=lambda name, e: log.error(f"{name} 异常: {e}"))
+    bus.every(0.15, engine.heartbeat_tick, prio=PRIO_CONTROL)
+    bus.start()
+    value = bus.call(engine.read_once, REG_HW_VERSION, prio=PRIO_TEST)
+"""
+
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Deque, Dict, List, Optional
+
+PRIO_CONTROL = 0
+PRIO_TEST = 1
+PRIO_TELEMETRY = 2
+PRIO_NAMES = {PRIO_CONTROL: "control", PRIO_TEST: "test", PRIO_TELEMETRY: "telemetry"}
+
+STATS_WINDOW = 4096  # 每个优先级保留的最近时延样本数
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """最近秩法分位数，samples 需已排序"""
+    if not samples:
+        return 0.0
+    idx = min(len(samples) - 1, max(0, math.ceil(q / 100.0 * len(samples)) - 1))
+    return samples[idx]
+
+
+class _Periodic:
+    __slots__ = ("period", "fn", "prio", "due", "cancelled", "queued")
+
+    def __init__(self, period: float, fn: Callable[[], object], prio: int, due: float):
+        self.period = period
+        self.fn = fn
+        self.prio = prio
+        self.due = due
+        self.cancelled = False
+        self.queued = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class BusScheduler:
+    def __init__(self, name: str = "bus", clock: Callable[[], float] = time.monotonic,
+                 on_error: Optional[Callable[[str, BaseException], None]] = None):
+        self.name = name
+        self.clock = clock
+        self.on_error = on_error
+        self._cond = threading.Condition()
+        self._queue: list = []          # (prio, deadline, seq, job)
+        self._periodic: List[_Periodic] = []
+        self._seq = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        # 统计
+        self._latency: Dict[int, Deque[float]] = {p: deque(maxlen=STATS_WINDOW) for p in PRIO_NAMES}
+        self._count: Dict[int, int] = {p: 0 for p in PRIO_NAMES}
+        self._misses: Dict[int, int] = {p: 0 for p in PRIO_NAMES}
+        self._errors: Dict[int, int] = {p: 0 for p in PRIO_NAMES}
+
+    # ---------------- 生命周期 ----------------
+    def start(self):
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 2.0):
+        """停止调度线程：已排队的一次性任务执行完后退出"""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def in_bus_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    # ---------------- 提交任务 ----------------
+    def submit(self, fn: Callable, *args, prio: int = PRIO_TEST, deadline: Optional[float] = None) -> Future:
+        """
+        提交一次性任务，deadline 为相对时间（秒，None 表示不限）。
+        在总线线程内调用时直接执行（任务里嵌套访问总线不会死锁）。
+        """
+        fut: Future = Future()
+        now = self.clock()
+        if self.in_bus_thread():
+            self._execute(fut, fn, args, prio, now, None if deadline is None else now + deadline)
+            return fut
+        job = (fut, fn, args, now)
+        abs_deadline = float("inf") if deadline is None else now + deadline
+        with self._cond:
+            heapq.heappush(self._queue, (prio, abs_deadline, next(self._seq), job))
+            self._cond.notify()
+        return fut
+
+    def call(self, fn: Callable, *args, prio: int = PRIO_TEST, deadline: Optional[float] = None,
+             timeout: Optional[float] = None):
+        """提交并等待结果"""
+        return self.submit(fn, *args, prio=prio, deadline=deadline).result(timeout)
+
+    def every(self, period: float, fn: Callable[[], object], prio: int = PRIO_CONTROL) -> _Periodic:
+        """注册周期任务，截止时间为下一次到期时刻；返回值可 cancel()"""
+        task = _Periodic(period, fn, prio, self.clock())
+        with self._cond:
+            self._periodic.append(task)
+            self._cond.notify()
+        return task
+
+    # ---------------- 调度线程 ----------------
+    def _release_due(self, now: float) -> Optional[float]:
+        """把到期的周期任务放入队列，返回最近的下一个到期时刻"""
+        next_due = None
+        for task in self._periodic:
+            if task.cancelled or task.queued:
+                continue
+            if task.due <= now:
+                task.queued = True
+                heapq.heappush(self._queue, (task.prio, task.due + task.period, next(self._seq), task))
+            elif next_due is None or task.due < next_due:
+                next_due = task.due
+        self._periodic = [t for t in self._periodic if not t.cancelled]
+        return next_due
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    now = self.clock()
+                    next_due = self._release_due(now) if self._running else None
+                    if self._queue:
+                        prio, deadline, _, job = heapq.heappop(self._queue)
+                        break
+                    if not self._running:
+                        return
+                    self._cond.wait(None if next_due is None else max(0.0, next_due - now))
+
+            if isinstance(job, _Periodic):
+                self._run_periodic(job, deadline)
+            else:
+                fut, fn, args, t_submit = job
+                if fut.set_running_or_notify_cancel():
+                    self._execute(fut, fn, args, prio, t_submit, None if deadline == float("inf") else deadline)
+
+    def _run_periodic(self, task: _Periodic, deadline: float):
+        planned = task.due
+        error = None
+        try:
+            if not task.cancelled:
+                task.fn()
+        except Exception as e:
+            error = e
+            self._report(task, e)
+        done = self.clock()
+        self._record(task.prio, done - planned, done > deadline, error is not None)
+        with self._cond:
+            # 落后超过一个周期时不补发，从当前时刻重新对齐
+            task.due = planned + task.period
+            if task.due < done:
+                task.due = done
+            task.queued = False
+
+    def _report(self, task: _Periodic, e: Exception):
+        name = getattr(task.fn, "__name__", repr(task.fn))
+        if self.on_error is None:
+            print(f"[{self.name}] 周期任务 {name} 异常: {e}")
+            return
+        try:
+            self.on_error(name, e)
+        except Exception as report_error:
+            print(f"[{self.name}] 周期任务 {name} 异常: {e}（on_error 失败: {report_error}）")
+
+    def _execute(self, fut: Future, fn: Callable, args, prio: int, t_submit: float, deadline: Optional[float]):
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            fut.set_exception(e)
+        else:
+            fut.set_result(result)
+        done = self.clock()
+        self._record(prio, done - t_submit, deadline is not None and done > deadline)
+
+    def _record(self, prio: int, latency: float, missed: bool, failed: bool = False):
+        with self._cond:
+            if prio not in self._latency:
+                self._latency[prio] = deque(maxlen=STATS_WINDOW)
+                self._count[prio] = 0
+                self._misses[prio] = 0
+                self._errors[prio] = 0
+            self._latency[prio].append(latency)
+            self._count[prio] += 1
+            if missed:
+                self._misses[prio] += 1
+            if failed:
+                self._errors[prio] += 1
+
+    # ---------------- 统计 ----------------
+    def stats(self) -> Dict[str, dict]:
+        with self._cond:
+            snapshot = [(prio, sorted(samples), self._count[prio], self._misses[prio], self._errors[prio])
+                        for prio, samples in self._latency.items()]
+        result = {}
+        for prio, data, count, misses, errors in snapshot:
+            result[PRIO_NAMES.get(prio, str(prio))] = {
+                "count": count,
+                "p50_ms": percentile(data, 50) * 1000,
+                "p99_ms": percentile(data, 99) * 1000,
+                "max_ms": (data[-1] if data else 0.0) * 1000,
+                "misses": misses,
+                "errors": errors,
+            }
+        return result
+
+    def format_stats(self) -> str:
+        lines = []
+        for name, st in self.stats().items():
+            if st["count"]:
+                lines.append(f"{name:<10} n={st['count']:<6} p50={st['p50_ms']:.1f}ms "
+                             f"p99={st['p99_ms']:.1f}ms max={st['max_ms']:.1f}ms 超时={st['misses']} 异常={st['errors']}")
+        return "\n".join(lines)
@@ -0,0 +1,401 @@
+# -*- coding: utf-8 -*-
+"""
+PPX 帧编解码（纯 Python 实现 + DLL 后端）
+============================================================
+纯 Python 实现按 ppx_region.dll / ppx_ble.dll 的实际行为编写，帧格式：
+
+    A5 | id | ~id | A5 | cmd | len | data(转义后, len 字节) | crc | 55
+
+- data 中每个字节先加 PPX_DATA_TAG(0x33)，再做转义：
+    0xA5 -> AB BA，0x55 -> CD DC；
+    紧跟在 AB 后面的 BA/BB 写成 BB BA/BB BB，紧跟在 CD 后面的 DC/DD 写成 DD DC/DD DD
+- crc 为 ppx_com_packet_crc（反射 CRC16，多项式 0xA10E，初值 0xFFFF）的低 8 位，
+  覆盖从帧头到 data 末尾的全部字节
+- cmd 高两位为命令类别 (REQ 0x00 / RSP 0x80 / EXCP 0xC0)，低 4 位为命令内容
+
+对外接口与 DLL 保持一致（ppx_com_region_format/parse、ppx_com_ble_format/parse、
+g_ppx_region_data/g_ppx_ble_data），脚本可通过 open_region_codec/open_ble_codec
+按配置选择后端，其余代码无需改动。
+
+与 DLL 的差异（有意为之）：
+- EXCP 帧只回填 region_msg.reg_excp，不会把异常状态字节拷贝进寄存器镜像
+- 越界长度直接拒绝，不会像 DLL 那样读写结构体之外的内存
+"""
+
+import os
+import re
+import ctypes
+from ctypes import (
+    cdll, sizeof, c_int, c_uint8, c_uint16, c_void_p, POINTER,
+)
+from typing import Optional, Tuple
+
+from .structs import (
+    PPX_FRAME_HEAD, PPX_FRAME_END, PPX_DATA_TAG,
+    PPX_DATA_REGION_SIZE,
+    PPX_ERROR, PPX_FALSE, PPX_TRUE,
+    PPX_CMD_REQ, PPX_CMD_RSP, PPX_CMD_EXCP, PPX_MSG_MASK,
+    PPX_MAX_REGION_REG, PPX_BLE_MAX_REG,
+    REGION_REG_OFFSETS, BLE_REG_OFFSETS,
+    ppx_region_msg_t, ppx_region_data_t,
+    ppx_ble_msg_t, ppx_ble_data_t,
+)
+
+# 后端名称
+BACKEND_DLL = "dll"
+BACKEND_PYTHON = "python"
+BACKEND_AUTO = "auto"      # Windows 且 DLL 存在时用 DLL，否则用纯 Python
+
+# ==============================================
+# 包层：CRC / 转义 / 组包 / 解析
+# ==============================================
+def _make_crc_table() -> Tuple[int, ...]:
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA10E if crc & 1 else crc >> 1
+        table.append(crc)
+    return tuple(table)
+
+
+_CRC_TABLE = _make_crc_table()
+
+# 数据区 +0x33 / -0x33
+_TAG_ADD = bytes((i + PPX_DATA_TAG) & 0xFF for i in range(256))
+_TAG_SUB = bytes((i - PPX_DATA_TAG) & 0xFF for i in range(256))
+
+_STUFF_RE = re.compile(rb"\xab(?=[\xba\xbb])|\xcd(?=[\xdc\xdd])|\xa5|\x55")
+_STUFF_MAP = {
+    b"\xab": b"\xab\xbb",
+    b"\xcd": b"\xcd\xdd",
+    b"\xa5": b"\xab\xba",
+    b"\x55": b"\xcd\xdc",
+}
+_UNSTUFF_RE = re.compile(rb"\xab[\xba\xbb]|\xcd[\xdc\xdd]")
+_UNSTUFF_MAP = {
+    b"\xab\xba": b"\xa5",
+    b"\xab\xbb": b"\xab",
+    b"\xcd\xdc": b"\x55",
+    b"\xcd\xdd": b"\xcd",
+}
+
+
+def packet_crc(pdata, length: Optional[int] = None) -> int:
+    """ppx_com_packet_crc：返回完整 16 位 CRC（帧内只使用低 8 位）"""
+    if length is not None:
+        pdata = pdata[:length]
+    crc = 0xFFFF
+    table = _CRC_TABLE
+    for b in pdata:
+        crc = (crc >> 8) ^ table[(crc ^ b) & 0xFF]
+    return crc
+
+
+def stuff(payload: bytes) -> bytes:
+    """数据区编码：+0x33 后做转义"""
+    shifted = bytes(payload).translate(_TAG_ADD)
+    return _STUFF_RE.sub(lambda m: _STUFF_MAP[m.group()], shifted)
+
+
+def unstuff(encoded: bytes) -> bytes:
+    """数据区解码：反转义后 -0x33"""
+    return _UNSTUFF_RE.sub(lambda m: _UNSTUFF_MAP[m.group()], bytes(encoded)).translate(_TAG_SUB)
+
+
+def packet_format(cmd_type: int, dev_id: int, cmd: int, payload: bytes) -> bytes:
+    """
+    ppx_com_packet_format：按帧格式组包
+    返回完整帧；参数非法（空数据/超长）时返回 b""
+    """
+    if not payload or len(payload) > PPX_DATA_REGION_SIZE:
+        return b""
+    body = stuff(payload)
+    if len(body) > 0xFF:
+        return b""
+    dev_id &= 0xFF
+    frame = bytearray((PPX_FRAME_HEAD, dev_id, dev_id ^ 0xFF, PPX_FRAME_HEAD,
+                       (cmd_type | cmd) & 0xFF, len(body)))
+    frame += body
+    frame.append(packet_crc(frame) & 0xFF)
+    frame.append(PPX_FRAME_END)
+    return bytes(frame)
+
+
+def packet_parse(pdata, data_len: Optional[int] = None) -> Optional[Tuple[int, int, bytes]]:
+    """
+    ppx_com_packet_parse：从缓冲区中找到第一个合法帧
+    返回 (id, cmd, data)，未找到返回 None
+    """
+    buf = bytes(pdata) if data_len is None else bytes(pdata[:data_len])
+    n = len(buf)
+    i = buf.find(PPX_FRAME_HEAD)
+    while 0 <= i and i + 8 < n:
+        if buf[i + 3] == PPX_FRAME_HEAD and buf[i + 2] == buf[i + 1] ^ 0xFF:
+            body_len = buf[i + 5]
+            if 0 < body_len < 0xC0 and body_len < n - i:
+                # 帧尾一般紧跟在 len 之后；找不到时继续向后找（与 DLL 一致）
+                for k in range(body_len, n - i - 7):
+                    if buf[i + 7 + k] != PPX_FRAME_END:
+                        continue
+                    if packet_crc(buf[i:i + 6 + k]) & 0xFF != buf[i + 6 + k]:
+                        continue
+                    data = unstuff(buf[i + 6:i + 6 + body_len])
+                    if data:
+                        return buf[i + 1], buf[i + 4], data
+                    break
+        i = buf.find(PPX_FRAME_HEAD, i + 1)
+    return None
+
+
+# ==============================================
+# 参数适配（兼容脚本中 DLL 风格的调用方式）
+# ==============================================
+def _as_bytes(pdata, data_len) -> bytes:
+    """接受 bytes / bytearray / ctypes 数组 / POINTER(c_uint8)"""
+    n = getattr(data_len, "value", data_len)
+    if isinstance(pdata, (ctypes._Pointer, c_void_p)):
+        return ctypes.string_at(pdata, n)
+    return bytes(memoryview(pdata).cast("B")[:n])
+
+
+def _unwrap(obj):
+    """byref(msg) -> msg"""
+    return getattr(obj, "_obj", obj)
+
+
+def _write_out(buffer, frame: bytes) -> int:
+    try:
+        memoryview(buffer).cast("B")[:len(frame)] = frame
+    except TypeError:
+        ctypes.memmove(buffer, frame, len(frame))
+    return len(frame)
+
+
+# ==============================================
+# 纯 Python 寄存器层
+# ==============================================
+class _PyRegCodec:
+    """region/ble 共用的寄存器层逻辑，寄存器镜像保存在 self._raw 中"""
+    data_type = None
+    offsets = ()
+    max_reg = 0
+
+    def __init__(self):
+        self.backend = BACKEND_PYTHON
+        self._raw = bytearray(sizeof(self.data_type))
+        self.g_data = self.data_type.from_buffer(self._raw)
+
+    # ---------------- 子类差异 ----------------
+    def _req_head_size(self, msg) -> int:
+        raise NotImplementedError
+
+    def _format_excp(self, msg) -> Optional[bytes]:
+        return None
+
+    def _on_excp(self, msg, data: bytes):
+        pass
+
+    def _on_rsp(self, msg):
+        pass
+
+    # ---------------- 组包 ----------------
+    def _format(self, cmd_type: int, msg, buffer) -> int:
+        msg = _unwrap(msg)
+        if msg is None or buffer is None:
+            return 0
+        if not msg.cmd & PPX_MSG_MASK:
+            return 0
+        addr = msg.reg_addr
+        end = addr + msg.reg_nums
+        if addr >= self.max_reg or end > self.max_reg:
+            return 0
+
+        if cmd_type == PPX_CMD_REQ:
+            head_size = self._req_head_size(msg)
+        elif cmd_type == PPX_CMD_RSP:
+            head_size = 1
+        elif cmd_type == PPX_CMD_EXCP:
+            payload = self._format_excp(msg)
+            if payload is None:
+                return 0
+            return _write_out(buffer, packet_format(cmd_type, msg.id, msg.cmd, payload))
+        else:
+            return 0
+
+        start, stop = self.offsets[addr], self.offsets[end]
+        if head_size + stop - start > PPX_DATA_REGION_SIZE - 1:
+            return 0
+        payload = bytes((addr, msg.reg_nums))[:head_size] + self._raw[start:stop]
+        frame = packet_format(cmd_type, msg.id, msg.cmd, payload)
+        if not frame:
+            return 0
+        return _write_out(buffer, frame)
+
+    # ---------------- 解析 ----------------
+    def _parse(self, pdata, data_len, msg) -> int:
+        msg = _unwrap(msg)
+        n = getattr(data_len, "value", data_len)
+        if n is None or n <= 8 or msg is None or pdata is None:
+            return PPX_ERROR
+        packet = packet_parse(_as_bytes(pdata, n))
+        if packet is None:
+            return PPX_FALSE
+        dev_id, cmd, data = packet
+
+        is_req = 0 < cmd <= PPX_MSG_MASK
+        if not is_req and not cmd & PPX_CMD_RSP:
+            return PPX_FALSE
+        if dev_id != msg.id:
+            return PPX_FALSE
+        addr = data[0]
+        if addr >= self.max_reg:
+            return PPX_FALSE
+        start = self.offsets[addr]
+        if start + len(data) - 2 > self.offsets[-1]:
+            return PPX_FALSE
+
+        msg.cmd = cmd
+        msg.reg_addr = addr
+
+        if not is_req:
+            if (cmd & PPX_CMD_EXCP) == PPX_CMD_EXCP:
+                self._on_excp(msg, data)
+                return PPX_TRUE
+            self._store(start, data[1:])
+            self._on_rsp(msg)
+            return PPX_TRUE
+
+        if cmd in (0x02, 0x04, 0x06):
+            if len(data) < 2:
+                return PPX_FALSE
+            msg.reg_nums = data[1]
+            head_size = 2
+        elif cmd in (0x01, 0x03):
+            msg.reg_nums = 1
+            head_size = 1
+        else:
+            return PPX_FALSE
+
+        # 读请求不携带有效数据，写请求把数据写入镜像
+        if cmd not in (0x01, 0x02):
+            self._store(start, data[head_size:])
+        return PPX_TRUE
+
+    def _store(self, start: int, values: bytes):
+        stop = min(start + len(values), len(self._raw))
+        self._raw[start:stop] = values[:stop - start]
+
+
+class PyRegionCodec(_PyRegCodec):
+    """纯 Python 版 ppx_region.dll"""
+    data_type = ppx_region_data_t
+    offsets = REGION_REG_OFFSETS
+    max_reg = PPX_MAX_REGION_REG
+
+    def __init__(self):
+        super().__init__()
+        self.g_ppx_region_data = self.g_data
+
+    def _req_head_size(self, msg) -> int:
+        return 2 if msg.reg_nums > 1 else 1
+
+    def _format_excp(self, msg) -> Optional[bytes]:
+        e = msg.reg_excp
+        return bytes((msg.reg_addr, e.parse_status, e.cmd_status, e.data_status))
+
+    def _on_excp(self, msg, data: bytes):
+        status = data[1:4].ljust(3, b"\x00")
+        msg.reg_excp.parse_status, msg.reg_excp.cmd_status, msg.reg_excp.data_status = status
+
+    def _on_rsp(self, msg):
+        msg.reg_excp.parse_status = 1
+        msg.reg_excp.cmd_status = 1
+        msg.reg_excp.data_status = 1
+
+    def ppx_com_region_format(self, cmd_type: int, region_msg, buffer) -> int:
+        return self._format(cmd_type, region_msg, buffer)
+
+    def ppx_com_region_parse(self, pdata, data_len, region_msg) -> int:
+        return self._parse(pdata, data_len, region_msg)
+
+
+class PyBleCodec(_PyRegCodec):
+    """纯 Python 版 ppx_ble.dll"""
+    data_type = ppx_ble_data_t
+    offsets = BLE_REG_OFFSETS
+    max_reg = PPX_BLE_MAX_REG
+
+    def __init__(self):
+        super().__init__()
+        self.g_ppx_ble_data = self.g_data
+
+    def _req_head_size(self, msg) -> int:
+        return 2 if (msg.cmd & 0x0B) == 0x02 or (msg.cmd & PPX_MSG_MASK) == 0x04 else 1
+
+    def ppx_com_ble_format(self, cmd_type: int, ble_msg, buffer) -> int:
+        return self._format(cmd_type, ble_msg, buffer)
+
+    def ppx_com_ble_parse(self, pdata, data_len, ble_msg) -> int:
+        return self._parse(pdata, data_len, ble_msg)
+
+
+# ==============================================
+# DLL 后端
+# ==============================================
+class DllRegionCodec:
+    """ppx_region.dll 封装，接口与 PyRegionCodec 相同"""
+
+    def __init__(self, dll_path: str):
+        self.backend = BACKEND_DLL
+        self.lib = cdll.LoadLibrary(dll_path)
+        self.ppx_com_region_format = self.lib.ppx_com_region_format
+        self.ppx_com_region_format.argtypes = [c_int, POINTER(ppx_region_msg_t), c_void_p]
+        self.ppx_com_region_format.restype = c_uint16
+        self.ppx_com_region_parse = self.lib.ppx_com_region_parse
+        self.ppx_com_region_parse.argtypes = [POINTER(c_uint8), c_uint8, POINTER(ppx_region_msg_t)]
+        self.ppx_com_region_parse.restype = c_int
+        self.g_ppx_region_data = ppx_region_data_t.in_dll(self.lib, "g_ppx_region_data")
+        self.g_data = self.g_ppx_region_data
+
+
+class DllBleCodec:
+    """ppx_ble.dll 封装，接口与 PyBleCodec 相同"""
+
+    def __init__(self, dll_path: str):
+        self.backend = BACKEND_DLL
+        self.lib = cdll.LoadLibrary(dll_path)
+        self.ppx_com_ble_format = self.lib.ppx_com_ble_format
+        self.ppx_com_ble_format.argtypes = [c_int, POINTER(ppx_ble_msg_t), c_void_p]
+        self.ppx_com_ble_format.restype = c_uint16
+        self.ppx_com_ble_parse = self.lib.ppx_com_ble_parse
+        self.ppx_com_ble_parse.argtypes = [POINTER(c_uint8), c_uint8, POINTER(ppx_ble_msg_t)]
+        self.ppx_com_ble_parse.restype = c_int
+        self.g_ppx_ble_data = ppx_ble_data_t.in_dll(self.lib, "g_ppx_ble_data")
+        self.g_data = self.g_ppx_ble_data
+
+
+def resolve_backend(backend: str, dll_path: Optional[str]) -> str:
+    """auto 按平台与 DLL 是否存在解析为 dll / python"""
+    backend = (backend or BACKEND_AUTO).lower()
+    if backend == BACKEND_AUTO:
+        if os.name == "nt" and dll_path and (os.path.exists(dll_path) or os.path.exists(dll_path + ".dll")):
+            return BACKEND_DLL
+        return BACKEND_PYTHON
+    if backend not in (BACKEND_DLL, BACKEND_PYTHON):
+        raise ValueError(f"未知的编解码后端: {backend}（可选 dll/python/auto）")
+    return backend
+
+
+def open_region_codec(backend: str = BACKEND_AUTO, dll_path: Optional[str] = None):
+    """按后端名称创建 region 编解码器；DLL 加载失败时抛出 OSError"""
+    if resolve_backend(backend, dll_path) == BACKEND_DLL:
+        return DllRegionCodec(dll_path)
+    return PyRegionCodec()
+
+
+def open_ble_codec(backend: str = BACKEND_AUTO, dll_path: Optional[str] = None):
+    """按后端名称创建 ble 编解码器；DLL 加载失败时抛出 OSError"""
+    if resolve_backend(backend, dll_path) == BACKEND_DLL:
+        return DllBleCodec(dll_path)
+    return PyBleCodec()
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+PPX 流式分帧器
+============================================================
+串口数据按任意大小分块送入，分帧器在内部预分配的缓冲区中增量查找完整帧：
+
+    A5 | id | ~id | A5 | cmd | len | data(len 字节) | crc | 55
+
+- 按帧头中的 len 定位帧尾，不依赖在数据区中搜索 0x55（转义后的数据区不含 A5/55，
+  但 len / crc 字节本身可能等于 A5/55，按位置判断才不会切错）
+- 校验帧尾与 CRC，通过后输出已反转义的数据区，同时保留原始帧供 DLL 解析
+- 帧头/帧尾/CRC 不匹配时只前移 1 字节重新同步，每个字节最多被检查常数次，整体 O(n)
+- 请求/应答场景用 read_frame：阻塞读（短超时）直到收到一帧完整合法帧立即返回，
+  不再固定 sleep 后读 in_waiting，也不会在收齐应答后空等到超时
+
+统计计数：
+- frames      : 输出的合法帧数
+- resyncs     : 重新同步次数（丢弃了一段不能构成帧的数据）
+- crc_errors  : 帧结构完整但 CRC 校验失败的次数
+- dropped     : 被丢弃的字节数
+"""
+
+import time
+from collections import deque
+from typing import Deque, List, NamedTuple, Optional
+
+from .codec import packet_crc, unstuff
+from .structs import PPX_FRAME_HEAD, PPX_FRAME_END
+
+# 帧头 6 字节 + crc + 帧尾
+FRAME_OVERHEAD = 8
+# len 字段合法范围（与 ppx_com_packet_parse 一致）
+MAX_BODY_LEN = 0xBF
+MAX_FRAME_SIZE = FRAME_OVERHEAD + MAX_BODY_LEN
+# 串口读超时（秒）：打开串口时设置一次（pyserial 每次给 timeout 赋值都会重新配置串口），
+# read_frame 阻塞读 1 字节，数据到达即返回，只在无数据时决定检查截止时间的粒度
+READ_POLL = 0.01
+
+
+class PpxFrame(NamedTuple):
+    dev_id: int     # 设备ID
+    cmd: int        # 命令字节（含 REQ/RSP/EXCP 类别位）
+    data: bytes     # 反转义后的数据区
+    raw: bytes      # 完整原始帧（可直接交给 ppx_com_region_parse / ppx_com_ble_parse）
+
+
+class Deframer:
+    """
+    增量分帧器
+
+    用法：
+        deframer = Deframer()
+        for frame in deframer.feed(ser.read(ser.in_waiting or 1)):
+            ...
+    或直接读入内部缓冲区，省去一次拷贝：
+        frames = deframer.feed_from(ser)
+    请求/应答：
+        frame = deframer.read_frame(ser, timeout=0.08)
+    """
+
+    def __init__(self, capacity: int = 4096, dev_id: Optional[int] = None):
+        if capacity < 2 * MAX_FRAME_SIZE:
+            raise ValueError(f"缓冲区容量至少为 {2 * MAX_FRAME_SIZE} 字节")
+        self.dev_id = dev_id            # 只接收指定设备的帧，None 表示不过滤
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._start = 0                 # 未处理数据起点
+        self._end = 0                   # 未处理数据终点
+        self._skipping = False          # 正在丢弃无效数据（同一段只记一次 resync）
+        self._ready: Deque[PpxFrame] = deque()  # read_frame 多读出的帧
+        self.frames = 0
+        self.resyncs = 0
+        self.crc_errors = 0
+        self.dropped = 0
+
+    # ---------------- 状态 ----------------
+    def reset(self):
+        """清空缓冲区（计数保留）"""
+        self._start = self._end = 0
+        self._skipping = False
+        self._ready.clear()
+
+    def stats(self) -> dict:
+        return {
+            "frames": self.frames,
+            "resyncs": self.resyncs,
+            "crc_errors": self.crc_errors,
+            "dropped": self.dropped,
+            "pending": self._end - self._start,
+        }
+
+    @property
+    def pending(self) -> int:
+        return self._end - self._start
+
+    # ---------------- 输入 ----------------
+    def feed(self, chunk) -> List[PpxFrame]:
+        """送入一段数据（bytes/bytearray/memoryview），返回本次新解出的帧"""
+        out: List[PpxFrame] = []
+        src = memoryview(chunk).cast("B")
+        pos, total = 0, len(src)
+        while pos < total:
+            room = self._reserve()
+            n = min(room, total - pos)
+            self._view[self._end:self._end + n] = src[pos:pos + n]
+            self._end += n
+            pos += n
+            self._scan(out)
+        return out
+
+    def feed_from(self, reader, size: Optional[int] = None) -> List[PpxFrame]:
+        """
+        直接从 reader（pyserial Serial 或任意带 readinto 的对象）读入内部缓冲区
+        size 为 None 时读取 reader.in_waiting（至少 1 字节）
+        """
+        out: List[PpxFrame] = []
+        if size is None:
+            size = max(getattr(reader, "in_waiting", 0), 1)
+        while size > 0:
+            room = self._reserve()
+            n = reader.readinto(self._view[self._end:self._end + min(room, size)])
+            if not n:
+                break
+            self._end += n
+            size -= n
+            self._scan(out)
+        return out
+
+    def read_frame(self, reader, timeout: float, poll: float = READ_POLL) -> Optional[PpxFrame]:
+        """
+        读取下一帧完整合法帧，超时返回 None。
+        reader 需支持 readinto / in_waiting / timeout（pyserial Serial），一次读到多帧时其余帧留给下一次调用。
+        不修改 reader.timeout：串口应以 timeout=READ_POLL 打开，无数据时阻塞读 1 字节、数据到达立即返回；
+        reader.timeout 超出剩余时间（或为 None/0）时改为每 poll 秒查询一次 in_waiting，不会越过截止时间。
+        """
+        if self._ready:
+            return self._ready.popleft()
+        deadline = time.monotonic() + timeout
+        while True:
+            waiting = reader.in_waiting
+            if waiting:
+                self._ready.extend(self.feed_from(reader, waiting))
+            else:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                block = reader.timeout
+                if block and block <= remaining:
+                    self._ready.extend(self.feed_from(reader, 1))
+                else:
+                    time.sleep(min(poll, remaining))
+            if self._ready:
+                return self._ready.popleft()
+
+    def _reserve(self) -> int:
+        """保证尾部有空闲空间，必要时把未处理数据搬到缓冲区开头"""
+        room = len(self._buf) - self._end
+        if room >= MAX_FRAME_SIZE or self._start == 0:
+            return room
+        pending = self._end - self._start
+        self._buf[:pending] = self._buf[self._start:self._end]
+        self._start, self._end = 0, pending
+        return len(self._buf) - pending
+
+    # ---------------- 分帧 ----------------
+    def _drop(self, n: int):
+        if not self._skipping:
+            self._skipping = True
+            self.resyncs += 1
+        self.dropped += n
+        self._start += n
+
+    def _scan(self, out: List[PpxFrame]):
+        buf = self._buf
+        end = self._end
+        while True:
+            start = self._start
+            head = buf.find(PPX_FRAME_HEAD, start, end)
+            if head < 0:
+                # 整段都没有帧头，全部丢弃
+                if end > start:
+                    self._drop(end - start)
+                return
+            if head > start:
+                self._drop(head - start)
+                start = head
+            if end - start < 6:
+                return
+
+            if buf[start + 3] != PPX_FRAME_HEAD or buf[start + 2] != buf[start + 1] ^ 0xFF:
+                self._drop(1)
+                continue
+            body_len = buf[start + 5]
+            if not 0 < body_len <= MAX_BODY_LEN:
+                self._drop(1)
+                continue
+            frame_end = start + FRAME_OVERHEAD + body_len
+            if frame_end > end:
+                return
+            if buf[frame_end - 1] != PPX_FRAME_END:
+                self._drop(1)
+                continue
+            crc_pos = frame_end - 2
+            if packet_crc(self._view[start:crc_pos]) & 0xFF != buf[crc_pos]:
+                self.crc_errors += 1
+                self._drop(1)
+                continue
+
+            self._start = frame_end
+            self._skipping = False
+            dev_id = buf[start + 1]
+            if self.dev_id is not None and dev_id != self.dev_id:
+                continue
+            self.frames += 1
+            raw = bytes(self._view[start:frame_end])
+            out.append(PpxFrame(dev_id, raw[4], unstuff(raw[6:crc_pos - start]), raw))
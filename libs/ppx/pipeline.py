@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+"""
+请求流水线（多请求在途 + 应答匹配）
+============================================================
+set_led_display / read_led_status / set_run_mode 等都是停等：发一帧、等应答、再发下一帧，
+每条请求都完整付出一次链路往返（蓝牙透传、USB 转串口的缓冲延时），吞吐量 = 1 / 往返时延。
+
+Pipeline 允许同一串口上最多 depth 帧请求同时在途，应答按 (设备ID, 命令, 寄存器地址) 匹配：
+
+    pipe = Pipeline(ser, Deframer(dev_id=PPX_ID_BLE), depth=8, timeout=1.0, retries=2)
+    for case in cases:
+        pipe.submit([write_frame, read_frame], tag=case, on_done=handle)   # 在途已满时先处理应答
+    pipe.drain()                                                            # 等待全部完成
+
+- 事务：submit 的一组帧（如写 + 回读）作为一个整体，全部收到应答后回调 on_done；
+  重试时整组按原顺序重发，回读看到的一定是本组写入的状态，不会被其它组的写覆盖
+- 匹配：应答 cmd 的低 4 位即请求命令，数据区首字节为寄存器地址（EXCP 应答相同），
+  同一键有多帧在途时按发送顺序先到先配；写应答若回显写入值，优先配给写入值相同的请求，
+  不回显时退回按发送顺序，不影响匹配
+- 乱序/缺失：串口设备逐帧处理、按请求顺序应答，收到某帧的应答时，比它更早发出且仍在途
+  的帧不会再有应答，立即判为缺失（计入乱序），只重发这些帧所在的事务，不必等到超时
+- 超时：超过 timeout 未收到应答（已收到的数据先处理完）视为应答丢失；
+  事务重试 retries 次后以失败完成
+- 重发事务时其余仍在途的帧可能还会收到应答：这些帧保留在发送顺序中作为占位，
+  应答到达时丢弃（计为过期），不会配给新的请求；到期仍未收到则直接移除
+- 校验（可选，默认只按键匹配）：连续丢两帧不同键的应答（如回读与下一组的写）时，后面的
+  读应答会错位一格，单靠键无法发现。submit 传入 check(req) 时在事务收齐应答后校验内容，
+  不通过时整组重发；重试耗尽仍不通过则按收到的应答完成，verified 为 False（与停等时读到
+  什么报告什么一致）。readback_check 假定写应答回显写入值，这一点目前只有 emulator 的
+  RegisterDevice 这样实现，ppx_packet.h 与实测设备都未确认；设备不回显时每个事务都会
+  判为不符并重发 retries 次，所以确认前不要默认传入
+- 回调按事务完成顺序调用；回调中不要再 submit
+
+stats() 给出发送帧数/完成/失败/重试/乱序/缺失/过期/未匹配/校验不符次数、最大在途帧数与事务时延 p50/p99。
+"""
+
+import itertools
+import time
+from collections import defaultdict, deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple, Union
+
+from .bus import percentile
+from .deframer import Deframer, PpxFrame
+from .trace import hexstr
+from .structs import PPX_MSG_MASK, PPX_MSG_READ, PPX_MSG_MULTREAD, PPX_MSG_WRITE, PPX_MSG_MULTWRITE
+
+# 匹配键：(设备ID, 命令低 4 位, 寄存器地址)
+Key = Tuple[int, int, int]
+
+# 等待应答时单次阻塞读的最长时间（秒）：数据到达即返回，只决定超时检查的粒度
+MAX_WAIT = 0.05
+STATS_WINDOW = 4096  # 保留的最近时延样本数
+
+
+def frame_key(frame: PpxFrame) -> Key:
+    """帧的匹配键（请求帧与应答帧通用）"""
+    return frame.dev_id, frame.cmd & PPX_MSG_MASK, frame.data[0] if frame.data else -1
+
+
+def write_echo(frame: PpxFrame) -> Optional[bytes]:
+    """写请求期望的应答数据区（寄存器地址 + 写入值），非写请求返回 None"""
+    cmd = frame.cmd & PPX_MSG_MASK
+    if cmd == PPX_MSG_WRITE:
+        return frame.data
+    if cmd == PPX_MSG_MULTWRITE:
+        return frame.data[:1] + frame.data[2:]
+    return None
+
+
+class PipelineRequest:
+    """一次事务：一帧或多帧请求，整体发送、整体重试"""
+    __slots__ = ("frames", "requests", "keys", "tag", "timeout", "on_done", "check", "attempts",
+                 "submitted_at", "responses", "waiting", "error", "verified", "done")
+
+    def __init__(self, frames: List[bytes], requests: List[PpxFrame], tag, timeout: float,
+                 on_done: Optional[Callable[["PipelineRequest"], None]],
+                 check: Optional[Callable[["PipelineRequest"], bool]]):
+        self.frames = frames
+        self.requests = requests        # 解析后的请求帧（取键与校验用）
+        self.keys = [frame_key(f) for f in requests]
+        self.tag = tag                  # 调用方自定义（如用例号）
+        self.timeout = timeout
+        self.on_done = on_done
+        self.check = check
+        self.attempts = 0               # 发送次数（含重试）
+        self.submitted_at = 0.0
+        self.responses: List[Optional[PpxFrame]] = [None] * len(frames)  # 与 frames 一一对应
+        self.waiting = 0                # 本次发送中尚未收到应答的帧数
+        self.error = ""                 # 失败原因（重试耗尽），成功为空
+        self.verified = True            # check 未通过（重试耗尽）时为 False
+        self.done = False
+
+    @property
+    def ok(self) -> bool:
+        return self.done and not self.error
+
+
+def readback_check(req: PipelineRequest) -> bool:
+    """
+    写应答回显写入值；写之后对同一寄存器区间的回读与写入一致
+    （写应答回显只在 emulator 上成立，未在实测设备上确认，调用方需显式启用）
+    """
+    written: Dict[Tuple[int, int], bytes] = {}
+    for sent, resp in zip(req.requests, req.responses):
+        echo = write_echo(sent)
+        if echo is not None:
+            if resp.data != echo:
+                return False
+            written[(sent.dev_id, sent.data[0])] = echo
+        elif sent.cmd & PPX_MSG_MASK in (PPX_MSG_READ, PPX_MSG_MULTREAD):
+            expect = written.get((sent.dev_id, sent.data[0]))
+            if expect is not None and len(expect) == len(resp.data) and resp.data != expect:
+                return False
+    return True
+
+
+class _Entry:
+    """一帧在途请求（req 为 None 时是已重发事务的占位，应答到达后丢弃）"""
+    __slots__ = ("req", "index", "key", "echo", "seq", "deadline")
+
+    def __init__(self, req: PipelineRequest, index: int, seq: int, deadline: float):
+        self.req = req
+        self.index = index
+        self.key = req.keys[index]
+        self.echo = write_echo(req.requests[index])
+        self.seq = seq
+        self.deadline = deadline
+
+
+class Pipeline:
+    def __init__(self, port, deframer: Deframer, depth: int = 8, timeout: float = 1.0,
+                 retries: int = 2, trace=None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        port     : 已打开的 pyserial Serial（或接口相同的对象，如 emulator.transport.LoopPort）
+        deframer : 应答分帧器（与同步 receive_data 共用时，流水线期间不要再调用 receive_data）
+        depth    : 最多在途帧数（重发时已重发事务的占位可能使在途帧数短暂超出）
+        trace    : ppx.trace.Trace，收发帧记录到 tx/rx 类别，重试/放弃记录为 WARNING
+        """
+        if depth < 1:
+            raise ValueError("depth 至少为 1")
+        self.port = port
+        self.deframer = deframer
+        self.depth = depth
+        self.timeout = timeout
+        self.retries = retries
+        self.trace = trace
+        self.clock = clock
+        self._keyer = Deframer()        # 解析请求帧得到匹配键
+        self._seq = itertools.count()
+        self._inflight: Dict[int, _Entry] = {}                      # 按发送顺序
+        self._by_key: Dict[Key, Deque[_Entry]] = defaultdict(deque)
+        # 统计
+        self.sent = 0
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+        self.out_of_order = 0
+        self.missing = 0
+        self.stale = 0
+        self.unmatched = 0
+        self.mismatch = 0
+        self.max_inflight = 0
+        self._latency: Deque[float] = deque(maxlen=STATS_WINDOW)
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    # ---------------- 提交 ----------------
+    def submit(self, frames: Union[bytes, List[bytes]], tag=None, timeout: Optional[float] = None,
+               on_done: Optional[Callable[[PipelineRequest], None]] = None,
+               check: Optional[Callable[[PipelineRequest], bool]] = None) -> PipelineRequest:
+        """发送一帧或一组请求（在途已满时先处理应答），返回事务对象；完成后 done 为 True"""
+        if isinstance(frames, (bytes, bytearray, memoryview)):
+            frames = [frames]
+        frames = [bytes(f) for f in frames]
+        requests = []
+        for data in frames:
+            parsed = self._keyer.feed(data)
+            if len(parsed) != 1:
+                raise ValueError(f"不是一帧完整请求: {hexstr(data)}")
+            requests.append(parsed[0])
+        req = PipelineRequest(frames, requests, tag, self.timeout if timeout is None else timeout,
+                              on_done, check)
+        req.submitted_at = self.clock()
+        # 一组帧数超过 depth 时等全部在途完成后单独发送
+        self._pump(lambda: not self._inflight or len(self._inflight) + len(frames) <= self.depth)
+        self._send(req)
+        return req
+
+    def drain(self):
+        """等待全部在途事务完成（成功或重试耗尽）"""
+        self._pump(lambda: not any(e.req for e in self._inflight.values()))
+
+    # ---------------- 收发 ----------------
+    def _send(self, req: PipelineRequest):
+        req.attempts += 1
+        req.responses = [None] * len(req.frames)
+        req.waiting = len(req.frames)
+        for index, data in enumerate(req.frames):
+            entry = _Entry(req, index, next(self._seq), self.clock() + req.timeout)
+            self._inflight[entry.seq] = entry
+            self._by_key[entry.key].append(entry)
+            self.sent += 1
+            if self.trace:
+                self.trace.debug("发送数据: %s", hexstr(data), category="tx")
+            self.port.write(data)
+        self.max_inflight = max(self.max_inflight, len(self._inflight))
+
+    def _remove(self, entry: _Entry):
+        del self._inflight[entry.seq]
+        queue = self._by_key[entry.key]
+        queue.remove(entry)
+        if not queue:
+            del self._by_key[entry.key]
+
+    def _pending(self, entry: _Entry) -> bool:
+        return entry.req is not None and self._inflight.get(entry.seq) is entry
+
+    def _finish(self, req: PipelineRequest, error: str = ""):
+        req.error = error
+        req.done = True
+        if error:
+            self.failed += 1
+        else:
+            self.completed += 1
+            self._latency.append(self.clock() - req.submitted_at)
+        if req.on_done:
+            req.on_done(req)
+
+    def _pump(self, until: Callable[[], bool]):
+        while not until():
+            wait = min(e.deadline for e in self._inflight.values()) - self.clock()
+            frame = self.deframer.read_frame(self.port, min(max(wait, 0.0), MAX_WAIT))
+            if frame is not None:
+                self._dispatch(frame)
+                continue
+            # 没有待处理的应答时才判超时
+            now = self.clock()
+            for entry in [e for e in self._inflight.values() if e.deadline <= now]:
+                if entry.req is None:
+                    self._remove(entry)
+                elif self._pending(entry):
+                    # 同一事务的其它帧可能已随前面的重试重发
+                    self.missing += 1
+                    self._retry(entry.req, "应答超时", entry.seq + 1)
+
+    # ---------------- 匹配 ----------------
+    def _dispatch(self, frame: PpxFrame):
+        if self.trace:
+            self.trace.debug("接收数据: %s", hexstr(frame.raw), category="rx")
+        key = frame_key(frame)
+        queue = self._by_key.get(key)
+        if not queue:
+            self.unmatched += 1
+            if self.trace:
+                self.trace.warning("未匹配的应答: %s", hexstr(frame.raw))
+            return
+        entry = queue[0]
+        if key[1] in (PPX_MSG_WRITE, PPX_MSG_MULTWRITE):
+            entry = next((e for e in queue if e.echo == frame.data), entry)
+        older = list(itertools.takewhile(lambda e: e is not entry, self._inflight.values()))
+        if older:
+            # 设备按序应答：更早发出的帧不会再有应答
+            self.out_of_order += 1
+            for e in older:
+                if e.req is None:
+                    self._remove(e)
+                elif self._pending(e):
+                    self.missing += 1
+                    self._retry(e.req, "应答缺失", entry.seq)
+        self._remove(entry)
+        if entry.req is None:
+            # 所在事务已整体重发，这是上一次发送的应答
+            self.stale += 1
+            return
+        req = entry.req
+        req.responses[entry.index] = frame
+        req.waiting -= 1
+        if req.waiting:
+            return
+        if req.check and not req.check(req):
+            self.mismatch += 1
+            if req.attempts <= self.retries:
+                self._retry(req, "应答校验不符", entry.seq + 1)
+                return
+            req.verified = False
+        self._finish(req)
+
+    def _retry(self, req: PipelineRequest, reason: str, lost_before: int):
+        """
+        整组重发（或重试耗尽时以失败完成）
+        lost_before: 序号小于它的帧已确定不会再有应答，直接移除；
+                     其余仍在途的帧的应答还会到达，留作占位
+        """
+        for entry in [e for e in self._inflight.values() if e.req is req]:
+            if entry.seq < lost_before:
+                self._remove(entry)
+            else:
+                entry.req = None
+        if req.attempts > self.retries:
+            if self.trace:
+                self.trace.warning("%s，重试 %d 次后放弃: %s", reason, self.retries, hexstr(req.frames[0]))
+            self._finish(req, reason)
+            return
+        if self.trace:
+            self.trace.warning("%s，第 %d 次重发: %s", reason, req.attempts, hexstr(req.frames[0]))
+        self.retried += 1
+        self._send(req)
+
+    # ---------------- 统计 ----------------
+    def stats(self) -> dict:
+        samples = sorted(self._latency)
+        return {
+            "depth": self.depth,
+            "sent": self.sent,
+            "completed": self.completed,
+            "failed": self.failed,
+            "retried": self.retried,
+            "out_of_order": self.out_of_order,
+            "missing": self.missing,
+            "stale": self.stale,
+            "unmatched": self.unmatched,
+            "mismatch": self.mismatch,
+            "max_inflight": self.max_inflight,
+            "inflight": len(self._inflight),
+            "p50_ms": percentile(samples, 50) * 1000,
+            "p99_ms": percentile(samples, 99) * 1000,
+        }
+
+    def format_stats(self) -> str:
+        s = self.stats()
+        return (f"流水线 depth={s['depth']}: 发送 {s['sent']} 帧，完成 {s['completed']} 失败 {s['failed']} "
+                f"重试 {s['retried']} 乱序 {s['out_of_order']} 缺失 {s['missing']} 过期 {s['stale']} "
+                f"未匹配 {s['unmatched']} 校验不符 {s['mismatch']} 最大在途 {s['max_inflight']} "
+                f"时延 p50 {s['p50_ms']:.1f}ms p99 {s['p99_ms']:.1f}ms")
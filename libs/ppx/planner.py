@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+MCB 多寄存器读规划（PPX_MSG_MULTREAD）
+============================================================
+调用方给出要读的寄存器集合，规划器把地址相邻/相近的寄存器合并成尽量少的
+MULTREAD(0x02) 请求，读完后按寄存器号把值分发给各调用方。
+
+单帧容量：
+- ppx_com_region_format 要求 数据头(addr, nums) + 寄存器数据 <= PPX_DATA_REGION_SIZE - 1
+- 帧最终要放进 PPX_DATA_BUF_SIZE，转义最坏情况下数据区翻倍，
+  因此默认每个区块的寄存器数据不超过 MULTREAD_MAX_BYTES（90 字节），
+  完整寄存器镜像（125 字节）拆成 2 帧
+
+合并策略：按地址排序后贪心扩展区块，两段之间夹带的“无用”字节不超过 max_gap
+（多读十几个字节的代价远小于一次往返的等待时间）。
+"""
+
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .regmap import REGION_REGS, reg_value
+from .structs import (
+    PPX_DATA_BUF_SIZE, PPX_DATA_REGION_SIZE, PPX_MAX_REGION_REG,
+    PPX_MSG_READ, PPX_MSG_MULTREAD,
+)
+
+# 帧开销：A5 id ~id A5 cmd len ... crc 55
+_FRAME_OVERHEAD = 8
+# MULTREAD 数据头：addr + nums
+_MULT_HEAD = 2
+
+MULTREAD_MAX_BYTES = min(
+    PPX_DATA_REGION_SIZE - 1 - _MULT_HEAD,
+    (PPX_DATA_BUF_SIZE - _FRAME_OVERHEAD) // 2 - _MULT_HEAD,
+)
+DEFAULT_MAX_GAP = 16
+
+
+class ReadBlock(NamedTuple):
+    addr: int                   # 起始寄存器
+    nums: int                   # 寄存器数量
+    regs: Tuple[int, ...]       # 区块内真正被请求的寄存器
+
+    @property
+    def cmd(self) -> int:
+        return PPX_MSG_MULTREAD if self.nums > 1 else PPX_MSG_READ
+
+    @property
+    def size(self) -> int:
+        return REGION_REGS[self.addr + self.nums - 1].offset + REGION_REGS[self.addr + self.nums - 1].size \
+            - REGION_REGS[self.addr].offset
+
+
+def plan_reads(regs: Iterable[int], max_bytes: int = MULTREAD_MAX_BYTES,
+               max_gap: int = DEFAULT_MAX_GAP) -> List[ReadBlock]:
+    """把寄存器集合规划为最少的读请求区块"""
+    wanted = sorted(set(regs))
+    for reg in wanted:
+        if not 0 <= reg < PPX_MAX_REGION_REG:
+            raise ValueError(f"寄存器地址越界: 0x{reg:02X}")
+
+    blocks: List[ReadBlock] = []
+    cur: List[int] = []
+    for reg in wanted:
+        if cur:
+            first, last = REGION_REGS[cur[0]], REGION_REGS[cur[-1]]
+            info = REGION_REGS[reg]
+            gap = info.offset - (last.offset + last.size)
+            span = info.offset + info.size - first.offset
+            if gap <= max_gap and span <= max_bytes:
+                cur.append(reg)
+                continue
+            blocks.append(ReadBlock(cur[0], cur[-1] - cur[0] + 1, tuple(cur)))
+        if REGION_REGS[reg].size > max_bytes:
+            raise ValueError(f"寄存器 0x{reg:02X} 超过单帧容量")
+        cur = [reg]
+    if cur:
+        blocks.append(ReadBlock(cur[0], cur[-1] - cur[0] + 1, tuple(cur)))
+    return blocks
+
+
+class ReadPlanner:
+    """
+    合并多个调用方的读请求
+
+    transact(cmd, addr, nums) 负责发出一次读请求并等待响应解析完成（寄存器镜像已更新），
+    成功返回 True。例如：
+        planner = ReadPlanner(lambda c, a, n: self._send_cmd(c, a, 0, nums=n, wait_resp=True), self.g_data)
+        values = planner.read([REG_BUS_VOLT, REG_BUS_CURR, REG_ERR_CODE, REG_BRAKE_STATE])
+    """
+
+    def __init__(self, transact: Callable[[int, int, int], bool], g_data,
+                 max_bytes: int = MULTREAD_MAX_BYTES, max_gap: int = DEFAULT_MAX_GAP):
+        self.transact = transact
+        self.g_data = g_data
+        self.max_bytes = max_bytes
+        self.max_gap = max_gap
+        self._pending: List[Tuple[Tuple[int, ...], Optional[Callable[[Dict[int, object]], None]]]] = []
+        # 统计
+        self.requests = 0       # 调用方请求的寄存器数（逐个读需要的往返次数）
+        self.round_trips = 0    # 实际往返次数
+        self.failures = 0
+
+    def submit(self, regs: Iterable[int], callback: Optional[Callable[[Dict[int, object]], None]] = None):
+        """登记一组寄存器，flush 时统一读取后回调 callback({reg: value})"""
+        self._pending.append((tuple(regs), callback))
+
+    def flush(self) -> Dict[int, object]:
+        """执行所有已登记的请求，返回 {reg: value}，读取失败的寄存器值为 None"""
+        pending, self._pending = self._pending, []
+        wanted = set()
+        for regs, _ in pending:
+            wanted.update(regs)
+        self.requests += len(wanted)
+
+        values: Dict[int, object] = {}
+        for block in plan_reads(wanted, self.max_bytes, self.max_gap):
+            self.round_trips += 1
+            ok = self.transact(block.cmd, block.addr, block.nums)
+            if not ok:
+                self.failures += 1
+            for reg in block.regs:
+                values[reg] = reg_value(self.g_data, reg) if ok else None
+
+        for regs, callback in pending:
+            if callback is not None:
+                callback({reg: values.get(reg) for reg in regs})
+        return values
+
+    def read(self, regs: Iterable[int]) -> Dict[int, object]:
+        """立即读取一组寄存器"""
+        self.submit(regs)
+        return self.flush()
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "round_trips": self.round_trips, "failures": self.failures}
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+MCB 寄存器表（ppx_region_reg_t 0x00 ~ 0x24）
+============================================================
+由 ppx_region_data_t 的字段定义自动生成，每个寄存器记录：
+地址、字段名、结构体内偏移、字节数、struct 格式符、是否有符号、换算系数和单位。
+
+- 按寄存器号 O(1) 查表：REGION_REGS[addr]
+- 整个寄存器镜像（125 字节）一次 struct.unpack_from 解出全部字段：decode_snapshot
+- 连续寄存器区间（MULTREAD 响应数据）一次解出：decode_range
+- 大量快照（抓包/日志回放）用 struct.iter_unpack：iter_snapshots
+
+注意：头文件枚举中 0x15 名为 PPX_BOARD_TEMP_REG，但结构体里 board_temp 已注释，
+该位置实际是 imu_acc，这里按结构体（即 DLL 实际行为）命名。
+"""
+
+import struct
+from ctypes import Array, Structure, sizeof
+from collections import namedtuple
+from functools import lru_cache
+from typing import Dict, Iterator, NamedTuple, Tuple, Union
+
+from .structs import ppx_region_data_t, REGION_REG_OFFSETS, PPX_MAX_REGION_REG
+
+
+class RegInfo(NamedTuple):
+    addr: int       # 寄存器地址
+    name: str       # ppx_region_data_t 字段名
+    offset: int     # 结构体内偏移
+    size: int       # 字节数
+    fmt: str        # struct 格式符（数组为 "Ns"）
+    signed: bool    # 是否有符号
+    scale: float    # 原始值 * scale = 物理量
+    unit: str       # 物理量单位
+
+
+# 需要换算的寄存器：字段名 -> (系数, 单位)
+_SCALES = {
+    "motor_speed": (1, "rpm"),
+    "bus_voltage": (0.1, "V"),
+    "bus_current": (0.1, "A"),
+    "phase_current_a": (0.1, "A"),
+    "phase_current_b": (0.1, "A"),
+    "phase_current_c": (0.1, "A"),
+    "imu_pitch": (0.1, "deg"),
+    "imu_roll": (0.1, "deg"),
+    "imu_acc": (0.01, "g"),
+    "brake_mileage": (1, "dm"),
+    "single_mileage": (1, "m"),
+    "angular_speed": (0.1, "deg/s"),
+    "target_speed": (1, "rpm"),
+    "rated_voltage": (0.1, "V"),
+    "rated_current": (0.1, "A"),
+    "max_voltage": (0.1, "V"),
+    "min_voltage": (0.1, "V"),
+}
+
+# ctypes 标量类型 -> struct 格式符
+_CTYPE_FMT = {"<B": "B", "<b": "b", "<H": "H", "<h": "h", "<I": "I", "<i": "i", "<L": "I", "<l": "i"}
+
+
+def _field_fmt(ctype) -> str:
+    if issubclass(ctype, Array):
+        return f"{sizeof(ctype)}s"
+    code = ctype._type_
+    fmt = _CTYPE_FMT.get("<" + code)
+    if fmt is None or struct.calcsize("<" + fmt) != sizeof(ctype):
+        raise TypeError(f"不支持的寄存器类型: {ctype}")
+    return fmt
+
+
+def _build_table() -> Tuple[RegInfo, ...]:
+    table = []
+    for addr, (name, ctype) in enumerate(ppx_region_data_t._fields_):
+        fmt = _field_fmt(ctype)
+        scale, unit = _SCALES.get(name, (1, ""))
+        table.append(RegInfo(
+            addr=addr,
+            name=name,
+            offset=REGION_REG_OFFSETS[addr],
+            size=REGION_REG_OFFSETS[addr + 1] - REGION_REG_OFFSETS[addr],
+            fmt=fmt,
+            signed=fmt in ("b", "h", "i"),
+            scale=scale,
+            unit=unit,
+        ))
+    return tuple(table)
+
+
+REGION_REGS = _build_table()
+REGION_REG_BY_NAME: Dict[str, RegInfo] = {r.name: r for r in REGION_REGS}
+assert len(REGION_REGS) == PPX_MAX_REGION_REG
+
+# 整个镜像的解码器
+REGION_SNAPSHOT_STRUCT = struct.Struct("<" + "".join(r.fmt for r in REGION_REGS))
+assert REGION_SNAPSHOT_STRUCT.size == sizeof(ppx_region_data_t)
+RegionSnapshot = namedtuple("RegionSnapshot", [r.name for r in REGION_REGS])
+
+# 单寄存器解码器（按地址索引）
+_REG_STRUCTS = tuple(struct.Struct("<" + r.fmt) for r in REGION_REGS)
+
+Buffer = Union[bytes, bytearray, memoryview, Structure]
+
+
+def _buffer(src: Buffer):
+    """ppx_region_data_t（含脚本中自行声明的同布局结构体）/ bytes 等统一为可供 unpack_from 使用的缓冲区"""
+    if isinstance(src, Structure):
+        return memoryview(src).cast("B")
+    return src
+
+
+# ==============================================
+# 解码
+# ==============================================
+def decode_snapshot(src: Buffer, offset: int = 0) -> RegionSnapshot:
+    """一次解出整个寄存器镜像（数组字段为 bytes）"""
+    return RegionSnapshot._make(REGION_SNAPSHOT_STRUCT.unpack_from(_buffer(src), offset))
+
+
+def iter_snapshots(data: bytes) -> Iterator[RegionSnapshot]:
+    """连续存放的多个镜像（长度必须是 125 的整数倍）逐个解码"""
+    make = RegionSnapshot._make
+    for values in REGION_SNAPSHOT_STRUCT.iter_unpack(data):
+        yield make(values)
+
+
+@lru_cache(maxsize=None)
+def range_struct(addr: int, nums: int) -> struct.Struct:
+    """寄存器区间 [addr, addr + nums) 的解码器"""
+    if nums < 1 or addr + nums > PPX_MAX_REGION_REG:
+        raise ValueError(f"寄存器区间越界: 0x{addr:02X} + {nums}")
+    return struct.Struct("<" + "".join(r.fmt for r in REGION_REGS[addr:addr + nums]))
+
+
+def decode_range(data: Buffer, addr: int, nums: int, offset: int = 0) -> Dict[int, object]:
+    """解码连续寄存器区间（如 MULTREAD 响应数据），返回 {寄存器地址: 原始值}"""
+    values = range_struct(addr, nums).unpack_from(_buffer(data), offset)
+    return dict(zip(range(addr, addr + nums), values))
+
+
+def reg_value(src: Buffer, addr: int):
+    """按寄存器号读取原始值（g_ppx_region_data 或镜像字节）"""
+    return _REG_STRUCTS[addr].unpack_from(_buffer(src), REGION_REGS[addr].offset)[0]
+
+
+def scaled_value(src: Buffer, addr: int) -> float:
+    """按寄存器号读取物理量（原始值 * 系数）"""
+    return reg_value(src, addr) * REGION_REGS[addr].scale
+
+
+# ==============================================
+# 编码
+# ==============================================
+def encode_reg(addr: int, value) -> bytes:
+    return _REG_STRUCTS[addr].pack(value)
+
+
+def write_reg(dst: Structure, addr: int, value):
+    """按寄存器号写入 g_ppx_region_data（组包前更新镜像）"""
+    _REG_STRUCTS[addr].pack_into(memoryview(dst).cast("B"), REGION_REGS[addr].offset, value)
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+PPX 编解码会话（缓冲区复用）
+============================================================
+脚本中常见写法每帧都会新建缓冲区：
+
+    buf = create_string_buffer(256)                              # 组包
+    self.lib.ppx_com_region_parse((c_uint8 * n)(*recv), n, ...)  # 解析
+
+心跳/压力循环中每小时要执行上万次。CodecSession 在创建时一次性分配：
+- 输出缓冲区：bytearray + (c_uint8 * N).from_buffer 视图，组包结果以 memoryview 返回，
+  可直接交给 ser.write，不再生成 bytes
+- 输入缓冲区：同上，接收数据拷入固定缓冲区后传预先 cast 好的指针
+- 收/发消息结构体及其 byref 引用
+- 已配置 argtypes 的函数对象（DLL 后端）或绑定方法（纯 Python 后端）
+
+稳态下不分配新对象的目标只对 DLL 后端成立（按代码路径推断：参数全部是预先创建的
+ctypes 对象，返回的 memoryview 按帧长缓存）；DLL 只能在 Windows 上加载，这一点未在
+bench_session.py 中实测。纯 Python 后端的转义/CRC/解包本身要生成中间 bytes，
+bench_session.py 实测每次组包约 0.5 KiB、解析约 0.5 KiB 临时内存（原写法约 1.1 KiB / 0.8 KiB），
+会话只省去缓冲区、结构体与返回视图的重复分配。
+
+注意：format 返回的 memoryview、parse 使用的 rx_msg 都会在下一次调用时被覆盖，
+需要保留时请自行拷贝（bytes(view) / 读取字段）。
+"""
+
+from ctypes import byref, cast, c_uint8, POINTER
+from typing import Optional
+
+from .codec import BACKEND_DLL
+from .structs import PPX_CMD_REQ, ppx_region_msg_t, ppx_ble_msg_t
+
+# c_uint8 的 data_len 决定了单次解析最多 255 字节
+MAX_PARSE_LEN = 0xFF
+
+
+class CodecSession:
+    """包装 open_region_codec / open_ble_codec 返回的编解码器，复用全部缓冲区"""
+
+    def __init__(self, codec, dev_id: int, buf_size: int = 256):
+        self.codec = codec
+        self.dev_id = dev_id
+        if hasattr(codec, "ppx_com_region_format"):
+            self._format_fn = codec.ppx_com_region_format
+            self._parse_fn = codec.ppx_com_region_parse
+            msg_type = ppx_region_msg_t
+        else:
+            self._format_fn = codec.ppx_com_ble_format
+            self._parse_fn = codec.ppx_com_ble_parse
+            msg_type = ppx_ble_msg_t
+        self._native = getattr(codec, "backend", BACKEND_DLL) == BACKEND_DLL
+
+        # 输出缓冲区
+        self._out_raw = bytearray(buf_size)
+        self._out = (c_uint8 * buf_size).from_buffer(self._out_raw)
+        self._out_view = memoryview(self._out_raw)
+        # 帧长 -> 输出缓冲区前 n 字节的视图（帧长种类很少，缓存后组包不再新建切片）
+        self._out_views = {}
+
+        # 输入缓冲区
+        self._in_raw = bytearray(MAX_PARSE_LEN)
+        self._in = (c_uint8 * MAX_PARSE_LEN).from_buffer(self._in_raw)
+        self._in_ptr = cast(self._in, POINTER(c_uint8))
+
+        # 收发消息结构体
+        self.tx_msg = msg_type()
+        self.rx_msg = msg_type()
+        self._tx_ref = byref(self.tx_msg)
+        self._rx_ref = byref(self.rx_msg)
+
+    # ---------------- 组包 ----------------
+    def format(self, cmd: int, reg_addr: int, reg_nums: int = 1,
+               cmd_type: int = PPX_CMD_REQ, dev_id: Optional[int] = None) -> memoryview:
+        """按字段组包，返回输出缓冲区中的帧（失败时为空 memoryview）"""
+        msg = self.tx_msg
+        msg.id = self.dev_id if dev_id is None else dev_id
+        msg.cmd = cmd
+        msg.reg_addr = reg_addr
+        msg.reg_nums = reg_nums
+        return self._view(self._format_fn(cmd_type, self._tx_ref, self._out))
+
+    def format_msg(self, cmd_type: int, msg) -> memoryview:
+        """使用调用方已填好的消息结构体组包"""
+        return self._view(self._format_fn(cmd_type, byref(msg), self._out))
+
+    def _view(self, length: int) -> memoryview:
+        view = self._out_views.get(length)
+        if view is None:
+            view = self._out_views[length] = self._out_view[:length]
+        return view
+
+    # ---------------- 解析 ----------------
+    def parse(self, data, dev_id: Optional[int] = None) -> int:
+        """
+        解析收到的数据，返回 ppx_com_*_parse 的返回值
+        解析结果在 self.rx_msg 与编解码器的寄存器镜像中
+        """
+        msg = self.rx_msg
+        msg.id = self.dev_id if dev_id is None else dev_id
+        msg.cmd = 0
+        msg.reg_addr = 0
+        msg.reg_nums = 0
+        n = len(data)
+        if n > MAX_PARSE_LEN:
+            n = MAX_PARSE_LEN
+            data = memoryview(data)[:n]
+        if not self._native:
+            return self._parse_fn(data, n, self._rx_ref)
+        self._in_raw[:n] = data
+        return self._parse_fn(self._in_ptr, n, self._rx_ref)
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+MCB 影子寄存器缓存
+============================================================
+- 控制寄存器（RT_SETTING / TARGET_SPEED / RUN_MODE / DAT_SETTING 等）：
+  每个寄存器带脏标记，值变化后的下一个心跳周期立即发送；
+  值未变化时只在保活周期（keepalive）到期时重发，避免每 150 ms 全量重写
+- 静态身份寄存器（0x00 ~ 0x04：ID/型号/序列号/硬件版本/软件版本）：
+  读过一次后在 TTL 内直接返回缓存值
+- 检测到设备重启（RUN_MODE 读回 0 而影子值非 0、静态寄存器读回值与缓存不一致，
+  或调用 on_reboot）时：
+  静态缓存失效、所有控制寄存器置脏、写合并器的“已知镜像”清空
+
+发送通过 WriteBatcher 完成，统计里给出与“每周期全量重写”相比节省的帧数。
+"""
+
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+from .batcher import WriteBatcher
+from .structs import (
+    PPX_ID_NUM_REG, PPX_MODEL_REG, PPX_SERIAL_NUM_REG, PPX_HW_VERSION_REG, PPX_SW_VESRION_REG,
+    PPX_RUN_MODE_REG,
+)
+
+STATIC_REGS = (PPX_ID_NUM_REG, PPX_MODEL_REG, PPX_SERIAL_NUM_REG, PPX_HW_VERSION_REG, PPX_SW_VESRION_REG)
+DEFAULT_KEEPALIVE = 0.45    # 未变化的控制寄存器重发间隔（秒），须小于 MCB 通信超时
+DEFAULT_STATIC_TTL = 300.0  # 静态寄存器缓存有效期（秒）
+
+
+class _Shadow:
+    __slots__ = ("value", "dirty", "last_sent", "skip_zero")
+
+    def __init__(self, value: int, skip_zero: bool):
+        self.value = value
+        self.dirty = True
+        self.last_sent = None
+        self.skip_zero = skip_zero
+
+
+class ShadowCache:
+    """
+    batcher : WriteBatcher，负责组帧发送
+    read_fn : read_fn(reg) -> value 或 None，用于静态寄存器读取
+    """
+
+    def __init__(self, batcher: WriteBatcher, read_fn: Optional[Callable[[int], object]] = None,
+                 keepalive: float = DEFAULT_KEEPALIVE, static_ttl: float = DEFAULT_STATIC_TTL,
+                 static_regs: Iterable[int] = STATIC_REGS, clock: Callable[[], float] = time.monotonic):
+        self.batcher = batcher
+        self.read_fn = read_fn
+        self.keepalive = keepalive
+        self.static_ttl = static_ttl
+        self.static_regs = frozenset(static_regs)
+        self.clock = clock
+        self._regs: Dict[int, _Shadow] = {}
+        self._static: Dict[int, tuple] = {}     # reg -> (value, 读取时间)
+        self._start = clock()
+        # 统计
+        self.legacy_frames = 0      # 每周期全量重写需要的帧数
+        self.sent_frames = 0        # 实际发送帧数
+        self.static_hits = 0
+        self.static_reads = 0
+        self.reboots = 0
+
+    # ---------------- 控制寄存器 ----------------
+    def track(self, reg: int, value: int = 0, skip_zero: bool = False):
+        """登记一个需要心跳维持的寄存器；skip_zero=True 时值为 0 不发送（如 RUN_MODE/DAT_SETTING）"""
+        self._regs[reg] = _Shadow(value, skip_zero)
+
+    def set(self, reg: int, value: int):
+        shadow = self._regs.get(reg)
+        if shadow is None:
+            self.track(reg, value)
+            return
+        if shadow.value != value:
+            shadow.value = value
+            shadow.dirty = True
+
+    def get(self, reg: int) -> int:
+        return self._regs[reg].value
+
+    def __getitem__(self, reg: int) -> int:
+        return self._regs[reg].value
+
+    def tick(self) -> int:
+        """心跳周期调用：发送脏寄存器和保活到期的寄存器，返回发送帧数"""
+        now = self.clock()
+        staged = []
+        for reg, shadow in self._regs.items():
+            if shadow.skip_zero and shadow.value == 0:
+                continue
+            self.legacy_frames += 1
+            if shadow.dirty or shadow.last_sent is None or now - shadow.last_sent >= self.keepalive:
+                self.batcher.set(reg, shadow.value)
+                staged.append(shadow)
+        if not staged:
+            return 0
+        sent = self.batcher.flush()
+        for shadow in staged:
+            shadow.dirty = False
+            shadow.last_sent = now
+        self.sent_frames += sent
+        return sent
+
+    # ---------------- 静态寄存器 ----------------
+    def get_static(self, reg: int, force: bool = False):
+        """读取静态寄存器，TTL 内返回缓存值；读取失败返回 None 且不缓存"""
+        now = self.clock()
+        cached = self._static.get(reg)
+        if not force and cached is not None and now - cached[1] < self.static_ttl:
+            self.static_hits += 1
+            return cached[0]
+        self.static_reads += 1
+        value = self.read_fn(reg) if self.read_fn else None
+        if value is not None and reg in self.static_regs:
+            self._static[reg] = (value, now)
+        return value
+
+    # ---------------- 重启检测 ----------------
+    def note_read(self, reg: int, value):
+        """读回寄存器后调用，用于检测设备重启"""
+        if reg == PPX_RUN_MODE_REG and value == 0:
+            shadow = self._regs.get(reg)
+            if shadow is not None and shadow.value != 0 and shadow.last_sent is not None:
+                self.on_reboot()
+        elif reg in self._static and self._static[reg][0] != value:
+            self.on_reboot()
+
+    def on_reboot(self):
+        self.reboots += 1
+        self._static.clear()
+        self.batcher.forget()
+        for shadow in self._regs.values():
+            shadow.dirty = True
+
+    # ---------------- 统计 ----------------
+    def stats(self) -> dict:
+        minutes = max((self.clock() - self._start) / 60.0, 1e-9)
+        saved = self.legacy_frames - self.sent_frames
+        return {
+            "legacy_frames": self.legacy_frames,
+            "sent_frames": self.sent_frames,
+            "saved_frames": saved,
+            "saved_per_min": saved / minutes,
+            "static_hits": self.static_hits,
+            "static_reads": self.static_reads,
+            "reboots": self.reboots,
+        }
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+PPX 协议常量与结构体定义
+============================================================
+与 libs/*/ppx_packet.h、ppx_region.h、ppx_ble.h 保持一致（#pragma pack(1)）。
+DLL 后端与纯 Python 后端共用这里的结构体，保证 byref(msg) 可以直接传给任一后端。
+"""
+
+from ctypes import Structure, sizeof, c_uint8, c_uint16, c_uint32, c_int16, c_int32
+
+# ==============================================
+# ppx_packet.h
+# ==============================================
+PPX_PACKET_MAX_SIZE = 256
+PPX_PACKET_MIN_SIZE = 9
+
+PPX_DATA_HEAD_SIZE = 5
+PPX_DATA_REGION_SIZE = 128 + PPX_DATA_HEAD_SIZE
+PPX_DATA_BUF_SIZE = 192
+
+PPX_SW_VER_SIZE = 20
+PPX_MODEL_SIZE = 8
+PPX_SN_SIZE = 26
+
+# 帧头/帧尾/数据偏移
+PPX_FRAME_HEAD = 0xA5
+PPX_FRAME_END = 0x55
+PPX_DATA_TAG = 0x33
+
+# 转义字节
+PPX_DATA_REPHEAD_H = 0xAB  # 0xA5 -> 0xABBA
+PPX_DATA_REPHEAD_L = 0xBA
+PPX_DATA_REPEND_H = 0xCD   # 0x55 -> 0xCDDC
+PPX_DATA_REPEND_L = 0xDC
+PPX_DATA_REPHEAD_2 = 0xBB  # 0xABBA -> 0xABBB BA
+PPX_DATA_REPEND_2 = 0xDD   # 0xCDDC -> 0xCDDD DC
+
+# 返回状态 (ppx_packet_status_t)
+PPX_ERROR = -1
+PPX_FALSE = 0
+PPX_TRUE = 1
+
+# 设备ID (ppx_packet_id_t)
+PPX_ID_RSVD = 0x00
+PPX_ID_CCB = 0x10
+PPX_ID_MCB = 0x20
+PPX_ID_FCB = 0x30
+PPX_ID_BMS = 0x40
+PPX_ID_GPRS = 0x50
+PPX_ID_BLE = 0x60
+PPX_ID_ALARM = 0x70
+PPX_ID_VOICE = 0x80
+
+# 命令类别 (ppx_cmd_type_t)
+PPX_CMD_REQ = 0x00
+PPX_CMD_RSP = 0x80
+PPX_CMD_EXCP = 0xC0
+
+# 命令内容 (ppx_cmd_msg_t)
+PPX_MSG_RSVD = 0x00
+PPX_MSG_READ = 0x01
+PPX_MSG_MULTREAD = 0x02
+PPX_MSG_WRITE = 0x03
+PPX_MSG_MULTWRITE = 0x04
+PPX_MSG_COMPARE = 0x05
+PPX_MSG_UPGRADE = 0x06
+PPX_MSG_NOTIFY = 0x07
+PPX_MSG_MASK = 0x0F
+
+
+def PPX_CMD_IS_REQ(x: int) -> bool:
+    return 0 < x <= PPX_MSG_MASK
+
+
+def PPX_CMD_IS_RSP(x: int) -> bool:
+    return (x & PPX_CMD_RSP) == PPX_CMD_RSP
+
+
+def PPX_CMD_IS_EXCP(x: int) -> bool:
+    return (x & PPX_CMD_EXCP) == PPX_CMD_EXCP
+
+
+def PPX_CMD_IS_MSG(x: int) -> int:
+    return x & PPX_MSG_MASK
+
+
+# ==============================================
+# ppx_region.h
+# ==============================================
+# 运行模式 (ppx_run_mode_t)
+PPX_MODE_IDLE = 0
+PPX_MODE_SET = 1
+PPX_MODE_RUN = 2
+PPX_MODE_LOCK = 3
+PPX_MODE_AID = 4
+PPX_MODE_BRAKE = 5
+PPX_MODE_IAP = 6
+PPX_MODE_TST = 7
+
+# rt_setting 位 (ppx_rt_setting_t)
+PPX_BRAKE_LED_ON = 1 << 0
+PPX_TAIL_LED_ON = 1 << 1
+PPX_RIGHT_LED_ON = 1 << 2
+PPX_LEFT_LED_ON = 1 << 3
+PPX_CLR_ERRCODE = 1 << 15
+
+# 寄存器地址 (ppx_region_reg_t)
+PPX_ID_NUM_REG = 0x00
+PPX_MODEL_REG = 0x01
+PPX_SERIAL_NUM_REG = 0x02
+PPX_HW_VERSION_REG = 0x03
+PPX_SW_VESRION_REG = 0x04
+PPX_RIM_STATE_REG = 0x05
+PPX_MCU_ERRCODE_REG = 0x06
+PPX_CTRL_MODEL_REG = 0x07
+PPX_SPEED_REF_REG = 0x08
+PPX_MOTOR_SPEED_REG = 0x09
+PPX_BUS_VOLTAGE_REG = 0x0A
+PPX_BUS_CURRENT_REG = 0x0B
+PPX_PHASE_CUR_A_REG = 0x0C
+PPX_PHASE_CUR_B_REG = 0x0D
+PPX_PHASE_CUR_C_REG = 0x0E
+PPX_HALL_STATE_REG = 0x0F
+PPX_PI_VQ_REG = 0x10
+PPX_PI_IQ_REG = 0x11
+PPX_BRAKE_STATE_REG = 0x12
+PPX_IMU_PITCH_REG = 0x13
+PPX_IMU_ROLL_REG = 0x14
+PPX_BOARD_TEMP_REG = 0x15
+PPX_BRAKE_MILEAGE_REG = 0x16
+PPX_MOTOR_ANGLE_REG = 0x17
+PPX_SINGLE_MILEAGE_REG = 0x18
+PPX_ANGULAR_SPEED_REG = 0x19
+PPX_RT_SETTING_REG = 0x1A
+PPX_RUN_MODE_REG = 0x1B
+PPX_GEARS_REG = 0x1C
+PPX_TARGET_SPEED_REG = 0x1D
+PPX_RATED_VOLT_REG = 0x1E
+PPX_RATED_CUR_REG = 0x1F
+PPX_MAX_VOLTAGE_REG = 0x20
+PPX_MIN_VOLTAGE_REG = 0x21
+PPX_ACCERATION_REG = 0x22
+PPX_DAT_SETTING_REG = 0x23
+PPX_RVSD_DATA_REG = 0x24
+PPX_MAX_REGION_REG = 0x25
+
+
+class ppx_region_excp_t(Structure):
+    _fields_ = [
+        ("parse_status", c_uint8),
+        ("cmd_status", c_uint8),
+        ("data_status", c_uint8),
+    ]
+
+
+class ppx_region_msg_t(Structure):
+    _fields_ = [
+        ("id", c_uint8),        # 设备ID
+        ("cmd", c_uint8),       # 读/写命令
+        ("msg_type", c_uint8),  # 主机使用
+        ("reg_addr", c_uint8),  # 寄存器起始地址
+        ("reg_nums", c_uint8),  # 寄存器数量
+        ("reg_excp", ppx_region_excp_t),
+    ]
+
+
+class ppx_region_data_t(Structure):
+    # 每个字段对应一个寄存器，字段顺序即寄存器地址 (0x00 ~ 0x24)
+    _pack_ = 1
+    _fields_ = [
+        ("id_num", c_uint8),
+        ("model", c_uint8 * PPX_MODEL_SIZE),
+        ("serial_num", c_uint8 * PPX_SN_SIZE),
+        ("hw_version", c_uint16),
+        ("sw_version", c_uint8 * PPX_SW_VER_SIZE),
+        ("rim_state", c_uint8),
+        ("mcu_errcode", c_uint32),
+        ("ctrl_model", c_uint8),
+        ("speed_ref", c_int16),
+        ("motor_speed", c_int16),
+        ("bus_voltage", c_uint16),      # 0.1V
+        ("bus_current", c_uint16),      # 0.1A
+        ("phase_current_a", c_int16),   # 0.1A
+        ("phase_current_b", c_int16),   # 0.1A
+        ("phase_current_c", c_int16),   # 0.1A
+        ("hall_state", c_uint8),
+        ("pi_vq", c_int16),
+        ("pi_iq", c_int16),
+        ("brake_state", c_uint8),
+        ("imu_pitch", c_int16),         # 0.1deg
+        ("imu_roll", c_int16),          # 0.1deg
+        ("imu_acc", c_uint8),           # 0.01g
+        ("brake_mileage", c_uint8),     # dm
+        ("motor_angle", c_int32),
+        ("single_mileage", c_uint32),   # m
+        ("angular_speed", c_int16),     # 0.1deg
+        ("rt_setting", c_uint16),
+        ("run_mode", c_uint8),
+        ("gear", c_uint8),
+        ("target_speed", c_int16),      # rpm
+        ("rated_voltage", c_uint16),    # 0.1V
+        ("rated_current", c_uint16),    # 0.1A
+        ("max_voltage", c_uint16),      # 0.1V
+        ("min_voltage", c_uint16),      # 0.1V
+        ("acceration", c_uint32),
+        ("dat_setting", c_uint32),
+        ("rsvd_data", c_uint32),
+    ]
+
+
+# ==============================================
+# ppx_ble.h
+# ==============================================
+PPX_BLE_ID_NUM_REG = 0x00
+PPX_BLE_MODEL_REG = 0x01
+PPX_BLE_SERIAL_NUM_REG = 0x02
+PPX_BLE_HW_VERSION_REG = 0x03
+PPX_BLE_SW_VESRION_REG = 0x04
+PPX_BLE_STATUS_REG = 0x05
+PPX_BLE_LDR_VALUE_REG = 0x06
+PPX_BLE_IO_STATUS_REG = 0x07
+PPX_BLE_LED_MSG_REG = 0x08
+PPX_BLE_CARD_ID_REG = 0x09
+PPX_BLE_DAT_SETTING_REG = 0x0A
+PPX_BLE_MAX_REG = 0x0B
+
+
+class ppx_ble_msg_t(Structure):
+    _fields_ = [
+        ("id", c_uint8),        # 设备ID
+        ("cmd", c_uint8),       # 读/写命令
+        ("reg_addr", c_uint8),  # 寄存器起始地址
+        ("reg_nums", c_uint8),  # 寄存器数量
+    ]
+
+
+class ppx_led_msg_t(Structure):
+    # uint32_t 位域，共占 12 字节（digital 放不进第一个 32 位单元）
+    _fields_ = [
+        ("screen_on", c_uint32, 1),      # 显示开关: 1开, 0关
+        ("brightness", c_uint32, 3),     # 亮度级别 0-7
+        ("blink_period", c_uint32, 4),   # 闪烁周期: N * 200ms
+        ("blink_duty", c_uint32, 4),     # 闪烁占空比
+        ("blink_en", c_uint32, 8),       # 闪烁使能
+        ("err_flag", c_uint32, 2),       # 错误码标志
+        ("err_code", c_uint32, 4),       # 错误码: 0-F
+        ("digital", c_uint32, 7),        # 电池SOC: 0-100
+        ("logo", c_uint32, 2),           # LOGO: 0关, 1白, 2红
+        ("rim_state", c_uint32, 2),      # 护盾: 0关, 1白, 2绿
+        ("rdygo", c_uint32, 2),          # Ready Go: 0关, 1白, 2红
+        ("turn_left", c_uint32, 2),      # 左转向灯: 0关, 1白, 2橙
+        ("turn_right", c_uint32, 2),     # 右转向灯: 0关, 1白, 2橙
+        ("ring", c_uint32, 2),           # 灯环: 0关, 1蓝, 2红
+        ("rsvd_data", c_uint32, 19),     # 保留
+    ]
+
+
+class ppx_ble_data_t(Structure):
+    # 每个字段对应一个寄存器，字段顺序即寄存器地址 (0x00 ~ 0x0A)
+    _pack_ = 1
+    _fields_ = [
+        ("id_num", c_uint8),
+        ("model", c_uint8 * PPX_MODEL_SIZE),
+        ("serial_num", c_uint8 * PPX_SN_SIZE),
+        ("hw_version", c_uint8),
+        ("sw_version", c_uint8 * PPX_SW_VER_SIZE),
+        ("status", c_uint32),
+        ("ldr_value", c_uint16),
+        ("io_status", c_uint16),
+        ("led_msg", ppx_led_msg_t),
+        ("card_id", c_uint32),
+        ("dat_setting", c_uint32),
+    ]
+
+
+def _reg_offsets(struct_type) -> tuple:
+    """按字段顺序生成寄存器偏移表，末尾追加结构体大小（与 DLL 内部偏移表一致）"""
+    offsets = [getattr(struct_type, name).offset for name, *_ in struct_type._fields_]
+    offsets.append(sizeof(struct_type))
+    return tuple(offsets)
+
+
+REGION_REG_OFFSETS = _reg_offsets(ppx_region_data_t)
+BLE_REG_OFFSETS = _reg_offsets(ppx_ble_data_t)
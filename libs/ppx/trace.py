@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+协议热路径日志（先判级别再格式化）
+============================================================
+BLEProtocol / RegionProtocol 每帧都会执行：
+
+    self._debug_print(f"发送数据: {self._bytes_to_hex(data)}")   # 先拼好十六进制再判断 DEBUG_MODE
+    self._print_ble_msg(ble_msg)                                  # 多行 f-string，不受 DEBUG_MODE 控制
+
+关闭调试后这些字符串照样生成再丢弃。Trace 把判断提到格式化之前：
+
+    trace = Trace(emit, level="INFO", sample={"rx": 10})
+    trace.debug("发送数据: %s", hexstr(data), category="tx")     # 级别不够直接返回，不做 % 格式化
+    trace.debug(self._format_ble_msg, ble_msg, category="frame")  # 消息也可以是函数，需要输出时才调用
+
+- 消息为 str 时按 % 格式化（有参数时）；为可调用对象时以参数调用，返回值作为消息
+- hexstr(data) 只包一层引用，输出时才转为 "5A A5 ..." 文本
+- sample={类别: N}：该类别每 N 条只输出第 1、N+1、... 条（如心跳帧），被跳过的计入 suppressed
+- emit(level, message) 为实际输出（通常是脚本的 _log，再转给 FileLogger）
+
+级别被关闭时，一次调用只剩一次比较，接近零开销。
+"""
+
+from collections import defaultdict
+from typing import Callable, Dict, Optional
+
+DEBUG = "DEBUG"
+INFO = "INFO"
+WARNING = "WARNING"
+ERROR = "ERROR"
+LEVELS = {DEBUG: 10, INFO: 20, WARNING: 30, ERROR: 40}
+
+
+class hexstr:
+    """延迟渲染的十六进制文本（str() / 格式化时才转换）"""
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        self.data = data
+
+    def __str__(self):
+        return ' '.join(f'{b:02X}' for b in self.data)
+
+    __repr__ = __str__
+
+    def __format__(self, spec):
+        return format(str(self), spec)
+
+
+class Trace:
+    def __init__(self, emit: Callable[[str, str], None], level: str = INFO,
+                 sample: Optional[Dict[str, int]] = None):
+        self.emit = emit
+        self.threshold = LEVELS[level]
+        self.sample_every: Dict[str, int] = {}
+        self.seen: Dict[str, int] = defaultdict(int)        # 通过级别检查的条数（按类别）
+        self.suppressed: Dict[str, int] = defaultdict(int)  # 因抽样被跳过的条数
+        for category, n in (sample or {}).items():
+            self.sample(category, n)
+
+    def set_level(self, level: str):
+        self.threshold = LEVELS[level]
+
+    def sample(self, category: str, every: int):
+        """该类别每 every 条输出 1 条；every <= 1 表示全部输出"""
+        if every > 1:
+            self.sample_every[category] = int(every)
+        else:
+            self.sample_every.pop(category, None)
+
+    def enabled(self, level: str) -> bool:
+        return LEVELS[level] >= self.threshold
+
+    # ---------------- 输出 ----------------
+    def log(self, level: str, msg, *args, category: Optional[str] = None):
+        if LEVELS[level] < self.threshold:
+            return
+        if category is not None:
+            n = self.seen[category]
+            self.seen[category] = n + 1
+            every = self.sample_every.get(category)
+            if every and n % every:
+                self.suppressed[category] += 1
+                return
+        if callable(msg):
+            msg = msg(*args)
+        elif args:
+            msg = msg % args
+        self.emit(level, msg)
+
+    def debug(self, msg, *args, category: Optional[str] = None):
+        if self.threshold <= 10:
+            self.log(DEBUG, msg, *args, category=category)
+
+    def info(self, msg, *args, category: Optional[str] = None):
+        if self.threshold <= 20:
+            self.log(INFO, msg, *args, category=category)
+
+    def warning(self, msg, *args, category: Optional[str] = None):
+        self.log(WARNING, msg, *args, category=category)
+
+    def error(self, msg, *args, category: Optional[str] = None):
+        self.log(ERROR, msg, *args, category=category)
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""
+继电器/NFC 压力测试公共组件
+============================================================
+Tool/ 下各压力测试脚本（继电器开关机、继电器充电、W3、NFC）共用的引擎代码。
+
+模块说明：
+- clock   : 时钟抽象（SystemClock 真实时间 / VirtualClock 虚拟时间，配合模拟器加速仿真）
+- matcher : 多关键字匹配，SUCCESS/EXCEPTION/INFO/ERROR/CRITICAL 各类关键字编译为一个 Aho–Corasick 自动机
+- normalize : 字节级日志行归一化（去 ANSI、转小写、去空格一次完成），匹配前不再逐行解码
+- decoder : 串口字节流分行（跨读取保留半行）+ 会话级编码检测（chardet，utf-8/gb18030）+ 增量解码
+- verdict : 单轮结果判定状态机，逐行更新各判定类别的命中标志，无需回扫整轮日志
+- rules   : 声明式滑动窗口规则引擎（window 秒内 count 次 → stop/alert/tag/power_cycle），支持热加载
+- logsink : 后台缓冲日志写入（有界队列 + 写线程，文件保持打开，判定边界 sync 落盘，退出时自动排空）
+- status  : 控制台实时状态行（4 Hz 原地重绘：轮数、轮/s、成功率、ETA、最近异常），详细日志只进文件
+- multidut: 多 DUT 并行（BLE/控制器 AutoTester 的 --ports，每个串口一个子进程，replicate/shard 分发，汇总报告每个 DUT 一列）
+
+脚本中使用方式（以 Tool 下的脚本为例）：
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../libs"))
+    from stress.clock import SYSTEM_CLOCK
+"""
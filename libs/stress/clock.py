@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+时钟抽象
+============================================================
+压力测试引擎中的 sleep / time / 滑动窗口时间戳统一通过时钟对象获取：
+
+- SystemClock  : 真实时间（time.time / time.monotonic / time.sleep），脚本默认使用
+- VirtualClock : 虚拟时间，sleep 只推进计数不真正等待。与 emulator.relay / emulator.dut_log
+                 （clock=vclock.monotonic）以及 StreamPort（sleep=vclock.sleep）配合，
+                 50 万次循环的关键字/滑动窗口逻辑可以离线在几分钟内跑完
+
+虚拟时钟只适用于单线程仿真：所有等待都发生在调用 sleep 的线程里。
+"""
+
+import datetime
+import time
+
+
+class SystemClock:
+    """真实时间"""
+
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def now(self) -> datetime.datetime:
+        return datetime.datetime.now()
+
+
+class VirtualClock:
+    """
+    虚拟时间：time() 从 start（默认当前真实时间）开始，只由 sleep/advance 推进。
+    monotonic() 与 time() 同步推进，便于模拟器与脚本共用同一时间轴。
+    """
+
+    def __init__(self, start: float = None):
+        self._t = time.time() if start is None else float(start)
+        self._start = self._t
+        self.sleeps = 0
+
+    def time(self) -> float:
+        return self._t
+
+    monotonic = time
+
+    def sleep(self, seconds: float):
+        self.sleeps += 1
+        if seconds > 0:
+            self._t += seconds
+
+    def advance(self, seconds: float):
+        self._t += max(0.0, seconds)
+
+    def now(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(self._t)
+
+    @property
+    def elapsed(self) -> float:
+        """自创建以来经过的虚拟秒数"""
+        return self._t - self._start
+
+
+SYSTEM_CLOCK = SystemClock()
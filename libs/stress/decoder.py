@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+串口日志流的分行与增量解码
+============================================================
+脚本原来各自解码：继电器开关机逐行 readline().decode('gb2312')，充电脚本整块
+decode('utf-8') 失败再 latin1，NFC 脚本 decode('utf-8', errors='ignore')。
+readline 超时或整块读取时，一个多字节字符被切在两次读取之间就会变成乱码，
+而且同一块数据会被反复解码。
+
+StreamDecoder 处理一个会话（一个串口）的字节流：
+
+- feed(chunk)   : 按 b"\\n" 切出完整行（原始字节，不含换行符），不完整的尾部留到下次拼接；
+                  关键字匹配直接用这些字节（stress.normalize），不需要先解码
+- decode(line)  : 用会话编码解码一行（完整行不会截断多字节字符）
+- text(chunk)   : 任意分块的增量解码（codecs 增量解码器跨读取保留半个字符），用于原始日志落盘
+
+会话编码只检测一次：从第一个非 ASCII 字节起最多 sample_size 字节留作样本，样本中非 ASCII
+字节达到 min_non_ascii（或样本已满）时用 chardet 判定并锁定。纯 ASCII 数据不提供任何编码
+信息，不进样本也不会触发锁定（设备启动日志通常全是 ASCII）。候选只有 utf-8 与 gb18030
+（GB2312 的超集）：chardet 对短 GB2312 文本置信度很低，结果不是 utf-8 时再用严格 UTF-8 校验兜底。
+锁定前只做临时判定：样本能通过严格 UTF-8 校验即按 utf-8，否则按 gb18030；
+ASCII 部分两种编码结果相同，临时判定随后续数据改变。
+"""
+
+import codecs
+from typing import List, Optional
+
+import chardet
+
+UTF8 = "utf-8"
+GB = "gb18030"
+
+
+def _is_utf8(data: bytes) -> bool:
+    try:
+        data.decode(UTF8)
+    except UnicodeDecodeError as e:
+        # 样本末尾被截断的半个字符不算错误
+        return e.reason == "unexpected end of data"
+    return True
+
+
+def detect_encoding(sample: bytes) -> str:
+    """在 utf-8 / gb18030 中判定样本编码"""
+    result = chardet.detect(sample)
+    enc = (result.get("encoding") or "").lower().replace("_", "-")
+    if enc in ("utf-8", "utf8") and result.get("confidence", 0) >= 0.5:
+        return UTF8
+    if _is_utf8(sample):
+        return UTF8
+    return GB
+
+
+class StreamDecoder:
+    def __init__(self, encoding: Optional[str] = None, errors: str = "replace",
+                 sample_size: int = 4096, min_non_ascii: int = 32):
+        """encoding 给定时不做检测"""
+        self.errors = errors
+        self.sample_size = sample_size
+        self.min_non_ascii = min_non_ascii
+        self._encoding = encoding
+        self.locked = encoding is not None
+        self._sample = bytearray()
+        self._non_ascii = 0
+        self._guess = None              # 锁定前的临时判定（样本变化后失效）
+        self._partial = b""             # 未收完的半行
+        self._text_decoder = None
+        self._text_encoding = None
+        self.lines = 0
+
+    # ---------------- 编码 ----------------
+    def _observe(self, data: bytes):
+        if not self._sample:
+            if data.isascii():
+                return
+            # 样本从第一个非 ASCII 字节开始，前面的 ASCII 不参与判定
+            data = data[next(i for i, b in enumerate(data) if b >= 0x80):]
+        room = self.sample_size - len(self._sample)
+        part = data[:room]
+        if not part.isascii():
+            self._non_ascii += sum(1 for b in part if b >= 0x80)
+        self._sample += part
+        self._guess = None
+        if self._non_ascii >= self.min_non_ascii or len(self._sample) >= self.sample_size:
+            self._lock()
+
+    def _lock(self):
+        self._encoding = detect_encoding(bytes(self._sample))
+        self.locked = True
+        self._sample = bytearray()
+
+    @property
+    def encoding(self) -> str:
+        if self.locked:
+            return self._encoding
+        if self._guess is None:
+            self._guess = UTF8 if _is_utf8(bytes(self._sample)) else GB
+        return self._guess
+
+    # ---------------- 分行 ----------------
+    def feed(self, data: bytes) -> List[bytes]:
+        """输入一块原始字节，返回其中已完整的行（不含 b"\\n"）"""
+        if not data:
+            return []
+        if not self.locked:
+            self._observe(data)
+        if self._partial:
+            data = self._partial + data
+        lines = data.split(b"\n")
+        self._partial = lines.pop()
+        self.lines += len(lines)
+        return lines
+
+    def flush(self) -> List[bytes]:
+        """取出未以换行结尾的残留数据（会话结束或一轮结束时调用）"""
+        rest, self._partial = self._partial, b""
+        if rest:
+            self.lines += 1
+            return [rest]
+        return []
+
+    # ---------------- 解码 ----------------
+    def decode(self, line: bytes) -> str:
+        return line.decode(self.encoding, self.errors)
+
+    def text(self, data: bytes, final: bool = False) -> str:
+        """增量解码任意分块，被切开的多字节字符留到下一块"""
+        enc = self.encoding
+        if self._text_decoder is None or self._text_encoding != enc:
+            self._text_decoder = codecs.getincrementaldecoder(enc)(self.errors)
+            self._text_encoding = enc
+        return self._text_decoder.decode(data, final)
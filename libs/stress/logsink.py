@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+后台缓冲日志写入
+============================================================
+BLE/区域协议 AutoTester 的 FileLogger、OTA 工具的 save_serial_log、把手脚本的 bWritePrint
+都是每写一行就 open/close 一次文件，调试级别日志下这部分耗时会超过用例本身。
+
+LogSink 把写文件移到后台线程：
+
+- write(text) 只把文本放进有界队列（队列满时阻塞调用方，不丢日志）
+- 写线程持有一直打开的文件，缓冲满 flush_bytes 或距上次落盘超过 flush_interval 秒时写入并 flush
+- sync() 等待此前写入的内容全部 flush 并 fsync，用于用例判定/循环结果等边界
+- close() 排空队列后关闭文件；创建时注册 atexit，正常退出或未捕获异常退出时都会执行
+
+同一路径共用一个 LogSink（open_sink），多个调用方、多个线程写同一文件时不会互相打开覆盖。
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+from typing import Dict, Optional
+
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_FLUSH_BYTES = 64 * 1024
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+_SYNC = object()        # 队列中的控制项：(_SYNC, event, fsync)
+_CLOSE = object()
+
+
+class LogSink:
+    def __init__(self, path: str, mode: str = "a", encoding: Optional[str] = "utf-8",
+                 queue_size: int = DEFAULT_QUEUE_SIZE, flush_bytes: int = DEFAULT_FLUSH_BYTES,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        """encoding=None 时与 open() 默认一致（系统区域编码）"""
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.path = path
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self._file = open(path, mode, encoding=encoding)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._closed = False
+        self.error = None               # 写线程遇到的最后一个异常
+        # 统计
+        self.writes = 0
+        self.flushes = 0
+        self.fsyncs = 0
+        self._thread = threading.Thread(target=self._run, name=f"LogSink:{os.path.basename(path)}",
+                                        daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ---------------- 调用方 ----------------
+    def write(self, text: str):
+        if self._closed:
+            raise ValueError(f"日志已关闭: {self.path}")
+        self._queue.put(text)
+
+    def __call__(self, text: str):
+        self.write(text)
+
+    def _control(self, item, fsync: bool, timeout: Optional[float]) -> bool:
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put((item, done, fsync))
+        return done.wait(timeout)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待此前写入的内容写入文件并 flush 到系统缓冲"""
+        return self._control(_SYNC, False, timeout)
+
+    def sync(self, timeout: Optional[float] = None) -> bool:
+        """等待此前写入的内容落盘（flush + fsync），用于判定边界"""
+        return self._control(_SYNC, True, timeout)
+
+    def close(self, timeout: Optional[float] = 5.0):
+        if self._closed:
+            return
+        self._control(_CLOSE, True, timeout)
+        self._closed = True
+        self._thread.join(timeout)
+        atexit.unregister(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------------- 写线程 ----------------
+    def _run(self):
+        buf = []
+        size = 0
+        last = time.monotonic()
+        get = self._queue.get
+        while True:
+            wait = self.flush_interval - (time.monotonic() - last) if buf else None
+            try:
+                item = get(timeout=max(wait, 0.0)) if wait is not None else get()
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, str):
+                buf.append(item)
+                size += len(item)
+                self.writes += 1
+                if size < self.flush_bytes:
+                    continue
+            if buf:
+                self._write_out(buf)
+                buf = []
+                size = 0
+            last = time.monotonic()
+
+            if isinstance(item, tuple):
+                kind, done, fsync = item
+                if fsync:
+                    self._fsync()
+                if kind is _CLOSE:
+                    try:
+                        self._file.close()
+                    except OSError as e:
+                        self.error = e
+                    done.set()
+                    return
+                done.set()
+
+    def _write_out(self, buf):
+        try:
+            self._file.write("".join(buf))
+            self._file.flush()
+            self.flushes += 1
+        except (OSError, ValueError) as e:
+            self.error = e
+
+    def _fsync(self):
+        try:
+            os.fsync(self._file.fileno())
+            self.fsyncs += 1
+        except (OSError, ValueError) as e:
+            self.error = e
+
+
+_sinks: Dict[str, LogSink] = {}
+_sinks_lock = threading.Lock()
+
+
+def open_sink(path: str, mode: str = "a", **kwargs) -> LogSink:
+    """按绝对路径复用 LogSink（同一文件只打开一次）；mode="w" 时关闭已有的并截断重开"""
+    key = os.path.abspath(path)
+    with _sinks_lock:
+        sink = _sinks.get(key)
+        if sink is not None and not sink._closed and "a" not in mode:
+            sink.close()
+        if sink is None or sink._closed:
+            sink = _sinks[key] = LogSink(path, mode=mode, **kwargs)
+        return sink
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+多关键字匹配（Aho–Corasick 自动机）
+============================================================
+压力测试脚本对每行日志依次执行 `for kw in INFO_KEYWORDS` / `for kw in EXCEPTION_KEYWORDS`
+以及 ERROR/CRITICAL 的 `in` 判断，代价为 行数 × 关键字数。KeywordMatcher 把所有类别的
+关键字一次编译成一个自动机（转移表已补全失配跳转，即 DFA），每行只扫描一遍，
+同时给出所有类别的命中结果：
+
+    matcher = KeywordMatcher({
+        "INFO": INFO_KEYWORDS,
+        "EXCEPTION": EXCEPTION_KEYWORDS,
+        "ERROR": [ERROR_CONFIG["keyword"]],
+    })
+    hits = matcher.scan(line_check)   # {"INFO": ["voice_msgnum"], ...}，未命中的类别不出现
+
+与原脚本 `kw in line` 的语义一致：同一关键字在一行中出现多次只报一次，
+命中列表按关键字在配置中的顺序排列。binary=True 时文本为 bytes（stress.normalize.normalize
+的输出），关键字按 UTF-8 编码后参与匹配，scan() 仍返回原来的 str 关键字，便于写日志。
+bytes 的 `in` 每次都要走缓冲区协议，短行上比 str 慢约 5 倍，因此 binary 模式下文本与关键字
+都按 latin-1 映射为 str（逐字节 1:1，不改变匹配语义），每行只多一次 C 层拷贝。
+
+纯 Python 的自动机逐字符推进，关键字很少时反而慢于 C 实现的 `in`
+（benchmarks/bench_matcher.py：8 个关键字约慢 4 倍，60 个左右持平，1000 个快约 30 倍）。
+因此关键字数不超过 AUTOMATON_THRESHOLD 时 find() 退化为逐个 `in`，结果完全相同；
+automaton=True/False 可强制指定。
+"""
+
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set
+
+AUTOMATON_THRESHOLD = 48    # 关键字数超过该值时使用自动机
+
+
+class KeywordMatcher:
+    def __init__(self, categories: Dict[str, Iterable], automaton: Optional[bool] = None,
+                 binary: bool = False):
+        self.keywords = []          # [(类别, 关键字)]，按配置顺序
+        seen = set()
+        for cat, words in categories.items():
+            for kw in words:
+                if kw and (cat, kw) not in seen:
+                    seen.add((cat, kw))
+                    self.keywords.append((cat, kw))
+        if automaton is None:
+            automaton = len(self.keywords) > AUTOMATON_THRESHOLD
+        self.automaton = automaton
+        self.binary = binary
+        self._patterns = [self._to_latin1(kw) if binary else kw for _, kw in self.keywords]
+        self._words = tuple(enumerate(self._patterns))
+        self._build()
+
+    @staticmethod
+    def _to_latin1(kw) -> str:
+        if isinstance(kw, str):
+            kw = kw.encode("utf-8")
+        return kw.decode("latin-1")
+
+    # ---------------- 构建 ----------------
+    def _build(self):
+        goto = [{}]
+        out = [[]]
+        for idx, kw in enumerate(self._patterns):
+            s = 0
+            for ch in kw:
+                nxt = goto[s].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[s][ch] = nxt
+                    goto.append({})
+                    out.append([])
+                s = nxt
+            out[s].append(idx)
+
+        # BFS 计算失配指针，并把失配跳转直接展开进转移表
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        delta = [dict(goto[0])] + [None] * (len(goto) - 1)
+        while queue:
+            s = queue.popleft()
+            f = fail[s]
+            if out[f]:
+                out[s] = out[s] + out[f]
+            row = dict(delta[f])
+            row.update(goto[s])
+            delta[s] = row
+            for ch, nxt in goto[s].items():
+                queue.append(nxt)
+                fail[nxt] = delta[f].get(ch, 0)
+
+        self._delta = delta
+        self._out = [tuple(sorted(set(o))) for o in out]
+        self.states = len(goto)
+
+    # ---------------- 匹配 ----------------
+    def find(self, text) -> List[int]:
+        """返回命中关键字的下标（self.keywords 中的位置，升序）"""
+        if self.binary:
+            text = text.decode("latin-1")
+        if not self.automaton:
+            return [idx for idx, kw in self._words if kw in text]
+        delta = self._delta
+        out = self._out
+        hits = set()
+        s = 0
+        for ch in text:
+            s = delta[s].get(ch, 0)
+            o = out[s]
+            if o:
+                hits.update(o)
+        return sorted(hits)
+
+    def scan(self, text) -> Dict[str, List]:
+        """{类别: [命中的关键字]}，只包含有命中的类别"""
+        result: Dict[str, List] = {}
+        keywords = self.keywords
+        for idx in self.find(text):
+            cat, kw = keywords[idx]
+            if cat in result:
+                result[cat].append(kw)
+            else:
+                result[cat] = [kw]
+        return result
+
+    def categories(self, text) -> Set[str]:
+        """命中的类别集合"""
+        return {self.keywords[idx][0] for idx in self.find(text)}
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+多 DUT 并行执行
+============================================================
+AutoTester.run_cases 一次只跑一个串口，夹具架上 8 块板要手工开 8 个脚本副本。
+run_ports 把用例表分发到多个串口并行执行：
+
+- replicate : 每个 DUT 跑完整用例表（同一批用例在多块板上对比）
+- shard     : 用例轮流分给各 DUT，每条只跑一次（总耗时约为单板的 1/N）
+
+每个 DUT 默认在独立进程中运行（ProcessPoolExecutor）：DLL 后端的 g_ppx_ble_data /
+g_ppx_region_data 是进程级全局变量，同一进程内多个串口会互相覆盖。纯 Python 后端每个
+编解码器各有一份状态，也可以 use_processes=False 在线程中运行。
+
+worker(port, cases, out_dir, options) 由脚本提供，必须是模块级函数（进程池按名称导入），
+在 out_dir（<输出目录>/<端口名>/）下写该 DUT 自己的 raw.log / results.csv / report.html，
+返回结果列表（AutoTester.results）。
+
+merge_results 按 case_id 合并成一行一条用例、每个 DUT 一组列（端口:verdict、端口:elapsed_s），
+save_merged_csv / save_merged_html 输出汇总报告。
+"""
+
+import csv
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+MODE_REPLICATE = "replicate"
+MODE_SHARD = "shard"
+MODES = (MODE_REPLICATE, MODE_SHARD)
+
+
+class PortRun(NamedTuple):
+    port: str
+    results: List[Dict[str, Any]]
+    elapsed: float          # 该 DUT 的执行耗时（秒）
+    error: str              # 初始化失败/异常时的说明，正常为空
+
+
+def parse_ports(text: str) -> List[str]:
+    """"COM1,COM2 COM3" -> ["COM1", "COM2", "COM3"]（去重，保持顺序）"""
+    ports = []
+    for port in re.split(r"[,\s;]+", text or ""):
+        if port and port not in ports:
+            ports.append(port)
+    return ports
+
+
+def port_dirname(port: str) -> str:
+    """端口名转为目录名：/dev/ttyUSB0 -> dev_ttyUSB0"""
+    return re.sub(r"[^0-9A-Za-z_.-]+", "_", port).strip("_") or "port"
+
+
+def to_rows(cases) -> List[Dict[str, Any]]:
+    """DataFrame（读表）或 list[dict]（make_combo_cases）统一为 list[dict]"""
+    rows = cases.to_dict(orient="records") if hasattr(cases, "to_dict") else list(cases)
+    # 没有 id 列时按原表顺序编号，分片后 case_id 仍对应原表
+    return [row if row.get("id") is not None else dict(row, id=i) for i, row in enumerate(rows, start=1)]
+
+
+def split_cases(rows: List[Dict[str, Any]], ports: List[str], mode: str) -> Dict[str, List[Dict[str, Any]]]:
+    if mode not in MODES:
+        raise ValueError(f"未知的分发方式: {mode}（可选 {'/'.join(MODES)}）")
+    if mode == MODE_REPLICATE:
+        return {port: rows for port in ports}
+    return {port: rows[i::len(ports)] for i, port in enumerate(ports)}
+
+
+def _run_one(worker: Callable, port: str, rows, out_dir: str, options: Dict[str, Any]):
+    t0 = time.perf_counter()
+    results = worker(port, rows, out_dir, options)
+    return results, time.perf_counter() - t0
+
+
+def run_ports(worker: Callable, ports: List[str], cases, out_dir: str, mode: str = MODE_REPLICATE,
+              options: Optional[Dict[str, Any]] = None, use_processes: bool = True,
+              on_done: Optional[Callable[[PortRun], None]] = None) -> List[PortRun]:
+    """并行执行，返回按 ports 顺序排列的 PortRun；某个 DUT 失败不影响其他 DUT"""
+    shards = split_cases(to_rows(cases), ports, mode)
+    pool_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    runs: Dict[str, PortRun] = {}
+    with pool_cls(max_workers=len(ports)) as pool:
+        futures = {
+            pool.submit(_run_one, worker, port, shards[port],
+                        os.path.join(out_dir, port_dirname(port)), options or {}): port
+            for port in ports
+        }
+        for fut in as_completed(futures):
+            port = futures[fut]
+            try:
+                results, elapsed = fut.result()
+                run = PortRun(port, list(results or []), elapsed, "")
+            except Exception as e:
+                run = PortRun(port, [], 0.0, f"{type(e).__name__}: {e}")
+            runs[port] = run
+            if on_done:
+                on_done(run)
+    return [runs[port] for port in ports]
+
+
+# ==============================================
+# 汇总
+# ==============================================
+def summarize(run: PortRun) -> Dict[str, Any]:
+    total = len(run.results)
+    passed = sum(1 for r in run.results if r.get("verdict") == "PASS")
+    return {
+        "port": run.port,
+        "total": total,
+        "passed": passed,
+        "failed": total - passed,
+        "pass_rate": passed / total * 100 if total else 0.0,
+        "elapsed_s": round(run.elapsed, 3),
+        "cases_per_s": total / run.elapsed if run.elapsed > 0 else 0.0,
+        "error": run.error,
+    }
+
+
+def merge_results(runs: List[PortRun], fields: List[str]) -> List[Dict[str, Any]]:
+    """
+    按 case_id 合并：fields 为用例参数列（取第一个 DUT 的值），每个 DUT 一组
+    "<端口>:verdict" / "<端口>:elapsed_s" 列，verdict 为所有执行过该用例的 DUT 均 PASS 时 PASS
+    """
+    merged: Dict[Any, Dict[str, Any]] = {}
+    for run in runs:
+        for r in run.results:
+            row = merged.get(r.get("case_id"))
+            if row is None:
+                row = merged[r.get("case_id")] = {"case_id": r.get("case_id"), "comment": r.get("comment", "")}
+                row.update({k: r.get(k) for k in fields})
+            row[f"{run.port}:verdict"] = r.get("verdict")
+            row[f"{run.port}:elapsed_s"] = r.get("elapsed_s")
+    ports = [run.port for run in runs]
+    for row in merged.values():
+        verdicts = [row[f"{p}:verdict"] for p in ports if f"{p}:verdict" in row]
+        row["verdict"] = "PASS" if verdicts and all(v == "PASS" for v in verdicts) else "FAIL"
+    return sorted(merged.values(), key=lambda row: _sort_key(row["case_id"]))
+
+
+def _sort_key(case_id):
+    return (0, case_id, "") if isinstance(case_id, (int, float)) else (1, 0, str(case_id))
+
+
+def save_merged_csv(path: str, rows: List[Dict[str, Any]], ports: List[str], fields: List[str]):
+    keys = ["case_id", "comment"] + list(fields)
+    for port in ports:
+        keys += [f"{port}:verdict", f"{port}:elapsed_s"]
+    keys.append("verdict")
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=keys)
+        w.writeheader()
+        for r in rows:
+            w.writerow({k: r.get(k, "") for k in keys})
+
+
+def _esc(x: Any) -> str:
+    s = str(x if x is not None else "")
+    return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _verdict_cell(v: Any) -> str:
+    if v is None:
+        return "<td></td>"
+    color = "green" if v == "PASS" else "red"
+    return f"<td><b style='color:{color}'>{_esc(v)}</b></td>"
+
+
+def save_merged_html(path: str, rows: List[Dict[str, Any]], runs: List[PortRun], fields: List[str],
+                     title: str = "多 DUT 汇总报告", mode: str = MODE_REPLICATE, wall_s: float = 0.0):
+    ports = [run.port for run in runs]
+    total = len(rows)
+    passed = sum(1 for r in rows if r.get("verdict") == "PASS")
+    executed = sum(len(run.results) for run in runs)
+
+    dut_rows = []
+    for run in runs:
+        s = summarize(run)
+        dut_rows.append(
+            "<tr>" + "".join([
+                f"<td>{_esc(s['port'])}</td>",
+                f"<td>{s['total']}</td>",
+                f"<td style='color:green'>{s['passed']}</td>",
+                f"<td style='color:red'>{s['failed']}</td>",
+                f"<td>{s['pass_rate']:.2f}%</td>",
+                f"<td>{s['elapsed_s']}</td>",
+                f"<td>{s['cases_per_s']:.1f}</td>",
+                f"<td style='color:red'>{_esc(s['error'])}</td>",
+            ]) + "</tr>")
+
+    case_rows = []
+    for r in rows:
+        cells = [f"<td>{_esc(r.get('case_id'))}</td>", f"<td>{_esc(r.get('comment'))}</td>"]
+        cells += [f"<td>{_esc(r.get(k))}</td>" for k in fields]
+        cells += [_verdict_cell(r.get(f"{p}:verdict")) for p in ports]
+        cells.append(_verdict_cell(r.get("verdict")))
+        case_rows.append("<tr>" + "".join(cells) + "</tr>")
+
+    head = "".join(f"<th>{_esc(k)}</th>" for k in ["ID", "备注"] + list(fields) + ports + ["结论"])
+    rate = executed / wall_s if wall_s > 0 else 0.0
+    html = f"""<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8" />
+<title>{_esc(title)}</title>
+<style>
+body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Arial, 'PingFang SC', 'Microsoft YaHei', sans-serif; margin: 24px; }}
+.kpi span {{ display: inline-block; margin-right: 16px; padding: 6px 10px; border-radius: 8px; background: #f2f2f2; }}
+table {{ border-collapse: collapse; width: 100%; font-size: 14px; margin-top: 16px; }}
+th, td {{ border: 1px solid #ddd; padding: 6px 8px; text-align: left; vertical-align: top; }}
+th {{ background: #fafafa; position: sticky; top: 0; }}
+tr:nth-child(even) {{ background: #fcfcfc; }}
+</style>
+</head>
+<body>
+<h1>{_esc(title)}</h1>
+<div>执行时间：{_esc(time.strftime('%Y-%m-%d %H:%M:%S'))} ｜ 分发方式：{_esc(mode)} ｜ DUT 数：{len(ports)}</div>
+<div class="kpi" style="margin:8px 0 16px">
+  <span>用例：<b>{total}</b></span>
+  <span>全部 DUT 通过：<b style="color:green">{passed}</b></span>
+  <span>存在失败：<b style="color:red">{total - passed}</b></span>
+  <span>总执行次数：<b>{executed}</b></span>
+  <span>总耗时：<b>{wall_s:.1f}s</b>（{rate:.1f} 条/s）</span>
+</div>
+<h3>各 DUT 统计</h3>
+<table>
+<thead><tr><th>端口</th><th>用例数</th><th>通过</th><th>失败</th><th>通过率</th><th>耗时(s)</th><th>条/s</th><th>错误</th></tr></thead>
+<tbody>{''.join(dut_rows)}</tbody>
+</table>
+<h3>用例结果（每个 DUT 一列）</h3>
+<table>
+<thead><tr>{head}</tr></thead>
+<tbody>{''.join(case_rows)}</tbody>
+</table>
+</body>
+</html>
+"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(html)
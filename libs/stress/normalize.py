@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+日志行归一化（字节级）
+============================================================
+脚本原来对每行日志依次执行 decode → ansi_escape.sub → lower() → replace(" ", "")，
+整轮文本在判定时还要再 lower()/replace() 一遍，每行 3~5 次整串拷贝。
+
+normalize() 直接作用于串口读到的原始字节（解码之前）：
+
+- 仅当行内含 ESC 时才做 CSI/ANSI 转义剥离（正则与脚本中的 ansi_escape 相同）
+- ASCII 大小写折叠与删除空格由一次 bytes.translate 完成（C 实现，单次遍历）
+
+GB2312/UTF-8 多字节字符的字节都 >= 0x80，不受大小写折叠影响。
+关键字匹配直接在归一化字节上进行（KeywordMatcher(..., binary=True)），
+原始行保留用于日志记录，只有真正需要打印时才用 display() 解码。
+"""
+
+import re
+
+ANSI_ESCAPE = re.compile(rb'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+
+_FOLD = bytes.maketrans(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ", b"abcdefghijklmnopqrstuvwxyz")
+
+
+def normalize(raw: bytes) -> bytes:
+    """去 ANSI 转义、ASCII 转小写、删除空格"""
+    if b"\x1b" in raw:
+        raw = ANSI_ESCAPE.sub(b"", raw)
+    return raw.translate(_FOLD, b" ")
+
+
+def strip_ansi(raw: bytes) -> bytes:
+    return ANSI_ESCAPE.sub(b"", raw) if b"\x1b" in raw else raw
+
+
+def display(raw: bytes, encoding: str = "gb2312") -> str:
+    """原始行 -> 用于日志记录的文本（去 ANSI、解码、去首尾空白）"""
+    return strip_ansi(raw).decode(encoding, errors="replace").strip()
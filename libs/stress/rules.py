@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+滑动窗口规则引擎
+============================================================
+各压力测试脚本原来各自硬编码一两条频率规则（ERROR_CONFIG 3 秒 3 次、CRITICAL_CONFIG
+1 秒 3 次 / 使能版本 1 秒 5 次），每条规则一个 deque + check_frequency / ErrorCounter。
+RuleEngine 把规则改为声明式配置：
+
+    RULES = [
+        {"name": "ERROR", "keywords": ["param is invalid"], "window": 3.0, "count": 3, "action": "stop"},
+        {"name": "CRITICAL", "keywords": ["[E/motor] reg_addr(00) is unviald"], "window": 1.0,
+         "count": 3, "action": "stop", "powered_only": True},
+    ]
+
+字段说明：
+
+- keywords     : 任一关键字命中计一次；按 normalize 的规则转小写、去空格后匹配
+- window/count : window 秒内命中 count 次触发
+- action       : stop（停止测试）/ alert（弹窗提醒）/ tag（标记本轮）/ power_cycle（立即断电进入下一轮）
+- powered_only : 仅在继电器上电期间触发（计数照常进行）
+- per_cycle    : 每轮开始时清零窗口（start_cycle）
+
+关键字不单独扫描：engine.categories 并入脚本的行匹配器（stress.matcher.KeywordMatcher），
+每行扫描一遍后把命中结果交给 feed()。每条规则只保留最近 count 个时间戳（deque(maxlen=count)），
+判断 "最早一个是否仍在窗口内"，每次命中 O(1)；没有命中的规则不产生任何开销，
+因此几百条规则时的代价几乎全在一次自动机扫描上。规则触发后窗口清零，需重新累计。
+
+规则可来自 JSON 文件（顶层为规则列表），reload_if_changed() 按修改时间热加载，
+脚本在每轮开始前调用；文件有误时抛出 ValueError 并保留原规则（同一版本文件只报一次）。
+各脚本的规则文件放在脚本旁、按脚本名命名（<脚本名>.rules.json），互不覆盖；
+describe_source() 说明当前生效的是内置规则还是哪个文件，脚本启动时记录一次。
+"""
+
+import json
+import os
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+ACTION_STOP = "stop"
+ACTION_ALERT = "alert"
+ACTION_TAG = "tag"
+ACTION_POWER_CYCLE = "power_cycle"
+ACTIONS = (ACTION_STOP, ACTION_ALERT, ACTION_TAG, ACTION_POWER_CYCLE)
+
+CATEGORY_PREFIX = "RULE:"   # 规则在共享匹配器中的类别名前缀
+
+
+class Rule(NamedTuple):
+    name: str
+    keywords: Tuple[str, ...]
+    window: float
+    count: int
+    action: str = ACTION_STOP
+    powered_only: bool = False
+    per_cycle: bool = False
+
+    @property
+    def category(self) -> str:
+        return CATEGORY_PREFIX + self.name
+
+    def describe(self) -> str:
+        return f"{self.window}秒内出现{self.count}次 {'/'.join(self.keywords)}"
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Rule":
+        unknown = set(d) - set(cls._fields)
+        if unknown:
+            raise ValueError(f"规则 {d.get('name')!r} 含未知字段: {sorted(unknown)}")
+        try:
+            name = str(d["name"])
+            words = d["keywords"]
+            window = float(d["window"])
+            count = int(d["count"])
+        except KeyError as e:
+            raise ValueError(f"规则 {d.get('name')!r} 缺少字段: {e.args[0]}") from None
+        if isinstance(words, str):
+            words = [words]
+        keywords = tuple(kw.lower().replace(" ", "") for kw in words if kw.strip())
+        action = d.get("action", ACTION_STOP)
+        if not keywords:
+            raise ValueError(f"规则 {name!r} 没有关键字")
+        if window <= 0 or count < 1:
+            raise ValueError(f"规则 {name!r} 的 window/count 无效: {window}/{count}")
+        if action not in ACTIONS:
+            raise ValueError(f"规则 {name!r} 的 action 无效: {action!r}（可选 {', '.join(ACTIONS)}）")
+        return cls(name, keywords, window, count, action,
+                   bool(d.get("powered_only", False)), bool(d.get("per_cycle", False)))
+
+
+class RuleEvent(NamedTuple):
+    rule: Rule
+    count: int          # 当前窗口内的命中次数（含本次）
+    fired: bool         # 本次是否达到阈值并触发
+
+
+class RuleEngine:
+    def __init__(self, rules: Iterable[Union[Rule, dict]] = (), path: Optional[str] = None):
+        """rules: 默认规则；path: JSON 规则文件，存在时覆盖默认规则并支持热加载"""
+        self.path = path
+        self.version = 0            # 规则每变更一次加 1，脚本据此重建行匹配器
+        self._mtime = None
+        self.loaded_path: Optional[str] = None     # 最近一次成功加载的规则文件
+        self.rules: List[Rule] = []
+        self._by_category: Dict[str, Rule] = {}
+        self._windows: Dict[str, deque] = {}
+        self.load(rules)
+        if path:
+            self.reload_if_changed()
+
+    # ---------------- 规则管理 ----------------
+    def load(self, rules: Iterable[Union[Rule, dict]]):
+        """替换全部规则；定义未变的规则保留当前窗口计数"""
+        parsed = [r if isinstance(r, Rule) else Rule.from_dict(r) for r in rules]
+        names = [r.name for r in parsed]
+        if len(set(names)) != len(names):
+            raise ValueError(f"规则名重复: {sorted({n for n in names if names.count(n) > 1})}")
+
+        old_rules = self._by_category
+        old_windows = self._windows
+        self.rules = parsed
+        self._by_category = {r.category: r for r in parsed}
+        self._windows = {}
+        for r in parsed:
+            prev = old_rules.get(r.category)
+            if prev is not None and prev.window == r.window and prev.count == r.count:
+                self._windows[r.category] = old_windows[r.category]
+            else:
+                self._windows[r.category] = deque(maxlen=r.count)
+        self.version += 1
+
+    def reload_if_changed(self) -> bool:
+        """规则文件修改过则重新加载，返回是否已更新；文件有误时抛出 ValueError，原规则不变"""
+        if not self.path:
+            return False
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if not isinstance(data, list):
+                raise ValueError("规则文件顶层必须是列表")
+            self.load(data)
+        except (OSError, ValueError, TypeError) as e:
+            raise ValueError(f"规则文件 {self.path} 加载失败，沿用原规则: {e}") from None
+        self.loaded_path = self.path
+        return True
+
+    def describe_source(self) -> str:
+        if self.loaded_path:
+            return f"规则文件 {os.path.abspath(self.loaded_path)} 覆盖内置规则，共 {len(self.rules)} 条"
+        if self.path:
+            return f"使用内置规则 {len(self.rules)} 条（未找到规则文件 {os.path.abspath(self.path)}）"
+        return f"使用内置规则 {len(self.rules)} 条"
+
+    @property
+    def categories(self) -> Dict[str, Tuple[str, ...]]:
+        """并入行匹配器的关键字类别 {CATEGORY_PREFIX + 规则名: 关键字}"""
+        return {r.category: r.keywords for r in self.rules}
+
+    # ---------------- 计数 ----------------
+    def feed(self, hits: Dict[str, list], now: float, powered: bool = True) -> List[RuleEvent]:
+        """
+        hits: 行匹配器 scan() 的结果（其他类别会被忽略）；now: 当前时间（秒）
+        返回本行命中的规则事件，fired=True 的需要执行对应 action
+        """
+        events = []
+        for cat in hits:
+            rule = self._by_category.get(cat)
+            if rule is None:
+                continue
+            stamps = self._windows[cat]
+            stamps.append(now)
+            limit = now - rule.window
+            if len(stamps) == rule.count and stamps[0] >= limit and (powered or not rule.powered_only):
+                stamps.clear()
+                events.append(RuleEvent(rule, rule.count, True))
+                continue
+            n = 0
+            for t in reversed(stamps):
+                if t < limit:
+                    break
+                n += 1
+            events.append(RuleEvent(rule, n, False))
+        return events
+
+    def start_cycle(self):
+        """新一轮开始：清零 per_cycle 规则的窗口"""
+        for r in self.rules:
+            if r.per_cycle:
+                self._windows[r.category].clear()
+
+    def reset(self):
+        for stamps in self._windows.values():
+            stamps.clear()
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+控制台实时状态行
+============================================================
+压力测试脚本每轮向控制台打印多行（循环序号、继电器动作、判定结果、成功率……）。
+十万轮以上时 Windows 控制台输出本身就占了可观的循环时间，有用的历史也被冲出缓冲区。
+
+StatusLine 在控制台只维护一行状态，按固定频率（默认 4 次/秒）原地重绘：
+
+    第 1234/100000 轮 | 0.14 轮/s | 成功率 99.84% | 剩余 8天03:12:45 | 最近异常: [12:01:33] 本轮失败 ...
+
+- update(done, ok)        : 每轮结束时更新计数；是否重绘由频率限制决定，调用代价很低
+- refresh()               : 长时间监控循环中调用，使速率/ETA 在一轮内也能刷新
+- error(msg)              : 记录最近一次异常，显示在状态行末尾
+- print(text)             : 需要保留在控制台历史中的少量消息（先清掉状态行，打印后重绘）
+- close()                 : 最后重绘一次并换行
+
+逐轮的详细日志只写入文件：logging 脚本用 route_console(logger, status) 把控制台 handler
+换成 StatusLogHandler（WARNING 及以上进入"最近异常"，其余不上控制台），返回值用于恢复。
+
+统计（速率、ETA）使用脚本的时钟（可为 VirtualClock），重绘频率限制始终按真实时间。
+输出不是终端（重定向到文件/管道）时不做原地重绘，改为每 plain_interval 秒输出一整行。
+"""
+
+import logging
+import shutil
+import sys
+import time
+import unicodedata
+from typing import Callable, Optional
+
+from .clock import SYSTEM_CLOCK
+
+DEFAULT_INTERVAL = 0.25         # 重绘间隔（秒），即 4 Hz
+DEFAULT_PLAIN_INTERVAL = 30.0   # 非终端输出时的整行输出间隔（秒）
+
+
+def display_width(text: str) -> int:
+    """控制台显示宽度（中文等全角字符占 2 列）"""
+    return sum(2 if unicodedata.east_asian_width(ch) in "WF" else 1 for ch in text)
+
+
+def fit_width(text: str, width: int) -> str:
+    """截断到不超过 width 列"""
+    if display_width(text) <= width:
+        return text
+    out = []
+    used = 0
+    for ch in text:
+        w = 2 if unicodedata.east_asian_width(ch) in "WF" else 1
+        if used + w > width - 1:
+            break
+        out.append(ch)
+        used += w
+    return "".join(out) + "…"
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    days, seconds = divmod(seconds, 86400)
+    h, seconds = divmod(seconds, 3600)
+    m, s = divmod(seconds, 60)
+    return f"{days}天{h:02d}:{m:02d}:{s:02d}" if days else f"{h:02d}:{m:02d}:{s:02d}"
+
+
+class StatusLine:
+    def __init__(self, total: Optional[int] = None, clock=SYSTEM_CLOCK, stream=None,
+                 interval: float = DEFAULT_INTERVAL, plain_interval: float = DEFAULT_PLAIN_INTERVAL,
+                 label: str = "轮"):
+        self.total = total
+        self.clock = clock
+        self.stream = stream or sys.stdout
+        self.label = label
+        try:
+            self.live = self.stream.isatty()
+        except (AttributeError, ValueError):
+            self.live = False
+        self.interval = interval if self.live else plain_interval
+        self.done = 0
+        self.ok = None              # 成功轮数（None 时不显示成功率）
+        self.rated = None           # 计入成功率的轮数（默认等于 done）
+        self.counters = {}          # 额外显示的计数，如 {"复位": 3}
+        self.last_error = ""
+        self.redraws = 0
+        self._start = clock.time()
+        self._last_draw = 0.0       # 上次重绘的真实时间
+        self._drawn = 0             # 当前状态行占用的列数
+
+    # ---------------- 更新 ----------------
+    def update(self, done: Optional[int] = None, ok: Optional[int] = None,
+               rated: Optional[int] = None, counters: Optional[dict] = None, force: bool = False):
+        """rated: 计入成功率的轮数（如排除复位轮）；counters: 额外显示的计数 {"复位": 3}"""
+        if done is not None:
+            self.done = done
+        if ok is not None:
+            self.ok = ok
+        if rated is not None:
+            self.rated = rated
+        if counters:
+            self.counters.update(counters)
+        self.refresh(force)
+
+    def error(self, message: str):
+        self.last_error = f"[{self.clock.now().strftime('%H:%M:%S')}] {' '.join(message.split())}"
+        self.refresh()
+
+    def refresh(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last_draw < self.interval:
+            return
+        self._last_draw = now
+        self._draw(self.render())
+
+    # ---------------- 输出 ----------------
+    def render(self) -> str:
+        elapsed = self.clock.time() - self._start
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        parts = [f"第 {self.done}/{self.total} {self.label}" if self.total else f"第 {self.done} {self.label}",
+                 f"{rate:.2f} {self.label}/s"]
+        rated = self.done if self.rated is None else self.rated
+        if self.ok is not None and rated > 0:
+            parts.append(f"成功率 {self.ok / rated * 100:.2f}%")
+        parts.extend(f"{k} {v}" for k, v in self.counters.items())
+        if self.total and rate > 0:
+            parts.append(f"剩余 {format_duration((self.total - self.done) / rate)}")
+        else:
+            parts.append(f"已运行 {format_duration(elapsed)}")
+        if self.last_error:
+            parts.append(f"最近异常: {self.last_error}")
+        return " | ".join(parts)
+
+    def _columns(self) -> int:
+        return shutil.get_terminal_size((120, 20)).columns - 1
+
+    def _draw(self, text: str):
+        self.redraws += 1
+        if not self.live:
+            self.stream.write(text + "\n")
+            self.stream.flush()
+            return
+        text = fit_width(text, self._columns())
+        width = display_width(text)
+        # 只用 \r + 空格覆盖，不依赖 ANSI 清行（旧版 Windows 控制台不支持）
+        self.stream.write("\r" + text + " " * max(self._drawn - width, 0))
+        self.stream.flush()
+        self._drawn = width
+
+    def _clear(self):
+        if self.live and self._drawn:
+            self.stream.write("\r" + " " * self._drawn + "\r")
+            self._drawn = 0
+
+    def print(self, text: str):
+        """输出一条保留在控制台历史中的消息，状态行随后重绘"""
+        self._clear()
+        self.stream.write(text + "\n")
+        self._last_draw = time.monotonic()
+        if self.live:
+            self._draw(self.render())
+        else:
+            self.stream.flush()
+
+    def close(self):
+        self._draw(self.render())
+        if self.live:
+            self.stream.write("\n")
+            self.stream.flush()
+            self._drawn = 0
+
+
+class StatusLogHandler(logging.Handler):
+    """替代控制台 handler：达到 level 的记录作为状态行的"最近异常"，其余只进文件 handler"""
+
+    def __init__(self, status: StatusLine, level: int = logging.WARNING):
+        super().__init__(level)
+        self.status = status
+
+    def emit(self, record):
+        try:
+            self.status.error(record.getMessage())
+        except Exception:
+            self.handleError(record)
+
+
+def route_console(logger: logging.Logger, status: StatusLine,
+                  level: int = logging.WARNING) -> Callable[[], None]:
+    """把 logger 的控制台 StreamHandler 换成 StatusLogHandler，返回恢复函数"""
+    console = [h for h in logger.handlers if type(h) is logging.StreamHandler]
+    for h in console:
+        logger.removeHandler(h)
+    handler = StatusLogHandler(status, level)
+    logger.addHandler(handler)
+
+    def restore():
+        logger.removeHandler(handler)
+        for h in console:
+            logger.addHandler(h)
+
+    return restore
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+单轮结果判定（增量状态机）
+============================================================
+脚本原来在监控期间把每行日志存入 collected_logs，本轮结束后 join 成整段文本，
+analyze_cycle_result 再对整段做一次关键字扫描。CycleVerdict 把判定条件表示为
+每个类别一个命中标志，随每行日志到达即时更新：
+
+    verdict = CycleVerdict(VERDICT_KEYWORDS)     # {"MotorOn": [...], "PM_ACC": [...], ...}
+    verdict.reset()                              # 每轮开始
+    verdict.feed(line_check)                     # 每行（normalize 后的字节）
+    verdict.passed, verdict.found                # 最后一行到达时结果已确定
+
+require="any"（默认）任一类别命中即成功，require="all" 要求全部类别命中。
+所有类别都已命中后 complete 为 True，后续行不再扫描；调用方也可据此提前结束本轮监控。
+关键字不会跨行匹配，与原先按 "\\n" 拼接后扫描的结果一致。
+"""
+
+from typing import Dict, Iterable, List
+
+from .matcher import KeywordMatcher
+
+REQUIRE_ANY = "any"
+REQUIRE_ALL = "all"
+
+
+class CycleVerdict:
+    def __init__(self, categories: Dict[str, Iterable], require: str = REQUIRE_ANY,
+                 binary: bool = True):
+        if require not in (REQUIRE_ANY, REQUIRE_ALL):
+            raise ValueError(f"require 只能是 'any' 或 'all': {require!r}")
+        self.require = require
+        self.matcher = KeywordMatcher(categories, binary=binary)
+        self.names = [cat for cat, words in categories.items() if any(words)]
+        self.lines = 0              # 本轮已喂入的行数
+        self.reset()
+
+    def reset(self):
+        """开始新的一轮"""
+        self._hit = set()
+        self.lines = 0
+        self.complete = not self.names
+
+    def feed(self, line) -> bool:
+        """喂入一行，返回当前是否已判定成功"""
+        self.lines += 1
+        if not self.complete:
+            hit = self._hit
+            for cat in self.matcher.categories(line):
+                hit.add(cat)
+            self.complete = len(hit) == len(self.names)
+        return self.passed
+
+    @property
+    def passed(self) -> bool:
+        if self.require == REQUIRE_ALL:
+            return self.complete and bool(self.names)
+        return bool(self._hit)
+
+    @property
+    def found(self) -> List[str]:
+        """已命中的类别，按配置顺序"""
+        return [cat for cat in self.names if cat in self._hit]
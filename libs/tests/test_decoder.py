@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""stress.decoder：会话编码检测（python -m pytest libs/tests）"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from stress.decoder import StreamDecoder, UTF8, GB  # noqa: E402
+
+BOOT_LOG = b"\x1b[32m[I/voice] voice_msg num: 9\x1b[0m\r\n"
+
+
+def test_ascii_prefix_does_not_lock():
+    dec = StreamDecoder()
+    dec.feed(BOOT_LOG * 200)    # 超过 sample_size 的纯 ASCII
+    assert not dec.locked
+    assert dec.encoding == UTF8
+
+
+def test_ascii_prefix_then_utf8_chinese():
+    dec = StreamDecoder()
+    dec.feed(BOOT_LOG * 200)
+    line = "断言失败 assertion failed".encode("utf-8")
+    assert dec.feed(line + b"\r\n") == [line + b"\r"]
+    assert dec.decode(line) == "断言失败 assertion failed"
+
+
+def test_ascii_prefix_then_gb2312_locks_gb18030():
+    dec = StreamDecoder()
+    dec.feed(BOOT_LOG * 200)
+    dec.feed(("参数无效，电机寄存器读取失败 " * 4).encode("gb2312") + b"\r\n")
+    assert dec.locked
+    assert dec.encoding == GB
+
+
+def test_utf8_char_split_across_reads():
+    dec = StreamDecoder()
+    data = BOOT_LOG * 10 + "语音提示 9\r\n".encode("utf-8")
+    cut = len(BOOT_LOG) * 10 + 2    # 切在第一个汉字中间
+    text = dec.text(data[:cut]) + dec.text(data[cut:], final=True)
+    assert text.endswith("语音提示 9\r\n")
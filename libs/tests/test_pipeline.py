@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""ppx.pipeline：应答匹配、缺失/超时重发、过期占位与可选校验（python -m pytest libs/tests）"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from emulator.ble import BleEmulator  # noqa: E402
+from emulator.transport import LoopPort  # noqa: E402
+from ppx.codec import packet_format  # noqa: E402
+from ppx.deframer import Deframer, READ_POLL  # noqa: E402
+from ppx.pipeline import Pipeline, readback_check  # noqa: E402
+from ppx.structs import (  # noqa: E402
+    PPX_CMD_REQ, PPX_CMD_RSP, PPX_ID_BLE, PPX_MSG_READ, PPX_MSG_WRITE,
+    PPX_BLE_LED_MSG_REG, PPX_BLE_STATUS_REG,
+)
+
+TIMEOUT = 0.05
+
+
+class ScriptedBle(BleEmulator):
+    """
+    按请求序号（从 0 起，含重发）控制应答：
+    drop  : 序号集合或 (序号, 请求帧) -> bool，命中时设备照常处理但不回应答
+    ack   : 写应答只回寄存器地址、不回显写入值（实测设备可能的应答方式）
+    extra : 序号 -> 附加在该应答前的多余帧
+    """
+
+    def __init__(self, drop=(), ack=False, extra=None):
+        super().__init__()
+        self.drop = drop if callable(drop) else (lambda n, frame, s=set(drop): n in s)
+        self.ack = ack
+        self.extra = extra or {}
+        self.count = 0
+
+    def handle(self, frame):
+        n, self.count = self.count, self.count + 1
+        resp = super().handle(frame)
+        if self.ack and frame.cmd == PPX_MSG_WRITE:
+            resp = packet_format(PPX_CMD_RSP, self.dev_id, frame.cmd, frame.data[:1])
+        if self.drop(n, frame):
+            resp = b""
+        return self.extra.get(n, b"") + resp
+
+
+def led_size():
+    offsets = BleEmulator().offsets
+    return offsets[PPX_BLE_LED_MSG_REG + 1] - offsets[PPX_BLE_LED_MSG_REG]
+
+
+def write_frame(value: int) -> bytes:
+    payload = bytes((PPX_BLE_LED_MSG_REG,)) + bytes((value,)) * led_size()
+    return packet_format(PPX_CMD_REQ, PPX_ID_BLE, PPX_MSG_WRITE, payload)
+
+
+def read_frame() -> bytes:
+    return packet_format(PPX_CMD_REQ, PPX_ID_BLE, PPX_MSG_READ, bytes((PPX_BLE_LED_MSG_REG,)))
+
+
+def run(device, count, depth=8, retries=2, check=None):
+    """提交 count 组 写 + 回读（第 i 组写入值 i + 1），返回 (流水线, 事务列表, 完成顺序)"""
+    pipe = Pipeline(LoopPort(device, timeout=READ_POLL), Deframer(dev_id=PPX_ID_BLE),
+                    depth=depth, timeout=TIMEOUT, retries=retries)
+    order = []
+    reqs = [pipe.submit([write_frame(i + 1), read_frame()], tag=i, check=check,
+                        on_done=lambda req: order.append(req.tag))
+            for i in range(count)]
+    pipe.drain()
+    return pipe, reqs, order
+
+
+def assert_readback(req):
+    """回读到的是本组写入值"""
+    value = req.tag + 1
+    assert req.ok
+    assert req.responses[1].data == bytes((PPX_BLE_LED_MSG_REG,)) + bytes((value,)) * led_size()
+
+
+def test_no_loss_in_order():
+    pipe, reqs, order = run(ScriptedBle(), 4, depth=4)
+    for req in reqs:
+        assert_readback(req)
+        assert req.attempts == 1
+    assert order == [0, 1, 2, 3]
+    s = pipe.stats()
+    assert (s["sent"], s["completed"], s["failed"], s["retried"]) == (8, 4, 0, 0)
+    assert s["missing"] == s["out_of_order"] == s["stale"] == s["unmatched"] == s["mismatch"] == 0
+    assert s["max_inflight"] == 4 and s["inflight"] == 0
+
+
+def test_missing_read_reply_detected_by_later_reply():
+    # 请求 1 是第 0 组的回读：第 1 组的写应答到达时即判为缺失，不等超时
+    pipe, reqs, order = run(ScriptedBle(drop={1}), 4)
+    for req in reqs:
+        assert_readback(req)
+    assert reqs[0].attempts == 2
+    assert order == [1, 2, 3, 0]
+    s = pipe.stats()
+    assert (s["missing"], s["out_of_order"], s["retried"], s["stale"]) == (1, 1, 1, 0)
+    assert s["completed"] == 4 and s["inflight"] == 0
+
+
+def test_missing_write_reply_leaves_stale_placeholder():
+    # 第 0 组写应答丢失：回读应答到达时整组重发，这条回读属于上一次发送，计为过期
+    pipe, reqs, _ = run(ScriptedBle(drop={0}), 2)
+    for req in reqs:
+        assert_readback(req)
+    assert reqs[0].attempts == 2
+    s = pipe.stats()
+    assert (s["missing"], s["stale"], s["retried"]) == (1, 1, 1)
+    assert s["inflight"] == 0
+
+
+def test_last_reply_timeout_then_retry():
+    # 最后一帧应答丢失，后面没有应答可以揭示缺失，只能靠超时
+    pipe, reqs, _ = run(ScriptedBle(drop={1}), 1)
+    assert_readback(reqs[0])
+    assert reqs[0].attempts == 2
+    s = pipe.stats()
+    assert (s["missing"], s["out_of_order"], s["retried"]) == (1, 0, 1)
+
+
+def test_permanent_loss_fails_after_retries():
+    pipe, reqs, _ = run(ScriptedBle(drop=lambda n, frame: frame.cmd == PPX_MSG_READ), 1, retries=2)
+    req = reqs[0]
+    assert req.done and not req.ok
+    assert req.error == "应答超时"
+    assert req.attempts == 3
+    s = pipe.stats()
+    assert (s["sent"], s["completed"], s["failed"], s["retried"]) == (6, 0, 1, 2)
+    assert s["inflight"] == 0
+
+
+def test_unmatched_reply_is_ignored():
+    spurious = packet_format(PPX_CMD_RSP, PPX_ID_BLE, PPX_MSG_READ, bytes((PPX_BLE_STATUS_REG, 0)))
+    pipe, reqs, _ = run(ScriptedBle(extra={0: spurious}), 2)
+    for req in reqs:
+        assert_readback(req)
+        assert req.attempts == 1
+    s = pipe.stats()
+    assert s["unmatched"] == 1 and s["missing"] == s["out_of_order"] == 0
+
+
+def test_write_ack_without_echo_passes_key_matching():
+    pipe, reqs, _ = run(ScriptedBle(ack=True), 3)
+    for req in reqs:
+        assert_readback(req)
+        assert req.attempts == 1 and req.verified
+    assert pipe.stats()["mismatch"] == 0
+
+
+def test_write_ack_without_echo_fails_readback_check():
+    # readback_check 假定写应答回显写入值；设备不回显时每组都判为不符并重发
+    pipe, reqs, _ = run(ScriptedBle(ack=True), 2, retries=1, check=readback_check)
+    for req in reqs:
+        assert req.ok and not req.verified
+        assert req.attempts == 2
+    s = pipe.stats()
+    assert (s["mismatch"], s["retried"], s["failed"]) == (4, 2, 0)
+
+
+def test_readback_check_passes_with_echo():
+    pipe, reqs, _ = run(ScriptedBle(drop={1}), 3, check=readback_check)
+    for req in reqs:
+        assert_readback(req)
+        assert req.verified
+    assert pipe.stats()["mismatch"] == 0